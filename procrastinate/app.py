@@ -4,10 +4,11 @@ import asyncio
 import contextlib
 import functools
 import logging
-from collections.abc import Generator, Iterable
+from collections.abc import Generator, Iterable, Sequence
 from typing import (
     TYPE_CHECKING,
     Any,
+    NoReturn,
     TypedDict,
 )
 
@@ -23,9 +24,10 @@ from procrastinate import (
     utils,
 )
 from procrastinate import connector as connector_module
+from procrastinate import jobs as jobs_module
 
 if TYPE_CHECKING:
-    from procrastinate import worker
+    from procrastinate import coordinator, worker
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +48,14 @@ class WorkerOptions(TypedDict):
     stalled_worker_timeout: NotRequired[float]
     task_middleware: NotRequired[list[middleware.TaskMiddleware]]
     worker_middleware: NotRequired[list[middleware.WorkerMiddleware]]
+    finish_jobs_batch_size: NotRequired[int | None]
+    finish_jobs_flush_interval: NotRequired[float]
+    wake_up_workers_per_job: NotRequired[float | None]
+    fetch_job_polling_max_interval: NotRequired[float | None]
+    fetch_job_polling_jitter: NotRequired[float]
+    process_pool_size: NotRequired[int | None]
+    sync_concurrency: NotRequired[int | None]
+    coordinator: NotRequired[coordinator.Coordinator | None]
 
 
 class App(blueprints.Blueprint):
@@ -79,6 +89,8 @@ class App(blueprints.Blueprint):
         import_paths: Iterable[str] | None = None,
         worker_defaults: WorkerOptions | None = None,
         periodic_defaults: dict | None = None,
+        defer_batch_size: int | None = None,
+        defer_flush_interval: float = manager.DEFER_FLUSH_INTERVAL,
     ):
         """
         Parameters
@@ -111,6 +123,18 @@ class App(blueprints.Blueprint):
               not deferred upon application recovery (provided that the outage duration
               is longer than ``max_delay``), that's especially important for tasks intended
               to run during off-peak hours, such as intensive nightly tasks. (defaults to 10 minutes)
+        defer_batch_size :
+            If set, jobs deferred concurrently with `Task.defer_async` (e.g. by
+            the handlers of a web application) are inserted together, in a single
+            query, by batches of up to this number of jobs. Each caller still gets
+            the id of its own job, or its own `AlreadyEnqueued` error. This trades
+            a little latency (see ``defer_flush_interval``) for a much higher
+            throughput under load. Jobs deferred with an external ``connection``
+            are not batched. (defaults to ``None``, no batching)
+        defer_flush_interval :
+            Maximum time, in seconds, a job waits for other jobs to join its
+            batch before being inserted, when ``defer_batch_size`` is set.
+            (defaults to 0.002)
         """
 
         super().__init__()
@@ -122,7 +146,9 @@ class App(blueprints.Blueprint):
 
         #: The :py:class:`~manager.JobManager` linked to the application
         self.job_manager: manager.JobManager = manager.JobManager(
-            connector=self.connector
+            connector=self.connector,
+            defer_batch_size=defer_batch_size,
+            defer_flush_interval=defer_flush_interval,
         )
 
         self._register_builtin_tasks()
@@ -154,6 +180,8 @@ class App(blueprints.Blueprint):
             connector=connector,
             import_paths=self.import_paths,
             worker_defaults=self.worker_defaults,
+            defer_batch_size=self.job_manager.defer_batch_size,
+            defer_flush_interval=self.job_manager.defer_flush_interval,
         )
         app.tasks = self.tasks
         app.periodic_registry = self.periodic_registry
@@ -238,6 +266,112 @@ class App(blueprints.Blueprint):
                 )
             raise exceptions.TaskNotFound from exc
 
+    async def batch_defer_async(
+        self, jobs: Sequence[jobs_module.Job], connection: Any | None = None
+    ) -> list[int]:
+        """
+        Defer jobs of any tasks, each with its own configuration, in a single
+        query. Jobs are created with `JobDeferrer.job_for`::
+
+            await app.batch_defer_async([
+                task_a.configure(priority=5).job_for(a=1),
+                task_b.configure(schedule_in={"hours": 1}).job_for(b=2),
+            ])
+
+        Parameters
+        ----------
+        jobs :
+            The jobs to defer
+        connection :
+            An optional external database connection. See `Task.configure`.
+
+        Returns
+        -------
+        :
+            The ids of the jobs, in the same order
+
+        Raises
+        ------
+        BatchAlreadyEnqueued
+            If jobs cannot be enqueued because of their queueing lock. No job is
+            deferred. ``exception.conflicts`` maps the index of each conflicting
+            job in ``jobs`` to its queueing lock.
+        """
+        # Make sure this code stays synchronized with .batch_defer()
+        jobs = list(jobs)
+        try:
+            deferred_jobs = await self.job_manager.batch_defer_jobs_async(
+                jobs=jobs, connection=connection
+            )
+        except exceptions.AlreadyEnqueued as exc:
+            conflicts = await self.job_manager.get_queueing_lock_conflicts_async(
+                jobs=jobs
+            )
+            self._raise_batch_already_enqueued(exc=exc, jobs=jobs, conflicts=conflicts)
+
+        return self._log_batch_deferred(jobs=deferred_jobs)
+
+    def batch_defer(
+        self, jobs: Sequence[jobs_module.Job], connection: Any | None = None
+    ) -> list[int]:
+        """
+        Sync version of `batch_defer_async`.
+        """
+        jobs = list(jobs)
+        try:
+            deferred_jobs = self.job_manager.batch_defer_jobs(
+                jobs=jobs, connection=connection
+            )
+        except exceptions.AlreadyEnqueued as exc:
+            conflicts = self.job_manager.get_queueing_lock_conflicts(jobs=jobs)
+            self._raise_batch_already_enqueued(exc=exc, jobs=jobs, conflicts=conflicts)
+
+        return self._log_batch_deferred(jobs=deferred_jobs)
+
+    def _raise_batch_already_enqueued(
+        self,
+        exc: exceptions.AlreadyEnqueued,
+        jobs: list[jobs_module.Job],
+        conflicts: dict[int, str],
+    ) -> NoReturn:
+        # The job holding the queueing lock reported by the database may have
+        # left the queue since
+        cause = exc.__cause__
+        if (
+            isinstance(cause, exceptions.UniqueViolation)
+            and cause.queueing_lock
+            and cause.queueing_lock not in conflicts.values()
+        ):
+            for index, job in enumerate(jobs):
+                if job.queueing_lock == cause.queueing_lock:
+                    conflicts[index] = job.queueing_lock
+                    break
+
+        raise exceptions.BatchAlreadyEnqueued(
+            f"{len(conflicts)} {'job' if len(conflicts) == 1 else 'jobs'} of the "
+            "batch cannot be enqueued: there are already jobs in the queue with "
+            f"the queueing locks {sorted(set(conflicts.values()))}",
+            conflicts=dict(sorted(conflicts.items())),
+        ) from exc
+
+    def _log_batch_deferred(self, jobs: list[jobs_module.Job]) -> list[int]:
+        job_ids: list[int] = []
+        for job in jobs:
+            assert job.id  # for mypy
+            job_ids.append(job.id)
+
+        if not logger.isEnabledFor(logging.INFO):
+            return job_ids
+
+        logger.info(
+            f"Deferred {len(jobs)} {'job' if len(jobs) == 1 else 'jobs'}",
+            extra={
+                "action": "jobs_deferred",
+                "jobs": [job.log_context() for job in jobs],
+            },
+        )
+        return job_ids
+
     def _worker(self, **kwargs: Unpack[WorkerOptions]) -> worker.Worker:
         from procrastinate import worker
 
@@ -342,6 +476,42 @@ class App(blueprints.Blueprint):
             A list of always-async middlewares wrapping every job this worker runs,
             on the event loop (both sync and async tasks). See
             `howto/advanced/middleware`. (defaults to no middleware)
+        finish_jobs_batch_size: ``Optional[int]``
+            If set, the outcome of completed jobs is not written to the database
+            one job at a time: it's buffered, and written in batches of at most
+            this many jobs, in a single query. Retried jobs are not batched.
+            Pending outcomes are always written before the worker stops.
+            See `howto/production/batch_job_completion`. (defaults to ``None``,
+            no batching)
+        finish_jobs_flush_interval: ``float``
+            When ``finish_jobs_batch_size`` is set, maximum time (in seconds) a job
+            outcome waits in the buffer before being written. (defaults to 0.005)
+        wake_up_workers_per_job: ``Optional[float]``
+            If set, not every idle worker wakes up when new jobs are deferred:
+            each one wakes up at random so that, on average, this many workers
+            wake up per new job, instead of all of them racing for it. See
+            `howto/production/targeted_wake_ups`. (defaults to ``None``, every
+            worker wakes up)
+        fetch_job_polling_max_interval: ``Optional[float]``
+            If set, the polling interval of an idle worker doubles each time it
+            wakes up without finding a job, up to this value (in seconds). It
+            goes back to ``fetch_job_polling_interval`` as soon as the worker is
+            notified of a new job or fetches one. See
+            `howto/production/adaptive_polling`. (defaults to ``None``, constant
+            polling interval)
+        fetch_job_polling_jitter: ``float``
+            Randomly spread each polling interval by up to this fraction of its
+            value (e.g. 0.1 for ±10%), so that workers started together don't
+            poll together. (defaults to 0, no jitter)
+        process_pool_size: ``Optional[int]``
+            Maximum number of processes running the jobs of the tasks declared
+            with ``executor="process"`` at the same time. The processes are only
+            started when such jobs run. See `howto/production/concurrency`.
+            (defaults to the number of CPUs)
+        sync_concurrency: ``Optional[int]``
+            Number of threads of the worker running the jobs of sync tasks. Jobs
+            of sync tasks wait for a free thread when they are all busy. See
+            `howto/production/concurrency`. (defaults to ``concurrency``)
         """
         self.perform_import_paths()
         worker = self._worker(**kwargs)
@@ -360,6 +530,145 @@ class App(blueprints.Blueprint):
 
         asyncio.run(f())
 
+    async def run_workers_async(
+        self,
+        workers: Iterable[WorkerOptions],
+        **kwargs: Unpack[WorkerOptions],
+    ) -> None:
+        """
+        Run several workers with different options (e.g. listening to different
+        queues, with different concurrencies) on the current event loop, until
+        they have all stopped. Rather than each worker doing it for itself, a
+        single connection listens for the notifications of all the workers,
+        their heartbeats are updated in a single query, and a single periodic
+        deferrer and abort polling run for all of them.
+
+        Workers that are not given a ``name`` are named after the common
+        ``name`` option, suffixed with their index. On SIGINT or SIGTERM, they
+        all stop gracefully::
+
+            await app.run_workers_async(
+                [{"queues": ["emails"], "concurrency": 20}, {"queues": ["reports"]}],
+                wait=True,
+            )
+
+        Parameters
+        ----------
+        workers :
+            The options of each worker, overriding the common options
+        kwargs :
+            Options common to all the workers. See `App.run_worker_async`.
+        """
+        from procrastinate import coordinator, worker
+
+        self.perform_import_paths()
+        options: WorkerOptions = {**self.worker_defaults, **kwargs}
+        coord = coordinator.from_worker_options(self, options)
+        name = options.get("name") or worker.WORKER_NAME
+        await coord.run_workers(
+            [
+                self._worker(
+                    **{
+                        **kwargs,
+                        "name": f"{name}-{index}",
+                        **worker_options,
+                        "install_signal_handlers": False,
+                        "coordinator": coord,
+                    }
+                )
+                for index, worker_options in enumerate(workers)
+            ],
+            install_signal_handlers=options.get("install_signal_handlers", True),
+        )
+
+    def run_workers(
+        self,
+        workers: Iterable[WorkerOptions],
+        **kwargs: Unpack[WorkerOptions],
+    ) -> None:
+        """
+        Synchronous version of `App.run_workers_async`.
+        Create the event loop and open the app, then run the workers.
+        """
+
+        async def f():
+            async with self.open_async():
+                await self.run_workers_async(workers, **kwargs)
+
+        asyncio.run(f())
+
+    def run_worker_processes(
+        self, processes: int, **kwargs: Unpack[WorkerOptions]
+    ) -> int:
+        """
+        Run a worker in each of ``processes`` child processes, to use several CPU
+        cores for sync tasks. The tasks are imported once, before the processes
+        are forked, so that they share that memory. Each process opens the app
+        for itself: the app must not be open when calling this method.
+
+        The worker processes are named after the ``name`` option, suffixed with
+        their index. A worker process that crashes is restarted. On SIGINT or
+        SIGTERM, the signal is forwarded to the worker processes, which stop
+        gracefully. A second signal kills them.
+
+        There is no asynchronous version of this method: the processes are
+        forked outside of any event loop, so it must not be called from
+        ``asyncio.run()``. Requires ``os.fork()``, so it is not available on
+        Windows.
+
+        Parameters
+        ----------
+        processes : ``int``
+            Number of worker processes
+        kwargs :
+            Options of the worker run in each process. See `App.run_worker_async`.
+
+        Returns
+        -------
+        :
+            0 if all the worker processes exited successfully, the exit status of
+            the first one that didn't otherwise
+        """
+        from procrastinate import supervisor
+
+        return supervisor.Supervisor(app=self, processes=processes, **kwargs).run()
+
+    async def run_worker_loops_async(
+        self, loops: int, **kwargs: Unpack[WorkerOptions]
+    ) -> None:
+        """
+        Run a worker on each of ``loops`` event loops, each in its own thread.
+        This uses several CPU cores on free-threaded Python builds, or when the
+        tasks release the GIL. The app must be open: its connector is shared by
+        the workers, along with a single connection listening for notifications
+        and a single heartbeat query for all the workers.
+
+        The workers are named after the ``name`` option, suffixed with their
+        index. On SIGINT or SIGTERM, they all stop gracefully.
+
+        Parameters
+        ----------
+        loops : ``int``
+            Number of event loops, and workers
+        kwargs :
+            Options of each worker. See `App.run_worker_async`.
+        """
+        from procrastinate import multi_loop
+
+        await multi_loop.WorkerLoops(app=self, loops=loops, **kwargs).run()
+
+    def run_worker_loops(self, loops: int, **kwargs: Unpack[WorkerOptions]) -> None:
+        """
+        Synchronous version of `App.run_worker_loops_async`.
+        Create the event loop and open the app, then run the workers.
+        """
+
+        async def f():
+            async with self.open_async():
+                await self.run_worker_loops_async(loops=loops, **kwargs)
+
+        asyncio.run(f())
+
     async def check_connection_async(self) -> bool:
         return await self.job_manager.check_connection_async()
 
@@ -405,11 +714,12 @@ class App(blueprints.Blueprint):
         open_coro = functools.partial(self.connector.open_async, pool=pool)
         return utils.AwaitableContext(
             open_coro=open_coro,
-            close_coro=self.connector.close_async,
+            close_coro=self.close_async,
             return_value=self,
         )
 
     async def close_async(self) -> None:
+        await self.job_manager.flush_deferred_jobs_async()
         await self.connector.close_async()
 
     def __enter__(self) -> App:
@@ -12,7 +12,7 @@ from procrastinate import exceptions, jobs, middleware, periodic, retry, utils
 from procrastinate.job_context import JobContext
 
 if TYPE_CHECKING:
-    from procrastinate.tasks import ConfigureTaskOptions, Task
+    from procrastinate.tasks import ConfigureTaskOptions, Executor, Task
 
 
 logger = logging.getLogger(__name__)
@@ -213,6 +213,7 @@ class Blueprint:
         lock: str | None = None,
         queueing_lock: str | None = None,
         task_middleware: list[middleware.TaskMiddleware] | None = None,
+        executor: Executor = "thread",
     ) -> Callable[[Callable[P, R]], Task[P, R, P]]: ...
 
     @overload
@@ -229,6 +230,7 @@ class Blueprint:
         lock: str | None = None,
         queueing_lock: str | None = None,
         task_middleware: list[middleware.TaskMiddleware] | None = None,
+        executor: Executor = "thread",
     ) -> Callable[
         [Callable[Concatenate[JobContext, P], R]],
         Task[Concatenate[JobContext, P], R, P],
@@ -250,6 +252,7 @@ class Blueprint:
         lock: str | None = None,
         queueing_lock: str | None = None,
         task_middleware: list[middleware.TaskMiddleware] | None = None,
+        executor: Executor = "thread",
     ):
         """
         Declare a function as a task. This method is meant to be used as a
@@ -311,6 +314,13 @@ class Blueprint:
             the task's nature: sync middleware (a plain function) for a sync task,
             async middleware (a coroutine function) for an async task. See
             `howto/advanced/middleware`.
+        executor :
+            Where the jobs of a sync task run: ``"thread"`` (the default) runs
+            them in a thread of the worker, ``"process"`` in the process pool of
+            the worker, so that CPU-bound tasks can use several cores. Tasks run
+            in a process can't be async nor take the job context, and must be
+            importable by their full path. See
+            `howto/production/concurrency`.
         """
         from procrastinate.tasks import Task
 
@@ -327,6 +337,7 @@ class Blueprint:
                 retry=retry,
                 pass_context=pass_context,
                 task_middleware=task_middleware,
+                executor=executor,
             )
             self._register_task(task)
 
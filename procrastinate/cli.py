@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import contextlib
 import functools
 import json
 import logging
@@ -282,6 +283,22 @@ def configure_worker_parser(subparsers: argparse._SubParsersAction[Any]):  # pyr
         "to (empty string for all queues)",
         envvar="WORKER_QUEUES",
     )
+    add_argument(
+        worker_parser,
+        "--processes",
+        type=int,
+        help="If greater than 1, run a worker in each of this many processes, "
+        "restarted if they crash",
+        envvar="WORKER_PROCESSES",
+    )
+    add_argument(
+        worker_parser,
+        "--loops",
+        type=int,
+        help="If greater than 1, run a worker on each of this many event loops, "
+        "each in its own thread, sharing the database connections",
+        envvar="WORKER_LOOPS",
+    )
     add_argument(
         worker_parser,
         "-c",
@@ -298,6 +315,21 @@ def configure_worker_parser(subparsers: argparse._SubParsersAction[Any]):  # pyr
         help="How long to wait for database event push before polling",
         envvar="WORKER_FETCH_JOB_POLLING_INTERVAL",
     )
+    add_argument(
+        worker_parser,
+        "--fetch-job-polling-max-interval",
+        type=float,
+        help="If set, back off exponentially up to this polling interval when "
+        "no job is found",
+        envvar="WORKER_FETCH_JOB_POLLING_MAX_INTERVAL",
+    )
+    add_argument(
+        worker_parser,
+        "--fetch-job-polling-jitter",
+        type=float,
+        help="Randomly spread each polling interval by up to this fraction of its value",
+        envvar="WORKER_FETCH_JOB_POLLING_JITTER",
+    )
     add_argument(
         worker_parser,
         "-a",
@@ -344,6 +376,45 @@ def configure_worker_parser(subparsers: argparse._SubParsersAction[Any]):  # pyr
         help="If set, delete jobs on completion",
         envvar="WORKER_DELETE_JOBS",
     )
+    add_argument(
+        worker_parser,
+        "--finish-jobs-batch-size",
+        type=int,
+        help="If set, write the outcome of completed jobs to the database "
+        "in batches of at most this many jobs",
+        envvar="WORKER_FINISH_JOBS_BATCH_SIZE",
+    )
+    add_argument(
+        worker_parser,
+        "--finish-jobs-flush-interval",
+        type=float,
+        help="Maximum time a completed job waits before its batch is written",
+        envvar="WORKER_FINISH_JOBS_FLUSH_INTERVAL",
+    )
+    add_argument(
+        worker_parser,
+        "--wake-up-workers-per-job",
+        type=float,
+        help="If set, only wake up this many idle workers on average per new job, "
+        "instead of all of them",
+        envvar="WORKER_WAKE_UP_WORKERS_PER_JOB",
+    )
+    add_argument(
+        worker_parser,
+        "--process-pool-size",
+        type=int,
+        help="Maximum number of processes running the jobs of tasks declared with "
+        "executor='process' (defaults to the number of CPUs)",
+        envvar="WORKER_PROCESS_POOL_SIZE",
+    )
+    add_argument(
+        worker_parser,
+        "--sync-concurrency",
+        type=int,
+        help="Number of threads running the jobs of sync tasks (defaults to the "
+        "concurrency)",
+        envvar="WORKER_SYNC_CONCURRENCY",
+    )
 
 
 def configure_defer_parser(subparsers: argparse._SubParsersAction[Any]):  # pyright: ignore[reportPrivateUsage]
@@ -511,7 +582,7 @@ def configure_shell_parser(subparsers: argparse._SubParsersAction[Any]):  # pyri
     shell_parser.set_defaults(func=shell_)
 
 
-async def cli(args: list[str]):
+def parse_args(args: list[str]) -> dict[str, Any]:
     parser = create_parser()
     add_arguments(parser)
     add_cli_features(parser)
@@ -522,18 +593,48 @@ async def cli(args: list[str]):
         format=parsed.pop("log_format"),
         style=parsed.pop("log_format_style"),
     )
-    await execute_command(parsed)
+    return parsed
+
+
+async def cli(args: list[str]):
+    await execute_command(parse_args(args))
+
+
+def run_command(parsed: dict[str, Any], **run_kwargs: Any) -> None:
+    """
+    Execute the command in a new event loop, except for worker processes,
+    which are forked before any event loop is started.
+    """
+    if parsed.get("processes", 1) > 1:
+        execute_worker_processes(parsed)
+    else:
+        asyncio.run(execute_command(parsed), **run_kwargs)
 
 
 async def execute_command(parsed: dict[str, Any]):
     parsed.pop("command")
-    try:
+    with exit_on_error():
         async with parsed.pop("app").open_async() as app:
             # Before calling the subcommand function,
             # we want to have popped all top-level arguments
             # from the parsed dict and kept only the subcommand
             # arguments.
             await parsed.pop("func")(app=app, **parsed)
+
+
+def execute_worker_processes(parsed: dict[str, Any]):
+    parsed.pop("command")
+    parsed.pop("func")
+    app = parsed.pop("app")
+    # Worker processes open the app for themselves, after being forked
+    with exit_on_error():
+        worker_processes(app=app, **parsed)
+
+
+@contextlib.contextmanager
+def exit_on_error():
+    try:
+        yield
     except Exception as exc:
         logger.debug("Exception details:", exc_info=exc)
         messages = [str(e) for e in utils.causes(exc)]
@@ -545,19 +646,51 @@ async def execute_command(parsed: dict[str, Any]):
 
 async def worker_(
     app: procrastinate.App,
+    processes: int = 1,
+    loops: int = 1,
     **kwargs: Any,
 ):
     """
     Launch a worker, listening on the given queues (or all queues).
     Values default to App.worker_defaults and then App.run_worker() defaults values.
     """
+    if processes > 1 and loops > 1:
+        raise ValueError("--processes and --loops cannot be used together")
+    if processes > 1:
+        raise ValueError(
+            "--processes cannot be used from a running event loop, "
+            "use procrastinate.cli.run_command()"
+        )
     queues = kwargs.get("queues")
-    print_stderr(
-        f"Launching a worker on {'all queues' if not queues else ', '.join(queues)}"
-    )
+    queues_display = "all queues" if not queues else ", ".join(queues)
+    if loops > 1:
+        print_stderr(f"Launching {loops} worker loops on {queues_display}")
+        await app.run_worker_loops_async(loops=loops, **kwargs)
+        return
+
+    print_stderr(f"Launching a worker on {queues_display}")
     await app.run_worker_async(**kwargs)
 
 
+def worker_processes(
+    app: procrastinate.App,
+    processes: int,
+    loops: int = 1,
+    **kwargs: Any,
+):
+    """
+    Launch a worker in each of several processes.
+    """
+    if loops > 1:
+        raise ValueError("--processes and --loops cannot be used together")
+    queues = kwargs.get("queues")
+    queues_display = "all queues" if not queues else ", ".join(queues)
+    print_stderr(f"Launching {processes} worker processes on {queues_display}")
+    exit_status = app.run_worker_processes(processes=processes, **kwargs)
+    if exit_status:
+        sys.exit(exit_status)
+
+
 async def defer(
     app: procrastinate.App,
     task: str,
@@ -682,4 +815,4 @@ def main():
         else:
             kwargs["loop_factory"] = asyncio.SelectorEventLoop
 
-    asyncio.run(cli(sys.argv[1:]), **kwargs)
+    run_command(parse_args(sys.argv[1:]), **kwargs)
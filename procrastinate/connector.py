@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable, Iterable
+from collections.abc import Awaitable, Callable, Iterable, Sequence
 from typing import Any, Protocol
 
 from typing_extensions import LiteralString
@@ -24,6 +24,15 @@ class BaseConnector:
     def get_sync_connector(self) -> BaseConnector:
         raise NotImplementedError
 
+    @property
+    def is_open(self) -> bool:
+        """
+        Whether the connector holds database connections (or a pool of them),
+        which must not be shared with forked processes. Connectors that don't
+        implement it are considered closed.
+        """
+        return False
+
     def open(self, pool: Pool | None = None) -> None:
         raise NotImplementedError
 
@@ -62,6 +71,11 @@ class BaseConnector:
     ) -> list[dict[str, Any]]:
         raise exceptions.SyncConnectorConfigurationError
 
+    async def execute_queries_one_async(
+        self, queries: Sequence[tuple[LiteralString, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        raise exceptions.SyncConnectorConfigurationError
+
     def execute_query_one_with_connection(
         self, connection: Any, query: LiteralString, **arguments: Any
     ) -> dict[str, Any]:
@@ -90,6 +104,37 @@ class BaseConnector:
             f"{type(self).__name__} does not support external connections"
         )
 
+    def copy_and_execute_query_all(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        raise exceptions.ConnectorException(
+            f"{type(self).__name__} does not support COPY"
+        )
+
+    async def copy_and_execute_query_all_async(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        """
+        In a single transaction, run ``setup_query``, stream ``rows`` into the
+        ``columns`` of ``table`` with ``COPY ... FROM STDIN``, then run ``query``
+        and return its rows.
+        """
+        raise exceptions.ConnectorException(
+            f"{type(self).__name__} does not support COPY"
+        )
+
     async def listen_notify(
         self,
         on_notification: Notify,
@@ -118,6 +163,19 @@ class BaseAsyncConnector(BaseConnector):
     ) -> list[dict[str, Any]]:
         raise NotImplementedError
 
+    async def execute_queries_one_async(
+        self, queries: Sequence[tuple[LiteralString, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        """
+        Execute independent queries returning a single row each, and return
+        these rows in order. Connectors may send all the queries at once rather
+        than waiting for each result before sending the next query.
+        """
+        return [
+            await self.execute_query_one_async(query, **arguments)
+            for query, arguments in queries
+        ]
+
     def execute_query(self, query: LiteralString, **arguments: Any) -> None:
         return utils.async_to_sync(self.execute_query_async, query, **arguments)
 
@@ -151,6 +209,25 @@ class BaseAsyncConnector(BaseConnector):
             **arguments,
         )
 
+    def copy_and_execute_query_all(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        return utils.async_to_sync(
+            self.copy_and_execute_query_all_async,
+            setup_query,
+            table,
+            columns,
+            rows,
+            query,
+            **arguments,
+        )
+
     async def listen_notify(
         self, on_notification: Notify, channels: Iterable[str]
     ) -> None:
@@ -194,6 +194,10 @@ class AiopgConnector(connector.BaseAsyncConnector):
         final_args.update(pool_args)
         return final_args
 
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None
+
     @property
     def pool(self) -> aiopg.Pool:
         if self._pool is None:  # Set by open_async
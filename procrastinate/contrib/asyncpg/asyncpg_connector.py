@@ -0,0 +1,349 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import re
+from collections.abc import AsyncGenerator, Callable, Iterable, Sequence
+from typing import Any
+
+import asyncpg
+import psycopg.conninfo
+
+from procrastinate import connector, exceptions, manager, sync_psycopg_connector, utils
+
+logger = logging.getLogger(__name__)
+
+# Connection arguments understood by both asyncpg and libpq, with their libpq name
+CONNECTION_ARGS = {
+    "host": "host",
+    "port": "port",
+    "user": "user",
+    "password": "password",
+    "database": "dbname",
+}
+
+PLACEHOLDER_RE = re.compile(r"%\((\w+)\)s|%%")
+
+JSONB_VERSION = b"\x01"
+
+
+@utils.async_context_decorator
+async def wrap_exceptions() -> AsyncGenerator[None, None]:
+    """
+    Wrap asyncpg errors as connector exceptions.
+
+    This decorator is expected to be used on coroutine functions only.
+    """
+    try:
+        yield
+    except asyncpg.UniqueViolationError as exc:
+        constraint_name = exc.constraint_name
+        queueing_lock = None
+        if constraint_name == manager.QUEUEING_LOCK_CONSTRAINT:
+            assert exc.detail
+            match = re.search(r"Key \((.*?)\)=\((.*?)\)", exc.detail)
+            assert match
+            column, queueing_lock = match.groups()
+            assert column == "queueing_lock"
+
+        raise exceptions.UniqueViolation(
+            constraint_name=constraint_name, queueing_lock=queueing_lock
+        )
+    except (asyncpg.PostgresError, asyncpg.InterfaceError) as exc:
+        raise exceptions.ConnectorException from exc
+
+
+@functools.lru_cache(maxsize=256)
+def convert_query(query: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Convert a query using pyformat placeholders (``%(name)s``) into a query using
+    asyncpg numbered placeholders (``$1``), and return it along with the names of
+    the arguments, in the order they must be passed.
+    """
+    names: list[str] = []
+
+    def replace(match: re.Match[str]) -> str:
+        name = match.group(1)
+        if name is None:
+            return "%"
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return PLACEHOLDER_RE.sub(replace, query), tuple(names)
+
+
+class AsyncpgConnector(connector.BaseAsyncConnector):
+    def __init__(
+        self,
+        *,
+        json_dumps: Callable | None = None,
+        json_loads: Callable | None = None,
+        **kwargs: Any,
+    ):
+        """
+        Create a PostgreSQL connector using asyncpg. The connector uses an
+        ``asyncpg.Pool``, which is created internally, or set into the connector
+        by calling ``AsyncpgConnector.open_async``.
+
+        asyncpg uses the binary protocol, and caches prepared statements on each
+        connection of the pool (see the ``statement_cache_size`` argument), which
+        makes it well suited to the many small queries issued by workers.
+
+        All other arguments than ``json_dumps`` and ``json_loads`` are passed to
+        :py:func:`asyncpg.create_pool` (see asyncpg documentation__).
+
+        An already existing ``asyncpg.Pool`` can be provided in the
+        ``App.open_async``, via the ``pool`` parameter. In that case, it should be
+        created with ``init=connector.init_connection``, so that JSON values are
+        encoded and decoded.
+
+        .. __: https://magicstack.github.io/asyncpg/current/api/index.html#asyncpg.pool.create_pool
+
+        Parameters
+        ----------
+        json_dumps :
+            A function to serialize JSON objects to a string. If not provided,
+            JSON objects will be serialized using ``json.dumps``.
+        json_loads :
+            A function to deserialize JSON objects from a string. If not
+            provided, JSON objects will be deserialized using ``json.loads``.
+        dsn : ``Optional[str]``
+            Passed to asyncpg. Connection parameters that are not set are read from
+            the libpq environment variables (``PGHOST``, ``PGDATABASE``...).
+        statement_cache_size : ``int``
+            Passed to asyncpg. Set it to 0 behind a connection pooler that doesn't
+            support prepared statements (such as PgBouncer < 1.21 in transaction
+            mode).
+        max_size : ``int``
+            Passed to asyncpg. If value is 1, then listen/notify feature will be
+            deactivated.
+        """
+        self._pool: asyncpg.Pool | None = None
+        self._pool_externally_set: bool = False
+        self.json_dumps = json_dumps
+        self.json_loads = json_loads
+        self._pool_args = kwargs
+        self._sync_connector: connector.BaseConnector | None = None
+
+    def get_sync_connector(self) -> connector.BaseConnector:
+        if self._pool:
+            return self
+
+        if self._sync_connector is None:
+            logger.debug(
+                "AsyncpgConnector used synchronously before being opened. "
+                "Creating a SyncPsycopgConnector."
+            )
+            conninfo = psycopg.conninfo.make_conninfo(
+                self._pool_args.get("dsn") or "",
+                **{
+                    libpq_name: self._pool_args[name]
+                    for name, libpq_name in CONNECTION_ARGS.items()
+                    if self._pool_args.get(name) is not None
+                },
+            )
+            self._sync_connector = sync_psycopg_connector.SyncPsycopgConnector(
+                json_dumps=self.json_dumps,
+                json_loads=self.json_loads,
+                conninfo=conninfo,
+            )
+        return self._sync_connector
+
+    async def init_connection(self, connection: asyncpg.Connection) -> None:
+        """
+        Configure a new connection to encode and decode JSON values with the
+        connector's ``json_dumps`` and ``json_loads``.
+        """
+        dumps = self.json_dumps or json.dumps
+        loads = self.json_loads or json.loads
+
+        # Composite types (used for deferring jobs) only support binary codecs.
+        # The binary jsonb format is the text format prefixed with a version byte.
+        await connection.set_type_codec(
+            "jsonb",
+            encoder=lambda value: JSONB_VERSION + dumps(value).encode(),
+            decoder=lambda data: loads(data[1:]),
+            schema="pg_catalog",
+            format="binary",
+        )
+        await connection.set_type_codec(
+            "json",
+            encoder=lambda value: dumps(value).encode(),
+            decoder=loads,
+            schema="pg_catalog",
+            format="binary",
+        )
+
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def pool(self) -> asyncpg.Pool:
+        if self._pool is None:  # Set by open_async
+            raise exceptions.AppNotOpen
+        return self._pool
+
+    async def open_async(self, pool: asyncpg.Pool | None = None) -> None:
+        """
+        Instantiate the pool.
+
+        pool :
+            Optional pool. Procrastinate can use an existing pool. Connection parameters
+            passed in the constructor will be ignored.
+        """
+        if self._pool:
+            return
+
+        if self._sync_connector is not None:
+            logger.debug("Closing automatically created SyncPsycopgConnector.")
+            await utils.sync_to_async(self._sync_connector.close)
+            self._sync_connector = None
+
+        if pool:
+            self._pool_externally_set = True
+            self._pool = pool
+        else:
+            self._pool = await self._create_pool(self._pool_args)
+
+    @wrap_exceptions()
+    async def _create_pool(self, pool_args: dict[str, Any]) -> asyncpg.Pool:
+        base_init = pool_args.get("init")
+
+        async def init(connection: asyncpg.Connection) -> None:
+            await self.init_connection(connection)
+            if base_init:
+                await base_init(connection)
+
+        return await asyncpg.create_pool(**{**pool_args, "init": init})
+
+    @wrap_exceptions()
+    async def close_async(self) -> None:
+        """
+        Close the pool and awaits all connections to be released.
+        """
+        if not self._pool or self._pool_externally_set:
+            return
+
+        await self._pool.close()
+        self._pool = None
+
+    def _convert(self, query: str, arguments: dict[str, Any]) -> tuple[str, list]:
+        query, names = convert_query(query)
+        return query, [arguments[name] for name in names]
+
+    @wrap_exceptions()
+    async def execute_query_async(self, query: str, **arguments: Any) -> None:
+        if not arguments:
+            # Without arguments, asyncpg uses the simple query protocol, which
+            # allows several statements in a single query (e.g. the schema). The
+            # query is still converted, to unescape its "%%"
+            query, _ = convert_query(query)
+            await self.pool.execute(query)
+            return
+
+        query, args = self._convert(query, arguments)
+        await self.pool.execute(query, *args)
+
+    @wrap_exceptions()
+    async def execute_query_one_async(
+        self, query: str, **arguments: Any
+    ) -> dict[str, Any]:
+        query, args = self._convert(query, arguments)
+        result = await self.pool.fetchrow(query, *args)
+
+        if result is None:
+            raise exceptions.NoResult
+        return dict(result)
+
+    @wrap_exceptions()
+    async def execute_query_all_async(
+        self, query: str, **arguments: Any
+    ) -> list[dict[str, Any]]:
+        query, args = self._convert(query, arguments)
+        return [dict(row) for row in await self.pool.fetch(query, *args)]
+
+    @wrap_exceptions()
+    async def copy_and_execute_query_all_async(
+        self,
+        setup_query: str,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: str,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        async with self.pool.acquire() as connection:
+            async with connection.transaction():
+                await connection.execute(setup_query)
+                await connection.copy_records_to_table(
+                    table, records=rows, columns=list(columns)
+                )
+                query, args = self._convert(query, arguments)
+                return [dict(row) for row in await connection.fetch(query, *args)]
+
+    @wrap_exceptions()
+    async def listen_notify(
+        self, on_notification: connector.Notify, channels: Iterable[str]
+    ) -> None:
+        # We need to acquire a dedicated connection, and register listeners on it
+        if self.pool.get_max_size() == 1:
+            logger.warning(
+                "Listen/Notify capabilities disabled because maximum pool size"
+                "is set to 1",
+                extra={"action": "listen_notify_disabled"},
+            )
+            return
+
+        channels = list(channels)
+        while True:
+            async with self.pool.acquire() as connection:
+                notifications: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+
+                def listener(
+                    connection: Any, pid: int, channel: str, payload: str
+                ) -> None:
+                    notifications.put_nowait((channel, payload))
+
+                try:
+                    for channel_name in channels:
+                        await connection.add_listener(channel_name, listener)
+
+                    await self._loop_notify(
+                        on_notification=on_notification,
+                        connection=connection,
+                        notifications=notifications,
+                    )
+                finally:
+                    # The pool refuses connections that still have listeners
+                    for channel_name in channels:
+                        with contextlib.suppress(
+                            asyncpg.PostgresError, asyncpg.InterfaceError, OSError
+                        ):
+                            await connection.remove_listener(channel_name, listener)
+
+    async def _loop_notify(
+        self,
+        on_notification: connector.Notify,
+        connection: asyncpg.Connection,
+        notifications: asyncio.Queue[tuple[str, str]],
+        timeout: float = connector.LISTEN_TIMEOUT,
+    ) -> None:
+        # We'll leave this loop with a CancelledError, when we get cancelled
+        while True:
+            try:
+                channel, payload = await asyncio.wait_for(notifications.get(), timeout)
+            except asyncio.TimeoutError:
+                try:
+                    # Without traffic, a dead connection would go unnoticed
+                    await connection.execute("SELECT 1")
+                except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError):
+                    # Connection is dead, we need to reconnect
+                    return
+                continue
+
+            await on_notification(channel=channel, payload=payload)
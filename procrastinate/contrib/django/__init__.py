@@ -1,11 +1,15 @@
 from __future__ import annotations
 
 from .db_cleanup import DjangoApp
+from .defer_buffer import DeferBuffer, atomic_defer, buffered_defer
 from .procrastinate_app import app
 from .utils import connector_params
 
 __all__ = [
+    "DeferBuffer",
     "DjangoApp",
     "app",
+    "atomic_defer",
+    "buffered_defer",
     "connector_params",
 ]
@@ -26,6 +26,7 @@ JOB_STATUS_EMOJI_MAPPING = {
     "cancelled": "🤚",
     "aborting": "🔌🕑️",  # legacy, not used anymore
     "aborted": "🔌",
+    "scheduled": "⏰",
 }
 
 
@@ -147,18 +148,22 @@ class ProcrastinateJobAdmin(admin.ModelAdmin):
                 job.id, utils.utcnow(), job.priority, job.queue_name, job.lock
             )
 
-    @admin.action(description="Cancel Job (only 'todo' jobs)")
+    @admin.action(description="Cancel Job (only 'todo' & 'scheduled' jobs)")
     def cancel(self, request: HttpRequest, queryset: QuerySet[models.ProcrastinateJob]):
         app_config: ProcrastinateConfig = apps.get_app_config("procrastinate")  # pyright: ignore [reportAssignmentType]
         p_app: App = app_config.app
-        for job in queryset.filter(status=Status.TODO.value):
+        for job in queryset.filter(
+            status__in=(Status.TODO.value, Status.SCHEDULED.value)
+        ):
             p_app.job_manager.cancel_job_by_id(job.id, abort=False)
 
-    @admin.action(description="Abort Job (includes 'todo' & 'doing' jobs)")
+    @admin.action(description="Abort Job (includes 'todo', 'scheduled' & 'doing' jobs)")
     def abort(self, request: HttpRequest, queryset: QuerySet[models.ProcrastinateJob]):
         app_config: ProcrastinateConfig = apps.get_app_config("procrastinate")  # pyright: ignore [reportAssignmentType]
         p_app: App = app_config.app
-        for job in queryset.filter(status__in=(Status.TODO.value, Status.DOING.value)):
+        for job in queryset.filter(
+            status__in=(Status.TODO.value, Status.SCHEDULED.value, Status.DOING.value)
+        ):
             p_app.job_manager.cancel_job_by_id(job.id, abort=True)
 
     actions = [retry, cancel, abort]
@@ -40,10 +40,10 @@ def close_db_connections(
     Sync task middleware that manages Django's per-thread DB connections around a
     sync task, the same way Django manages them around an HTTP request.
 
-    Runs in the worker's asgiref ``sync_to_async`` pool thread — the same thread
-    Django opened its per-thread connection in — so closing here targets the right
-    connection. Without it, the connection opened by a sync ORM call leaks for the
-    lifetime of the (reused) pool thread.
+    Runs in the worker's sync thread pool thread — the same thread Django opened
+    its per-thread connection in — so closing here targets the right connection.
+    Without it, the connection opened by a sync ORM call leaks for the lifetime of
+    the (reused) pool thread.
 
     Note: for the rare sync function that returns an awaitable without being a
     coroutine function (awaited later by the worker), the after-cleanup runs after
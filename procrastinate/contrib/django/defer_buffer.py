@@ -0,0 +1,200 @@
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import logging
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Any
+
+from django.core import exceptions as django_exceptions
+from django.db import transaction
+
+from procrastinate import jobs, tasks
+from procrastinate.contrib.django import django_connector, settings
+
+if TYPE_CHECKING:
+    from procrastinate import manager, types
+
+logger = logging.getLogger(__name__)
+
+Deferrable = tasks.Task[..., Any, Any] | jobs.JobDeferrer
+
+_current_buffer: contextvars.ContextVar[DeferBuffer | None] = contextvars.ContextVar(
+    "procrastinate_defer_buffer", default=None
+)
+
+
+class DeferBuffer:
+    """
+    Collects jobs deferred within an `atomic_defer` block, and defers them in a
+    single query when the block exits, before its transaction commits.
+
+    Parameters
+    ----------
+    using :
+        The alias of the database of the transaction. Defaults to the
+        ``PROCRASTINATE_DATABASE_ALIAS`` setting.
+    """
+
+    def __init__(self, using: str | None = None) -> None:
+        if using is None:
+            using = settings.settings.DATABASE_ALIAS
+        self.using = using
+        self.jobs: list[tuple[manager.JobManager, jobs.Job]] = []
+        #: Ids of the deferred jobs, in the order they were buffered. Set when the
+        #: buffer is flushed.
+        self.job_ids: list[int] = []
+
+    def defer(self, task: Deferrable, **task_kwargs: types.JSONValue) -> None:
+        """
+        Buffer a job, to be deferred when the buffer is flushed.
+
+        Parameters
+        ----------
+        task :
+            The task, or the result of ``task.configure(...)`` to configure the job
+        task_kwargs :
+            The arguments of the task
+        """
+        deferrer = task.configure() if isinstance(task, tasks.Task) else task
+        self.jobs.append((deferrer.job_manager, deferrer.job_for(**task_kwargs)))
+
+    def flush(self) -> list[int]:
+        """
+        Defer the buffered jobs, in a single query per job manager (that is, per
+        app).
+
+        Returns
+        -------
+        :
+            The ids of the jobs deferred since the buffer was created, in the
+            order they were buffered
+
+        Raises
+        ------
+        django.core.exceptions.ImproperlyConfigured
+            If the app of a job doesn't use the Django connector on the
+            database of the transaction: its jobs would be deferred outside of
+            the transaction. No job is deferred.
+        """
+        jobs_by_manager: dict[manager.JobManager, list[int]] = {}
+        for index, (job_manager, _) in enumerate(self.jobs):
+            jobs_by_manager.setdefault(job_manager, []).append(index)
+
+        for job_manager in jobs_by_manager:
+            self._check_connector(job_manager)
+
+        job_ids: list[int] = [0] * len(self.jobs)
+        for job_manager, indexes in jobs_by_manager.items():
+            deferred_jobs = job_manager.batch_defer_jobs(
+                jobs=[self.jobs[index][1] for index in indexes]
+            )
+            for index, job in zip(indexes, deferred_jobs):
+                assert job.id  # for mypy
+                job_ids[index] = job.id
+
+            job_count = len(deferred_jobs)
+            logger.info(
+                f"Deferred {job_count} buffered {'job' if job_count == 1 else 'jobs'}",
+                extra={
+                    "action": "buffered_jobs_deferred",
+                    "jobs": [job.log_context() for job in deferred_jobs],
+                },
+            )
+
+        self.jobs = []
+        self.job_ids.extend(job_ids)
+        return self.job_ids
+
+    def _check_connector(self, job_manager: manager.JobManager) -> None:
+        connector = job_manager.connector
+        if not isinstance(connector, django_connector.DjangoConnector):
+            raise django_exceptions.ImproperlyConfigured(
+                "Jobs buffered by atomic_defer must be deferred with the Django "
+                f"connector, got {type(connector).__name__}: they would not be "
+                "deferred in the transaction"
+            )
+        if connector.alias != self.using:
+            raise django_exceptions.ImproperlyConfigured(
+                "Jobs buffered by atomic_defer must be deferred on the database of "
+                f"the transaction ({self.using!r}), got {connector.alias!r}"
+            )
+
+
+@contextlib.contextmanager
+def atomic_defer(
+    using: str | None = None, savepoint: bool = True, durable: bool = False
+) -> Iterator[DeferBuffer]:
+    """
+    Open a ``transaction.atomic()`` block in which jobs deferred with
+    `buffered_defer` (or ``buffer.defer``) are buffered instead of being inserted
+    one by one. When the block exits without error, the buffered jobs are
+    deferred in a single query, on the same connection and before the
+    transaction commits: they are committed, or rolled back, along with the
+    rest of the block. If the block raises, no job is deferred. If a queueing
+    lock conflicts, `AlreadyEnqueued` is raised and the whole block is rolled
+    back.
+
+    Buffering is opt-in: ``task.defer()`` keeps returning the id of the job, so
+    it still inserts the job right away (in the transaction). Only the jobs
+    deferred with `buffered_defer` or ``buffer.defer`` are buffered, as their id
+    is only known once the block has exited.
+
+    The app of the jobs must use the Django connector on the ``using``
+    database, which is the case of ``procrastinate.contrib.django.app``.
+    Otherwise, the jobs could not be deferred in the transaction:
+    ``ImproperlyConfigured`` is raised and the whole block is rolled back.
+
+    Parameters
+    ----------
+    using :
+        The alias of the database, passed to ``transaction.atomic()``. Defaults
+        to the ``PROCRASTINATE_DATABASE_ALIAS`` setting.
+    savepoint :
+        Passed to ``transaction.atomic()``
+    durable :
+        Passed to ``transaction.atomic()``
+
+    Returns
+    -------
+    :
+        The buffer. Once the block has exited, ``buffer.job_ids`` holds the ids
+        of the deferred jobs.
+    """
+    if using is None:
+        using = settings.settings.DATABASE_ALIAS
+
+    buffer = DeferBuffer(using=using)
+    with transaction.atomic(using=using, savepoint=savepoint, durable=durable):
+        token = _current_buffer.set(buffer)
+        try:
+            yield buffer
+        finally:
+            _current_buffer.reset(token)
+        buffer.flush()
+
+
+def buffered_defer(task: Deferrable, **task_kwargs: types.JSONValue) -> int | None:
+    """
+    Defer a job in the buffer of the enclosing `atomic_defer` block, or right
+    away if there is none.
+
+    Parameters
+    ----------
+    task :
+        The task, or the result of ``task.configure(...)`` to configure the job
+    task_kwargs :
+        The arguments of the task
+
+    Returns
+    -------
+    :
+        The id of the job if it was deferred right away, ``None`` if it was
+        buffered
+    """
+    buffer = _current_buffer.get()
+    if buffer is None:
+        return task.defer(**task_kwargs)
+
+    buffer.defer(task, **task_kwargs)
+    return None
@@ -67,6 +67,11 @@ class DjangoConnector(connector.BaseAsyncConnector):
     def connection(self) -> BaseDatabaseWrapper:
         return connections[self.alias]  # type: ignore
 
+    @property
+    def is_open(self) -> bool:
+        # The connection is opened by Django, on first use
+        return self.connection.connection is not None
+
     def open(self, pool: None = None) -> None:
         if pool:
             raise django_exceptions.ImproperlyConfigured(
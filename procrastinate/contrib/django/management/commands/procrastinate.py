@@ -43,4 +43,4 @@ class Command(BaseCommand):
             context = app.replace_connector(app.connector.get_worker_connector())
 
         with context:
-            asyncio.run(cli.execute_command(kwargs), **run_kwargs)
+            cli.run_command(kwargs, **run_kwargs)
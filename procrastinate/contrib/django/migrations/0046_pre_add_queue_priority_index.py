@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_05_pre_add_queue_priority_index.sql"
+        ),
+    ]
+    name = "0046_pre_add_queue_priority_index"
+    dependencies = [
+        ("procrastinate", "0045_pre_add_locks_table"),
+    ]
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from django.db import migrations, models
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_06_pre_add_scheduled_status.sql"
+        ),
+        migrations.AlterField(
+            "procrastinatejob",
+            "status",
+            models.CharField(
+                choices=[
+                    ("todo", "todo"),
+                    ("doing", "doing"),
+                    ("succeeded", "succeeded"),
+                    ("failed", "failed"),
+                    ("cancelled", "cancelled"),
+                    ("aborted", "aborted"),
+                    ("scheduled", "scheduled"),
+                ],
+                max_length=32,
+            ),
+        ),
+    ]
+    name = "0047_pre_add_scheduled_status"
+    dependencies = [
+        ("procrastinate", "0046_pre_add_queue_priority_index"),
+    ]
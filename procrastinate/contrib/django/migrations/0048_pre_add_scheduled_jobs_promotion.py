@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_07_pre_add_scheduled_jobs_promotion.sql"
+        ),
+    ]
+    name = "0048_pre_add_scheduled_jobs_promotion"
+    dependencies = [
+        ("procrastinate", "0047_pre_add_scheduled_status"),
+    ]
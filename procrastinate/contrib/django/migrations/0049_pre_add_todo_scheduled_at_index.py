@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_08_pre_add_todo_scheduled_at_index.sql"
+        ),
+    ]
+    name = "0049_pre_add_todo_scheduled_at_index"
+    dependencies = [
+        ("procrastinate", "0048_pre_add_scheduled_jobs_promotion"),
+    ]
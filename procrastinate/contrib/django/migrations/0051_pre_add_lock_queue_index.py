@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_10_pre_add_lock_queue_index.sql"
+        ),
+    ]
+    name = "0051_pre_add_lock_queue_index"
+    dependencies = [
+        ("procrastinate", "0050_pre_statement_level_job_inserted_notification"),
+    ]
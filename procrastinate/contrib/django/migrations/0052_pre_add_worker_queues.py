@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_11_pre_add_worker_queues.sql"
+        ),
+    ]
+    name = "0052_pre_add_worker_queues"
+    dependencies = [
+        ("procrastinate", "0051_pre_add_lock_queue_index"),
+    ]
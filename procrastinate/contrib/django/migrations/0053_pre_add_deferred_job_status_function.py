@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from django.db import migrations
+
+from .. import migrations_utils
+
+
+class Migration(migrations.Migration):
+    operations = [
+        migrations_utils.RunProcrastinateSQL(
+            name="03.05.00_12_pre_add_deferred_job_status_function.sql"
+        ),
+    ]
+    name = "0053_pre_add_deferred_job_status_function"
+    dependencies = [
+        ("procrastinate", "0052_pre_add_worker_queues"),
+    ]
@@ -82,6 +82,7 @@ class ProcrastinateJob(ProcrastinateReadOnlyModelMixin, models.Model):
         "failed",
         "cancelled",
         "aborted",
+        "scheduled",
     )
     id = models.BigAutoField(primary_key=True)
     queue_name = models.CharField(max_length=128)
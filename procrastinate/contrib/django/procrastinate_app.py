@@ -31,8 +31,12 @@ class FutureApp(blueprints.Blueprint):
         [
             "__enter__",
             "__exit__",
+            "_log_batch_deferred",
+            "_raise_batch_already_enqueued",
             "_register_builtin_tasks",
             "_worker",
+            "batch_defer_async",
+            "batch_defer",
             "check_connection_async",
             "check_connection",
             "close_async",
@@ -43,6 +47,11 @@ class FutureApp(blueprints.Blueprint):
             "perform_import_paths",
             "run_worker_async",
             "run_worker",
+            "run_workers_async",
+            "run_workers",
+            "run_worker_processes",
+            "run_worker_loops_async",
+            "run_worker_loops",
             "schema_manager",
             "with_connector",
             "replace_connector",
@@ -168,6 +168,10 @@ class Psycopg2Connector(connector.BaseConnector):
         if self._pool and not self._pool.closed and not self._pool_externally_set:
             self._pool.closeall()
 
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None and not self._pool.closed
+
     @property
     def pool(self) -> psycopg2.pool.AbstractConnectionPool:
         if self._pool is None:  # Set by open
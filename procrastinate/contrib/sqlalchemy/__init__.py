@@ -3,7 +3,11 @@ from __future__ import annotations
 from procrastinate.contrib.sqlalchemy.psycopg2_connector import (
     SQLAlchemyPsycopg2Connector,
 )
+from procrastinate.contrib.sqlalchemy.psycopg_connector import (
+    SQLAlchemyAsyncConnector,
+)
 
 __all__ = [
+    "SQLAlchemyAsyncConnector",
     "SQLAlchemyPsycopg2Connector",
 ]
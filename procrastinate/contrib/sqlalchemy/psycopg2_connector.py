@@ -4,14 +4,22 @@ import contextlib
 import functools
 import re
 from collections.abc import Callable, Generator, Mapping
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
-import psycopg2.errors
 import sqlalchemy
 import sqlalchemy.exc
-from psycopg2.extras import Json
 
-from procrastinate import connector, exceptions, manager
+from procrastinate import connector, exceptions, manager, utils
+
+if TYPE_CHECKING:
+    import psycopg2.errors
+    import psycopg2.extras
+else:
+    # psycopg2 is only needed when this connector is used, so that the other
+    # SQLAlchemy connectors can be imported without it
+    psycopg2, *_ = utils.import_or_wrapper(
+        "psycopg2", "psycopg2.errors", "psycopg2.extras"
+    )
 
 
 @contextlib.contextmanager
@@ -140,6 +148,10 @@ class SQLAlchemyPsycopg2Connector(connector.BaseConnector):
             self._engine.dispose()
         self._engine = None
 
+    @property
+    def is_open(self) -> bool:
+        return self._engine is not None
+
     @property
     def engine(self) -> sqlalchemy.engine.Engine:
         if self._engine is None:  # Set by open
@@ -148,7 +160,7 @@ class SQLAlchemyPsycopg2Connector(connector.BaseConnector):
 
     def _wrap_value(self, value: Any) -> Any:
         if isinstance(value, dict):
-            return Json(value, dumps=self.json_dumps)
+            return psycopg2.extras.Json(value, dumps=self.json_dumps)
         elif isinstance(value, list):
             return [self._wrap_value(item) for item in value]
         elif isinstance(value, tuple):
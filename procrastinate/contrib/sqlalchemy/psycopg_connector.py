@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import logging
+import re
+from collections.abc import AsyncGenerator, Callable, Coroutine, Iterable
+from typing import TYPE_CHECKING, Any, TypeVar, cast
+
+import psycopg
+import psycopg.sql
+import psycopg.types.json
+import sqlalchemy
+import sqlalchemy.exc
+
+from procrastinate import connector, exceptions, sql, sync_psycopg_connector, utils
+
+if TYPE_CHECKING:
+    import sqlalchemy.ext.asyncio as sqlalchemy_asyncio
+else:
+    # SQLAlchemy's asyncio extension needs greenlet, which the sync connector
+    # doesn't need
+    (sqlalchemy_asyncio,) = utils.import_or_wrapper("sqlalchemy.ext.asyncio")
+
+logger = logging.getLogger(__name__)
+
+CoroutineFunction = Callable[..., Coroutine]
+T = TypeVar("T", bound=CoroutineFunction)
+
+PERCENT_PATTERN = re.compile(r"%(?![\(s])")
+
+
+@utils.async_context_decorator
+async def wrap_exceptions() -> AsyncGenerator[None, None]:
+    """
+    Wrap SQLAlchemy errors as connector exceptions.
+
+    This decorator is expected to be used on coroutine functions only.
+    """
+    try:
+        yield
+    except sqlalchemy.exc.StatementError as exc:
+        if isinstance(exc.orig, psycopg.errors.UniqueViolation):
+            with sync_psycopg_connector.wrap_exceptions():
+                raise exc.orig from exc
+        raise exceptions.ConnectorException from exc
+    except sqlalchemy.exc.SQLAlchemyError as exc:
+        raise exceptions.ConnectorException from exc
+
+
+def wrap_query_exceptions(coro: T) -> T:
+    """
+    Detect "admin shutdown" errors and retry once.
+
+    This is to handle the case where the database connection (obtained from the pool)
+    was actually closed by the server. In this case, SQLAlchemy raises a ``DBAPIError``
+    with ``connection_invalidated`` set to ``True``, and also invalidates the rest of
+    the connection pool. So we just retry once, to get a fresh connection.
+    """
+
+    @functools.wraps(coro)
+    async def wrapped(*args: Any, **kwargs: Any):
+        try:
+            return await coro(*args, **kwargs)
+        except sqlalchemy.exc.DBAPIError as exc:
+            if exc.connection_invalidated:
+                return await coro(*args, **kwargs)
+            raise exc
+
+    return cast(T, wrapped)
+
+
+class SQLAlchemyAsyncConnector(connector.BaseAsyncConnector):
+    def __init__(
+        self,
+        *,
+        dsn: str = "postgresql+psycopg://",
+        json_dumps: Callable[..., Any] | None = None,
+        json_loads: Callable[..., Any] | None = None,
+        **kwargs: Any,
+    ):
+        """
+        Asynchronous connector based on an SQLAlchemy ``AsyncEngine`` with the
+        psycopg (v3) driver. Jobs are deferred and fetched through the engine's
+        connection pool, so that an application already using SQLAlchemy doesn't
+        need a second pool for Procrastinate.
+
+        ``listen_notify`` keeps one connection of the pool for itself while the
+        worker runs, so the pool should allow more than one connection.
+
+        All other arguments than ``dsn``, ``json_dumps``, and ``json_loads`` are passed
+        to :py:func:`create_async_engine` (see SQLAlchemy documentation__).
+
+        .. __: https://docs.sqlalchemy.org/en/latest/orm/extensions/asyncio.html#sqlalchemy.ext.asyncio.create_async_engine
+
+        Parameters
+        ----------
+        dsn : The dsn string or URL object passed to SQLAlchemy's
+            ``create_async_engine`` function. Ignored if the engine is externally
+            created and set into the connector through the ``App.open_async``
+            method. The driver must be psycopg (``postgresql+psycopg://``).
+        json_dumps :
+            A function to serialize JSON objects to a string. If not provided,
+            JSON objects will be serialized using psycopg's default JSON
+            serializer.
+        json_loads :
+            A function to deserialize JSON objects from a string. If not
+            provided, JSON objects will be deserialized using psycopg's default
+            JSON deserializer. Note that it is set on the psycopg connections of
+            the pool, so it is also used for the other queries of the application.
+        """
+        self.json_dumps = json_dumps
+        self.json_loads = json_loads
+        self._engine: sqlalchemy_asyncio.AsyncEngine | None = None
+        self._engine_dsn = dsn
+        self._engine_kwargs = kwargs
+        self._engine_externally_set = False
+        self._sync_connector: connector.BaseConnector | None = None
+
+    def get_sync_connector(self) -> connector.BaseConnector:
+        if self._engine:
+            return self
+
+        if self._sync_connector is None:
+            logger.debug(
+                "SQLAlchemyAsyncConnector used synchronously before being opened. "
+                "Creating a SyncPsycopgConnector."
+            )
+            url = sqlalchemy.make_url(self._engine_dsn).set(drivername="postgresql")
+            self._sync_connector = sync_psycopg_connector.SyncPsycopgConnector(
+                json_dumps=self.json_dumps,
+                json_loads=self.json_loads,
+                conninfo=url.render_as_string(hide_password=False),
+            )
+        return self._sync_connector
+
+    async def open_async(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self, engine: sqlalchemy_asyncio.AsyncEngine | None = None
+    ) -> None:
+        """
+        Create an SQLAlchemy async engine for the connector.
+
+        Parameters
+        ----------
+        engine :
+            Optional engine. Procrastinate can use an existing engine. If set the
+            engine dsn and arguments passed in the constructor will be ignored.
+        """
+        if self._engine:
+            return
+
+        if self._sync_connector is not None:
+            logger.debug("Closing automatically created SyncPsycopgConnector.")
+            await utils.sync_to_async(self._sync_connector.close)
+            self._sync_connector = None
+
+        if engine:
+            self._engine_externally_set = True
+            self._engine = engine
+        else:
+            self._engine = sqlalchemy_asyncio.create_async_engine(
+                self._engine_dsn, **self._engine_kwargs
+            )
+
+    @wrap_exceptions()
+    async def close_async(self) -> None:
+        """
+        Dispose of the connection pool used by the SQLAlchemy engine.
+        """
+        if not self._engine_externally_set and self._engine:
+            await self._engine.dispose()
+        self._engine = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._engine is not None
+
+    @property
+    def engine(self) -> sqlalchemy_asyncio.AsyncEngine:
+        if self._engine is None:  # Set by open_async
+            raise exceptions.AppNotOpen
+        return self._engine
+
+    def _wrap_value(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return psycopg.types.json.Jsonb(value, dumps=self.json_dumps)
+        elif isinstance(value, list):
+            return [self._wrap_value(item) for item in value]
+        elif isinstance(value, tuple):
+            return tuple([self._wrap_value(item) for item in value])
+        else:
+            return value
+
+    def _wrap_json(self, arguments: dict[str, Any]):
+        return {key: self._wrap_value(value) for key, value in arguments.items()}
+
+    async def _execute(
+        self,
+        connection: sqlalchemy_asyncio.AsyncConnection,
+        query: str,
+        arguments: dict[str, Any],
+    ) -> sqlalchemy.engine.CursorResult:
+        if self.json_loads:
+            raw_connection = await connection.get_raw_connection()
+            psycopg.types.json.set_json_loads(
+                loads=self.json_loads, context=raw_connection.driver_connection
+            )
+        return await connection.exec_driver_sql(
+            PERCENT_PATTERN.sub("%%", query), self._wrap_json(arguments)
+        )
+
+    @wrap_exceptions()
+    @wrap_query_exceptions
+    async def execute_query_async(self, query: str, **arguments: Any) -> None:
+        async with self.engine.begin() as connection:
+            await self._execute(connection, query, arguments)
+
+    @wrap_exceptions()
+    @wrap_query_exceptions
+    async def execute_query_one_async(
+        self, query: str, **arguments: Any
+    ) -> dict[str, Any]:
+        async with self.engine.begin() as connection:
+            return await self._fetch_one(connection, query, arguments)
+
+    @wrap_exceptions()
+    @wrap_query_exceptions
+    async def execute_query_all_async(
+        self, query: str, **arguments: Any
+    ) -> list[dict[str, Any]]:
+        async with self.engine.begin() as connection:
+            return await self._fetch_all(connection, query, arguments)
+
+    @wrap_exceptions()
+    async def execute_query_one_async_with_connection(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self,
+        connection: sqlalchemy_asyncio.AsyncConnection,
+        query: str,
+        **arguments: Any,
+    ) -> dict[str, Any]:
+        return await self._fetch_one(connection, query, arguments)
+
+    @wrap_exceptions()
+    async def execute_query_all_async_with_connection(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self,
+        connection: sqlalchemy_asyncio.AsyncConnection,
+        query: str,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        return await self._fetch_all(connection, query, arguments)
+
+    async def _fetch_one(
+        self,
+        connection: sqlalchemy_asyncio.AsyncConnection,
+        query: str,
+        arguments: dict[str, Any],
+    ) -> dict[str, Any]:
+        result = await self._execute(connection, query, arguments)
+        row = result.mappings().fetchone()
+
+        if row is None:
+            raise exceptions.NoResult
+        return dict(row)
+
+    async def _fetch_all(
+        self,
+        connection: sqlalchemy_asyncio.AsyncConnection,
+        query: str,
+        arguments: dict[str, Any],
+    ) -> list[dict[str, Any]]:
+        result = await self._execute(connection, query, arguments)
+        return [dict(row) for row in result.mappings()]
+
+    @wrap_exceptions()
+    async def listen_notify(
+        self, on_notification: connector.Notify, channels: Iterable[str]
+    ) -> None:
+        # LISTEN is issued on the psycopg connection underlying a dedicated
+        # connection of the pool, which is given back when we get cancelled.
+        channels = list(channels)
+        while True:
+            async with self.engine.connect() as connection:
+                connection = await connection.execution_options(
+                    isolation_level="AUTOCOMMIT"
+                )
+                raw_connection = await connection.get_raw_connection()
+                driver_connection: psycopg.AsyncConnection = (
+                    raw_connection.driver_connection  # pyright: ignore[reportAssignmentType]
+                )
+                try:
+                    for channel_name in channels:
+                        await driver_connection.execute(
+                            psycopg.sql.SQL(sql.queries["listen_queue"]).format(
+                                channel_name=psycopg.sql.Identifier(channel_name)
+                            )
+                        )
+                    await self._loop_notify(
+                        on_notification=on_notification,
+                        connection=driver_connection,
+                    )
+                finally:
+                    # The connection goes back to the pool, where it shouldn't
+                    # keep receiving notifications
+                    with contextlib.suppress(psycopg.Error):
+                        await driver_connection.execute("UNLISTEN *")
+
+    async def _loop_notify(
+        self,
+        on_notification: connector.Notify,
+        connection: psycopg.AsyncConnection,
+        timeout: float = connector.LISTEN_TIMEOUT,
+    ) -> None:
+        # We'll leave this loop with a CancelledError, when we get cancelled
+        while True:
+            try:
+                async for notification in utils.gen_with_timeout(
+                    aiterable=connection.notifies(),
+                    timeout=timeout,
+                    raise_timeout=False,
+                ):
+                    await on_notification(
+                        channel=notification.channel, payload=notification.payload
+                    )
+
+                await connection.execute("SELECT 1")
+            except psycopg.OperationalError:
+                # Connection is dead, we need to reconnect
+                break
@@ -0,0 +1,402 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+from collections.abc import Iterable, Sequence
+from typing import TYPE_CHECKING, Any
+
+import attr
+
+from procrastinate import jobs, manager, periodic, signals, utils
+
+if TYPE_CHECKING:
+    from procrastinate import app as app_module
+    from procrastinate import worker as worker_module
+
+logger = logging.getLogger(__name__)
+
+UPDATE_HEARTBEAT_INTERVAL = 10.0  # seconds
+ABORT_JOB_POLLING_INTERVAL = 5.0  # seconds
+PROMOTE_SCHEDULED_JOBS_INTERVAL = 60.0  # seconds
+PROMOTE_SCHEDULED_JOBS_BATCH_SIZE = 1000
+
+
+@attr.dataclass(frozen=True, kw_only=True, eq=False)
+class _Subscription:
+    channels: frozenset[str]
+    on_notification: manager.NotificationCallback
+    loop: asyncio.AbstractEventLoop
+    #: Fails if the coordinator stops listening because of an error
+    listening: asyncio.Future[None]
+
+
+class Coordinator:
+    """
+    Does, once for all the workers of a process, what each worker otherwise does
+    for itself:
+
+    - a single connection listens to the channels of all the workers, and
+      forwards each notification to the workers listening to its channel,
+    - the heartbeats of all the workers are updated in a single query,
+    - a single periodic deferrer defers the periodic tasks,
+    - a single query polls the jobs to abort, for all the workers running jobs,
+    - a single task promotes the scheduled jobs that are coming due, and wakes
+      the workers up.
+
+    The coordinator runs (see `Coordinator.run`) on the event loop owning the
+    connector of the app. The workers using it may run on other event loops, in
+    other threads.
+    """
+
+    def __init__(
+        self,
+        app: app_module.App,
+        update_heartbeat_interval: float = UPDATE_HEARTBEAT_INTERVAL,
+        abort_job_polling_interval: float = ABORT_JOB_POLLING_INTERVAL,
+    ):
+        self.app = app
+        self.update_heartbeat_interval = update_heartbeat_interval
+        self.abort_job_polling_interval = abort_job_polling_interval
+
+        self._lock = threading.Lock()
+        # Registered workers, with the event loop they run on
+        self._workers: dict[worker_module.Worker, asyncio.AbstractEventLoop] = {}
+        self._subscriptions: list[_Subscription] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._channels: frozenset[str] = frozenset()
+        self._listener_task: asyncio.Task[None] | None = None
+
+    @property
+    def job_manager(self) -> manager.JobManager:
+        return self.app.job_manager
+
+    async def run(self) -> None:
+        """
+        Listen for notifications, update the heartbeats of the registered
+        workers, defer periodic tasks, poll the jobs to abort and promote the
+        scheduled jobs, until cancelled.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._update_listener()
+        side_tasks = [
+            asyncio.create_task(self._update_heartbeats(), name="update_heartbeats"),
+            asyncio.create_task(self._periodic_deferrer(), name="deferrer"),
+            asyncio.create_task(self._poll_jobs_to_abort(), name="poll_jobs_to_abort"),
+            asyncio.create_task(
+                self._promote_scheduled_jobs(), name="promote_scheduled_jobs"
+            ),
+        ]
+        try:
+            # Only a failure stops the coordinator (the periodic deferrer returns
+            # right away when there is no periodic task)
+            await asyncio.gather(*side_tasks)
+        finally:
+            await utils.cancel_and_capture_errors(side_tasks)
+            self._loop = None
+            self._channels = frozenset()
+            if self._listener_task:
+                await utils.cancel_and_capture_errors([self._listener_task])
+                self._listener_task = None
+
+    async def run_workers(
+        self,
+        workers: Sequence[worker_module.Worker],
+        install_signal_handlers: bool = True,
+    ) -> None:
+        """
+        Run the given workers, created with this coordinator, on the current event
+        loop, along with the coordinator, until they have all stopped. If
+        ``install_signal_handlers`` is ``True``, SIGINT and SIGTERM stop all the
+        workers gracefully.
+        """
+        coordinator_task = asyncio.create_task(self.run(), name="coordinator")
+        coordinator_task.add_done_callback(
+            lambda task: _on_coordinator_done(task, workers)
+        )
+        worker_tasks = [
+            asyncio.create_task(worker.run(), name=f"worker {worker.worker_name}")
+            for worker in workers
+        ]
+
+        def stop() -> None:
+            for worker in workers:
+                worker.stop()
+
+        context = (
+            signals.on_stop(stop)
+            if install_signal_handlers
+            else contextlib.nullcontext()
+        )
+        try:
+            with context:
+                await asyncio.gather(*worker_tasks)
+        finally:
+            # Whether a worker failed or the run was cancelled, the other
+            # workers still stop gracefully
+            stop()
+            await asyncio.wait(worker_tasks)
+            await utils.cancel_and_capture_errors([coordinator_task])
+
+    def add_worker(self, worker: worker_module.Worker) -> None:
+        """
+        Update the heartbeat of the given (registered) worker from now on. Must be
+        called from the event loop of the worker.
+        """
+        with self._lock:
+            self._workers[worker] = asyncio.get_running_loop()
+
+    def remove_worker(self, worker: worker_module.Worker) -> None:
+        with self._lock:
+            del self._workers[worker]
+
+    async def listen_for_jobs(
+        self,
+        *,
+        on_notification: manager.NotificationCallback,
+        queues: list[str] | None = None,
+    ) -> None:
+        """
+        Same as `JobManager.listen_for_jobs`, using the connection of the
+        coordinator. ``on_notification`` is called on the event loop calling
+        this method.
+        """
+        loop = asyncio.get_running_loop()
+        subscription = _Subscription(
+            channels=frozenset(manager.get_channel_for_queues(queues=queues)),
+            on_notification=on_notification,
+            loop=loop,
+            listening=loop.create_future(),
+        )
+        with self._lock:
+            self._subscriptions.append(subscription)
+        self._call_soon(self._update_listener)
+        try:
+            await subscription.listening
+        finally:
+            with self._lock:
+                self._subscriptions.remove(subscription)
+            self._call_soon(self._update_listener)
+
+    def _call_soon(self, callback: Any) -> None:
+        # Until the coordinator runs, the listener is set up when it starts
+        loop = self._loop
+        if loop is not None:
+            loop.call_soon_threadsafe(callback)
+
+    def _update_listener(self) -> None:
+        """
+        Listen to the channels of all the subscriptions, with a new connection if
+        they changed.
+        """
+        if self._loop is None:
+            return
+        with self._lock:
+            channels = frozenset().union(*(s.channels for s in self._subscriptions))
+        if channels == self._channels:
+            return
+
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+        self._channels = channels
+        if not channels:
+            return
+
+        logger.debug(
+            f"Listening to {', '.join(sorted(channels))} for the workers",
+            extra={"action": "coordinator_listen", "channels": sorted(channels)},
+        )
+        self._listener_task = asyncio.create_task(
+            self.job_manager.connector.listen_notify(
+                on_notification=self._dispatch, channels=sorted(channels)
+            ),
+            name="coordinator listener",
+        )
+        self._listener_task.add_done_callback(self._on_listener_done)
+
+    def _on_listener_done(self, task: asyncio.Task[None]) -> None:
+        # Like the listener of a worker, a listener that returns (because the
+        # connector can't listen) leaves the workers polling
+        if task.cancelled() or not (exc := task.exception()):
+            return
+        logger.error(
+            f"Listener of the coordinator failed: {exc!r}",
+            exc_info=exc,
+            extra={"action": "coordinator_listener_failed"},
+        )
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(
+                _set_exception, subscription.listening, exc
+            )
+
+    async def _dispatch(self, *, channel: str, payload: str) -> None:
+        notification: jobs.Notification = json.loads(payload)
+        logger.debug(
+            f"Received {notification['type']} notification from channel",
+            extra={"channel": channel, "payload": payload},
+        )
+        with self._lock:
+            subscriptions = [s for s in self._subscriptions if channel in s.channels]
+
+        for subscription in subscriptions:
+            coro = subscription.on_notification(
+                channel=channel, notification=notification
+            )
+            if subscription.loop is self._loop:
+                await coro
+                continue
+            try:
+                asyncio.run_coroutine_threadsafe(coro, subscription.loop)  # pyright: ignore[reportArgumentType]
+            except RuntimeError:
+                # The loop closes once its worker stops: the notification is
+                # dropped, and the coroutine must not be left unawaited
+                coro.close()  # pyright: ignore[reportAttributeAccessIssue]
+
+    async def _update_heartbeats(self) -> None:
+        while True:
+            await asyncio.sleep(self.update_heartbeat_interval)
+
+            with self._lock:
+                workers = [w for w in self._workers if w.worker_id is not None]
+            if not workers:
+                continue
+
+            worker_ids = [w.worker_id for w in workers if w.worker_id is not None]
+            logger.debug(
+                f"Updating heartbeat of workers {', '.join(map(str, worker_ids))}",
+                extra={"action": "update_heartbeats", "worker_ids": worker_ids},
+            )
+            if all(w.wake_up_workers_per_job is None for w in workers):
+                await self.job_manager.update_heartbeats(worker_ids)
+                continue
+
+            workers_count = await self.job_manager.update_heartbeats_and_count_workers(
+                worker_ids
+            )
+            for worker in workers:
+                worker.set_workers_count(workers_count)
+
+    async def _periodic_deferrer(self) -> None:
+        deferrer = periodic.PeriodicDeferrer(
+            registry=self.app.periodic_registry,
+            **self.app.periodic_defaults,
+        )
+        await deferrer.worker()
+
+    async def _poll_jobs_to_abort(self) -> None:
+        while True:
+            await asyncio.sleep(self.abort_job_polling_interval)
+
+            with self._lock:
+                workers = [
+                    (worker, loop)
+                    for worker, loop in self._workers.items()
+                    if worker._running_jobs
+                ]
+            if not workers:
+                logger.debug("Not querying jobs to abort because no job is running")
+                continue
+
+            try:
+                job_ids = await self.job_manager.list_jobs_to_abort_async()
+            except Exception as error:
+                logger.exception(
+                    f"poll_jobs_to_abort error: {error!r}",
+                    exc_info=error,
+                    extra={"action": "poll_jobs_to_abort_error"},
+                )
+                # recover from errors and continue polling
+                continue
+
+            for worker, loop in workers:
+                _call_soon_threadsafe(
+                    loop, worker._handle_abort_jobs_requested, job_ids
+                )
+
+    async def _promote_scheduled_jobs(self) -> None:
+        # Promote right away, so that the jobs that came due while no worker was
+        # running don't wait for a whole interval
+        while True:
+            try:
+                # Promote in batches, so that each transaction stays short
+                while True:
+                    promoted_count = (
+                        await self.job_manager.promote_scheduled_jobs_async(
+                            limit=PROMOTE_SCHEDULED_JOBS_BATCH_SIZE
+                        )
+                    )
+                    if promoted_count:
+                        with self._lock:
+                            workers = list(self._workers.items())
+                        for worker, loop in workers:
+                            _call_soon_threadsafe(
+                                loop, worker._handle_scheduled_jobs_promoted
+                            )
+                        logger.debug(
+                            f"Promoted {promoted_count} scheduled jobs to todo",
+                            extra={
+                                "action": "promoted_scheduled_jobs",
+                                "promoted_count": promoted_count,
+                            },
+                        )
+                    if promoted_count < PROMOTE_SCHEDULED_JOBS_BATCH_SIZE:
+                        break
+            except Exception as error:
+                logger.exception(
+                    f"promote_scheduled_jobs error: {error!r}",
+                    exc_info=error,
+                    extra={"action": "promote_scheduled_jobs_error"},
+                )
+                # recover from errors and continue promoting
+
+            await asyncio.sleep(PROMOTE_SCHEDULED_JOBS_INTERVAL)
+
+
+def from_worker_options(
+    app: app_module.App, worker_options: app_module.WorkerOptions
+) -> Coordinator:
+    """
+    Create a coordinator for workers created with the given options, using their
+    heartbeat and abort polling intervals.
+    """
+    return Coordinator(
+        app=app,
+        update_heartbeat_interval=worker_options.get(
+            "update_heartbeat_interval", UPDATE_HEARTBEAT_INTERVAL
+        ),
+        abort_job_polling_interval=worker_options.get(
+            "abort_job_polling_interval", ABORT_JOB_POLLING_INTERVAL
+        ),
+    )
+
+
+def _on_coordinator_done(
+    task: asyncio.Task[None], workers: Iterable[worker_module.Worker]
+) -> None:
+    if task.cancelled() or not (exc := task.exception()):
+        return
+    logger.error(
+        f"Coordinator failed with exception: {exc!r}, stopping workers",
+        exc_info=exc,
+        extra={"action": "coordinator_failed"},
+    )
+    for worker in workers:
+        worker.stop()
+
+
+def _call_soon_threadsafe(
+    loop: asyncio.AbstractEventLoop, callback: Any, *args: Any
+) -> None:
+    # The loop closes once its worker stops
+    with contextlib.suppress(RuntimeError):
+        loop.call_soon_threadsafe(callback, *args)
+
+
+def _set_exception(future: asyncio.Future[Any], exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
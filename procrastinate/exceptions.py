@@ -44,6 +44,13 @@ class MiddlewareKindMismatch(ProcrastinateException):
     """
 
 
+class InvalidTaskExecutor(ProcrastinateException):
+    """
+    A task was declared with ``executor="process"``, but only sync tasks that
+    don't take the job context can run in a process.
+    """
+
+
 class LoadFromPathError(ProcrastinateException, ImportError):  # pyright: ignore[reportUnsafeMultipleInheritance]
     """
     App was not found at the provided path, or the loaded object is not an App.
@@ -91,6 +98,20 @@ class AlreadyEnqueued(ProcrastinateException):
     """
 
 
+class BatchAlreadyEnqueued(AlreadyEnqueued):
+    """
+    Jobs of the batch cannot be enqueued because of their queueing lock, so none
+    of the jobs of the batch were deferred. ``exception.conflicts`` maps the
+    index of each conflicting job in the batch to its queueing lock.
+    """
+
+    def __init__(
+        self, message: str | None = None, conflicts: dict[int, str] | None = None
+    ):
+        super().__init__(message)
+        self.conflicts = conflicts or {}
+
+
 class UniqueViolation(ConnectorException):
     """
     A unique constraint is violated. The constraint name is available in
@@ -16,6 +16,9 @@ class JobResult:
     start_timestamp: float
     end_timestamp: float | None = None
     result: Any = None
+    #: For sync jobs, time (in seconds) the job waited for a free thread of the
+    #: worker before starting
+    thread_wait: float | None = None
 
     def duration(self, current_timestamp: float) -> float | None:
         return (self.end_timestamp or current_timestamp) - self.start_timestamp
@@ -29,6 +32,8 @@ class JobResult:
             }
         )
 
+        if self.thread_wait is not None:
+            result["thread_wait"] = self.thread_wait
         if self.end_timestamp:
             result.update({"end_timestamp": self.end_timestamp, "result": self.result})
         return result
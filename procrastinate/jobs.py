@@ -1,14 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import collections
 import datetime
 import functools
 import logging
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from enum import Enum
 from typing import TYPE_CHECKING, Any, Literal, TypeAlias, TypedDict
 
 import attr
 
-from procrastinate import types
+from procrastinate import types, utils
 
 if TYPE_CHECKING:
     from procrastinate import manager
@@ -24,7 +27,10 @@ cached_property = getattr(functools, "cached_property", property)
 
 class JobInserted(TypedDict):
     type: Literal["job_inserted"]
-    job_id: int
+    #: Queue of the inserted jobs
+    queue_name: str
+    #: Number of jobs inserted in the queue by the same statement
+    count: int
 
 
 class AbortJobRequested(TypedDict):
@@ -54,6 +60,9 @@ class Status(Enum):
     CANCELLED = "cancelled"  #: The job was cancelled
     ABORTING = "aborting"  #: legacy, not used anymore
     ABORTED = "aborted"  #: The job was aborted
+    #: The job is scheduled far in the future, and will be moved back to
+    #: ``todo`` when it gets close to its due time
+    SCHEDULED = "scheduled"
 
 
 class DeleteJobCondition(Enum):
@@ -121,7 +130,10 @@ class Job:
         return attr.asdict(self)
 
     def log_context(self) -> types.JSONDict:
-        context = self.asdict()
+        # Built for every deferred job: a shallow copy is much cheaper than the
+        # recursive one of asdict(), and the fields don't hold attrs instances
+        context = attr.asdict(self, recurse=False)
+        context["task_kwargs"] = dict(self.task_kwargs)
 
         if context["scheduled_at"]:
             context["scheduled_at"] = context["scheduled_at"].isoformat()
@@ -158,12 +170,21 @@ class JobDeferrer:
         self.connection = connection
 
     def make_new_job(self, **task_kwargs: types.JSONValue) -> Job:
-        final_kwargs = self.job.task_kwargs.copy()
-        final_kwargs.update(task_kwargs)
+        return self.job.evolve(task_kwargs={**self.job.task_kwargs, **task_kwargs})
 
-        return self.job.evolve(task_kwargs=final_kwargs)
+    def job_for(self, **task_kwargs: types.JSONValue) -> Job:
+        """
+        Create the job that `defer` would defer with these arguments, without
+        deferring it. Jobs of different tasks and configurations can then be
+        deferred together with `App.batch_defer_async`.
+        """
+        return self.make_new_job(**task_kwargs)
 
     def _log_before_defer_jobs(self, jobs: list[Job]) -> None:
+        # Don't build the log context of the jobs if it's going to be discarded
+        if not logger.isEnabledFor(logging.DEBUG):
+            return
+
         job_count = len(jobs)
         logger.debug(
             f"About to defer {job_count} {'job' if job_count == 1 else 'jobs'}",
@@ -174,6 +195,9 @@ class JobDeferrer:
         )
 
     def _log_after_defer_jobs(self, jobs: list[Job]) -> None:
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
         job_count = len(jobs)
         logger.info(
             f"Deferred {job_count} {'job' if job_count == 1 else 'jobs'}",
@@ -214,6 +238,96 @@ class JobDeferrer:
             job_ids.append(job.id)
         return job_ids
 
+    async def defer_stream(
+        self,
+        task_kwargs: AsyncIterable[types.JSONDict],
+        chunk_size: int = 1000,
+        max_in_flight: int = 4,
+    ) -> AsyncIterator[int]:
+        """
+        See `Task.defer_stream` for details.
+        """
+        if chunk_size < 1 or max_in_flight < 1:
+            raise ValueError("chunk_size and max_in_flight must be positive integers")
+
+        # Chunks being deferred, oldest first, so that ids are yielded in order
+        in_flight: collections.deque[asyncio.Task[list[int]]] = collections.deque()
+        try:
+            chunk: list[types.JSONDict] = []
+            async for kwargs in task_kwargs:
+                chunk.append(kwargs)
+                if len(chunk) == chunk_size:
+                    in_flight.append(
+                        asyncio.create_task(self.batch_defer_async(*chunk))
+                    )
+                    chunk = []
+                    # Backpressure: don't read further than max_in_flight chunks
+                    if len(in_flight) == max_in_flight:
+                        for job_id in await in_flight.popleft():
+                            yield job_id
+
+                while in_flight and in_flight[0].done():
+                    for job_id in in_flight.popleft().result():
+                        yield job_id
+
+            if chunk:
+                in_flight.append(asyncio.create_task(self.batch_defer_async(*chunk)))
+
+            while in_flight:
+                for job_id in await in_flight.popleft():
+                    yield job_id
+        finally:
+            await utils.cancel_and_capture_errors(list(in_flight))
+
+    async def bulk_defer_async(
+        self, task_kwargs: Iterable[types.JSONDict], chunk_size: int = 10_000
+    ) -> int:
+        """
+        See `Task.bulk_defer_async` for details.
+        """
+        # Make sure this code stays synchronized with .bulk_defer()
+        self._check_bulk_defer()
+        job_count = await self.job_manager.bulk_defer_copy_count_async(
+            jobs=(self.make_new_job(**kwargs) for kwargs in task_kwargs),
+            chunk_size=chunk_size,
+        )
+        self._log_after_bulk_defer(job_count=job_count)
+        return job_count
+
+    def bulk_defer(
+        self, task_kwargs: Iterable[types.JSONDict], chunk_size: int = 10_000
+    ) -> int:
+        """
+        See `Task.bulk_defer` for details.
+        """
+        self._check_bulk_defer()
+        job_count = self.job_manager.bulk_defer_copy_count(
+            jobs=(self.make_new_job(**kwargs) for kwargs in task_kwargs),
+            chunk_size=chunk_size,
+        )
+        self._log_after_bulk_defer(job_count=job_count)
+        return job_count
+
+    def _check_bulk_defer(self) -> None:
+        if self.connection is not None:
+            raise ValueError(
+                "Bulk deferring jobs doesn't support external connections, as each "
+                "chunk of jobs is committed in its own transaction"
+            )
+
+    def _log_after_bulk_defer(self, job_count: int) -> None:
+        # Jobs are not logged one by one, as there may be millions of them
+        logger.info(
+            f"Deferred {job_count} {'job' if job_count == 1 else 'jobs'} "
+            f"of task {self.job.task_name}",
+            extra={
+                "action": "jobs_bulk_deferred",
+                "task_name": self.job.task_name,
+                "queue": self.job.queue,
+                "job_count": job_count,
+            },
+        )
+
     def defer(self, **task_kwargs: types.JSONValue) -> int:
         """
         See `Task.defer` for details.
@@ -1,18 +1,29 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
+import itertools
 import json
 import logging
 import warnings
-from collections.abc import Awaitable, Iterable
+import weakref
+from collections.abc import Awaitable, Iterable, Sequence
 from typing import Any, NoReturn, Protocol
 
+import attr
+
 from procrastinate import connector, exceptions, sql, types, utils
 from procrastinate import jobs as jobs_module
 
 logger = logging.getLogger(__name__)
 
 QUEUEING_LOCK_CONSTRAINT = "procrastinate_jobs_queueing_lock_idx_v1"
+# Jobs scheduled further than this in the future are deferred in the
+# "scheduled" status, and only become "todo" when they get closer
+SCHEDULED_JOBS_HORIZON = datetime.timedelta(minutes=10)
+# When defer batching is enabled, concurrent calls to defer_job_async wait at
+# most this long (in seconds) for other calls to join their batch
+DEFER_FLUSH_INTERVAL = 0.002
 
 
 class NotificationCallback(Protocol):
@@ -28,9 +39,43 @@ def get_channel_for_queues(queues: Iterable[str] | None = None) -> Iterable[str]
         return ["procrastinate_queue_v1#" + queue for queue in queues]
 
 
+@attr.dataclass(frozen=True, kw_only=True)
+class WorkersCount:
+    """
+    Number of registered workers, by the queues they listen to.
+    """
+
+    #: Workers listening to all the queues
+    all_queues: int
+    #: Workers listening to specific queues, by queue
+    by_queue: dict[str, int] = attr.ib(factory=dict)
+
+    @classmethod
+    def from_row(cls, row: dict[str, Any]) -> WorkersCount:
+        return cls(all_queues=row["all_queues_count"], by_queue=row["queues_count"])
+
+    def listening_to(self, queue: str) -> int:
+        """
+        Number of workers listening to the given queue, specifically or not.
+        """
+        return self.all_queues + self.by_queue.get(queue, 0)
+
+
 class JobManager:
-    def __init__(self, connector: connector.BaseConnector):
+    def __init__(
+        self,
+        connector: connector.BaseConnector,
+        defer_batch_size: int | None = None,
+        defer_flush_interval: float = DEFER_FLUSH_INTERVAL,
+    ):
         self.connector = connector
+        self.defer_batch_size = defer_batch_size
+        self.defer_flush_interval = defer_flush_interval
+        # Batchers hold futures, which are bound to an event loop
+        self._defer_batchers: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop,
+            utils.Batcher[jobs_module.Job, jobs_module.Job],
+        ] = weakref.WeakKeyDictionary()
 
     async def defer_job_async(
         self,
@@ -40,6 +85,10 @@ class JobManager:
         """
         Add a job in its queue for later processing by a worker.
 
+        If ``defer_batch_size`` is set, and no ``connection`` is given, the job
+        is inserted along with the jobs deferred concurrently, within
+        ``defer_flush_interval`` seconds, in a single query.
+
         Parameters
         ----------
         job:
@@ -52,8 +101,54 @@ class JobManager:
         :
             A copy of the job instance with the id set.
         """
+        if self.defer_batch_size and connection is None:
+            return await self._get_defer_batcher().submit(job)
+
         return (await self.batch_defer_jobs_async(jobs=[job], connection=connection))[0]
 
+    def _get_defer_batcher(
+        self,
+    ) -> utils.Batcher[jobs_module.Job, jobs_module.Job]:
+        loop = asyncio.get_running_loop()
+        batcher = self._defer_batchers.get(loop)
+        if batcher is None:
+            assert self.defer_batch_size  # for mypy
+            batcher = self._defer_batchers[loop] = utils.Batcher(
+                process_batch=self._defer_jobs_batch,
+                max_size=self.defer_batch_size,
+                max_delay=self.defer_flush_interval,
+            )
+        return batcher
+
+    async def _defer_jobs_batch(
+        self, jobs: list[jobs_module.Job]
+    ) -> list[jobs_module.Job | Exception]:
+        try:
+            return list(await self.batch_defer_jobs_async(jobs=jobs))
+        except exceptions.AlreadyEnqueued:
+            if len(jobs) == 1:
+                raise
+
+        # A queueing lock conflict rolled back the whole batch. Defer the jobs
+        # one by one, in order, so that only the conflicting callers get the
+        # error, as if they had not been batched.
+        results: list[jobs_module.Job | Exception] = []
+        for job in jobs:
+            try:
+                results.extend(await self.batch_defer_jobs_async(jobs=[job]))
+            except exceptions.AlreadyEnqueued as exc:
+                results.append(exc)
+        return results
+
+    async def flush_deferred_jobs_async(self) -> None:
+        """
+        When defer batching is enabled, insert the jobs waiting for their batch
+        right away, and wait until they are inserted.
+        """
+        batcher = self._defer_batchers.get(asyncio.get_running_loop())
+        if batcher is not None:
+            await batcher.flush()
+
     async def batch_defer_jobs_async(
         self,
         jobs: list[jobs_module.Job],
@@ -127,23 +222,222 @@ class JobManager:
             for index, job in enumerate(jobs)
         ]
 
+    async def bulk_defer_copy_async(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int = 10_000
+    ) -> list[int]:
+        """
+        Add a large number of jobs in their queue for later processing by a worker.
+
+        Jobs are consumed lazily, ``chunk_size`` at a time. Each chunk is streamed
+        with ``COPY ... FROM STDIN`` into a temporary staging table, then inserted
+        in the jobs table, in its own transaction: if a chunk fails, the previous
+        chunks stay deferred. Only connectors supporting ``COPY`` can be used
+        (`PsycopgConnector`, `SyncPsycopgConnector` and ``AsyncpgConnector``).
+
+        Parameters
+        ----------
+        jobs:
+            The jobs to defer
+        chunk_size:
+            Number of jobs inserted per transaction
+
+        Returns
+        -------
+        :
+            The ids of the created jobs
+        """
+        rows = await self._bulk_defer_copy_rows_async(
+            jobs=jobs, chunk_size=chunk_size, query_name="defer_staged_jobs"
+        )
+        return [row["id"] for row in rows]
+
+    def bulk_defer_copy(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int = 10_000
+    ) -> list[int]:
+        """
+        Sync version of `bulk_defer_copy_async`.
+        """
+        rows = self._bulk_defer_copy_rows(
+            jobs=jobs, chunk_size=chunk_size, query_name="defer_staged_jobs"
+        )
+        return [row["id"] for row in rows]
+
+    async def bulk_defer_copy_count_async(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int = 10_000
+    ) -> int:
+        """
+        Same as `bulk_defer_copy_async`, but the ids of the created jobs are not
+        sent back by the database: only their number is returned.
+
+        Parameters
+        ----------
+        jobs:
+            The jobs to defer
+        chunk_size:
+            Number of jobs inserted per transaction
+
+        Returns
+        -------
+        :
+            The number of created jobs
+        """
+        rows = await self._bulk_defer_copy_rows_async(
+            jobs=jobs, chunk_size=chunk_size, query_name="defer_staged_jobs_count"
+        )
+        return sum(row["count"] for row in rows)
+
+    def bulk_defer_copy_count(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int = 10_000
+    ) -> int:
+        """
+        Sync version of `bulk_defer_copy_count_async`.
+        """
+        rows = self._bulk_defer_copy_rows(
+            jobs=jobs, chunk_size=chunk_size, query_name="defer_staged_jobs_count"
+        )
+        return sum(row["count"] for row in rows)
+
+    async def _bulk_defer_copy_rows_async(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int, query_name: str
+    ) -> list[dict[str, Any]]:
+        # Make sure this code stays synchronized with ._bulk_defer_copy_rows()
+        rows: list[dict[str, Any]] = []
+        for chunk in self._bulk_defer_copy_chunks(jobs=jobs, chunk_size=chunk_size):
+            try:
+                rows.extend(
+                    await self.connector.copy_and_execute_query_all_async(
+                        **self._bulk_defer_copy_query_kwargs(
+                            chunk=chunk, query_name=query_name
+                        )
+                    )
+                )
+            except exceptions.UniqueViolation as exc:
+                self._raise_already_enqueued(exc=exc, queueing_lock=exc.queueing_lock)
+
+        return rows
+
+    def _bulk_defer_copy_rows(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int, query_name: str
+    ) -> list[dict[str, Any]]:
+        rows: list[dict[str, Any]] = []
+        sync_connector = self.connector.get_sync_connector()
+        for chunk in self._bulk_defer_copy_chunks(jobs=jobs, chunk_size=chunk_size):
+            try:
+                rows.extend(
+                    sync_connector.copy_and_execute_query_all(
+                        **self._bulk_defer_copy_query_kwargs(
+                            chunk=chunk, query_name=query_name
+                        )
+                    )
+                )
+            except exceptions.UniqueViolation as exc:
+                self._raise_already_enqueued(exc=exc, queueing_lock=exc.queueing_lock)
+
+        return rows
+
+    def _bulk_defer_copy_chunks(
+        self, jobs: Iterable[jobs_module.Job], chunk_size: int
+    ) -> Iterable[list[types.JobToDefer]]:
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be a positive integer")
+
+        rows = (self._job_to_defer(job) for job in jobs)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            yield chunk
+
+    def _bulk_defer_copy_query_kwargs(
+        self, chunk: list[types.JobToDefer], query_name: str
+    ) -> dict[str, Any]:
+        return {
+            "setup_query": sql.queries["create_staged_jobs_table"],
+            "table": "procrastinate_staged_jobs",
+            "columns": types.JobToDefer._fields,
+            "rows": chunk,
+            "query": sql.queries[query_name],
+            "scheduled_horizon": SCHEDULED_JOBS_HORIZON,
+        }
+
+    def _job_to_defer(self, job: jobs_module.Job) -> types.JobToDefer:
+        return types.JobToDefer(
+            queue_name=job.queue,
+            task_name=job.task_name,
+            priority=job.priority,
+            lock=job.lock,
+            queueing_lock=job.queueing_lock,
+            args=job.task_kwargs,
+            scheduled_at=job.scheduled_at,
+        )
+
     def _defer_jobs_query_kwargs(self, jobs: list[jobs_module.Job]) -> dict[str, Any]:
         return {
             "query": sql.queries["defer_jobs"],
-            "jobs": [
-                types.JobToDefer(
-                    queue_name=job.queue,
-                    task_name=job.task_name,
-                    priority=job.priority,
-                    lock=job.lock,
-                    queueing_lock=job.queueing_lock,
-                    args=job.task_kwargs,
-                    scheduled_at=job.scheduled_at,
-                )
-                for job in jobs
-            ],
+            "jobs": [self._job_to_defer(job) for job in jobs],
+            "scheduled_horizon": SCHEDULED_JOBS_HORIZON,
         }
 
+    async def get_queueing_lock_conflicts_async(
+        self, jobs: Sequence[jobs_module.Job]
+    ) -> dict[int, str]:
+        """
+        Find the jobs that cannot be deferred together because of their queueing
+        lock: the ones whose queueing lock is held by a job waiting in the queue,
+        and the ones whose queueing lock is used by a previous job of the batch.
+
+        Parameters
+        ----------
+        jobs:
+            The jobs of the batch
+
+        Returns
+        -------
+        :
+            A mapping of the index of each conflicting job in ``jobs`` to its
+            queueing lock
+        """
+        queueing_locks = self._get_queueing_locks(jobs=jobs)
+        if not queueing_locks:
+            return {}
+
+        rows = await self.connector.execute_query_all_async(
+            query=sql.queries["list_enqueued_queueing_locks"],
+            queueing_locks=queueing_locks,
+        )
+        return self._get_queueing_lock_conflicts(jobs=jobs, rows=rows)
+
+    def get_queueing_lock_conflicts(
+        self, jobs: Sequence[jobs_module.Job]
+    ) -> dict[int, str]:
+        """
+        Sync version of `get_queueing_lock_conflicts_async`.
+        """
+        queueing_locks = self._get_queueing_locks(jobs=jobs)
+        if not queueing_locks:
+            return {}
+
+        rows = self.connector.get_sync_connector().execute_query_all(
+            query=sql.queries["list_enqueued_queueing_locks"],
+            queueing_locks=queueing_locks,
+        )
+        return self._get_queueing_lock_conflicts(jobs=jobs, rows=rows)
+
+    def _get_queueing_locks(self, jobs: Sequence[jobs_module.Job]) -> list[str]:
+        return list(
+            {job.queueing_lock: None for job in jobs if job.queueing_lock is not None}
+        )
+
+    def _get_queueing_lock_conflicts(
+        self, jobs: Sequence[jobs_module.Job], rows: list[dict[str, Any]]
+    ) -> dict[int, str]:
+        taken_queueing_locks = {row["queueing_lock"] for row in rows}
+        conflicts = {}
+        for index, job in enumerate(jobs):
+            if job.queueing_lock is None:
+                continue
+            if job.queueing_lock in taken_queueing_locks:
+                conflicts[index] = job.queueing_lock
+            taken_queueing_locks.add(job.queueing_lock)
+        return conflicts
+
     def _raise_already_enqueued(
         self, exc: exceptions.UniqueViolation, queueing_lock: str | None
     ) -> NoReturn:
@@ -220,6 +514,63 @@ class JobManager:
 
         return jobs_module.Job.from_row(row)
 
+    async def fetch_jobs(
+        self, queues: Iterable[str] | None, worker_id: int, limit: int
+    ) -> list[jobs_module.Job]:
+        """
+        Select up to ``limit`` jobs in the queue, and mark them as doing, in a
+        single query. Lock ordering is respected: at most one job per lock is
+        returned.
+
+        Parameters
+        ----------
+        queues:
+            Filter by job queue names
+        worker_id:
+            Id of the worker fetching the jobs
+        limit:
+            Maximum number of jobs to fetch
+
+        Returns
+        -------
+        :
+            The fetched jobs, by decreasing priority then increasing id. The list
+            is empty if no suitable job was found.
+        """
+
+        rows = await self.connector.execute_query_all_async(
+            query=sql.queries["fetch_jobs"],
+            queues=queues,
+            worker_id=worker_id,
+            limit=limit,
+        )
+
+        return [jobs_module.Job.from_row(row) for row in rows]
+
+    async def get_next_scheduled_job_delay_async(
+        self, queues: Iterable[str] | None
+    ) -> float | None:
+        """
+        Get the time until the earliest upcoming scheduled job is due. The delay
+        is computed by the database, so it doesn't depend on the local clock.
+
+        Parameters
+        ----------
+        queues:
+            Filter by job queue names
+
+        Returns
+        -------
+        :
+            The delay in seconds, or ``None`` if no job is scheduled in the
+            future.
+        """
+        row = await self.connector.execute_query_one_async(
+            query=sql.queries["next_scheduled_job_delay"],
+            queues=queues,
+        )
+        return row["delay"]
+
     async def get_stalled_jobs(
         self,
         nb_seconds: int | None = None,
@@ -347,6 +698,109 @@ class JobManager:
             delete_job=delete_job,
         )
 
+    async def finish_job_and_fetch_next(
+        self,
+        job: jobs_module.Job,
+        status: jobs_module.Status,
+        delete_job: bool,
+        queues: Iterable[str] | None,
+        worker_id: int,
+    ) -> jobs_module.Job | None:
+        """
+        Set a job to its final state, then select the next job in the queue and
+        mark it as doing, atomically and in a single query. This is the same as
+        calling `finish_job` then `fetch_job`, with a single round trip.
+
+        Parameters
+        ----------
+        job:
+            The job to finish
+        status:
+            ``succeeded``, ``failed`` or ``aborted``
+        delete_job:
+            Whether the finished job should be deleted instead of updated
+        queues:
+            Filter the next job by queue names
+        worker_id:
+            Id of the worker fetching the next job
+
+        Returns
+        -------
+        :
+            None if no suitable job was found. The next job otherwise.
+        """
+        assert job.id
+        row = await self.connector.execute_query_one_async(
+            query=sql.queries["finish_and_fetch_job"],
+            job_id=job.id,
+            status=status.value,
+            delete_job=delete_job,
+            queues=queues,
+            worker_id=worker_id,
+        )
+
+        # Like for fetch_job, there's always a row, with None values when no job
+        # was found
+        if row["id"] is None:
+            return None
+
+        return jobs_module.Job.from_row(row)
+
+    async def promote_scheduled_jobs_async(self, limit: int) -> int:
+        """
+        Move jobs that get close to their due time from the ``scheduled``
+        status to ``todo``, so that workers can fetch them.
+
+        Parameters
+        ----------
+        limit:
+            Maximum number of jobs to promote
+
+        Returns
+        -------
+        :
+            The number of promoted jobs
+        """
+        row = await self.connector.execute_query_one_async(
+            query=sql.queries["promote_scheduled_jobs"],
+            scheduled_horizon=SCHEDULED_JOBS_HORIZON,
+            limit=limit,
+        )
+        return row["count"]
+
+    async def finish_jobs_by_id_async(
+        self,
+        job_ids: Sequence[int],
+        statuses: Sequence[jobs_module.Status],
+        delete_jobs: Sequence[bool],
+    ) -> list[int]:
+        """
+        Set several jobs to their final state in a single query. The 3 sequences
+        are read in parallel: the n-th job gets the n-th status and delete flag.
+
+        Parameters
+        ----------
+        job_ids:
+            Ids of the jobs to finish
+        statuses:
+            ``succeeded``, ``failed`` or ``aborted``, for each job
+        delete_jobs:
+            Whether each job should be deleted instead of updated
+
+        Returns
+        -------
+        :
+            The ids of the jobs that could not be finished, because they were not
+            found or not in ``todo`` or ``doing`` status.
+        """
+        rows = await self.connector.execute_query_all_async(
+            query=sql.queries["finish_jobs"],
+            job_ids=list(job_ids),
+            statuses=[status.value for status in statuses],
+            delete_jobs=list(delete_jobs),
+        )
+        return [row["id"] for row in rows]
+
     def cancel_job_by_id(
         self,
         job_id: int,
@@ -363,8 +817,9 @@ class JobManager:
             The id of the job to cancel
         abort:
             If True, a job will be marked for abortion, but the task itself has to
-            respect the abortion request. If False, only jobs in ``todo`` state will
-            be set to ``cancelled`` and won't be processed by a worker anymore.
+            respect the abortion request. If False, only jobs in ``todo`` (or
+            ``scheduled``) state will be set to ``cancelled`` and won't be
+            processed by a worker anymore.
         delete_job:
             If True, the job will be deleted from the database after being cancelled. Does
             not affect the jobs that should be aborted.
@@ -417,8 +872,9 @@ class JobManager:
             The id of the job to cancel
         abort:
             If True, a job will be marked for abortion, but the task itself has to
-            respect the abortion request. If False, only jobs in ``todo`` state will
-            be set to ``cancelled`` and won't be processed by a worker anymore.
+            respect the abortion request. If False, only jobs in ``todo`` (or
+            ``scheduled``) state will be set to ``cancelled`` and won't be
+            processed by a worker anymore.
         delete_job:
             If True, the job will be deleted from the database after being cancelled. Does
             not affect the jobs that should be aborted.
@@ -759,13 +1215,14 @@ class JobManager:
         -------
         :
             A list of dictionaries representing queues stats (``name``, ``jobs_count``,
-            ``todo``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
+            ``todo``, ``scheduled``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
         """
         return [
             {
                 "name": row["name"],
                 "jobs_count": row["jobs_count"],
                 "todo": row["stats"].get("todo", 0),
+                "scheduled": row["stats"].get("scheduled", 0),
                 "doing": row["stats"].get("doing", 0),
                 "succeeded": row["stats"].get("succeeded", 0),
                 "failed": row["stats"].get("failed", 0),
@@ -796,6 +1253,7 @@ class JobManager:
                 "name": row["name"],
                 "jobs_count": row["jobs_count"],
                 "todo": row["stats"].get("todo", 0),
+                "scheduled": row["stats"].get("scheduled", 0),
                 "doing": row["stats"].get("doing", 0),
                 "succeeded": row["stats"].get("succeeded", 0),
                 "failed": row["stats"].get("failed", 0),
@@ -836,13 +1294,14 @@ class JobManager:
         -------
         :
             A list of dictionaries representing tasks stats (``name``, ``jobs_count``,
-            ``todo``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
+            ``todo``, ``scheduled``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
         """
         return [
             {
                 "name": row["name"],
                 "jobs_count": row["jobs_count"],
                 "todo": row["stats"].get("todo", 0),
+                "scheduled": row["stats"].get("scheduled", 0),
                 "doing": row["stats"].get("doing", 0),
                 "succeeded": row["stats"].get("succeeded", 0),
                 "failed": row["stats"].get("failed", 0),
@@ -873,6 +1332,7 @@ class JobManager:
                 "name": row["name"],
                 "jobs_count": row["jobs_count"],
                 "todo": row["stats"].get("todo", 0),
+                "scheduled": row["stats"].get("scheduled", 0),
                 "doing": row["stats"].get("doing", 0),
                 "succeeded": row["stats"].get("succeeded", 0),
                 "failed": row["stats"].get("failed", 0),
@@ -913,7 +1373,7 @@ class JobManager:
         -------
         :
             A list of dictionaries representing locks stats (``name``, ``jobs_count``,
-            ``todo``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
+            ``todo``, ``scheduled``, ``doing``, ``succeeded``, ``failed``, ``cancelled``, ``aborted``).
         """
         result = []
         for row in await self.connector.execute_query_all_async(
@@ -928,6 +1388,7 @@ class JobManager:
                     "name": row["name"],
                     "jobs_count": row["jobs_count"],
                     "todo": row["stats"].get("todo", 0),
+                    "scheduled": row["stats"].get("scheduled", 0),
                     "doing": row["stats"].get("doing", 0),
                     "succeeded": row["stats"].get("succeeded", 0),
                     "failed": row["stats"].get("failed", 0),
@@ -960,6 +1421,7 @@ class JobManager:
                     "name": row["name"],
                     "jobs_count": row["jobs_count"],
                     "todo": row["stats"].get("todo", 0),
+                    "scheduled": row["stats"].get("scheduled", 0),
                     "doing": row["stats"].get("doing", 0),
                     "succeeded": row["stats"].get("succeeded", 0),
                     "failed": row["stats"].get("failed", 0),
@@ -978,10 +1440,15 @@ class JobManager:
         )
         return [row["id"] for row in rows]
 
-    async def register_worker(self) -> int:
+    async def register_worker(self, queues: Iterable[str] | None = None) -> int:
         """
         Register a newly started worker (with a initial heartbeat) in the database.
 
+        Parameters
+        ----------
+        queues:
+            The queues the worker listens to (``None`` for all the queues)
+
         Returns
         -------
         :
@@ -989,6 +1456,7 @@ class JobManager:
         """
         result = await self.connector.execute_query_one_async(
             query=sql.queries["register_worker"],
+            queues=list(queues) if queues is not None else None,
         )
         return result["worker_id"]
 
@@ -1020,6 +1488,82 @@ class JobManager:
             worker_id=worker_id,
         )
 
+    async def update_heartbeat_and_count_workers(self, worker_id: int) -> WorkersCount:
+        """
+        Update the heartbeat of a worker, and count the registered workers. Both
+        queries are sent together if the connector supports it.
+
+        Parameters
+        ----------
+        worker_id:
+            The ID of the worker to update the heartbeat
+
+        Returns
+        -------
+        :
+            The number of registered workers, by the queues they listen to
+        """
+        _, count_row = await self.connector.execute_queries_one_async(
+            [
+                (sql.queries["update_heartbeat"], {"worker_id": worker_id}),
+                (sql.queries["count_workers"], {}),
+            ]
+        )
+        return WorkersCount.from_row(count_row)
+
+    async def update_heartbeats(self, worker_ids: Iterable[int]) -> None:
+        """
+        Update the heartbeat of several workers, in a single query.
+
+        Parameters
+        ----------
+        worker_ids:
+            The IDs of the workers to update the heartbeat
+        """
+        await self.connector.execute_query_one_async(
+            query=sql.queries["update_heartbeats"],
+            worker_ids=list(worker_ids),
+        )
+
+    async def update_heartbeats_and_count_workers(
+        self, worker_ids: Iterable[int]
+    ) -> WorkersCount:
+        """
+        Update the heartbeat of several workers, and count the registered
+        workers. Both queries are sent together if the connector supports it.
+
+        Parameters
+        ----------
+        worker_ids:
+            The IDs of the workers to update the heartbeat
+
+        Returns
+        -------
+        :
+            The number of registered workers, by the queues they listen to
+        """
+        _, count_row = await self.connector.execute_queries_one_async(
+            [
+                (sql.queries["update_heartbeats"], {"worker_ids": list(worker_ids)}),
+                (sql.queries["count_workers"], {}),
+            ]
+        )
+        return WorkersCount.from_row(count_row)
+
+    async def count_workers_async(self) -> WorkersCount:
+        """
+        Count the registered workers, by the queues they listen to.
+
+        Returns
+        -------
+        :
+            The number of registered workers, by the queues they listen to
+        """
+        row = await self.connector.execute_query_one_async(
+            query=sql.queries["count_workers"],
+        )
+        return WorkersCount.from_row(row)
+
     async def prune_stalled_workers(self, seconds_since_heartbeat: float) -> list[int]:
         """
         Delete the workers that have not sent a heartbeat for more than a given time.
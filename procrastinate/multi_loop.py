@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import threading
+from collections.abc import Callable, Coroutine, Iterable, Sequence
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from typing_extensions import LiteralString, Unpack
+
+from procrastinate import connector, coordinator, signals, utils
+from procrastinate import worker as worker_module
+
+if TYPE_CHECKING:
+    from procrastinate import app as app_module
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LoopConnector(connector.BaseAsyncConnector):
+    """
+    Wraps a connector, so that it can be used from any event loop: the queries
+    made from another event loop than ``loop``, the one owning the connector
+    (and its pool), are run on ``loop``.
+    """
+
+    def __init__(
+        self, connector: connector.BaseConnector, loop: asyncio.AbstractEventLoop
+    ):
+        self.connector = connector
+        self.loop = loop
+        self.json_dumps = connector.json_dumps
+        self.json_loads = connector.json_loads
+
+    async def _run(self, func: Callable[[], Coroutine[Any, Any, T]]) -> T:
+        if asyncio.get_running_loop() is self.loop:
+            return await func()
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(func(), self.loop)
+        )
+
+    def get_sync_connector(self) -> connector.BaseConnector:
+        sync_connector = self.connector.get_sync_connector()
+        return self if sync_connector is self.connector else sync_connector
+
+    @property
+    def is_open(self) -> bool:
+        return self.connector.is_open
+
+    async def open_async(self, pool: connector.Pool | None = None) -> None:
+        await self._run(lambda: self.connector.open_async(pool))
+
+    async def close_async(self) -> None:
+        await self._run(self.connector.close_async)
+
+    async def execute_query_async(self, query: LiteralString, **arguments: Any) -> None:
+        await self._run(lambda: self.connector.execute_query_async(query, **arguments))
+
+    async def execute_query_one_async(
+        self, query: LiteralString, **arguments: Any
+    ) -> dict[str, Any]:
+        return await self._run(
+            lambda: self.connector.execute_query_one_async(query, **arguments)
+        )
+
+    async def execute_query_all_async(
+        self, query: LiteralString, **arguments: Any
+    ) -> list[dict[str, Any]]:
+        return await self._run(
+            lambda: self.connector.execute_query_all_async(query, **arguments)
+        )
+
+    async def execute_queries_one_async(
+        self, queries: Sequence[tuple[LiteralString, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        return await self._run(
+            lambda: self.connector.execute_queries_one_async(queries)
+        )
+
+    async def execute_query_one_async_with_connection(
+        self, connection: Any, query: LiteralString, **arguments: Any
+    ) -> dict[str, Any]:
+        # External connections belong to the event loop of the caller
+        return await self.connector.execute_query_one_async_with_connection(
+            connection, query, **arguments
+        )
+
+    async def execute_query_all_async_with_connection(
+        self, connection: Any, query: LiteralString, **arguments: Any
+    ) -> list[dict[str, Any]]:
+        return await self.connector.execute_query_all_async_with_connection(
+            connection, query, **arguments
+        )
+
+    async def copy_and_execute_query_all_async(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        return await self._run(
+            lambda: self.connector.copy_and_execute_query_all_async(
+                setup_query, table, columns, rows, query, **arguments
+            )
+        )
+
+    async def listen_notify(
+        self, on_notification: connector.Notify, channels: Iterable[str]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+
+        async def notify(*, channel: str, payload: str) -> None:
+            # Notifications are handled on the event loop of the listener
+            asyncio.run_coroutine_threadsafe(
+                on_notification(channel=channel, payload=payload),  # pyright: ignore[reportArgumentType]
+                loop,
+            )
+
+        await self._run(
+            lambda: self.connector.listen_notify(
+                on_notification=on_notification if loop is self.loop else notify,
+                channels=channels,
+            )
+        )
+
+
+class WorkerLoops:
+    """
+    Run a worker on each of ``loops`` event loops, each in its own thread of the
+    current process, and stop them gracefully on SIGINT or SIGTERM.
+
+    The workers share the connector of the app, which stays on the current
+    event loop, and a `coordinator.Coordinator`: a single connection listens for
+    the notifications of all the workers, their heartbeats are updated in a
+    single query, and the periodic tasks and the jobs to abort are handled once
+    for all of them.
+    """
+
+    def __init__(
+        self,
+        app: app_module.App,
+        loops: int,
+        **worker_options: Unpack[app_module.WorkerOptions],
+    ):
+        if loops < 1:
+            raise ValueError("loops must be a positive integer")
+
+        self.app = app
+        self.loops = loops
+        self.worker_options: app_module.WorkerOptions = {
+            **app.worker_defaults,
+            **worker_options,
+        }
+
+        self._lock = threading.Lock()
+        self._workers: dict[worker_module.Worker, asyncio.AbstractEventLoop] = {}
+        self._stopping = False
+
+    async def run(self) -> None:
+        """
+        Run the workers until they have all stopped. The app must be open.
+        """
+        self.app.perform_import_paths()
+        loop = asyncio.get_running_loop()
+        coord = coordinator.from_worker_options(self.app, self.worker_options)
+        coordinator_task = asyncio.create_task(coord.run(), name="coordinator")
+        coordinator_task.add_done_callback(self._on_coordinator_done)
+
+        executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.loops, thread_name_prefix="procrastinate-loop"
+        )
+        try:
+            with (
+                self.app.replace_connector(LoopConnector(self.app.connector, loop)),
+                self._on_stop(self.stop),
+            ):
+                futures = [
+                    executor.submit(asyncio.run, self._run_worker(index, coord))
+                    for index in range(self.loops)
+                ]
+                try:
+                    await asyncio.gather(*map(asyncio.wrap_future, futures))
+                finally:
+                    # Whether a worker failed or the run was cancelled, the other
+                    # workers still stop gracefully, using the connector from
+                    # this event loop
+                    self.stop()
+                    await asyncio.wait(map(asyncio.wrap_future, futures))
+        finally:
+            executor.shutdown(wait=False)
+            coordinator_task.remove_done_callback(self._on_coordinator_done)
+            await utils.cancel_and_capture_errors([coordinator_task])
+
+    def stop(self) -> None:
+        """
+        Stop the workers gracefully, as a single worker does on SIGTERM.
+        Thread-safe.
+        """
+        with self._lock:
+            self._stopping = True
+            workers = list(self._workers.items())
+
+        for worker, loop in workers:
+            # The loop closes once its worker stops
+            with contextlib.suppress(RuntimeError):
+                loop.call_soon_threadsafe(worker.stop)
+
+    def _on_stop(
+        self, callback: Callable[[], None]
+    ) -> contextlib.AbstractContextManager[None]:
+        if self.worker_options.get("install_signal_handlers", True):
+            return signals.on_stop(callback)
+        return contextlib.nullcontext()
+
+    def _on_coordinator_done(self, task: asyncio.Task[None]) -> None:
+        if task.cancelled() or not (exc := task.exception()):
+            return
+        logger.error(
+            f"Coordinator failed with exception: {exc!r}, stopping workers",
+            exc_info=exc,
+            extra={"action": "coordinator_failed"},
+        )
+        self.stop()
+
+    async def _run_worker(self, index: int, coord: coordinator.Coordinator) -> None:
+        name = self.worker_options.get("name") or worker_module.WORKER_NAME
+        worker = self.app._worker(
+            **{
+                **self.worker_options,
+                "name": f"{name}-{index}",
+                "install_signal_handlers": False,
+                "coordinator": coord,
+            }
+        )
+        with self._lock:
+            if self._stopping:
+                return
+            self._workers[worker] = asyncio.get_running_loop()
+
+        try:
+            # A stop requested from now on runs after the worker has started
+            await worker.run()
+        finally:
+            with self._lock:
+                del self._workers[worker]
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextlib
+import logging
+import multiprocessing
+import os
+import signal
+from collections.abc import Callable
+from typing import Any
+
+from procrastinate import exceptions, tasks, types, utils
+
+logger = logging.getLogger(__name__)
+
+# Signal sent to the process running a job to abort it (there is no SIGKILL on
+# Windows, where SIGTERM terminates the process right away)
+KILL_SIGNAL = getattr(signal, "SIGKILL", signal.SIGTERM)
+
+
+def run_task(task_path: str, task_kwargs: types.JSONDict) -> Any:
+    """
+    Run the task at the given path. Called in a process of the pool, where the
+    task function is imported by its path rather than pickled. The path may
+    point to the task, or to the function it was created from.
+    """
+    func = utils.load_from_path(task_path)
+    if isinstance(func, tasks.Task):
+        func = func.func
+    return func(**task_kwargs)
+
+
+def get_mp_context() -> multiprocessing.context.BaseContext:
+    """
+    Processes are started from a fresh interpreter rather than forked: forking
+    the worker would copy its event loop, threads and open connections (whose
+    locks may be held by another thread at that moment) into the process.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+class _Process:
+    """
+    A single-process executor, so that the process running a job can be killed
+    without breaking the processes running other jobs.
+    """
+
+    def __init__(self) -> None:
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=1, mp_context=get_mp_context()
+        )
+        self.pid: int | None = None
+        self.killed = False
+
+    async def start(self) -> None:
+        self.pid = await self.run(os.getpid)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.wrap_future(self.executor.submit(func, *args))
+
+    def kill(self) -> None:
+        self.killed = True
+        if self.pid is not None:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(self.pid, KILL_SIGNAL)
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+class ProcessPool:
+    """
+    Runs the jobs of the tasks declared with ``executor="process"``, each in one
+    of at most ``size`` processes. Processes are started when needed, and reused
+    from one job to the next. The process running an aborted job is killed, and
+    replaced by a new one for the next jobs.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._semaphore = asyncio.Semaphore(size)
+        self._idle: list[_Process] = []
+        self._running: dict[int, _Process] = {}
+
+    async def run(
+        self,
+        job_id: int,
+        task_path: str,
+        task_kwargs: types.JSONDict,
+        should_abort: Callable[[], bool],
+    ) -> Any:
+        """
+        Run a job in a process of the pool, waiting for one to be available.
+
+        Raises
+        ------
+        exceptions.JobAborted
+            If the job was aborted before it started, or was killed with `kill`
+        """
+        async with self._semaphore:
+            process = self._idle.pop() if self._idle else await self._start_process()
+            if should_abort():
+                self._idle.append(process)
+                raise exceptions.JobAborted
+
+            self._running[job_id] = process
+            try:
+                return await process.run(run_task, task_path, task_kwargs)
+            except concurrent.futures.process.BrokenProcessPool as exc:
+                if process.killed:
+                    raise exceptions.JobAborted from exc
+                # The process died while running the job (e.g. segfault)
+                process.killed = True
+                raise
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+            finally:
+                del self._running[job_id]
+                if process.killed:
+                    await utils.sync_to_async(process.close)
+                else:
+                    self._idle.append(process)
+
+    def kill(self, job_id: int) -> bool:
+        """
+        Kill the process running the given job, if any. The job then raises
+        `exceptions.JobAborted`.
+
+        Returns
+        -------
+        :
+            ``True`` if the job was running in a process, which was killed
+        """
+        process = self._running.get(job_id)
+        if process is None:
+            return False
+
+        logger.debug(
+            f"Killing process {process.pid} running job {job_id}",
+            extra={"action": "kill_job_process", "job_id": job_id, "pid": process.pid},
+        )
+        process.kill()
+        return True
+
+    async def close(self) -> None:
+        """
+        Stop the idle processes. Jobs must not be running anymore.
+        """
+        idle, self._idle = self._idle, []
+        for process in idle:
+            await utils.sync_to_async(process.close)
+
+    async def _start_process(self) -> _Process:
+        process = _Process()
+        await process.start()
+        logger.debug(
+            f"Started job process {process.pid}",
+            extra={"action": "start_job_process", "pid": process.pid},
+        )
+        return process
@@ -3,10 +3,12 @@ from __future__ import annotations
 import contextlib
 import importlib.metadata
 import logging
+import threading
 from collections.abc import (
     AsyncGenerator,
     Callable,
     Iterable,
+    Sequence,
 )
 from typing import (
     TYPE_CHECKING,
@@ -61,6 +63,9 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         pool_factory: Callable[
             ..., psycopg_pool.AsyncConnectionPool
         ] = psycopg_pool.AsyncConnectionPool,
+        prepare_statements: bool = False,
+        pipeline: bool = False,
+        sync_pool: bool = False,
         **kwargs: Any,
     ):
         """
@@ -70,8 +75,9 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         custom callable which returns ``psycopg_pool.AsyncConnectionPool`` instance
         as ``pool_factory`` kwarg.
 
-        All other arguments than ``pool_factory``, ``json_dumps`` and ``json_loads`` are passed
-        to ``pool_factory`` callable (see psycopg documentation__).
+        All other arguments than ``pool_factory``, ``json_dumps``, ``json_loads``,
+        ``prepare_statements``, ``pipeline`` and ``sync_pool`` are passed to
+        ``pool_factory`` callable (see psycopg documentation__).
 
         ``json_dumps`` and ``json_loads`` are used to configure new connections
         created by the pool with ``psycopg.types.json.set_json_dumps`` and
@@ -96,6 +102,23 @@ class PsycopgConnector(connector.BaseAsyncConnector):
             Default is ``psycopg_pool.AsyncConnectionPool``.
             You can set this to ``psycopg_pool.AsyncNullConnectionPool`` to disable
             pooling.
+        prepare_statements :
+            If ``True``, Procrastinate queries are prepared on the server the
+            first time each pooled connection runs them, so that later runs skip
+            parsing and planning. Otherwise, psycopg only prepares a query after it
+            ran a few times on the same connection. Don't enable this behind a
+            connection pooler that doesn't support prepared statements (such as
+            PgBouncer < 1.21 in transaction mode). Default is ``False``.
+        pipeline :
+            If ``True``, independent queries issued together are sent in a single
+            round trip, using psycopg pipeline mode (needs libpq 14 or later).
+            Default is ``False``.
+        sync_pool :
+            If ``True``, synchronous calls made once the connector is opened (such
+            as ``Task.defer``) run on a companion ``psycopg_pool.ConnectionPool``,
+            created with the same arguments on first use, instead of being handed
+            over to the event loop. This saves a thread and loop round trip per
+            call, at the cost of extra connections. Default is ``False``.
         """
         self._async_pool: psycopg_pool.AsyncConnectionPool | None = None
         self._pool_factory: Callable[..., psycopg_pool.AsyncConnectionPool] = (
@@ -106,22 +129,56 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         self._json_dumps = json_dumps
         self._pool_args = kwargs
         self._sync_connector: connector.BaseConnector | None = None
+        self._prepare_statements = prepare_statements
+        self._pipeline = pipeline
+        self._named_queries = frozenset(sql.queries.values())
+        self._sync_pool = sync_pool
+        self._sync_pool_lock = threading.Lock()
 
     def get_sync_connector(self) -> connector.BaseConnector:
         if self._async_pool:
-            return self
+            if not self._sync_pool:
+                return self
+            return self._get_companion_sync_connector()
+
         if self._sync_connector is None:
             logger.debug(
                 "PsycopgConnector used synchronously before being opened. "
                 "Creating a SyncPsycopgConnector."
             )
-            self._sync_connector = sync_psycopg_connector.SyncPsycopgConnector(
-                json_dumps=self._json_dumps,
-                json_loads=self._json_loads,
-                **self._pool_args,
-            )
+            self._sync_connector = self._create_sync_connector()
         return self._sync_connector
 
+    def _create_sync_connector(self) -> sync_psycopg_connector.SyncPsycopgConnector:
+        return sync_psycopg_connector.SyncPsycopgConnector(
+            json_dumps=self._json_dumps,
+            json_loads=self._json_loads,
+            **self._pool_args,
+        )
+
+    def _get_companion_sync_connector(self) -> connector.BaseConnector:
+        sync_connector = self._sync_connector
+        if sync_connector is None:
+            # Sync calls come from other threads than the event loop's
+            with self._sync_pool_lock:
+                if self._sync_connector is None:
+                    logger.debug(
+                        "Creating a companion SyncPsycopgConnector for sync calls."
+                    )
+                    new_connector = self._create_sync_connector()
+                    new_connector.open()
+                    self._sync_connector = new_connector
+                sync_connector = self._sync_connector
+        return sync_connector
+
+    @property
+    def is_open(self) -> bool:
+        # Used synchronously before being opened, the connector may have opened
+        # a sync connector of its own
+        return self._async_pool is not None or (
+            self._sync_connector is not None and self._sync_connector.is_open
+        )
+
     @property
     def pool(
         self,
@@ -143,10 +200,7 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         if self._async_pool:
             return
 
-        if self._sync_connector is not None:
-            logger.debug("Closing automatically created SyncPsycopgConnector.")
-            await utils.sync_to_async(self._sync_connector.close)
-            self._sync_connector = None
+        await self._close_sync_connector()
 
         if pool:
             self._pool_externally_set = True
@@ -177,12 +231,20 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         """
         Close the pool and awaits all connections to be released.
         """
+        await self._close_sync_connector()
+
         if not self._async_pool or self._pool_externally_set:
             return
 
         await self._async_pool.close()
         self._async_pool = None
 
+    async def _close_sync_connector(self) -> None:
+        if self._sync_connector is not None:
+            logger.debug("Closing automatically created SyncPsycopgConnector.")
+            await utils.sync_to_async(self._sync_connector.close)
+            self._sync_connector = None
+
     def _wrap_value(self, value: Any) -> Any:
         if isinstance(value, dict):
             return psycopg.types.json.Jsonb(value)
@@ -207,29 +269,43 @@ class PsycopgConnector(connector.BaseAsyncConnector):
             else self.pool.connection()
         )
         async with conn_ctx as conn:
-            async with conn.cursor(row_factory=psycopg.rows.dict_row) as cursor:
-                if self._json_loads:
-                    psycopg.types.json.set_json_loads(
-                        loads=self._json_loads, context=cursor
-                    )
-
-                if self._json_dumps:
-                    psycopg.types.json.set_json_dumps(
-                        dumps=self._json_dumps, context=cursor
-                    )
+            async with self._make_cursor(conn) as cursor:
                 yield cursor
 
+    def _make_cursor(
+        self, connection: psycopg.AsyncConnection
+    ) -> psycopg.AsyncCursor[psycopg.rows.DictRow]:
+        cursor = connection.cursor(row_factory=psycopg.rows.dict_row)
+        if self._json_loads:
+            psycopg.types.json.set_json_loads(loads=self._json_loads, context=cursor)
+
+        if self._json_dumps:
+            psycopg.types.json.set_json_dumps(dumps=self._json_dumps, context=cursor)
+        return cursor
+
+    async def _execute(
+        self,
+        cursor: psycopg.AsyncCursor[psycopg.rows.DictRow],
+        query: LiteralString,
+        arguments: dict[str, Any],
+    ) -> None:
+        # prepare=None lets psycopg decide, based on how often the query ran
+        prepare = (
+            True if self._prepare_statements and query in self._named_queries else None
+        )
+        await cursor.execute(query, self._wrap_json(arguments), prepare=prepare)
+
     @wrap_exceptions()
     async def execute_query_async(self, query: LiteralString, **arguments: Any) -> None:
         async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+            await self._execute(cursor, query, arguments)
 
     @wrap_exceptions()
     async def execute_query_one_async(
         self, query: LiteralString, **arguments: Any
     ) -> dict[str, Any]:
         async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+            await self._execute(cursor, query, arguments)
 
             result = await cursor.fetchone()
 
@@ -242,10 +318,35 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         self, query: LiteralString, **arguments: Any
     ) -> list[dict[str, Any]]:
         async with self._get_cursor() as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+            await self._execute(cursor, query, arguments)
 
             return await cursor.fetchall()
 
+    @wrap_exceptions()
+    async def execute_queries_one_async(
+        self, queries: Sequence[tuple[LiteralString, dict[str, Any]]]
+    ) -> list[dict[str, Any]]:
+        if not self._pipeline:
+            return await super().execute_queries_one_async(queries)
+
+        async with self.pool.connection() as connection:
+            async with connection.pipeline():
+                cursors = [self._make_cursor(connection) for _ in queries]
+                try:
+                    for cursor, (query, arguments) in zip(cursors, queries):
+                        await self._execute(cursor, query, arguments)
+
+                    results = []
+                    for cursor in cursors:
+                        result = await cursor.fetchone()
+                        if result is None:
+                            raise exceptions.NoResult
+                        results.append(result)
+                    return results
+                finally:
+                    for cursor in cursors:
+                        await cursor.close()
+
     @wrap_exceptions()
     async def execute_query_one_async_with_connection(
         self,
@@ -254,7 +355,7 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         **arguments: Any,
     ) -> dict[str, Any]:
         async with self._get_cursor(connection=connection) as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+            await self._execute(cursor, query, arguments)
 
             result = await cursor.fetchone()
 
@@ -270,7 +371,30 @@ class PsycopgConnector(connector.BaseAsyncConnector):
         **arguments: Any,
     ) -> list[dict[str, Any]]:
         async with self._get_cursor(connection=connection) as cursor:
-            await cursor.execute(query, self._wrap_json(arguments))
+            await self._execute(cursor, query, arguments)
+
+            return await cursor.fetchall()
+
+    @wrap_exceptions()
+    async def copy_and_execute_query_all_async(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        # The pool connection context commits the transaction when leaving it
+        async with self._get_cursor() as cursor:
+            await cursor.execute(setup_query)
+            copy_query = sync_psycopg_connector.make_copy_query(
+                table=table, columns=columns
+            )
+            async with cursor.copy(copy_query) as copy:
+                for row in rows:
+                    await copy.write_row(self._wrap_value(tuple(row)))
+            await self._execute(cursor, query, arguments)
 
             return await cursor.fetchall()
 
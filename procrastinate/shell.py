@@ -85,6 +85,7 @@ class ProcrastinateShell(cmd.Cmd):
             print(
                 f"{queue['name']}: {queue['jobs_count']} jobs ("
                 f"todo: {queue['todo']}, "
+                f"scheduled: {queue['scheduled']}, "
                 f"doing: {queue['doing']}, "
                 f"succeeded: {queue['succeeded']}, "
                 f"failed: {queue['failed']}, "
@@ -107,6 +108,7 @@ class ProcrastinateShell(cmd.Cmd):
             print(
                 f"{task['name']}: {task['jobs_count']} jobs ("
                 f"todo: {task['todo']}, "
+                f"scheduled: {task['scheduled']}, "
                 f"doing: {task['doing']}, "
                 f"succeeded: {task['succeeded']}, "
                 f"failed: {task['failed']}, "
@@ -129,6 +131,7 @@ class ProcrastinateShell(cmd.Cmd):
             print(
                 f"{lock['name']}: {lock['jobs_count']} jobs ("
                 f"todo: {lock['todo']}, "
+                f"scheduled: {lock['scheduled']}, "
                 f"doing: {lock['doing']}, "
                 f"succeeded: {lock['succeeded']}, "
                 f"failed: {lock['failed']}, "
@@ -0,0 +1,56 @@
+-- Migration: Add procrastinate_fetch_jobs_v1 to fetch several jobs in a single call
+CREATE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Only the first job of each lock (by priority, then id) can pass the
+    -- lock check below, so a single call never returns 2 jobs sharing a lock.
+    RETURN QUERY
+    WITH candidate AS (
+        SELECT jobs.*
+            FROM procrastinate_jobs AS jobs
+            WHERE
+                -- reject the job if its lock has earlier or higher priority jobs
+                NOT EXISTS (
+                    SELECT 1
+                        FROM procrastinate_jobs AS other_jobs
+                        WHERE
+                            jobs.lock IS NOT NULL
+                            AND other_jobs.lock = jobs.lock
+                            AND (
+                                -- job with same lock is already running
+                                other_jobs.status = 'doing'
+                                OR
+                                -- job with same lock is waiting and has higher priority (or same priority but was queued first)
+                                (
+                                    other_jobs.status = 'todo'
+                                    AND (
+                                        other_jobs.priority > jobs.priority
+                                        OR (
+                                        other_jobs.priority = jobs.priority
+                                        AND other_jobs.id < jobs.id
+                                        )
+                                    )
+                                )
+                            )
+                )
+                AND jobs.status = 'todo'
+                AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
+                AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT p_limit
+            FOR UPDATE OF jobs SKIP LOCKED
+    ), fetched_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'doing', worker_id = p_worker_id
+            FROM candidate
+            WHERE procrastinate_jobs.id = candidate.id
+            RETURNING procrastinate_jobs.*
+    )
+    SELECT * FROM fetched_jobs ORDER BY priority DESC, id ASC;
+END;
+$$;
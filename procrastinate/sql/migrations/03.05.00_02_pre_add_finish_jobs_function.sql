@@ -0,0 +1,59 @@
+-- Migration: Add procrastinate_finish_jobs_v1 to finish several jobs in a single call
+CREATE FUNCTION procrastinate_finish_jobs_v1(
+    job_ids bigint[],
+    end_statuses procrastinate_job_status[],
+    delete_jobs boolean[]
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _finished_job_ids bigint[];
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM unnest(end_statuses) AS end_status
+        WHERE end_status NOT IN ('succeeded', 'failed', 'aborted')
+    ) THEN
+        RAISE 'End status should be either "succeeded", "failed" or "aborted"';
+    END IF;
+
+    WITH finished_jobs AS (
+        SELECT *
+            FROM unnest(job_ids, end_statuses, delete_jobs)
+                AS f(job_id, end_status, delete_job)
+    ), deleted_jobs AS (
+        DELETE FROM procrastinate_jobs
+            USING finished_jobs
+            WHERE procrastinate_jobs.id = finished_jobs.job_id
+                AND finished_jobs.delete_job
+                AND procrastinate_jobs.status IN ('todo', 'doing')
+            RETURNING procrastinate_jobs.id
+    ), updated_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = finished_jobs.end_status,
+                abort_requested = false,
+                attempts = CASE procrastinate_jobs.status
+                    WHEN 'doing' THEN procrastinate_jobs.attempts + 1
+                    ELSE procrastinate_jobs.attempts
+                END
+            FROM finished_jobs
+            WHERE procrastinate_jobs.id = finished_jobs.job_id
+                AND NOT finished_jobs.delete_job
+                AND procrastinate_jobs.status IN ('todo', 'doing')
+            RETURNING procrastinate_jobs.id
+    )
+    SELECT array_agg(id) INTO _finished_job_ids
+        FROM (
+            SELECT id FROM deleted_jobs
+            UNION ALL
+            SELECT id FROM updated_jobs
+        ) AS done_jobs;
+
+    -- Return the jobs that could not be finished, so that the caller can
+    -- report an error for each of them.
+    RETURN ARRAY(
+        SELECT job_id FROM unnest(job_ids) AS job_id
+        WHERE job_id <> ALL(COALESCE(_finished_job_ids, '{}'))
+    );
+END;
+$$;
@@ -0,0 +1,22 @@
+-- Migration: Add procrastinate_finish_and_fetch_v1 to finish a job and fetch the next one in a single call
+CREATE FUNCTION procrastinate_finish_and_fetch_v1(
+    job_id bigint,
+    end_status procrastinate_job_status,
+    delete_job boolean,
+    target_queue_names character varying[],
+    p_worker_id bigint
+)
+    RETURNS procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    found_jobs procrastinate_jobs;
+BEGIN
+    PERFORM procrastinate_finish_job_v1(job_id, end_status, delete_job);
+
+    SELECT * FROM procrastinate_fetch_jobs_v1(target_queue_names, p_worker_id, 1)
+        INTO found_jobs;
+
+    RETURN found_jobs;
+END;
+$$;
@@ -0,0 +1,202 @@
+-- Migration: Track the locks of the awaiting and running jobs, along with the
+-- first awaiting job of each lock, in a dedicated table, so that fetching a job
+-- only visits the first locks by priority instead of scanning every job sharing
+-- a lock
+CREATE TABLE procrastinate_locks (
+    lock text PRIMARY KEY,
+    doing_job_id bigint,
+    head_job_id bigint,
+    head_priority integer,
+    head_queue_name character varying(128)
+);
+
+CREATE INDEX procrastinate_locks_head_priority_idx_v1 ON procrastinate_locks(head_priority desc, head_job_id asc) WHERE (doing_job_id IS NULL AND head_job_id IS NOT NULL);
+
+CREATE INDEX procrastinate_jobs_lock_priority_idx_v1 ON procrastinate_jobs(lock, priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status);
+CREATE INDEX procrastinate_jobs_no_lock_priority_idx_v1 ON procrastinate_jobs(priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status AND lock IS NULL);
+
+CREATE FUNCTION procrastinate_trigger_function_locks_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _locks text[];
+    _locked_count integer;
+BEGIN
+    -- The locks of the awaiting or running jobs changed by the statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT lock) INTO _locks
+            FROM new_jobs
+            WHERE lock IS NOT NULL AND status IN ('todo', 'doing');
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT lock) INTO _locks
+            FROM old_jobs
+            WHERE lock IS NOT NULL AND status IN ('todo', 'doing');
+    ELSE
+        SELECT array_agg(DISTINCT changed.lock) INTO _locks
+            FROM old_jobs
+            JOIN new_jobs ON new_jobs.id = old_jobs.id
+            CROSS JOIN LATERAL (
+                VALUES (old_jobs.lock, old_jobs.status), (new_jobs.lock, new_jobs.status)
+            ) AS changed (lock, status)
+            WHERE (old_jobs.status, old_jobs.lock, old_jobs.priority, old_jobs.queue_name)
+                    IS DISTINCT FROM (new_jobs.status, new_jobs.lock, new_jobs.priority, new_jobs.queue_name)
+                AND changed.lock IS NOT NULL
+                AND changed.status IN ('todo', 'doing');
+    END IF;
+    IF _locks IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- Lock the rows of these locks (creating the missing ones) until the end of
+    -- the transaction, always in the same order, so that concurrent statements
+    -- changing several locks can't deadlock. The jobs are then read again: the
+    -- changes of the transactions that locked a row before are visible from then
+    -- on, and the ones of the transactions locking it after will be visible to
+    -- them. Fetching jobs locks the rows of their locks beforehand, skipping the
+    -- rows already locked, so that it never waits here.
+    LOOP
+        INSERT INTO procrastinate_locks (lock)
+            SELECT lock FROM unnest(_locks) AS lock ORDER BY lock
+            ON CONFLICT DO NOTHING;
+        PERFORM 1 FROM procrastinate_locks
+            WHERE lock = ANY(_locks)
+            ORDER BY lock
+            FOR NO KEY UPDATE;
+        GET DIAGNOSTICS _locked_count = ROW_COUNT;
+        -- a row may have been deleted concurrently, before we could lock it
+        EXIT WHEN _locked_count = cardinality(_locks);
+    END LOOP;
+
+    UPDATE procrastinate_locks
+        SET doing_job_id = (
+                SELECT jobs.id
+                    FROM procrastinate_jobs AS jobs
+                    WHERE jobs.lock = procrastinate_locks.lock AND jobs.status = 'doing'
+            ),
+            (head_job_id, head_priority, head_queue_name) = (
+                SELECT jobs.id, jobs.priority, jobs.queue_name
+                    FROM procrastinate_jobs AS jobs
+                    WHERE jobs.lock = procrastinate_locks.lock AND jobs.status = 'todo'
+                    ORDER BY jobs.priority DESC, jobs.id ASC LIMIT 1
+            )
+        WHERE lock = ANY(_locks);
+
+    -- Delete the rows of the locks that have no awaiting or running job left
+    DELETE FROM procrastinate_locks
+        WHERE lock = ANY(_locks) AND doing_job_id IS NULL AND head_job_id IS NULL;
+
+    RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER procrastinate_trigger_locks_insert_v1
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
+
+CREATE TRIGGER procrastinate_trigger_locks_update_v1
+    AFTER UPDATE ON procrastinate_jobs
+    REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
+
+CREATE TRIGGER procrastinate_trigger_locks_delete_v1
+    AFTER DELETE ON procrastinate_jobs
+    REFERENCING OLD TABLE AS old_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
+
+-- Creating the trigger locked the jobs table for writes: no job can be
+-- deferred or fetched until the end of the migration.
+INSERT INTO procrastinate_locks (lock, doing_job_id, head_job_id, head_priority, head_queue_name)
+    SELECT locks.lock, locks.doing_job_id, head.id, head.priority, head.queue_name
+        FROM (
+            SELECT lock, max(id) FILTER (WHERE status = 'doing') AS doing_job_id
+                FROM procrastinate_jobs
+                WHERE lock IS NOT NULL AND status IN ('todo', 'doing')
+                GROUP BY lock
+        ) AS locks
+        LEFT JOIN LATERAL (
+            SELECT jobs.id, jobs.priority, jobs.queue_name
+                FROM procrastinate_jobs AS jobs
+                WHERE jobs.lock = locks.lock AND jobs.status = 'todo'
+                ORDER BY jobs.priority DESC, jobs.id ASC LIMIT 1
+        ) AS head ON true;
+
+CREATE OR REPLACE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- A job can be fetched if it has no lock, or if it's the first job of its
+    -- lock (by priority, then id) and the lock isn't held by a running job.
+    -- Held locks and the first job of each lock are tracked in
+    -- procrastinate_locks, so that the cost of a fetch doesn't depend on the
+    -- number of locks, or on the number of jobs waiting behind a lock.
+    RETURN QUERY
+    WITH unlocked_candidate AS (
+        SELECT jobs.id, jobs.priority
+            FROM procrastinate_jobs AS jobs
+            WHERE jobs.status = 'todo'
+                AND jobs.lock IS NULL
+                AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
+                AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT p_limit
+            FOR UPDATE OF jobs SKIP LOCKED
+    ), locked_candidate AS (
+        -- the first job of the locks that aren't held, in the order of the
+        -- index: only the locks ranked before the fetched jobs are visited.
+        -- The rows of the locks are locked too, skipping the ones locked by
+        -- a transaction changing their jobs, so that the fetch never waits
+        -- for it, in its trigger on procrastinate_jobs.
+        SELECT jobs.id, jobs.priority
+            FROM procrastinate_locks AS locks
+            JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+            WHERE locks.doing_job_id IS NULL
+                AND locks.head_job_id IS NOT NULL
+                -- checked again once the job is locked, as it may have been
+                -- fetched concurrently
+                AND jobs.status = 'todo'
+                AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
+                AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+            ORDER BY locks.head_priority DESC, locks.head_job_id ASC LIMIT p_limit
+            FOR UPDATE OF jobs SKIP LOCKED
+            FOR NO KEY UPDATE OF locks SKIP LOCKED
+    ), candidate AS (
+        SELECT id, priority FROM unlocked_candidate
+        UNION ALL
+        SELECT id, priority FROM locked_candidate
+        ORDER BY priority DESC, id ASC LIMIT p_limit
+    ), fetched_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'doing', worker_id = p_worker_id
+            FROM candidate
+            WHERE procrastinate_jobs.id = candidate.id
+            RETURNING procrastinate_jobs.*
+    )
+    SELECT * FROM fetched_jobs ORDER BY priority DESC, id ASC;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_fetch_job_v2(
+    target_queue_names character varying[],
+    p_worker_id bigint
+)
+    RETURNS procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+	found_jobs procrastinate_jobs;
+BEGIN
+    SELECT * FROM procrastinate_fetch_jobs_v1(target_queue_names, p_worker_id, 1)
+        INTO found_jobs;
+
+    RETURN found_jobs;
+END;
+$$;
@@ -0,0 +1,3 @@
+-- Migration: Add the "scheduled" status, for jobs scheduled far in the future.
+-- The new value can only be used once this migration is committed.
+ALTER TYPE procrastinate_job_status ADD VALUE 'scheduled';
@@ -0,0 +1,177 @@
+-- Migration: Keep jobs scheduled far in the future in the "scheduled" status,
+-- and promote them to "todo" in batches as they get close to their due time
+CREATE INDEX procrastinate_jobs_scheduled_idx_v1 ON procrastinate_jobs(scheduled_at) WHERE (status = 'scheduled'::procrastinate_job_status);
+
+CREATE FUNCTION procrastinate_defer_jobs_v2(
+    jobs procrastinate_job_to_defer_v1[],
+    scheduled_horizon interval
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    job_ids bigint[];
+BEGIN
+    -- Jobs scheduled further than scheduled_horizon in the future are kept in
+    -- the "scheduled" status, out of the indexes used for fetching, until
+    -- procrastinate_promote_scheduled_jobs_v1 moves them to "todo". Jobs with
+    -- a lock or a queueing lock always go to "todo", as they take part in
+    -- lock ordering and queueing lock unicity as soon as they're deferred.
+    WITH inserted_jobs AS (
+        INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, status)
+        SELECT (job).queue_name,
+               (job).task_name,
+               (job).priority,
+               (job).lock,
+               (job).queueing_lock,
+               (job).args,
+               (job).scheduled_at,
+               CASE
+                   WHEN (job).scheduled_at > now() + scheduled_horizon
+                       AND (job).lock IS NULL
+                       AND (job).queueing_lock IS NULL
+                   THEN 'scheduled'::procrastinate_job_status
+                   ELSE 'todo'::procrastinate_job_status
+               END
+        FROM unnest(jobs) AS job
+        RETURNING id
+    )
+    SELECT array_agg(id) FROM inserted_jobs INTO job_ids;
+
+    RETURN job_ids;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_promote_scheduled_jobs_v1(
+    scheduled_horizon interval,
+    p_limit integer
+)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _promoted_count integer;
+BEGIN
+    WITH promoted_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'todo'
+            WHERE id IN (
+                SELECT id
+                    FROM procrastinate_jobs
+                    WHERE status = 'scheduled'
+                        AND scheduled_at <= now() + scheduled_horizon
+                    ORDER BY scheduled_at
+                    LIMIT p_limit
+                    FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+    )
+    SELECT count(*) FROM promoted_jobs INTO _promoted_count;
+
+    RETURN _promoted_count;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_cancel_job_v1(job_id bigint, abort boolean, delete_job boolean)
+    RETURNS bigint
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _job_id bigint;
+BEGIN
+    IF delete_job THEN
+        DELETE FROM procrastinate_jobs
+        WHERE id = job_id AND status IN ('todo', 'scheduled')
+        RETURNING id INTO _job_id;
+    END IF;
+    IF _job_id IS NULL THEN
+        IF abort THEN
+            UPDATE procrastinate_jobs
+            SET abort_requested = true,
+                status = CASE
+                    WHEN status IN ('todo', 'scheduled') THEN 'cancelled'::procrastinate_job_status ELSE status
+                END
+            WHERE id = job_id AND status IN ('todo', 'scheduled', 'doing')
+            RETURNING id INTO _job_id;
+        ELSE
+            UPDATE procrastinate_jobs
+            SET status = 'cancelled'::procrastinate_job_status
+            WHERE id = job_id AND status IN ('todo', 'scheduled')
+            RETURNING id INTO _job_id;
+        END IF;
+    END IF;
+    RETURN _job_id;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_scheduled_events_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- The job was already scheduled, it's only made runnable
+    IF TG_OP = 'UPDATE' AND OLD.status = 'scheduled' AND NEW.status = 'todo' THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO procrastinate_events(job_id, type, at)
+        VALUES (NEW.id, 'scheduled'::procrastinate_job_event_type, NEW.scheduled_at);
+
+	RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_trigger_function_status_events_update_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    WITH t AS (
+        SELECT CASE
+            WHEN OLD.status = 'todo'::procrastinate_job_status
+                AND NEW.status = 'doing'::procrastinate_job_status
+                THEN 'started'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'todo'::procrastinate_job_status
+                THEN 'deferred_for_retry'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'failed'::procrastinate_job_status
+                THEN 'failed'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'succeeded'::procrastinate_job_status
+                THEN 'succeeded'::procrastinate_job_event_type
+            WHEN OLD.status IN ('todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status)
+                AND (
+                    NEW.status = 'cancelled'::procrastinate_job_status
+                    OR NEW.status = 'failed'::procrastinate_job_status
+                    OR NEW.status = 'succeeded'::procrastinate_job_status
+                )
+                THEN 'cancelled'::procrastinate_job_event_type
+            WHEN OLD.status = 'doing'::procrastinate_job_status
+                AND NEW.status = 'aborted'::procrastinate_job_status
+                THEN 'aborted'::procrastinate_job_event_type
+            WHEN OLD.status = 'failed'::procrastinate_job_status
+                AND NEW.status = 'todo'::procrastinate_job_status
+                THEN 'retried'::procrastinate_job_event_type
+            ELSE NULL
+        END as event_type
+    )
+    INSERT INTO procrastinate_events(job_id, type)
+        SELECT NEW.id, t.event_type
+        FROM t
+        WHERE t.event_type IS NOT NULL;
+	RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER procrastinate_trigger_status_events_insert_v1 ON procrastinate_jobs;
+CREATE TRIGGER procrastinate_trigger_status_events_insert_v1
+    AFTER INSERT ON procrastinate_jobs
+    FOR EACH ROW WHEN ((new.status = ANY (ARRAY['todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status])))
+    EXECUTE PROCEDURE procrastinate_trigger_function_status_events_insert_v1();
+
+DROP TRIGGER procrastinate_trigger_scheduled_events_v1 ON procrastinate_jobs;
+CREATE TRIGGER procrastinate_trigger_scheduled_events_v1
+    AFTER UPDATE OR INSERT ON procrastinate_jobs
+    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = ANY (ARRAY['todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status])))
+    EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v1();
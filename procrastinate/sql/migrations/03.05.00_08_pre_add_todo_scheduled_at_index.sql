@@ -0,0 +1,3 @@
+-- Migration: Index the upcoming scheduled jobs, so that workers can cheaply
+-- know when the next one is due
+CREATE INDEX procrastinate_jobs_todo_scheduled_at_idx_v1 ON procrastinate_jobs(scheduled_at) WHERE (status = 'todo'::procrastinate_job_status AND scheduled_at IS NOT NULL);
@@ -0,0 +1,37 @@
+-- Migration: Notify inserted jobs once per queue and per statement, instead of
+-- once per job
+CREATE FUNCTION procrastinate_notify_queue_jobs_inserted_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    queue RECORD;
+    payload TEXT;
+BEGIN
+    -- One notification per queue for the whole statement, so that deferring
+    -- a batch of jobs doesn't wake the workers up once per job
+    FOR queue IN
+        SELECT queue_name, count(*) AS count
+        FROM new_jobs
+        WHERE status = 'todo'::procrastinate_job_status
+        GROUP BY queue_name
+    LOOP
+        SELECT json_build_object(
+            'type', 'job_inserted', 'queue_name', queue.queue_name, 'count', queue.count
+        )::text INTO payload;
+        PERFORM pg_notify('procrastinate_queue_v1#' || queue.queue_name, payload);
+        PERFORM pg_notify('procrastinate_any_queue_v1', payload);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER procrastinate_jobs_notify_queue_job_inserted_v1 ON procrastinate_jobs;
+
+CREATE TRIGGER procrastinate_jobs_notify_queue_jobs_inserted_v1
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_notify_queue_jobs_inserted_v1();
+
+DROP FUNCTION procrastinate_notify_queue_job_inserted_v1();
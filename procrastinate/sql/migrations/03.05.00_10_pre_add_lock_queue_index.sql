@@ -0,0 +1,148 @@
+-- Migration: Fetch the locked jobs of the requested queues with a per-queue
+-- index probe, so that the locks of other queues are never visited
+CREATE INDEX procrastinate_locks_head_queue_name_priority_idx_v1 ON procrastinate_locks(head_queue_name, head_priority desc, head_job_id asc) WHERE (doing_job_id IS NULL AND head_job_id IS NOT NULL);
+
+CREATE OR REPLACE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _fetched_ids bigint[] := '{}';
+    _visited_ids bigint[] := '{}';
+    _requested integer;
+    _unlocked_ids bigint[];
+    _locked_ids bigint[];
+    _locks text[];
+BEGIN
+    -- A job can be fetched if it has no lock, or if it's the first job of its
+    -- lock (by priority, then id) and the lock isn't held by a running job.
+    -- Held locks and the first job of each lock are tracked in
+    -- procrastinate_locks, so that the cost of a fetch doesn't depend on the
+    -- number of locks, or on the number of jobs waiting behind a lock.
+    -- The candidates are selected without locking them, then locked, skipping
+    -- the ones locked by a concurrent fetch, which are replaced by the next
+    -- candidates: only the fetched jobs are locked.
+    LOOP
+        _requested := p_limit - cardinality(_fetched_ids);
+        WITH unlocked_candidate AS (
+            SELECT jobs.id, jobs.priority, jobs.lock
+                FROM procrastinate_jobs AS jobs
+                WHERE target_queue_names IS NULL
+                    AND jobs.status = 'todo'
+                    AND jobs.lock IS NULL
+                    AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                    AND jobs.id <> ALL(_visited_ids)
+                ORDER BY jobs.priority DESC, jobs.id ASC
+                LIMIT _requested
+        ), queue_unlocked_candidate AS (
+            -- probe the index of each queue separately, then merge, so that
+            -- jobs from other queues are never visited
+            SELECT queue_jobs.id, queue_jobs.priority, queue_jobs.lock
+                FROM (SELECT DISTINCT unnest(target_queue_names) AS queue_name) AS queues
+                CROSS JOIN LATERAL (
+                    SELECT jobs.id, jobs.priority, jobs.lock
+                        FROM procrastinate_jobs AS jobs
+                        WHERE jobs.status = 'todo'
+                            AND jobs.lock IS NULL
+                            AND jobs.queue_name = queues.queue_name
+                            AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                            AND jobs.id <> ALL(_visited_ids)
+                        ORDER BY jobs.priority DESC, jobs.id ASC
+                        LIMIT _requested
+                ) AS queue_jobs
+        ), locked_candidate AS (
+            -- the first job of the locks that aren't held, in the order of the
+            -- index: only the locks ranked before the fetched jobs are visited
+            SELECT jobs.id, jobs.priority, jobs.lock
+                FROM procrastinate_locks AS locks
+                JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                WHERE target_queue_names IS NULL
+                    AND locks.doing_job_id IS NULL
+                    AND locks.head_job_id IS NOT NULL
+                    AND locks.head_job_id <> ALL(_visited_ids)
+                    AND jobs.status = 'todo'
+                    AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                ORDER BY locks.head_priority DESC, locks.head_job_id ASC
+                LIMIT _requested
+        ), queue_locked_candidate AS (
+            -- same, probing the index of each queue separately, like for the
+            -- jobs without a lock
+            SELECT queue_jobs.id, queue_jobs.priority, queue_jobs.lock
+                FROM (SELECT DISTINCT unnest(target_queue_names) AS queue_name) AS queues
+                CROSS JOIN LATERAL (
+                    SELECT jobs.id, jobs.priority, jobs.lock
+                        FROM procrastinate_locks AS locks
+                        JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                        WHERE locks.head_queue_name = queues.queue_name
+                            AND locks.doing_job_id IS NULL
+                            AND locks.head_job_id IS NOT NULL
+                            AND locks.head_job_id <> ALL(_visited_ids)
+                            AND jobs.status = 'todo'
+                            AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                        ORDER BY locks.head_priority DESC, locks.head_job_id ASC
+                        LIMIT _requested
+                ) AS queue_jobs
+        ), candidate AS (
+            SELECT id, priority, lock FROM unlocked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM queue_unlocked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM locked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM queue_locked_candidate
+            ORDER BY priority DESC, id ASC
+            LIMIT _requested
+        )
+        SELECT
+            coalesce(array_agg(id) FILTER (WHERE lock IS NULL), '{}'),
+            coalesce(array_agg(id) FILTER (WHERE lock IS NOT NULL), '{}'),
+            coalesce(array_agg(lock) FILTER (WHERE lock IS NOT NULL), '{}')
+            INTO _unlocked_ids, _locked_ids, _locks
+            FROM candidate;
+
+        _visited_ids := _visited_ids || _unlocked_ids || _locked_ids;
+
+        -- The candidates are checked again once locked, as they may have been
+        -- fetched in the meantime. The rows of the locks are locked too,
+        -- skipping the ones locked by a transaction changing their jobs, so
+        -- that the fetch never waits for it, in its trigger on
+        -- procrastinate_jobs.
+        _fetched_ids := _fetched_ids || ARRAY(
+            SELECT jobs.id
+                FROM procrastinate_jobs AS jobs
+                WHERE jobs.id = ANY(_unlocked_ids)
+                    AND jobs.status = 'todo'
+                    AND jobs.lock IS NULL
+                FOR UPDATE SKIP LOCKED
+        ) || ARRAY(
+            SELECT jobs.id
+                FROM procrastinate_locks AS locks
+                JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                WHERE (locks.lock, locks.head_job_id) IN (
+                        SELECT * FROM unnest(_locks, _locked_ids)
+                    )
+                    AND locks.doing_job_id IS NULL
+                    AND jobs.status = 'todo'
+                FOR UPDATE OF jobs SKIP LOCKED
+                FOR NO KEY UPDATE OF locks SKIP LOCKED
+        );
+
+        -- fewer candidates than requested means that there are no others
+        EXIT WHEN cardinality(_fetched_ids) = p_limit
+            OR cardinality(_unlocked_ids) + cardinality(_locked_ids) < _requested;
+    END LOOP;
+
+    RETURN QUERY
+    WITH fetched_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'doing', worker_id = p_worker_id
+            WHERE id = ANY(_fetched_ids)
+            RETURNING procrastinate_jobs.*
+    )
+    SELECT * FROM fetched_jobs ORDER BY priority DESC, id ASC;
+END;
+$$;
@@ -0,0 +1,14 @@
+-- Migration: Store the queues each worker listens to, so that targeted wake-ups
+-- only count the workers listening to the queue of the new jobs
+ALTER TABLE procrastinate_workers ADD COLUMN queues character varying(128)[];
+
+CREATE FUNCTION procrastinate_register_worker_v2(p_queues character varying[])
+    RETURNS TABLE(worker_id bigint)
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    INSERT INTO procrastinate_workers (queues) VALUES (p_queues)
+    RETURNING procrastinate_workers.id;
+END;
+$$;
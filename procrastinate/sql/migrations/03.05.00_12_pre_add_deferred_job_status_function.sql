@@ -0,0 +1,57 @@
+-- Migration: Compute the status of deferred jobs in a function, shared by
+-- procrastinate_defer_jobs_v2 and the deferral of jobs copied into a staging
+-- table, so that the latter inserts them straight from the table
+CREATE FUNCTION procrastinate_deferred_job_status_v1(
+    p_scheduled_at timestamp with time zone,
+    p_lock text,
+    p_queueing_lock text,
+    scheduled_horizon interval
+)
+    RETURNS procrastinate_job_status
+    LANGUAGE sql
+    STABLE
+AS $$
+    -- Jobs scheduled further than scheduled_horizon in the future are kept in
+    -- the "scheduled" status, out of the indexes used for fetching, until
+    -- procrastinate_promote_scheduled_jobs_v1 moves them to "todo". Jobs with
+    -- a lock or a queueing lock always go to "todo", as they take part in
+    -- lock ordering and queueing lock unicity as soon as they're deferred.
+    SELECT CASE
+        WHEN p_scheduled_at > now() + scheduled_horizon
+            AND p_lock IS NULL
+            AND p_queueing_lock IS NULL
+        THEN 'scheduled'::procrastinate_job_status
+        ELSE 'todo'::procrastinate_job_status
+    END;
+$$;
+
+CREATE OR REPLACE FUNCTION procrastinate_defer_jobs_v2(
+    jobs procrastinate_job_to_defer_v1[],
+    scheduled_horizon interval
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    job_ids bigint[];
+BEGIN
+    WITH inserted_jobs AS (
+        INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, status)
+        SELECT (job).queue_name,
+               (job).task_name,
+               (job).priority,
+               (job).lock,
+               (job).queueing_lock,
+               (job).args,
+               (job).scheduled_at,
+               procrastinate_deferred_job_status_v1(
+                   (job).scheduled_at, (job).lock, (job).queueing_lock, scheduled_horizon
+               )
+        FROM unnest(jobs) AS job
+        RETURNING id
+    )
+    SELECT array_agg(id) FROM inserted_jobs INTO job_ids;
+
+    RETURN job_ids;
+END;
+$$;
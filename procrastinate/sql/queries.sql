@@ -6,11 +6,41 @@
 -- defer_jobs --
 -- Create and enqueue one or more jobs
 SELECT  unnest(
-  procrastinate_defer_jobs_v1(
-    %(jobs)s::procrastinate_job_to_defer_v1[]
+  procrastinate_defer_jobs_v2(
+    %(jobs)s::procrastinate_job_to_defer_v1[],
+    %(scheduled_horizon)s
   )
 ) AS id;
 
+-- create_staged_jobs_table --
+-- Create a table, dropped at the end of the transaction, to copy jobs to defer into
+CREATE TEMPORARY TABLE procrastinate_staged_jobs OF procrastinate_job_to_defer_v1 ON COMMIT DROP;
+
+-- defer_staged_jobs --
+-- Create and enqueue the jobs copied into the staging table
+INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, status)
+SELECT queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at,
+       procrastinate_deferred_job_status_v1(scheduled_at, lock, queueing_lock, %(scheduled_horizon)s)
+    FROM procrastinate_staged_jobs
+RETURNING id;
+
+-- defer_staged_jobs_count --
+-- Create and enqueue the jobs copied into the staging table, only returning their number
+WITH inserted_jobs AS (
+    INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, status)
+    SELECT queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at,
+           procrastinate_deferred_job_status_v1(scheduled_at, lock, queueing_lock, %(scheduled_horizon)s)
+        FROM procrastinate_staged_jobs
+    RETURNING 1
+)
+SELECT count(*) AS count FROM inserted_jobs;
+
+-- list_enqueued_queueing_locks --
+-- Get the queueing locks, among the given ones, of the jobs waiting in the queue
+SELECT DISTINCT queueing_lock
+    FROM procrastinate_jobs
+    WHERE status = 'todo' AND queueing_lock = ANY(%(queueing_locks)s);
+
 -- defer_periodic_job --
 -- Create a periodic job if it doesn't already exist, and delete periodic metadata
 -- for previous jobs in the same task.
@@ -21,6 +51,19 @@ SELECT procrastinate_defer_periodic_job_v2(%(queue)s, %(lock)s, %(queueing_lock)
 SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id
     FROM procrastinate_fetch_job_v2(%(queues)s::varchar[], %(worker_id)s);
 
+-- fetch_jobs --
+-- Get up to a given number of awaiting jobs
+SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id
+    FROM procrastinate_fetch_jobs_v1(%(queues)s::varchar[], %(worker_id)s, %(limit)s);
+
+-- next_scheduled_job_delay --
+-- Get the number of seconds until the earliest upcoming scheduled job is due
+SELECT EXTRACT(EPOCH FROM MIN(scheduled_at) - NOW())::float AS delay
+    FROM procrastinate_jobs
+    WHERE status = 'todo'
+      AND scheduled_at > NOW()
+      AND (%(queues)s::varchar[] IS NULL OR queue_name = ANY(%(queues)s));
+
 -- select_stalled_jobs_by_started --
 -- Get running jobs that started more than a given time ago
 SELECT job.id, status, task_name, priority, lock, queueing_lock,
@@ -34,14 +77,14 @@ WHERE event.type = 'started'
   AND (%(queue)s::varchar IS NULL OR job.queue_name = %(queue)s)
   AND (%(task_name)s::varchar IS NULL OR job.task_name = %(task_name)s)
 GROUP BY job.id
-  HAVING MAX(event.at) < NOW() - (%(nb_seconds)s || 'SECOND')::INTERVAL
+  HAVING MAX(event.at) < NOW() - %(nb_seconds)s * INTERVAL '1 SECOND'
 
 -- select_stalled_jobs_by_heartbeat --
 -- Get running jobs of stalled workers (with absent or outdated heartbeat)
 WITH stalled_workers AS (
    SELECT id
      FROM procrastinate_workers
-    WHERE last_heartbeat < NOW() - (%(seconds_since_heartbeat)s || ' SECOND')::INTERVAL
+    WHERE last_heartbeat < NOW() - %(seconds_since_heartbeat)s * INTERVAL '1 SECOND'
 )
 SELECT job.id, status, task_name, priority, lock, queueing_lock,
        args, scheduled_at, queue_name, attempts, job.worker_id
@@ -65,13 +108,32 @@ WHERE id IN (
     ) AS job
     WHERE job.status = ANY(%(statuses)s::procrastinate_job_status[])
       AND (%(queue)s::varchar IS NULL OR job.queue_name = %(queue)s)
-      AND latest_at < NOW() - (%(nb_hours)s || 'HOUR')::INTERVAL
+      AND latest_at < NOW() - %(nb_hours)s * INTERVAL '1 HOUR'
 )
 
 -- finish_job --
 -- Finish a job, changing it from "doing" to "succeeded" or "failed"
 SELECT procrastinate_finish_job_v1(%(job_id)s, %(status)s, %(delete_job)s);
 
+-- finish_jobs --
+-- Finish several jobs at once, returning the ids of the jobs that could not be finished
+SELECT unnest(
+  procrastinate_finish_jobs_v1(
+    %(job_ids)s::bigint[],
+    %(statuses)s::procrastinate_job_status[],
+    %(delete_jobs)s::boolean[]
+  )
+) AS id;
+
+-- finish_and_fetch_job --
+-- Finish a job, then get the next awaiting job, in a single transaction
+SELECT id, status, task_name, priority, lock, queueing_lock, args, scheduled_at, queue_name, attempts, worker_id
+    FROM procrastinate_finish_and_fetch_v1(%(job_id)s, %(status)s, %(delete_job)s, %(queues)s::varchar[], %(worker_id)s);
+
+-- promote_scheduled_jobs --
+-- Move a batch of jobs that are close to their due time from "scheduled" to "todo"
+SELECT procrastinate_promote_scheduled_jobs_v1(%(scheduled_horizon)s, %(limit)s) AS count;
+
 -- cancel_job --
 -- Cancel a job, changing it from "todo" to "cancelled" or mark for abortion
 SELECT procrastinate_cancel_job_v1(%(job_id)s, %(abort)s, %(delete_job)s) AS id;
@@ -222,7 +284,7 @@ AND (%(queue_name)s::varchar IS NULL OR queue_name = %(queue_name)s)
 
 -- register_worker --
 -- Register a newly started worker
-SELECT * FROM procrastinate_register_worker_v1()
+SELECT * FROM procrastinate_register_worker_v2(%(queues)s::varchar[])
 
 -- unregister_worker --
 -- Unregister a finished worker
@@ -232,6 +294,31 @@ SELECT procrastinate_unregister_worker_v1(%(worker_id)s)
 -- Update the heartbeat of a worker
 SELECT procrastinate_update_heartbeat_v1(%(worker_id)s)
 
+-- update_heartbeats --
+-- Update the heartbeat of several workers at once
+WITH updated AS (
+    UPDATE procrastinate_workers
+       SET last_heartbeat = NOW()
+     WHERE id = ANY(%(worker_ids)s::bigint[])
+ RETURNING id
+)
+SELECT count(*) AS count FROM updated
+
 -- prune_stalled_workers --
 -- Delete stalled workers that haven't sent a heartbeat in a while
 SELECT * FROM procrastinate_prune_stalled_workers_v1(%(seconds_since_heartbeat)s)
+
+-- count_workers --
+-- Count the registered workers listening to all the queues, and, for each queue,
+-- the workers listening to this queue specifically
+SELECT
+    count(*) FILTER (WHERE queues IS NULL) AS all_queues_count,
+    COALESCE((
+        SELECT jsonb_object_agg(queue_name, count)
+        FROM (
+            SELECT queue_name, count(*) AS count
+            FROM procrastinate_workers, unnest(queues) AS queue_name
+            GROUP BY queue_name
+        ) AS queue_counts
+    ), '{}') AS queues_count
+FROM procrastinate_workers;
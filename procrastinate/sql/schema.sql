@@ -27,7 +27,8 @@ CREATE TYPE procrastinate_job_status AS ENUM (
     'failed',  -- The job ended with an error
     'cancelled', -- The job was cancelled
     'aborting',  -- legacy, not used anymore since v3.0.0
-    'aborted'  -- The job was aborted
+    'aborted',  -- The job was aborted
+    'scheduled'  -- The job is scheduled far in the future, and not runnable yet
 );
 
 CREATE TYPE procrastinate_job_event_type AS ENUM (
@@ -59,7 +60,8 @@ CREATE TYPE procrastinate_job_to_defer_v1 AS (
 
 CREATE TABLE procrastinate_workers(
     id bigint PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
-    last_heartbeat timestamp with time zone NOT NULL DEFAULT NOW()
+    last_heartbeat timestamp with time zone NOT NULL DEFAULT NOW(),
+    queues character varying(128)[]
 );
 
 CREATE TABLE procrastinate_jobs (
@@ -87,6 +89,18 @@ CREATE TABLE procrastinate_periodic_defers (
     CONSTRAINT procrastinate_periodic_defers_unique UNIQUE (task_name, periodic_id, defer_timestamp)
 );
 
+-- Locks of the awaiting or running jobs, maintained by triggers on
+-- procrastinate_jobs. doing_job_id is the running job holding the lock, if any.
+-- head_* describe the first awaiting job of the lock (by priority, then id), if
+-- any: the only one of its jobs that can be fetched.
+CREATE TABLE procrastinate_locks (
+    lock text PRIMARY KEY,
+    doing_job_id bigint,
+    head_job_id bigint,
+    head_priority integer,
+    head_queue_name character varying(128)
+);
+
 CREATE TABLE procrastinate_events (
     id bigserial PRIMARY KEY,
     job_id bigint NOT NULL REFERENCES procrastinate_jobs ON DELETE CASCADE,
@@ -108,6 +122,16 @@ CREATE INDEX procrastinate_jobs_queue_name_idx_v1 ON procrastinate_jobs(queue_na
 CREATE INDEX procrastinate_jobs_id_lock_idx_v1 ON procrastinate_jobs (id, lock) WHERE status = ANY (ARRAY['todo'::procrastinate_job_status, 'doing'::procrastinate_job_status]);
 CREATE INDEX procrastinate_jobs_priority_idx_v1 ON procrastinate_jobs(priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status);
 
+CREATE INDEX procrastinate_jobs_lock_priority_idx_v1 ON procrastinate_jobs(lock, priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status);
+CREATE INDEX procrastinate_jobs_queue_name_priority_idx_v1 ON procrastinate_jobs(queue_name, priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status AND lock IS NULL);
+CREATE INDEX procrastinate_jobs_no_lock_priority_idx_v1 ON procrastinate_jobs(priority desc, id asc) WHERE (status = 'todo'::procrastinate_job_status AND lock IS NULL);
+
+CREATE INDEX procrastinate_jobs_scheduled_idx_v1 ON procrastinate_jobs(scheduled_at) WHERE (status = 'scheduled'::procrastinate_job_status);
+CREATE INDEX procrastinate_jobs_todo_scheduled_at_idx_v1 ON procrastinate_jobs(scheduled_at) WHERE (status = 'todo'::procrastinate_job_status AND scheduled_at IS NOT NULL);
+
+CREATE INDEX procrastinate_locks_head_priority_idx_v1 ON procrastinate_locks(head_priority desc, head_job_id asc) WHERE (doing_job_id IS NULL AND head_job_id IS NOT NULL);
+CREATE INDEX procrastinate_locks_head_queue_name_priority_idx_v1 ON procrastinate_locks(head_queue_name, head_priority desc, head_job_id asc) WHERE (doing_job_id IS NULL AND head_job_id IS NOT NULL);
+
 CREATE INDEX procrastinate_events_job_id_fkey_v1 ON procrastinate_events(job_id);
 
 CREATE INDEX procrastinate_periodic_defers_job_id_fkey_v1 ON procrastinate_periodic_defers(job_id);
@@ -142,6 +166,61 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_deferred_job_status_v1(
+    p_scheduled_at timestamp with time zone,
+    p_lock text,
+    p_queueing_lock text,
+    scheduled_horizon interval
+)
+    RETURNS procrastinate_job_status
+    LANGUAGE sql
+    STABLE
+AS $$
+    -- Jobs scheduled further than scheduled_horizon in the future are kept in
+    -- the "scheduled" status, out of the indexes used for fetching, until
+    -- procrastinate_promote_scheduled_jobs_v1 moves them to "todo". Jobs with
+    -- a lock or a queueing lock always go to "todo", as they take part in
+    -- lock ordering and queueing lock unicity as soon as they're deferred.
+    SELECT CASE
+        WHEN p_scheduled_at > now() + scheduled_horizon
+            AND p_lock IS NULL
+            AND p_queueing_lock IS NULL
+        THEN 'scheduled'::procrastinate_job_status
+        ELSE 'todo'::procrastinate_job_status
+    END;
+$$;
+
+CREATE FUNCTION procrastinate_defer_jobs_v2(
+    jobs procrastinate_job_to_defer_v1[],
+    scheduled_horizon interval
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    job_ids bigint[];
+BEGIN
+    WITH inserted_jobs AS (
+        INSERT INTO procrastinate_jobs (queue_name, task_name, priority, lock, queueing_lock, args, scheduled_at, status)
+        SELECT (job).queue_name,
+               (job).task_name,
+               (job).priority,
+               (job).lock,
+               (job).queueing_lock,
+               (job).args,
+               (job).scheduled_at,
+               procrastinate_deferred_job_status_v1(
+                   (job).scheduled_at, (job).lock, (job).queueing_lock, scheduled_horizon
+               )
+        FROM unnest(jobs) AS job
+        RETURNING id
+    )
+    SELECT array_agg(id) FROM inserted_jobs INTO job_ids;
+
+    RETURN job_ids;
+END;
+$$;
+
 CREATE FUNCTION procrastinate_defer_periodic_job_v2(
     _queue_name character varying,
     _lock character varying,
@@ -217,47 +296,155 @@ AS $$
 DECLARE
 	found_jobs procrastinate_jobs;
 BEGIN
-    WITH candidate AS (
-        SELECT jobs.*
-            FROM procrastinate_jobs AS jobs
-            WHERE
-                -- reject the job if its lock has earlier or higher priority jobs
-                NOT EXISTS (
-                    SELECT 1
-                        FROM procrastinate_jobs AS other_jobs
-                        WHERE
-                            jobs.lock IS NOT NULL
-                            AND other_jobs.lock = jobs.lock
-                            AND (
-                                -- job with same lock is already running
-                                other_jobs.status = 'doing'
-                                OR
-                                -- job with same lock is waiting and has higher priority (or same priority but was queued first)
-                                (
-                                    other_jobs.status = 'todo'
-                                    AND (
-                                        other_jobs.priority > jobs.priority
-                                        OR (
-                                        other_jobs.priority = jobs.priority
-                                        AND other_jobs.id < jobs.id
-                                        )
-                                    )
-                                )
-                            )
-                )
-                AND jobs.status = 'todo'
-                AND (target_queue_names IS NULL OR jobs.queue_name = ANY( target_queue_names ))
-                AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
-            ORDER BY jobs.priority DESC, jobs.id ASC LIMIT 1
-            FOR UPDATE OF jobs SKIP LOCKED
-    )
-    UPDATE procrastinate_jobs
-        SET status = 'doing', worker_id = p_worker_id
-        FROM candidate
-        WHERE procrastinate_jobs.id = candidate.id
-        RETURNING procrastinate_jobs.* INTO found_jobs;
+    SELECT * FROM procrastinate_fetch_jobs_v1(target_queue_names, p_worker_id, 1)
+        INTO found_jobs;
 
- RETURN found_jobs;
+    RETURN found_jobs;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_fetch_jobs_v1(
+    target_queue_names character varying[],
+    p_worker_id bigint,
+    p_limit integer
+)
+    RETURNS SETOF procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _fetched_ids bigint[] := '{}';
+    _visited_ids bigint[] := '{}';
+    _requested integer;
+    _unlocked_ids bigint[];
+    _locked_ids bigint[];
+    _locks text[];
+BEGIN
+    -- A job can be fetched if it has no lock, or if it's the first job of its
+    -- lock (by priority, then id) and the lock isn't held by a running job.
+    -- Held locks and the first job of each lock are tracked in
+    -- procrastinate_locks, so that the cost of a fetch doesn't depend on the
+    -- number of locks, or on the number of jobs waiting behind a lock.
+    -- The candidates are selected without locking them, then locked, skipping
+    -- the ones locked by a concurrent fetch, which are replaced by the next
+    -- candidates: only the fetched jobs are locked.
+    LOOP
+        _requested := p_limit - cardinality(_fetched_ids);
+        WITH unlocked_candidate AS (
+            SELECT jobs.id, jobs.priority, jobs.lock
+                FROM procrastinate_jobs AS jobs
+                WHERE target_queue_names IS NULL
+                    AND jobs.status = 'todo'
+                    AND jobs.lock IS NULL
+                    AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                    AND jobs.id <> ALL(_visited_ids)
+                ORDER BY jobs.priority DESC, jobs.id ASC
+                LIMIT _requested
+        ), queue_unlocked_candidate AS (
+            -- probe the index of each queue separately, then merge, so that
+            -- jobs from other queues are never visited
+            SELECT queue_jobs.id, queue_jobs.priority, queue_jobs.lock
+                FROM (SELECT DISTINCT unnest(target_queue_names) AS queue_name) AS queues
+                CROSS JOIN LATERAL (
+                    SELECT jobs.id, jobs.priority, jobs.lock
+                        FROM procrastinate_jobs AS jobs
+                        WHERE jobs.status = 'todo'
+                            AND jobs.lock IS NULL
+                            AND jobs.queue_name = queues.queue_name
+                            AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                            AND jobs.id <> ALL(_visited_ids)
+                        ORDER BY jobs.priority DESC, jobs.id ASC
+                        LIMIT _requested
+                ) AS queue_jobs
+        ), locked_candidate AS (
+            -- the first job of the locks that aren't held, in the order of the
+            -- index: only the locks ranked before the fetched jobs are visited
+            SELECT jobs.id, jobs.priority, jobs.lock
+                FROM procrastinate_locks AS locks
+                JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                WHERE target_queue_names IS NULL
+                    AND locks.doing_job_id IS NULL
+                    AND locks.head_job_id IS NOT NULL
+                    AND locks.head_job_id <> ALL(_visited_ids)
+                    AND jobs.status = 'todo'
+                    AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                ORDER BY locks.head_priority DESC, locks.head_job_id ASC
+                LIMIT _requested
+        ), queue_locked_candidate AS (
+            -- same, probing the index of each queue separately, like for the
+            -- jobs without a lock
+            SELECT queue_jobs.id, queue_jobs.priority, queue_jobs.lock
+                FROM (SELECT DISTINCT unnest(target_queue_names) AS queue_name) AS queues
+                CROSS JOIN LATERAL (
+                    SELECT jobs.id, jobs.priority, jobs.lock
+                        FROM procrastinate_locks AS locks
+                        JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                        WHERE locks.head_queue_name = queues.queue_name
+                            AND locks.doing_job_id IS NULL
+                            AND locks.head_job_id IS NOT NULL
+                            AND locks.head_job_id <> ALL(_visited_ids)
+                            AND jobs.status = 'todo'
+                            AND (jobs.scheduled_at IS NULL OR jobs.scheduled_at <= now())
+                        ORDER BY locks.head_priority DESC, locks.head_job_id ASC
+                        LIMIT _requested
+                ) AS queue_jobs
+        ), candidate AS (
+            SELECT id, priority, lock FROM unlocked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM queue_unlocked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM locked_candidate
+            UNION ALL
+            SELECT id, priority, lock FROM queue_locked_candidate
+            ORDER BY priority DESC, id ASC
+            LIMIT _requested
+        )
+        SELECT
+            coalesce(array_agg(id) FILTER (WHERE lock IS NULL), '{}'),
+            coalesce(array_agg(id) FILTER (WHERE lock IS NOT NULL), '{}'),
+            coalesce(array_agg(lock) FILTER (WHERE lock IS NOT NULL), '{}')
+            INTO _unlocked_ids, _locked_ids, _locks
+            FROM candidate;
+
+        _visited_ids := _visited_ids || _unlocked_ids || _locked_ids;
+
+        -- The candidates are checked again once locked, as they may have been
+        -- fetched in the meantime. The rows of the locks are locked too,
+        -- skipping the ones locked by a transaction changing their jobs, so
+        -- that the fetch never waits for it, in its trigger on
+        -- procrastinate_jobs.
+        _fetched_ids := _fetched_ids || ARRAY(
+            SELECT jobs.id
+                FROM procrastinate_jobs AS jobs
+                WHERE jobs.id = ANY(_unlocked_ids)
+                    AND jobs.status = 'todo'
+                    AND jobs.lock IS NULL
+                FOR UPDATE SKIP LOCKED
+        ) || ARRAY(
+            SELECT jobs.id
+                FROM procrastinate_locks AS locks
+                JOIN procrastinate_jobs AS jobs ON jobs.id = locks.head_job_id
+                WHERE (locks.lock, locks.head_job_id) IN (
+                        SELECT * FROM unnest(_locks, _locked_ids)
+                    )
+                    AND locks.doing_job_id IS NULL
+                    AND jobs.status = 'todo'
+                FOR UPDATE OF jobs SKIP LOCKED
+                FOR NO KEY UPDATE OF locks SKIP LOCKED
+        );
+
+        -- fewer candidates than requested means that there are no others
+        EXIT WHEN cardinality(_fetched_ids) = p_limit
+            OR cardinality(_unlocked_ids) + cardinality(_locked_ids) < _requested;
+    END LOOP;
+
+    RETURN QUERY
+    WITH fetched_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'doing', worker_id = p_worker_id
+            WHERE id = ANY(_fetched_ids)
+            RETURNING procrastinate_jobs.*
+    )
+    SELECT * FROM fetched_jobs ORDER BY priority DESC, id ASC;
 END;
 $$;
 
@@ -291,6 +478,117 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_finish_jobs_v1(
+    job_ids bigint[],
+    end_statuses procrastinate_job_status[],
+    delete_jobs boolean[]
+)
+    RETURNS bigint[]
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _finished_job_ids bigint[];
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM unnest(end_statuses) AS end_status
+        WHERE end_status NOT IN ('succeeded', 'failed', 'aborted')
+    ) THEN
+        RAISE 'End status should be either "succeeded", "failed" or "aborted"';
+    END IF;
+
+    WITH finished_jobs AS (
+        SELECT *
+            FROM unnest(job_ids, end_statuses, delete_jobs)
+                AS f(job_id, end_status, delete_job)
+    ), deleted_jobs AS (
+        DELETE FROM procrastinate_jobs
+            USING finished_jobs
+            WHERE procrastinate_jobs.id = finished_jobs.job_id
+                AND finished_jobs.delete_job
+                AND procrastinate_jobs.status IN ('todo', 'doing')
+            RETURNING procrastinate_jobs.id
+    ), updated_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = finished_jobs.end_status,
+                abort_requested = false,
+                attempts = CASE procrastinate_jobs.status
+                    WHEN 'doing' THEN procrastinate_jobs.attempts + 1
+                    ELSE procrastinate_jobs.attempts
+                END
+            FROM finished_jobs
+            WHERE procrastinate_jobs.id = finished_jobs.job_id
+                AND NOT finished_jobs.delete_job
+                AND procrastinate_jobs.status IN ('todo', 'doing')
+            RETURNING procrastinate_jobs.id
+    )
+    SELECT array_agg(id) INTO _finished_job_ids
+        FROM (
+            SELECT id FROM deleted_jobs
+            UNION ALL
+            SELECT id FROM updated_jobs
+        ) AS done_jobs;
+
+    -- Return the jobs that could not be finished, so that the caller can
+    -- report an error for each of them.
+    RETURN ARRAY(
+        SELECT job_id FROM unnest(job_ids) AS job_id
+        WHERE job_id <> ALL(COALESCE(_finished_job_ids, '{}'))
+    );
+END;
+$$;
+
+CREATE FUNCTION procrastinate_finish_and_fetch_v1(
+    job_id bigint,
+    end_status procrastinate_job_status,
+    delete_job boolean,
+    target_queue_names character varying[],
+    p_worker_id bigint
+)
+    RETURNS procrastinate_jobs
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    found_jobs procrastinate_jobs;
+BEGIN
+    PERFORM procrastinate_finish_job_v1(job_id, end_status, delete_job);
+
+    SELECT * FROM procrastinate_fetch_jobs_v1(target_queue_names, p_worker_id, 1)
+        INTO found_jobs;
+
+    RETURN found_jobs;
+END;
+$$;
+
+CREATE FUNCTION procrastinate_promote_scheduled_jobs_v1(
+    scheduled_horizon interval,
+    p_limit integer
+)
+    RETURNS integer
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _promoted_count integer;
+BEGIN
+    WITH promoted_jobs AS (
+        UPDATE procrastinate_jobs
+            SET status = 'todo'
+            WHERE id IN (
+                SELECT id
+                    FROM procrastinate_jobs
+                    WHERE status = 'scheduled'
+                        AND scheduled_at <= now() + scheduled_horizon
+                    ORDER BY scheduled_at
+                    LIMIT p_limit
+                    FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id
+    )
+    SELECT count(*) FROM promoted_jobs INTO _promoted_count;
+
+    RETURN _promoted_count;
+END;
+$$;
+
 CREATE FUNCTION procrastinate_cancel_job_v1(job_id bigint, abort boolean, delete_job boolean)
     RETURNS bigint
     LANGUAGE plpgsql
@@ -300,22 +598,22 @@ DECLARE
 BEGIN
     IF delete_job THEN
         DELETE FROM procrastinate_jobs
-        WHERE id = job_id AND status = 'todo'
+        WHERE id = job_id AND status IN ('todo', 'scheduled')
         RETURNING id INTO _job_id;
     END IF;
     IF _job_id IS NULL THEN
         IF abort THEN
             UPDATE procrastinate_jobs
             SET abort_requested = true,
-                status = CASE status
-                    WHEN 'todo' THEN 'cancelled'::procrastinate_job_status ELSE status
+                status = CASE
+                    WHEN status IN ('todo', 'scheduled') THEN 'cancelled'::procrastinate_job_status ELSE status
                 END
-            WHERE id = job_id AND status IN ('todo', 'doing')
+            WHERE id = job_id AND status IN ('todo', 'scheduled', 'doing')
             RETURNING id INTO _job_id;
         ELSE
             UPDATE procrastinate_jobs
             SET status = 'cancelled'::procrastinate_job_status
-            WHERE id = job_id AND status = 'todo'
+            WHERE id = job_id AND status IN ('todo', 'scheduled')
             RETURNING id INTO _job_id;
         END IF;
     END IF;
@@ -401,17 +699,29 @@ BEGIN
 END;
 $$;
 
-CREATE FUNCTION procrastinate_notify_queue_job_inserted_v1()
+CREATE FUNCTION procrastinate_notify_queue_jobs_inserted_v1()
     RETURNS trigger
     LANGUAGE plpgsql
 AS $$
 DECLARE
+    queue RECORD;
     payload TEXT;
 BEGIN
-    SELECT json_build_object('type', 'job_inserted', 'job_id', NEW.id)::text INTO payload;
-	PERFORM pg_notify('procrastinate_queue_v1#' || NEW.queue_name, payload);
-	PERFORM pg_notify('procrastinate_any_queue_v1', payload);
-	RETURN NEW;
+    -- One notification per queue for the whole statement, so that deferring
+    -- a batch of jobs doesn't wake the workers up once per job
+    FOR queue IN
+        SELECT queue_name, count(*) AS count
+        FROM new_jobs
+        WHERE status = 'todo'::procrastinate_job_status
+        GROUP BY queue_name
+    LOOP
+        SELECT json_build_object(
+            'type', 'job_inserted', 'queue_name', queue.queue_name, 'count', queue.count
+        )::text INTO payload;
+        PERFORM pg_notify('procrastinate_queue_v1#' || queue.queue_name, payload);
+        PERFORM pg_notify('procrastinate_any_queue_v1', payload);
+    END LOOP;
+    RETURN NULL;
 END;
 $$;
 
@@ -459,7 +769,7 @@ BEGIN
             WHEN OLD.status = 'doing'::procrastinate_job_status
                 AND NEW.status = 'succeeded'::procrastinate_job_status
                 THEN 'succeeded'::procrastinate_job_event_type
-            WHEN OLD.status = 'todo'::procrastinate_job_status
+            WHEN OLD.status IN ('todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status)
                 AND (
                     NEW.status = 'cancelled'::procrastinate_job_status
                     OR NEW.status = 'failed'::procrastinate_job_status
@@ -488,6 +798,11 @@ CREATE FUNCTION procrastinate_trigger_function_scheduled_events_v1()
     LANGUAGE plpgsql
 AS $$
 BEGIN
+    -- The job was already scheduled, it's only made runnable
+    IF TG_OP = 'UPDATE' AND OLD.status = 'scheduled' AND NEW.status = 'todo' THEN
+        RETURN NEW;
+    END IF;
+
     INSERT INTO procrastinate_events(job_id, type, at)
         VALUES (NEW.id, 'scheduled'::procrastinate_job_event_type, NEW.scheduled_at);
 
@@ -506,6 +821,81 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_trigger_function_locks_v1()
+    RETURNS trigger
+    LANGUAGE plpgsql
+AS $$
+DECLARE
+    _locks text[];
+    _locked_count integer;
+BEGIN
+    -- The locks of the awaiting or running jobs changed by the statement
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(DISTINCT lock) INTO _locks
+            FROM new_jobs
+            WHERE lock IS NOT NULL AND status IN ('todo', 'doing');
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT lock) INTO _locks
+            FROM old_jobs
+            WHERE lock IS NOT NULL AND status IN ('todo', 'doing');
+    ELSE
+        SELECT array_agg(DISTINCT changed.lock) INTO _locks
+            FROM old_jobs
+            JOIN new_jobs ON new_jobs.id = old_jobs.id
+            CROSS JOIN LATERAL (
+                VALUES (old_jobs.lock, old_jobs.status), (new_jobs.lock, new_jobs.status)
+            ) AS changed (lock, status)
+            WHERE (old_jobs.status, old_jobs.lock, old_jobs.priority, old_jobs.queue_name)
+                    IS DISTINCT FROM (new_jobs.status, new_jobs.lock, new_jobs.priority, new_jobs.queue_name)
+                AND changed.lock IS NOT NULL
+                AND changed.status IN ('todo', 'doing');
+    END IF;
+    IF _locks IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    -- Lock the rows of these locks (creating the missing ones) until the end of
+    -- the transaction, always in the same order, so that concurrent statements
+    -- changing several locks can't deadlock. The jobs are then read again: the
+    -- changes of the transactions that locked a row before are visible from then
+    -- on, and the ones of the transactions locking it after will be visible to
+    -- them. Fetching jobs locks the rows of their locks beforehand, skipping the
+    -- rows already locked, so that it never waits here.
+    LOOP
+        INSERT INTO procrastinate_locks (lock)
+            SELECT lock FROM unnest(_locks) AS lock ORDER BY lock
+            ON CONFLICT DO NOTHING;
+        PERFORM 1 FROM procrastinate_locks
+            WHERE lock = ANY(_locks)
+            ORDER BY lock
+            FOR NO KEY UPDATE;
+        GET DIAGNOSTICS _locked_count = ROW_COUNT;
+        -- a row may have been deleted concurrently, before we could lock it
+        EXIT WHEN _locked_count = cardinality(_locks);
+    END LOOP;
+
+    UPDATE procrastinate_locks
+        SET doing_job_id = (
+                SELECT jobs.id
+                    FROM procrastinate_jobs AS jobs
+                    WHERE jobs.lock = procrastinate_locks.lock AND jobs.status = 'doing'
+            ),
+            (head_job_id, head_priority, head_queue_name) = (
+                SELECT jobs.id, jobs.priority, jobs.queue_name
+                    FROM procrastinate_jobs AS jobs
+                    WHERE jobs.lock = procrastinate_locks.lock AND jobs.status = 'todo'
+                    ORDER BY jobs.priority DESC, jobs.id ASC LIMIT 1
+            )
+        WHERE lock = ANY(_locks);
+
+    -- Delete the rows of the locks that have no awaiting or running job left
+    DELETE FROM procrastinate_locks
+        WHERE lock = ANY(_locks) AND doing_job_id IS NULL AND head_job_id IS NULL;
+
+    RETURN NULL;
+END;
+$$;
+
 CREATE FUNCTION procrastinate_unlink_periodic_defers_v1()
     RETURNS trigger
     LANGUAGE plpgsql
@@ -529,6 +919,17 @@ BEGIN
 END;
 $$;
 
+CREATE FUNCTION procrastinate_register_worker_v2(p_queues character varying[])
+    RETURNS TABLE(worker_id bigint)
+    LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    INSERT INTO procrastinate_workers (queues) VALUES (p_queues)
+    RETURNING procrastinate_workers.id;
+END;
+$$;
+
 CREATE FUNCTION procrastinate_unregister_worker_v1(worker_id bigint)
     RETURNS void
     LANGUAGE plpgsql
@@ -564,10 +965,11 @@ $$;
 
 -- Triggers
 
-CREATE TRIGGER procrastinate_jobs_notify_queue_job_inserted_v1
+CREATE TRIGGER procrastinate_jobs_notify_queue_jobs_inserted_v1
     AFTER INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.status = 'todo'::procrastinate_job_status))
-    EXECUTE PROCEDURE procrastinate_notify_queue_job_inserted_v1();
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_notify_queue_jobs_inserted_v1();
 
 CREATE TRIGGER procrastinate_jobs_notify_queue_job_aborted_v1
     AFTER UPDATE OF abort_requested ON procrastinate_jobs
@@ -581,12 +983,12 @@ CREATE TRIGGER procrastinate_trigger_status_events_update_v1
 
 CREATE TRIGGER procrastinate_trigger_status_events_insert_v1
     AFTER INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.status = 'todo'::procrastinate_job_status))
+    FOR EACH ROW WHEN ((new.status = ANY (ARRAY['todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status])))
     EXECUTE PROCEDURE procrastinate_trigger_function_status_events_insert_v1();
 
 CREATE TRIGGER procrastinate_trigger_scheduled_events_v1
     AFTER UPDATE OR INSERT ON procrastinate_jobs
-    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = 'todo'::procrastinate_job_status))
+    FOR EACH ROW WHEN ((new.scheduled_at IS NOT NULL AND new.status = ANY (ARRAY['todo'::procrastinate_job_status, 'scheduled'::procrastinate_job_status])))
     EXECUTE PROCEDURE procrastinate_trigger_function_scheduled_events_v1();
 
 CREATE TRIGGER procrastinate_trigger_abort_requested_events_v1
@@ -597,3 +999,21 @@ CREATE TRIGGER procrastinate_trigger_abort_requested_events_v1
 CREATE TRIGGER procrastinate_trigger_delete_jobs_v1
     BEFORE DELETE ON procrastinate_jobs
     FOR EACH ROW EXECUTE PROCEDURE procrastinate_unlink_periodic_defers_v1();
+
+CREATE TRIGGER procrastinate_trigger_locks_insert_v1
+    AFTER INSERT ON procrastinate_jobs
+    REFERENCING NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
+
+CREATE TRIGGER procrastinate_trigger_locks_update_v1
+    AFTER UPDATE ON procrastinate_jobs
+    REFERENCING OLD TABLE AS old_jobs NEW TABLE AS new_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
+
+CREATE TRIGGER procrastinate_trigger_locks_delete_v1
+    AFTER DELETE ON procrastinate_jobs
+    REFERENCING OLD TABLE AS old_jobs
+    FOR EACH STATEMENT
+    EXECUTE PROCEDURE procrastinate_trigger_function_locks_v1();
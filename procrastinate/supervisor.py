@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+import sys
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING
+
+from typing_extensions import Unpack
+
+from procrastinate import signals, utils
+from procrastinate import worker as worker_module
+
+if TYPE_CHECKING:
+    from procrastinate import app as app_module
+
+logger = logging.getLogger(__name__)
+
+# How often the supervisor checks on its worker processes
+POLL_INTERVAL = 0.1
+# How long the supervisor waits before restarting a crashed worker process
+RESTART_DELAY = 1.0
+# How often worker processes check that their supervisor is still alive
+SUPERVISOR_CHECK_INTERVAL = 1.0
+
+
+class Supervisor:
+    """
+    Run a worker in each of ``processes`` child processes forked from the
+    current one, restart the worker processes that crash, and stop them
+    gracefully when the supervisor receives SIGINT or SIGTERM.
+
+    The supervisor is synchronous: the worker processes are forked outside of
+    any event loop, and each one starts its own.
+    """
+
+    def __init__(
+        self,
+        app: app_module.App,
+        processes: int,
+        restart_delay: float = RESTART_DELAY,
+        **worker_options: Unpack[app_module.WorkerOptions],
+    ):
+        if processes < 1:
+            raise ValueError("processes must be a positive integer")
+        if not hasattr(os, "fork"):
+            raise RuntimeError(
+                "Running worker processes requires os.fork(), which is not "
+                "available on this platform"
+            )
+
+        self.app = app
+        self.processes = processes
+        self.restart_delay = restart_delay
+        self.worker_options: app_module.WorkerOptions = {
+            **app.worker_defaults,
+            **worker_options,
+        }
+        #: Exit code of the last run of each worker process, by index. Negative
+        #: if the process was killed by a signal.
+        self.exit_codes: dict[int, int] = {}
+        #: Number of times worker processes were restarted after a crash
+        self.restarts = 0
+
+        self._pids: dict[int, int] = {}
+        self._restart_at: dict[int, float] = {}
+        self._supervisor_pid: int | None = None
+        self._stopping = False
+
+    def run(self) -> int:
+        """
+        Start the worker processes and supervise them until they have all
+        exited.
+
+        Returns
+        -------
+        :
+            0 if all the worker processes exited successfully, the exit status
+            of the first one that didn't otherwise (128 + the signal number if
+            it was killed by a signal)
+
+        Raises
+        ------
+        RuntimeError
+            If the app is open: the worker processes would share the
+            connections of its pool. Or if called from a running event loop:
+            the worker processes would inherit its state.
+        """
+        self._check_no_running_loop()
+        self._check_app_closed()
+        # Tasks are imported once, before forking, so that the worker
+        # processes share the memory of the imported modules (copy-on-write)
+        self.app.perform_import_paths()
+        self._supervisor_pid = os.getpid()
+
+        for index in range(self.processes):
+            self._start_process(index)
+
+        with self._on_stop(self.stop):
+            while not self._stopping and (self._pids or self._restart_at):
+                self._check_processes()
+
+        # After a stop request, a second signal kills the worker processes
+        # instead of waiting for their jobs to finish
+        with self._on_stop(self.kill):
+            while self._pids:
+                self._check_processes()
+
+        return self.exit_status
+
+    def _check_no_running_loop(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        raise RuntimeError(
+            "Worker processes cannot be started from a running event loop: the "
+            "forked processes would inherit its state. Use "
+            "App.run_worker_processes() outside of asyncio.run()."
+        )
+
+    def _check_app_closed(self) -> None:
+        if self.app.connector.is_open:
+            raise RuntimeError(
+                "The app must not be open when running worker processes: the "
+                "connections of its pool would be shared by the forked "
+                "processes. Each worker process opens the app for itself."
+            )
+
+    @property
+    def exit_status(self) -> int:
+        for _, exit_code in sorted(self.exit_codes.items()):
+            if exit_code > 0:
+                return exit_code
+            if exit_code < 0:
+                return 128 - exit_code
+        return 0
+
+    def stop(self) -> None:
+        """
+        Stop the worker processes gracefully: each one stops fetching jobs and
+        waits for its running jobs to finish, as a single worker does on SIGTERM.
+        """
+        if self._stopping:
+            return
+        self._stopping = True
+        self._restart_at.clear()
+
+        logger.info(
+            "Stop requested, stopping worker processes",
+            extra={"action": "stopping_worker_processes"},
+        )
+        self._send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        """
+        Kill the worker processes without waiting for their jobs to finish.
+        """
+        logger.warning(
+            "Killing worker processes",
+            extra={"action": "killing_worker_processes"},
+        )
+        self._send_signal(signal.SIGKILL)
+
+    def _on_stop(
+        self, callback: Callable[[], None]
+    ) -> contextlib.AbstractContextManager[None]:
+        if self.worker_options.get("install_signal_handlers", True):
+            return signals.on_stop(callback)
+        return contextlib.nullcontext()
+
+    def _send_signal(self, signum: int) -> None:
+        for pid in self._pids.values():
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(pid, signum)
+
+    def _check_processes(self) -> None:
+        self._reap_processes()
+
+        now = time.monotonic()
+        for index, restart_at in list(self._restart_at.items()):
+            if restart_at <= now:
+                del self._restart_at[index]
+                self.restarts += 1
+                self._start_process(index)
+
+        time.sleep(POLL_INTERVAL)
+
+    def _reap_processes(self) -> None:
+        for index, pid in list(self._pids.items()):
+            reaped_pid, status = os.waitpid(pid, os.WNOHANG)
+            if not reaped_pid:
+                continue
+
+            del self._pids[index]
+            exit_code = self.exit_codes[index] = os.waitstatus_to_exitcode(status)
+            log_extra = {
+                "action": "worker_process_exited",
+                "worker_index": index,
+                "pid": pid,
+                "exit_code": exit_code,
+            }
+            if exit_code == 0 or self._stopping:
+                logger.info(
+                    f"Worker process {index} (pid {pid}) exited with code {exit_code}",
+                    extra=log_extra,
+                )
+                continue
+
+            logger.error(
+                f"Worker process {index} (pid {pid}) exited with code {exit_code}, "
+                f"restarting it in {self.restart_delay} s",
+                extra=log_extra,
+            )
+            self._restart_at[index] = time.monotonic() + self.restart_delay
+
+    def _start_process(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                exit_code = self._run_process(index)
+            finally:
+                # Leave right away, without running the cleanup of the
+                # supervisor (atexit handlers, open connections...)
+                os._exit(exit_code)
+
+        self._pids[index] = pid
+        logger.info(
+            f"Started worker process {index} (pid {pid})",
+            extra={"action": "start_worker_process", "worker_index": index, "pid": pid},
+        )
+
+    def _run_process(self, index: int) -> int:
+        # The signal handlers of the supervisor are inherited by the child
+        # process: restore the defaults until the worker installs its own
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Signals sent by the terminal to its foreground process group (e.g.
+        # Ctrl-C) only reach the supervisor, which forwards them
+        os.setpgid(0, 0)
+
+        try:
+            asyncio.run(self._run_worker(index))
+        except BaseException:
+            logger.exception(
+                f"Worker process {index} crashed",
+                extra={"action": "worker_process_crashed", "worker_index": index},
+            )
+            return 1
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        return 0
+
+    async def _run_worker(self, index: int) -> None:
+        name = self.worker_options.get("name") or worker_module.WORKER_NAME
+        async with self.app.open_async():
+            worker = self.app._worker(
+                **{
+                    **self.worker_options,
+                    "name": f"{name}-{index}",
+                    "install_signal_handlers": False,
+                }
+            )
+            loop = asyncio.get_running_loop()
+            # Unlike a single worker, a second signal doesn't bypass the graceful
+            # shutdown: the supervisor may forward a signal that the process
+            # also received directly (e.g. from a process manager)
+            loop.add_signal_handler(signal.SIGINT, worker.stop)
+            loop.add_signal_handler(signal.SIGTERM, worker.stop)
+
+            supervisor_check = asyncio.create_task(self._check_supervisor(worker))
+            try:
+                await worker.run()
+            finally:
+                await utils.cancel_and_capture_errors([supervisor_check])
+
+    async def _check_supervisor(self, worker: worker_module.Worker) -> None:
+        # Worker processes are in their own process group: don't leave them
+        # running if the supervisor is killed
+        while os.getppid() == self._supervisor_pid:
+            await asyncio.sleep(SUPERVISOR_CHECK_INTERVAL)
+
+        logger.warning(
+            "The supervisor process is gone, stopping the worker",
+            extra={"action": "supervisor_gone"},
+        )
+        worker.stop()
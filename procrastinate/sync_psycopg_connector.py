@@ -3,11 +3,12 @@ from __future__ import annotations
 import contextlib
 import logging
 import re
-from collections.abc import Callable, Generator
+from collections.abc import Callable, Generator, Iterable, Sequence
 from typing import Any
 
 import psycopg
 import psycopg.rows
+import psycopg.sql
 import psycopg.types.json
 import psycopg_pool
 from typing_extensions import LiteralString
@@ -44,6 +45,15 @@ def wrap_exceptions() -> Generator[None, None, None]:
         raise exceptions.ConnectorException from exc
 
 
+def make_copy_query(table: str, columns: Sequence[str]) -> psycopg.sql.Composed:
+    return psycopg.sql.SQL("COPY {table} ({columns}) FROM STDIN").format(
+        table=psycopg.sql.Identifier(table),
+        columns=psycopg.sql.SQL(", ").join(
+            psycopg.sql.Identifier(column) for column in columns
+        ),
+    )
+
+
 class SyncPsycopgConnector(connector.BaseConnector):
     def __init__(
         self,
@@ -91,6 +101,10 @@ class SyncPsycopgConnector(connector.BaseConnector):
     def get_sync_connector(self) -> connector.BaseConnector:
         return self
 
+    @property
+    def is_open(self) -> bool:
+        return self._pool is not None
+
     @property
     def pool(self) -> psycopg_pool.ConnectionPool:
         if self._pool is None:  # Set by open_async
@@ -224,3 +238,23 @@ class SyncPsycopgConnector(connector.BaseConnector):
             cursor.execute(query, self._wrap_json(arguments))
 
             return cursor.fetchall()
+
+    @wrap_exceptions()
+    def copy_and_execute_query_all(
+        self,
+        setup_query: LiteralString,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: LiteralString,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        # The pool connection context commits the transaction when leaving it
+        with self._get_cursor() as cursor:
+            cursor.execute(setup_query)
+            with cursor.copy(make_copy_query(table=table, columns=columns)) as copy:
+                for row in rows:
+                    copy.write_row(self._wrap_value(tuple(row)))
+            cursor.execute(query, self._wrap_json(arguments))
+
+            return cursor.fetchall()
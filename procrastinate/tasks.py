@@ -3,8 +3,8 @@ from __future__ import annotations
 import datetime
 import inspect
 import logging
-from collections.abc import Callable
-from typing import Any, Generic, TypedDict, cast
+from collections.abc import AsyncIterable, AsyncIterator, Callable, Iterable
+from typing import Any, Generic, Literal, TypedDict, cast
 
 from typing_extensions import NotRequired, ParamSpec, TypeVar, Unpack
 
@@ -20,6 +20,8 @@ Args = ParamSpec("Args")
 P = ParamSpec("P")
 R = TypeVar("R")
 
+Executor = Literal["thread", "process"]
+
 
 class ConfigureTaskOptions(TypedDict):
     lock: NotRequired[str | None]
@@ -92,6 +94,7 @@ class Task(Generic[P, R, Args]):
         lock: str | None = None,
         queueing_lock: str | None = None,
         task_middleware: list[middleware_module.TaskMiddleware] | None = None,
+        executor: Executor = "thread",
     ):
         #: Default queue to send deferred jobs to. The queue can be overridden
         #: when a job is deferred.
@@ -126,7 +129,21 @@ class Task(Generic[P, R, Args]):
         self.task_middleware: list[middleware_module.TaskMiddleware] = (
             task_middleware or []
         )
+        #: Where the jobs of a sync task run: ``"thread"`` (in a thread of the
+        #: worker process) or ``"process"`` (in the process pool of the worker).
+        self.executor: Executor = executor
+        self._default_deferrer: tuple[tuple[Any, ...], jobs.JobDeferrer] | None = None
         task_is_async = inspect.iscoroutinefunction(func)
+        if executor not in ("thread", "process"):
+            raise ValueError(
+                f"Invalid executor {executor!r} for task {self.name!r}, expected "
+                "'thread' or 'process'"
+            )
+        if executor == "process" and (task_is_async or pass_context):
+            raise exceptions.InvalidTaskExecutor(
+                f"Task {self.name!r} cannot run in a process: only sync tasks that "
+                "don't take the job context can."
+            )
         for mw in self.task_middleware:
             if not callable(mw):
                 raise TypeError(
@@ -165,7 +182,7 @@ class Task(Generic[P, R, Args]):
         The job will be created with default parameters, if you want to better
         specify when and how to launch this job, see `Task.configure`.
         """
-        return await self.configure().defer_async(**task_kwargs)
+        return await self._configure_default().defer_async(**task_kwargs)
 
     async def batch_defer_async(self, *task_kwargs: types.JSONDict) -> list[int]:
         """
@@ -174,7 +191,72 @@ class Task(Generic[P, R, Args]):
         The jobs will be created with default parameters, if you want to better
         specify when and how to launch this job, see `Task.configure`.
         """
-        return await self.configure().batch_defer_async(*task_kwargs)
+        return await self._configure_default().batch_defer_async(*task_kwargs)
+
+    def job_for(self, *_: Args.args, **task_kwargs: Args.kwargs) -> jobs.Job:
+        """
+        Create the job that `Task.defer` would defer with these arguments,
+        without deferring it. See `App.batch_defer_async`.
+        """
+        return self._configure_default().job_for(**task_kwargs)
+
+    def defer_stream(
+        self,
+        task_kwargs: AsyncIterable[types.JSONDict],
+        chunk_size: int = 1000,
+        max_in_flight: int = 4,
+    ) -> AsyncIterator[int]:
+        """
+        Create jobs from this task for each dictionary of arguments of the given
+        async iterable, and yield the ids of the jobs, in order, as they are
+        assigned.
+
+        Arguments are deferred ``chunk_size`` at a time, each chunk in its own
+        transaction, and up to ``max_in_flight`` chunks are being deferred
+        concurrently, over different connections of the pool. The iterable is
+        not read further while ``max_in_flight`` chunks are waiting for their
+        ids to be consumed, so that memory stays bounded however long the
+        stream is.
+
+        If a chunk fails (e.g. with `AlreadyEnqueued`), the exception is raised
+        when its ids would have been yielded, and the chunks still in flight are
+        cancelled. Jobs from previous chunks, and possibly from cancelled ones,
+        stay deferred.
+        """
+        return self._configure_default().defer_stream(
+            task_kwargs, chunk_size=chunk_size, max_in_flight=max_in_flight
+        )
+
+    async def bulk_defer_async(
+        self, task_kwargs: Iterable[types.JSONDict], chunk_size: int = 10_000
+    ) -> int:
+        """
+        Create a large number of jobs from this task, one for each dictionary of
+        arguments of the given iterable. The iterable is consumed lazily, and jobs
+        are streamed to the database with ``COPY``, ``chunk_size`` at a time. This
+        is much more efficient than `Task.batch_defer_async` for hundreds of
+        thousands of jobs, but the ids of the jobs are not returned.
+
+        Each chunk is committed in its own transaction: if a chunk fails (e.g.
+        with `AlreadyEnqueued`), the previous chunks stay deferred. This requires
+        a connector supporting ``COPY``, such as `PsycopgConnector`.
+
+        Returns
+        -------
+        :
+            The number of deferred jobs
+        """
+        return await self._configure_default().bulk_defer_async(
+            task_kwargs, chunk_size=chunk_size
+        )
+
+    def bulk_defer(
+        self, task_kwargs: Iterable[types.JSONDict], chunk_size: int = 10_000
+    ) -> int:
+        """
+        Sync version of `Task.bulk_defer_async`.
+        """
+        return self._configure_default().bulk_defer(task_kwargs, chunk_size=chunk_size)
 
     def defer(self, *_: Args.args, **task_kwargs: Args.kwargs) -> int:
         """
@@ -182,7 +264,7 @@ class Task(Generic[P, R, Args]):
         The job will be created with default parameters, if you want to better
         specify when and how to launch this job, see `Task.configure`.
         """
-        return self.configure().defer(**task_kwargs)
+        return self._configure_default().defer(**task_kwargs)
 
     def batch_defer(self, *task_kwargs: types.JSONDict) -> list[int]:
         """
@@ -191,7 +273,7 @@ class Task(Generic[P, R, Args]):
         The jobs will be created with default parameters, if you want to better
         specify when and how to launch this job, see `Task.configure`.
         """
-        return self.configure().batch_defer(*task_kwargs)
+        return self._configure_default().batch_defer(*task_kwargs)
 
     def configure(self, **options: Unpack[ConfigureTaskOptions]) -> jobs.JobDeferrer:
         """
@@ -270,6 +352,24 @@ class Task(Generic[P, R, Args]):
             connection=connection,
         )
 
+    def _configure_default(self) -> jobs.JobDeferrer:
+        # Deferring with the task defaults is the hot path: the deferrer is
+        # reused for as long as the defaults and the app's job manager don't
+        # change, instead of being rebuilt by configure() on every defer.
+        self.blueprint.will_configure_task()
+        app = cast(app_module.App, self.blueprint)
+        key = (
+            app.job_manager,
+            self.name,
+            self.queue,
+            self.lock,
+            self.queueing_lock,
+            self.priority,
+        )
+        if self._default_deferrer is None or self._default_deferrer[0] != key:
+            self._default_deferrer = (key, self.configure())
+        return self._default_deferrer[1]
+
     def get_retry_exception(
         self, exception: BaseException, job: jobs.Job
     ) -> exceptions.JobRetry | None:
@@ -5,7 +5,7 @@ import datetime
 import json
 import threading
 from collections import Counter
-from collections.abc import Coroutine, Iterable, Iterator
+from collections.abc import Coroutine, Iterable, Iterator, Sequence
 from itertools import count
 from typing import Any, Literal
 
@@ -50,6 +50,9 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         self.jobs = {}
         self.events: dict[int, list[EventRow]] = {}
         self.workers: dict[int, datetime.datetime] = {}
+        #: Queues of the registered workers (workers missing here listen to all
+        #: the queues)
+        self.worker_queues: dict[int, list[str] | None] = {}
         self.job_counter = count(1)
         self.queries: list[tuple[str, dict[str, Any]]] = []
         self.on_notification: connector.Notify | None = None
@@ -57,6 +60,7 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         self.periodic_defers: dict[tuple[str, str], int] = {}
         self.table_exists = True
         self.states: list[str] = []
+        self.staged_jobs: list[types.JobToDefer] = []
 
     def get_sync_connector(self) -> connector.BaseConnector:
         return self
@@ -109,12 +113,31 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     ) -> list[dict[str, Any]]:
         return await self.execute_query_all_async(query, **arguments)
 
+    async def copy_and_execute_query_all_async(
+        self,
+        setup_query: str,
+        table: str,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        query: str,
+        **arguments: Any,
+    ) -> list[dict[str, Any]]:
+        await self.execute_query_async(setup_query)
+        self.staged_jobs.extend(
+            types.JobToDefer(**dict(zip(columns, row))) for row in rows
+        )
+        return await self.execute_query_all_async(query, **arguments)
+
     async def listen_notify(
         self, on_notification: connector.Notify, channels: Iterable[str]
     ) -> None:
         self.on_notification = on_notification
         self.notify_channels = list(channels)
 
+    @property
+    def is_open(self) -> bool:
+        return bool(self.states) and self.states[-1] in ("open", "open_async")
+
     def open(self, pool: connector.Pool | None = None) -> None:
         self.states.append("open")
 
@@ -135,7 +158,11 @@ class InMemoryConnector(connector.BaseAsyncConnector):
 
     # End of BaseConnector methods
 
-    async def defer_jobs_all(self, jobs: list[types.JobToDefer]) -> list[JobRow]:
+    async def defer_jobs_all(
+        self,
+        jobs: list[types.JobToDefer],
+        scheduled_horizon: datetime.timedelta = manager.SCHEDULED_JOBS_HORIZON,
+    ) -> list[JobRow]:
         # We check the queueing locks upfront so that no job is inserted into
         # the queue if the constraint is violated (simulating a database
         # rollback).
@@ -167,8 +194,17 @@ class InMemoryConnector(connector.BaseAsyncConnector):
             )
 
         job_rows = []
+        scheduled_after = utils.utcnow() + scheduled_horizon
         for job in jobs:
             id = next(self.job_counter)
+            status = (
+                "scheduled"
+                if job.scheduled_at
+                and job.scheduled_at > scheduled_after
+                and job.lock is None
+                and job.queueing_lock is None
+                else "todo"
+            )
 
             self.jobs[id] = job_row = {
                 "id": id,
@@ -178,7 +214,7 @@ class InMemoryConnector(connector.BaseAsyncConnector):
                 "lock": job.lock,
                 "queueing_lock": job.queueing_lock,
                 "args": job.args,
-                "status": "todo",
+                "status": status,
                 "scheduled_at": job.scheduled_at,
                 "attempts": 0,
                 "abort_requested": False,
@@ -188,18 +224,49 @@ class InMemoryConnector(connector.BaseAsyncConnector):
             if job.scheduled_at:
                 self.events[id].append({"type": "scheduled", "at": job.scheduled_at})
             self.events[id].append({"type": "deferred", "at": utils.utcnow()})
+            job_rows.append(job_row)
 
+        # Like the database trigger, notify once per queue for the whole batch
+        inserted_counts = Counter(
+            job_row["queue_name"] for job_row in job_rows if job_row["status"] == "todo"
+        )
+        for queue_name, jobs_count in inserted_counts.items():
             await self._notify(
-                job.queue_name,
+                queue_name,
                 {
                     "type": "job_inserted",
-                    "job_id": id,
+                    "queue_name": queue_name,
+                    "count": jobs_count,
                 },
             )
-            job_rows.append(job_row)
 
         return job_rows
 
+    async def list_enqueued_queueing_locks_all(
+        self, queueing_locks: list[str]
+    ) -> list[dict[str, Any]]:
+        enqueued = {
+            job["queueing_lock"]
+            for job in self.jobs.values()
+            if job["status"] == "todo" and job["queueing_lock"] in queueing_locks
+        }
+        return [{"queueing_lock": queueing_lock} for queueing_lock in enqueued]
+
+    async def create_staged_jobs_table_run(self) -> None:
+        self.staged_jobs = []
+
+    async def defer_staged_jobs_all(
+        self, scheduled_horizon: datetime.timedelta
+    ) -> list[JobRow]:
+        jobs, self.staged_jobs = self.staged_jobs, []
+        return await self.defer_jobs_all(jobs=jobs, scheduled_horizon=scheduled_horizon)
+
+    async def defer_staged_jobs_count_all(
+        self, scheduled_horizon: datetime.timedelta
+    ) -> list[dict[str, Any]]:
+        job_rows = await self.defer_staged_jobs_all(scheduled_horizon=scheduled_horizon)
+        return [{"count": len(job_rows)}]
+
     async def defer_periodic_job_one(
         self,
         queue: str,
@@ -286,6 +353,15 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def fetch_job_one(
         self, queues: Iterable[str] | None, worker_id: int
     ) -> dict[str, Any]:
+        jobs = await self.fetch_jobs_all(queues=queues, worker_id=worker_id, limit=1)
+        if not jobs:
+            return {"id": None}
+
+        return jobs[0]
+
+    async def fetch_jobs_all(
+        self, queues: Iterable[str] | None, worker_id: int, limit: int
+    ) -> list[dict[str, Any]]:
         assert worker_id in self.workers, f"Worker {worker_id} not found"
 
         filtered_jobs = [
@@ -301,14 +377,38 @@ class InMemoryConnector(connector.BaseAsyncConnector):
 
         filtered_jobs.sort(key=lambda job: (-job["priority"], job["id"]))
 
-        if not filtered_jobs:
-            return {"id": None}
-
-        job = filtered_jobs[0]
-        job["status"] = "doing"
-        job["worker_id"] = worker_id
-        self.events[job["id"]].append({"type": "started", "at": utils.utcnow()})
-        return job
+        fetched_jobs: list[dict[str, Any]] = []
+        fetched_locks: set[str] = set()
+        for job in filtered_jobs:
+            if len(fetched_jobs) >= limit:
+                break
+            if job["lock"] is not None:
+                if job["lock"] in fetched_locks:
+                    continue
+                fetched_locks.add(job["lock"])
+
+            job["status"] = "doing"
+            job["worker_id"] = worker_id
+            self.events[job["id"]].append({"type": "started", "at": utils.utcnow()})
+            fetched_jobs.append(job)
+
+        return fetched_jobs
+
+    async def next_scheduled_job_delay_one(
+        self, queues: Iterable[str] | None
+    ) -> dict[str, Any]:
+        now = utils.utcnow()
+        scheduled_ats = [
+            job["scheduled_at"]
+            for job in self.jobs.values()
+            if job["status"] == "todo"
+            and (queues is None or job["queue_name"] in queues)
+            and job["scheduled_at"]
+            and job["scheduled_at"] > now
+        ]
+        if not scheduled_ats:
+            return {"delay": None}
+        return {"delay": (min(scheduled_ats) - now).total_seconds()}
 
     async def finish_job_run(self, job_id: int, status: str, delete_job: bool) -> None:
         if delete_job:
@@ -321,12 +421,56 @@ class InMemoryConnector(connector.BaseAsyncConnector):
         job_row["abort_requested"] = False
         self.events[job_id].append({"type": status, "at": utils.utcnow()})
 
+    async def finish_and_fetch_job_one(
+        self,
+        job_id: int,
+        status: str,
+        delete_job: bool,
+        queues: Iterable[str] | None,
+        worker_id: int,
+    ) -> dict[str, Any]:
+        await self.finish_job_run(job_id=job_id, status=status, delete_job=delete_job)
+        return await self.fetch_job_one(queues=queues, worker_id=worker_id)
+
+    async def finish_jobs_all(
+        self, job_ids: list[int], statuses: list[str], delete_jobs: list[bool]
+    ) -> list[dict[str, Any]]:
+        failed_job_ids = []
+        for job_id, status, delete_job in zip(job_ids, statuses, delete_jobs):
+            job_row = self.jobs.get(job_id)
+            if not job_row or job_row["status"] not in ("todo", "doing"):
+                failed_job_ids.append(job_id)
+                continue
+            await self.finish_job_run(
+                job_id=job_id, status=status, delete_job=delete_job
+            )
+
+        return [{"id": job_id} for job_id in failed_job_ids]
+
+    async def promote_scheduled_jobs_one(
+        self, scheduled_horizon: datetime.timedelta, limit: int
+    ) -> dict[str, Any]:
+        promoted_before = utils.utcnow() + scheduled_horizon
+        scheduled_jobs = sorted(
+            (
+                job
+                for job in self.jobs.values()
+                if job["status"] == "scheduled"
+                and job["scheduled_at"] <= promoted_before
+            ),
+            key=lambda job: job["scheduled_at"],
+        )[:limit]
+        for job in scheduled_jobs:
+            job["status"] = "todo"
+
+        return {"count": len(scheduled_jobs)}
+
     async def cancel_job_one(
         self, job_id: int, abort: bool, delete_job: bool
     ) -> dict[str, Any]:
         job_row = self.jobs[job_id]
 
-        if job_row["status"] == "todo":
+        if job_row["status"] in ("todo", "scheduled"):
             if delete_job:
                 self.jobs.pop(job_id)
                 return {"id": job_id}
@@ -479,13 +623,15 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def check_connection_one(self):
         return {"check": self.table_exists or None}
 
-    async def register_worker_one(self):
+    async def register_worker_one(self, queues: list[str] | None = None):
         worker_id = max(self.workers, default=0) + 1
         self.workers[worker_id] = utils.utcnow()
+        self.worker_queues[worker_id] = queues
         return {"worker_id": worker_id}
 
     async def unregister_worker_run(self, worker_id: int):
         self.workers.pop(worker_id)
+        self.worker_queues.pop(worker_id, None)
         for job in self.jobs.values():
             if job["worker_id"] == worker_id:
                 job["worker_id"] = None
@@ -493,6 +639,28 @@ class InMemoryConnector(connector.BaseAsyncConnector):
     async def update_heartbeat_run(self, worker_id: int):
         self.workers[worker_id] = utils.utcnow()
 
+    async def update_heartbeat_one(self, worker_id: int) -> dict[str, Any]:
+        await self.update_heartbeat_run(worker_id=worker_id)
+        return {"procrastinate_update_heartbeat_v1": None}
+
+    async def update_heartbeats_one(self, worker_ids: list[int]) -> dict[str, Any]:
+        updated = [worker_id for worker_id in worker_ids if worker_id in self.workers]
+        for worker_id in updated:
+            self.workers[worker_id] = utils.utcnow()
+        return {"count": len(updated)}
+
+    async def count_workers_one(self) -> dict[str, Any]:
+        all_queues_count = 0
+        queues_count: dict[str, int] = {}
+        for worker_id in self.workers:
+            queues = self.worker_queues.get(worker_id)
+            if queues is None:
+                all_queues_count += 1
+                continue
+            for queue in queues:
+                queues_count[queue] = queues_count.get(queue, 0) + 1
+        return {"all_queues_count": all_queues_count, "queues_count": queues_count}
+
     async def prune_stalled_workers_all(self, seconds_since_heartbeat: int):
         pruned_workers = []
         for worker_id, heartbeat in list(self.workers.items()):
@@ -500,6 +668,7 @@ class InMemoryConnector(connector.BaseAsyncConnector):
                 seconds=seconds_since_heartbeat
             ):
                 self.workers.pop(worker_id)
+                self.worker_queues.pop(worker_id, None)
                 pruned_workers.append({"worker_id": worker_id})
 
         for job in self.jobs.values():
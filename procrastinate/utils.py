@@ -212,6 +212,84 @@ class AwaitableContext(Generic[U]):
         return _inner_coro().__await__()
 
 
+class Batcher(Generic[T, U]):
+    """
+    Group items submitted concurrently into batches, each processed by a single
+    call to ``process_batch``. A batch is processed as soon as it holds
+    ``max_size`` items, or ``max_delay`` seconds after its first item was
+    submitted, whichever comes first.
+
+    ``process_batch`` returns one result per item, in the same order. A result
+    that is an exception is raised to the caller that submitted the matching
+    item. If ``process_batch`` itself raises, all the callers of the batch get
+    the exception.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list[T]], Awaitable[list[U | Exception]]],
+        max_size: int,
+        max_delay: float,
+    ):
+        self.process_batch = process_batch
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._pending: list[tuple[T, asyncio.Future[U]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._batch_tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, item: T) -> U:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[U] = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._process_pending()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._process_pending)
+        return await future
+
+    async def flush(self) -> None:
+        """
+        Process the pending items right away, and wait until every batch is
+        processed.
+        """
+        self._process_pending()
+        await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+
+    def _process_pending(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(self._process(batch), name="process_batch")
+        self._batch_tasks.add(task)
+        task.add_done_callback(self._batch_tasks.discard)
+
+    async def _process(self, batch: list[tuple[T, asyncio.Future[U]]]) -> None:
+        results: list[U | Exception]
+        try:
+            results = await self.process_batch([item for item, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as exc:
+            results = [exc] * len(batch)
+
+        for (_, future), result in zip(batch, results):
+            # The caller may have been cancelled in the meantime
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
 async def cancel_and_capture_errors(tasks: list[asyncio.Task[Any]]):
     """
     Cancel all tasks and capture any error returned by any of those tasks (except the CancellationError itself)
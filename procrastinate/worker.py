@@ -1,26 +1,36 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import contextlib
 import inspect
 import logging
+import os
+import random
+import threading
 import time
-from collections.abc import Iterable
+from collections.abc import Callable, Iterable
 from typing import Any
 
+import attr
+from asgiref import sync
+
 from procrastinate import (
     app,
     exceptions,
     job_context,
     jobs,
+    manager,
     middleware,
     periodic,
+    process_pool,
     retry,
     signals,
     tasks,
     types,
     utils,
 )
+from procrastinate import coordinator as coordinator_module
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +38,76 @@ WORKER_NAME = "worker"
 WORKER_CONCURRENCY = 1  # maximum number of parallel jobs
 FETCH_JOB_POLLING_INTERVAL = 5.0  # seconds
 ABORT_JOB_POLLING_INTERVAL = 5.0  # seconds
+FINISH_JOBS_FLUSH_INTERVAL = 0.005  # seconds
+FETCH_JOB_POLLING_BACKOFF_FACTOR = 2.0
+PROMOTE_SCHEDULED_JOBS_INTERVAL = 60.0  # seconds
+PROMOTE_SCHEDULED_JOBS_BATCH_SIZE = 1000
+
+
+@attr.dataclass(kw_only=True)
+class FetchStats:
+    """
+    Counters about how a worker fetches jobs, reset each time the worker starts.
+    """
+
+    #: Number of queries that fetched jobs (including the ones that fetched the
+    #: next job while finishing the previous one)
+    fetches: int = 0
+    #: Number of these queries that didn't return any job
+    empty_fetches: int = 0
+    #: Number of new job notifications received
+    notifications: int = 0
+    #: Number of new job notifications the worker didn't wake up for
+    skipped_wake_ups: int = 0
+    #: Number of times the worker woke up without a notification (polling
+    #: interval elapsed, or scheduled job due)
+    polls: int = 0
+    #: Current time between two polls
+    polling_interval: float = 0.0
+
+    @property
+    def successful_fetches(self) -> int:
+        return self.fetches - self.empty_fetches
+
+    @property
+    def empty_fetch_ratio(self) -> float:
+        return self.empty_fetches / self.fetches if self.fetches else 0.0
+
+    def as_dict(self) -> types.JSONDict:
+        return {
+            **attr.asdict(self),
+            "empty_fetch_ratio": self.empty_fetch_ratio,
+        }
+
+
+@attr.dataclass(kw_only=True)
+class SyncStats:
+    """
+    Counters about how the jobs of sync tasks wait for a thread of the worker,
+    reset each time the worker starts.
+    """
+
+    #: Number of sync jobs that were run in a thread
+    jobs: int = 0
+    #: Total time (in seconds) these jobs waited for a free thread
+    total_wait: float = 0.0
+    #: Longest time (in seconds) a job waited for a free thread
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.total_wait / self.jobs if self.jobs else 0.0
+
+    def add_wait(self, wait: float) -> None:
+        self.jobs += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> types.JSONDict:
+        return {
+            **attr.asdict(self),
+            "mean_wait": self.mean_wait,
+        }
 
 
 class Worker:
@@ -49,6 +129,14 @@ class Worker:
         stalled_worker_timeout: float = 30.0,
         task_middleware: list[middleware.TaskMiddleware] | None = None,
         worker_middleware: list[middleware.WorkerMiddleware] | None = None,
+        finish_jobs_batch_size: int | None = None,
+        finish_jobs_flush_interval: float = FINISH_JOBS_FLUSH_INTERVAL,
+        wake_up_workers_per_job: float | None = None,
+        fetch_job_polling_max_interval: float | None = None,
+        fetch_job_polling_jitter: float = 0.0,
+        process_pool_size: int | None = None,
+        sync_concurrency: int | None = None,
+        coordinator: coordinator_module.Coordinator | None = None,
     ):
         self.app = app
         self.queues = queues
@@ -56,6 +144,8 @@ class Worker:
         self.concurrency = concurrency
         self.wait = wait
         self.fetch_job_polling_interval = fetch_job_polling_interval
+        self.fetch_job_polling_max_interval = fetch_job_polling_max_interval
+        self.fetch_job_polling_jitter = fetch_job_polling_jitter
         self.abort_job_polling_interval = abort_job_polling_interval
         self.listen_notify = listen_notify
         self.delete_jobs = (
@@ -91,9 +181,31 @@ class Worker:
 
         self.worker_id: int | None = None
 
+        self.finish_jobs_batch_size = finish_jobs_batch_size
+        self.finish_jobs_flush_interval = finish_jobs_flush_interval
+        self._finish_jobs_batcher: (
+            utils.Batcher[tuple[int, jobs.Status, bool], None] | None
+        ) = None
+
+        self.wake_up_workers_per_job = wake_up_workers_per_job
+        self.process_pool_size = process_pool_size or os.cpu_count() or 1
+        self.sync_concurrency = sync_concurrency or concurrency
+        self.coordinator = coordinator
+        self.sync_stats = SyncStats()
+        self._sync_executor: concurrent.futures.ThreadPoolExecutor | None = None
+        self._process_pool = process_pool.ProcessPool(size=self.process_pool_size)
+        # Until we know better, assume we're alone so that we always wake up
+        self._workers_count = manager.WorkersCount(all_queues=1)
+        # Event loop time at which the next scheduled job is due (None if there
+        # is none), queried again only when it may have changed
+        self._next_scheduled_job_at: float | None = None
+        self._next_scheduled_job_stale = True
+        self.fetch_stats = FetchStats(polling_interval=self.fetch_job_polling_interval)
+
         self._loop_task: asyncio.Future[Any] | None = None
         self._new_job_event = asyncio.Event()
         self._running_jobs: dict[asyncio.Task[Any], job_context.JobContext] = {}
+        self._slot_handovers: set[int] = set()
         self._job_semaphore = asyncio.Semaphore(self.concurrency)
         self._stop_event = asyncio.Event()
         self.shutdown_graceful_timeout = shutdown_graceful_timeout
@@ -170,6 +282,7 @@ class Worker:
         context: job_context.JobContext,
         job_result: job_context.JobResult | None,
     ):
+        next_job: jobs.Job | None = None
         if retry_decision:
             await self.app.job_manager.retry_job(
                 job=job,
@@ -184,9 +297,24 @@ class Worker:
                 jobs.DeleteJobCondition.NEVER: False,
                 jobs.DeleteJobCondition.SUCCESSFUL: status == jobs.Status.SUCCEEDED,
             }[self.delete_jobs]
-            await self.app.job_manager.finish_job(
-                job=job, status=status, delete_job=delete_job
-            )
+            if self._finish_jobs_batcher:
+                assert job.id
+                await self._finish_jobs_batcher.submit((job.id, status, delete_job))
+            elif self._stop_event.is_set():
+                await self.app.job_manager.finish_job(
+                    job=job, status=status, delete_job=delete_job
+                )
+            else:
+                # Save a round trip by fetching the next job in the same query
+                assert self.worker_id is not None
+                next_job = await self.app.job_manager.finish_job_and_fetch_next(
+                    job=job,
+                    status=status,
+                    delete_job=delete_job,
+                    queues=self.queues,
+                    worker_id=self.worker_id,
+                )
+                self._count_fetch(fetched=next_job is not None)
 
         assert job.id
         self._job_ids_to_abort.pop(job.id, None)
@@ -201,6 +329,32 @@ class Worker:
             ),
         )
 
+        if next_job:
+            # The finished job hands its concurrency slot over to the next one
+            self._slot_handovers.add(job.id)
+            self._start_job(next_job)
+
+    async def _finish_jobs(
+        self, jobs_to_finish: list[tuple[int, jobs.Status, bool]]
+    ) -> list[None | Exception]:
+        """Persist a batch of job completions, see ``finish_jobs_batch_size``"""
+        failed_job_ids = set(
+            await self.app.job_manager.finish_jobs_by_id_async(
+                job_ids=[job_id for job_id, _, _ in jobs_to_finish],
+                statuses=[status for _, status, _ in jobs_to_finish],
+                delete_jobs=[delete_job for _, _, delete_job in jobs_to_finish],
+            )
+        )
+        return [
+            exceptions.ConnectorException(
+                'Job was not found or not in "doing" or "todo" status '
+                f"(job id: {job_id})"
+            )
+            if job_id in failed_job_ids
+            else None
+            for job_id, _, _ in jobs_to_finish
+        ]
+
     def _log_job_outcome(
         self,
         status: jobs.Status,
@@ -303,13 +457,22 @@ class Worker:
                     task_result = await middleware.compose(
                         middlewares, run_async_task, context, self
                     )()
+                elif task.executor == "process":
+                    task_result = await self._run_in_process(
+                        task=task,
+                        context=context,
+                        job_result=job_result,
+                        middlewares=middlewares,
+                    )
                 else:
 
                     def run_sync_task():
                         return task(*job_args, **job.task_kwargs)
 
-                    task_result = await utils.sync_to_async(
-                        middleware.compose(middlewares, run_sync_task, context, self)
+                    task_result = await self._run_in_thread(
+                        middleware.compose(middlewares, run_sync_task, context, self),
+                        context=context,
+                        job_result=job_result,
                     )
 
                 # A *sync* task function might return an awaitable without being a
@@ -385,54 +548,231 @@ class Worker:
                 await persist_job_status_task
                 raise
 
+    async def _run_in_process(
+        self,
+        task: tasks.Task[Any, Any, Any],
+        context: job_context.JobContext,
+        job_result: job_context.JobResult,
+        middlewares: list[middleware.TaskMiddleware],
+    ) -> Any:
+        job = context.job
+        assert job.id
+
+        async def run_in_process():
+            return await self._process_pool.run(
+                job_id=job.id,
+                task_path=task.full_path,
+                task_kwargs=job.task_kwargs,
+                should_abort=context.should_abort,
+            )
+
+        if not middlewares:
+            return await run_in_process()
+
+        # Sync middlewares run in a thread, like for the other sync tasks, and
+        # wait there for the job to run in its process.
+        loop = asyncio.get_running_loop()
+
+        def run_process_task():
+            return asyncio.run_coroutine_threadsafe(run_in_process(), loop).result()
+
+        return await self._run_in_thread(
+            middleware.compose(middlewares, run_process_task, context, self),
+            context=context,
+            job_result=job_result,
+        )
+
+    async def _run_in_thread(
+        self,
+        func: Callable[[], Any],
+        context: job_context.JobContext,
+        job_result: job_context.JobResult,
+    ) -> Any:
+        """
+        Run a sync job in a thread of the worker, named after the job while it
+        runs, and record how long the job waited for a free thread.
+        """
+        job = context.job
+        submitted_at = time.monotonic()
+
+        def run_job():
+            job_result.thread_wait = time.monotonic() - submitted_at
+
+            thread = threading.current_thread()
+            thread_name = thread.name
+            thread.name = f"{thread_name} {job.task_name}[{job.id}]"
+            try:
+                return func()
+            finally:
+                thread.name = thread_name
+
+        try:
+            return await sync.sync_to_async(
+                run_job, thread_sensitive=False, executor=self._sync_executor
+            )()
+        finally:
+            # Updated from the event loop, not from the threads
+            if job_result.thread_wait is not None:
+                self.sync_stats.add_wait(job_result.thread_wait)
+
     async def _fetch_and_process_jobs(self):
         """Fetch and process jobs until there is no job left or asked to stop"""
         while not self._stop_event.is_set():
             acquire_sem_task = asyncio.create_task(self._job_semaphore.acquire())
-            job = None
+            acquired_slots = 0
+            fetched_jobs: list[jobs.Job] = []
             try:
                 await utils.wait_any(acquire_sem_task, self._stop_event.wait())
+                if not acquire_sem_task.cancelled() and acquire_sem_task.done():
+                    acquired_slots = 1
                 if self._stop_event.is_set():
                     break
 
+                # Claim the other free slots too (this doesn't block), so that
+                # a single query fetches as many jobs as we can start right away.
+                while not self._job_semaphore.locked():
+                    await self._job_semaphore.acquire()
+                    acquired_slots += 1
+
                 assert self.worker_id is not None
-                job = await self.app.job_manager.fetch_job(
-                    queues=self.queues, worker_id=self.worker_id
+                fetched_jobs = await self.app.job_manager.fetch_jobs(
+                    queues=self.queues,
+                    worker_id=self.worker_id,
+                    limit=acquired_slots,
                 )
+                self._count_fetch(fetched=bool(fetched_jobs))
             finally:
-                if (not job or self._stop_event.is_set()) and acquire_sem_task.done():
+                for _ in range(acquired_slots - len(fetched_jobs)):
                     self._job_semaphore.release()
                 self._new_job_event.clear()
 
-            if not job:
+            for job in fetched_jobs:
+                self._start_job(job)
+
+            if len(fetched_jobs) < acquired_slots:
+                # The queue is drained (for now)
                 break
 
-            job_id = job.id
+    def _count_fetch(self, fetched: bool) -> None:
+        self.fetch_stats.fetches += 1
+        if not fetched:
+            self.fetch_stats.empty_fetches += 1
 
-            context = job_context.JobContext(
-                app=self.app,
-                worker_name=self.worker_name,
-                worker_queues=self.queues,
-                additional_context=self.additional_context.copy()
-                if self.additional_context
-                else {},
-                job=job,
-                abort_reason=lambda: (
-                    self._job_ids_to_abort.get(job_id) if job_id else None
-                ),
-                start_timestamp=time.time(),
+    async def _get_fetch_delay(self, polling_interval: float) -> float:
+        """
+        Time to wait before fetching jobs again if no notification comes in: the
+        polling interval (with jitter), or less if a scheduled job is due before
+        that. The time of the next scheduled job is only queried again when it
+        may have changed: after a new job notification, a polling backoff or a
+        promotion of scheduled jobs, and once the job is due.
+        """
+        if self.fetch_job_polling_jitter:
+            polling_interval *= 1 + random.uniform(
+                -self.fetch_job_polling_jitter, self.fetch_job_polling_jitter
             )
-            job_task = asyncio.create_task(
-                self._process_job(context),
-                name=f"process job {job.task_name}[{job.id}]",
+
+        loop = asyncio.get_running_loop()
+        if (
+            self._next_scheduled_job_at is not None
+            and self._next_scheduled_job_at <= loop.time()
+        ):
+            self._next_scheduled_job_stale = True
+
+        if self._next_scheduled_job_stale:
+            try:
+                delay = await self.app.job_manager.get_next_scheduled_job_delay_async(
+                    queues=self.queues
+                )
+            except Exception as error:
+                logger.exception(
+                    f"next_scheduled_job_delay error: {error!r}",
+                    exc_info=error,
+                    extra={"action": "next_scheduled_job_delay_error"},
+                )
+                # fall back to polling, and query again next time
+                return polling_interval
+            self._next_scheduled_job_at = None if delay is None else loop.time() + delay
+            self._next_scheduled_job_stale = False
+
+        if self._next_scheduled_job_at is None:
+            return polling_interval
+        delay = max(self._next_scheduled_job_at - loop.time(), 0.0)
+        if delay > polling_interval:
+            return polling_interval
+
+        logger.debug(
+            f"Next scheduled job is due in {delay:.3f}s",
+            extra={"action": "wait_for_scheduled_job", "delay": delay},
+        )
+        return delay
+
+    def _get_next_polling_interval(self, polling_interval: float, reset: bool) -> float:
+        """
+        Without ``fetch_job_polling_max_interval``, the polling interval is
+        constant. With it, the interval grows after each wake-up that didn't
+        bring any job, up to the max, and goes back to
+        ``fetch_job_polling_interval`` as soon as the worker is notified or
+        fetches a job.
+        """
+        if reset or self.fetch_job_polling_max_interval is None:
+            return self.fetch_job_polling_interval
+
+        next_polling_interval = min(
+            polling_interval * FETCH_JOB_POLLING_BACKOFF_FACTOR,
+            self.fetch_job_polling_max_interval,
+        )
+        if next_polling_interval != polling_interval:
+            # Jobs may have been scheduled without us being notified
+            self._next_scheduled_job_stale = True
+            self.logger.debug(
+                f"No job found, polling again in {next_polling_interval}s",
+                extra=self._log_extra(
+                    context=None,
+                    action="fetch_job_polling_backoff",
+                    job_result=None,
+                    fetch_stats=self.fetch_stats.as_dict(),
+                ),
             )
-            self._running_jobs[job_task] = context
+        return next_polling_interval
+
+    def _start_job(self, job: jobs.Job) -> None:
+        """
+        Start processing a fetched job in a new task. The caller must hold a
+        semaphore slot for the job: it's released when the job task completes,
+        unless the slot was handed over to the next job (see
+        `_persist_job_status`).
+        """
+        job_id = job.id
+
+        # fmt: off
+        context = job_context.JobContext(
+            app=self.app,
+            worker_name=self.worker_name,
+            worker_queues=self.queues,
+            additional_context=self.additional_context.copy()
+            if self.additional_context
+            else {},
+            job=job,
+            abort_reason=lambda: (
+                self._job_ids_to_abort.get(job_id) if job_id else None
+            ),
+            start_timestamp=time.time(),
+        )
+        # fmt: on
+        job_task = asyncio.create_task(
+            self._process_job(context),
+            name=f"process job {job.task_name}[{job.id}]",
+        )
+        self._running_jobs[job_task] = context
 
-            def on_job_complete(task: asyncio.Task):
-                del self._running_jobs[task]
+        def on_job_complete(task: asyncio.Task):
+            del self._running_jobs[task]
+            if job_id in self._slot_handovers:
+                self._slot_handovers.discard(job_id)
+            else:
                 self._job_semaphore.release()
 
-            job_task.add_done_callback(on_job_complete)
+        job_task.add_done_callback(on_job_complete)
 
     async def run(self):
         """
@@ -451,8 +791,11 @@ class Worker:
         if pruned_workers:
             logger.debug(f"Pruned stalled workers: {', '.join(str(pruned_workers))}")
 
-        self.worker_id = await self.app.job_manager.register_worker()
+        self.worker_id = await self.app.job_manager.register_worker(queues=self.queues)
         logger.debug(f"Registered worker {self.worker_id} in the database")
+        await self._update_workers_count()
+        if self.coordinator:
+            self.coordinator.add_worker(self)
 
         self.run_task = asyncio.current_task()
         self._loop = asyncio.get_running_loop()
@@ -476,10 +819,47 @@ class Worker:
         self, *, channel: str, notification: jobs.Notification
     ):
         if notification["type"] == "job_inserted":
-            self._new_job_event.set()
+            self.fetch_stats.notifications += 1
+            self._next_scheduled_job_stale = True
+            if self._should_wake_up(notification):
+                self._new_job_event.set()
+            else:
+                self.fetch_stats.skipped_wake_ups += 1
         elif notification["type"] == "abort_job_requested":
             self._handle_abort_jobs_requested([notification["job_id"]])
 
+    def _should_wake_up(self, notification: jobs.JobInserted) -> bool:
+        """
+        Without ``wake_up_workers_per_job``, every idle worker wakes up on each
+        new job notification, and all of them race for the same jobs. With it,
+        each worker wakes up at random, so that on average
+        ``wake_up_workers_per_job`` of the workers listening to the queue of the
+        jobs wake up for each inserted job. The other workers will find the jobs
+        at their next poll, if need be.
+        """
+        if self.wake_up_workers_per_job is None:
+            return True
+
+        workers_count = max(
+            self._workers_count.listening_to(notification["queue_name"]), 1
+        )
+        probability = (
+            notification["count"] * self.wake_up_workers_per_job / workers_count
+        )
+        return random.random() < probability
+
+    async def _update_workers_count(self) -> None:
+        if self.wake_up_workers_per_job is None:
+            return
+        self.set_workers_count(await self.app.job_manager.count_workers_async())
+
+    def set_workers_count(self, workers_count: manager.WorkersCount) -> None:
+        """
+        Set the number of registered workers by queue, used with
+        ``wake_up_workers_per_job``.
+        """
+        self._workers_count = workers_count
+
     async def _update_heartbeat(self):
         while True:
             logger.debug(
@@ -489,7 +869,15 @@ class Worker:
 
             logger.debug(f"Updating heartbeat of worker {self.worker_id}")
             assert self.worker_id is not None
-            await self.app.job_manager.update_heartbeat(self.worker_id)
+            if self.wake_up_workers_per_job is None:
+                await self.app.job_manager.update_heartbeat(self.worker_id)
+            else:
+                workers_count = (
+                    await self.app.job_manager.update_heartbeat_and_count_workers(
+                        self.worker_id
+                    )
+                )
+                self.set_workers_count(workers_count)
 
     async def _poll_jobs_to_abort(self):
         while True:
@@ -513,6 +901,50 @@ class Worker:
                 )
                 # recover from errors and continue polling
 
+    async def _promote_scheduled_jobs(self):
+        # Promote right away, so that the jobs that came due while no worker was
+        # running don't wait for a whole interval
+        while True:
+            try:
+                # Promote in batches, so that each transaction stays short
+                while True:
+                    promoted_count = (
+                        await self.app.job_manager.promote_scheduled_jobs_async(
+                            limit=PROMOTE_SCHEDULED_JOBS_BATCH_SIZE
+                        )
+                    )
+                    if promoted_count:
+                        self._handle_scheduled_jobs_promoted()
+                        logger.debug(
+                            f"Promoted {promoted_count} scheduled jobs to todo",
+                            extra={
+                                "action": "promoted_scheduled_jobs",
+                                "promoted_count": promoted_count,
+                            },
+                        )
+                    if promoted_count < PROMOTE_SCHEDULED_JOBS_BATCH_SIZE:
+                        break
+            except Exception as error:
+                logger.exception(
+                    f"promote_scheduled_jobs error: {error!r}",
+                    exc_info=error,
+                    extra={
+                        "action": "promote_scheduled_jobs_error",
+                    },
+                )
+                # recover from errors and continue promoting
+
+            logger.debug(
+                f"waiting for {PROMOTE_SCHEDULED_JOBS_INTERVAL}s before promoting scheduled jobs"
+            )
+            await asyncio.sleep(PROMOTE_SCHEDULED_JOBS_INTERVAL)
+
+    def _handle_scheduled_jobs_promoted(self):
+        # Wake up, to fetch the promoted jobs that are due and look up the next
+        # one
+        self._next_scheduled_job_stale = True
+        self._new_job_event.set()
+
     def _handle_abort_jobs_requested(self, job_ids: Iterable[int]):
         running_job_ids = {c.job.id for c in self._running_jobs.values() if c.job.id}
         new_job_ids_to_abort = (running_job_ids & set(job_ids)) - set(
@@ -538,6 +970,9 @@ class Worker:
         task = self.app.tasks.get(context.job.task_name)
         if not task:
             log_message = "Received a request to abort a job but the job has no associated task. No action to perform"
+        elif task.executor == "process":
+            log_message = "Received a request to abort a job run in a process. Killing the process"
+            self._process_pool.kill(context.job.id)
         elif not inspect.iscoroutinefunction(task.func):
             log_message = "Received a request to abort a synchronous job. Job is responsible for aborting by checking context.should_abort"
         else:
@@ -556,6 +991,11 @@ class Worker:
         """
         await utils.cancel_and_capture_errors(side_tasks)
 
+        if self._finish_jobs_batcher:
+            # Don't make the remaining jobs wait for the flush interval
+            self._finish_jobs_batcher.max_delay = 0
+            await self._finish_jobs_batcher.flush()
+
         now = time.time()
         for context in self._running_jobs.values():
             duration = now - context.start_timestamp
@@ -566,10 +1006,20 @@ class Worker:
                 ),
             )
 
-        if self._running_jobs:
-            await asyncio.wait(
-                self._running_jobs, timeout=self.shutdown_graceful_timeout
-            )
+        # Jobs finishing right now may have fetched a next job just before the
+        # stop request: wait for those too.
+        deadline = (
+            None
+            if self.shutdown_graceful_timeout is None
+            else time.monotonic() + self.shutdown_graceful_timeout
+        )
+        while self._running_jobs:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            await asyncio.wait(list(self._running_jobs), timeout=timeout)
+            # Let the done callbacks of the finished tasks run
+            await asyncio.sleep(0)
 
         # As a reminder, tasks have a done callback that
         # removes them from the self._running_jobs dict,
@@ -586,6 +1036,18 @@ class Worker:
             )
             await self._abort_running_jobs()
 
+        if self._finish_jobs_batcher:
+            await self._finish_jobs_batcher.flush()
+
+        await self._process_pool.close()
+        if self._sync_executor:
+            # Jobs are done: the threads are idle, or stuck in a sync job that
+            # couldn't be aborted
+            self._sync_executor.shutdown(wait=False)
+            self._sync_executor = None
+
+        if self.coordinator:
+            self.coordinator.remove_worker(self)
         assert self.worker_id is not None
         await self.app.job_manager.unregister_worker(self.worker_id)
         logger.debug(f"Unregistered finished worker {self.worker_id} from the database")
@@ -594,25 +1056,45 @@ class Worker:
         self.logger.info(
             f"Stopped worker on {utils.queues_display(self.queues)}",
             extra=self._log_extra(
-                action="stop_worker", queues=self.queues, context=None, job_result=None
+                action="stop_worker",
+                queues=self.queues,
+                context=None,
+                job_result=None,
+                fetch_stats=self.fetch_stats.as_dict(),
+                sync_stats=self.sync_stats.as_dict(),
             ),
         )
 
     async def _abort_running_jobs(self):
-        for task, context in self._running_jobs.items():
-            self._abort_job(task, context, job_context.AbortReason.SHUTDOWN)
+        while self._running_jobs:
+            for task, context in list(self._running_jobs.items()):
+                if not task.done():
+                    self._abort_job(task, context, job_context.AbortReason.SHUTDOWN)
 
-        await asyncio.gather(*self._running_jobs, return_exceptions=True)
+            await asyncio.gather(*self._running_jobs, return_exceptions=True)
+            # Let the done callbacks of the finished tasks run
+            await asyncio.sleep(0)
 
     def _start_side_tasks(self) -> list[asyncio.Task[Any]]:
         """Start side tasks such as periodic deferrer and notification listener"""
-        side_tasks = [
-            asyncio.create_task(self._update_heartbeat(), name="update_heartbeats"),
-            asyncio.create_task(self._periodic_deferrer(), name="deferrer"),
-            asyncio.create_task(self._poll_jobs_to_abort(), name="poll_jobs_to_abort"),
-        ]
+        side_tasks: list[asyncio.Task[Any]] = []
+        # With a coordinator, the heartbeat, the periodic deferrer, the abort
+        # polling, the promotion of scheduled jobs and the listener are handled
+        # by the coordinator, for all its workers
+        if not self.coordinator:
+            side_tasks += [
+                asyncio.create_task(self._update_heartbeat(), name="update_heartbeats"),
+                asyncio.create_task(self._periodic_deferrer(), name="deferrer"),
+                asyncio.create_task(
+                    self._poll_jobs_to_abort(), name="poll_jobs_to_abort"
+                ),
+                asyncio.create_task(
+                    self._promote_scheduled_jobs(), name="promote_scheduled_jobs"
+                ),
+            ]
         if self.listen_notify:
-            listener_coro = self.app.job_manager.listen_for_jobs(
+            listener = self.coordinator or self.app.job_manager
+            listener_coro = listener.listen_for_jobs(
                 on_notification=self._handle_notification,
                 queues=self.queues,
             )
@@ -663,8 +1145,23 @@ class Worker:
             ),
         )
         self._new_job_event.clear()
+        self.fetch_stats = FetchStats(polling_interval=self.fetch_job_polling_interval)
+        self._next_scheduled_job_stale = True
         self._running_jobs = {}
+        self._slot_handovers = set()
         self._job_semaphore = asyncio.Semaphore(self.concurrency)
+        self._process_pool = process_pool.ProcessPool(size=self.process_pool_size)
+        self.sync_stats = SyncStats()
+        self._sync_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.sync_concurrency,
+            thread_name_prefix=f"procrastinate-{self.worker_name or WORKER_NAME}",
+        )
+        if self.finish_jobs_batch_size:
+            self._finish_jobs_batcher = utils.Batcher(
+                process_batch=self._finish_jobs,
+                max_size=self.finish_jobs_batch_size,
+                max_delay=self.finish_jobs_flush_interval,
+            )
         side_tasks = self._start_side_tasks()
         side_tasks_monitor = asyncio.create_task(
             self._monitor_side_tasks(side_tasks), name="side_tasks_monitor"
@@ -691,14 +1188,27 @@ class Worker:
                     )
                     self._stop_event.set()
 
+                polling_interval = self.fetch_job_polling_interval
                 while not self._stop_event.is_set():
-                    # wait for a new job notification, a stop event or the next polling interval
+                    self.fetch_stats.polling_interval = polling_interval
+                    successful_fetches = self.fetch_stats.successful_fetches
+                    # wait for a new job notification, a stop event, the next
+                    # scheduled job being due or the next polling interval
                     await utils.wait_any(
                         self._new_job_event.wait(),
-                        asyncio.sleep(self.fetch_job_polling_interval),
+                        asyncio.sleep(await self._get_fetch_delay(polling_interval)),
                         self._stop_event.wait(),
                     )
+                    notified = self._new_job_event.is_set()
+                    if not notified and not self._stop_event.is_set():
+                        self.fetch_stats.polls += 1
+
                     await self._fetch_and_process_jobs()
+                    polling_interval = self._get_next_polling_interval(
+                        polling_interval,
+                        reset=notified
+                        or self.fetch_stats.successful_fetches > successful_fetches,
+                    )
         finally:
             if not side_tasks_monitor.done():
                 side_tasks_monitor.cancel()
@@ -3,6 +3,7 @@ from __future__ import annotations
 import functools
 import itertools
 import json
+import os
 import time
 
 import procrastinate
@@ -50,6 +51,11 @@ app.add_tasks_from(bp, namespace="ns")
 app.add_task_alias(sum_task, "tests.acceptance.app.sum_task")
 
 
+@app.task(queue="process_queue", executor="process")
+def pid_task():
+    print(os.getpid())
+
+
 @app.task(priority=5)
 def sum_task_with_default_priority(a, b):
     print(a + b)
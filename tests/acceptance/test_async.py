@@ -6,18 +6,21 @@ import time
 import pytest
 
 from procrastinate import app as app_module
-from procrastinate.contrib import aiopg
-from procrastinate.exceptions import JobAborted
+from procrastinate.contrib import aiopg, asyncpg
+from procrastinate.exceptions import AlreadyEnqueued, BatchAlreadyEnqueued, JobAborted
 from procrastinate.job_context import JobContext
 from procrastinate.jobs import Status
 
 
-@pytest.fixture(params=["psycopg_connector", "aiopg_connector"])
+@pytest.fixture(params=["psycopg_connector", "aiopg_connector", "asyncpg_connector"])
 async def async_app(request, psycopg_connector, connection_params):
     app = app_module.App(
         connector={
             "psycopg_connector": psycopg_connector,
             "aiopg_connector": aiopg.AiopgConnector(**connection_params),
+            "asyncpg_connector": asyncpg.AsyncpgConnector(
+                database=connection_params["dbname"]
+            ),
         }[request.param]
     )
     async with app.open_async():
@@ -83,6 +86,108 @@ async def test_batch_defer(async_app: app_module.App):
     assert product_results == [12, 30]
 
 
+async def test_defer_stream(async_app: app_module.App):
+    sum_results = []
+
+    @async_app.task(queue="default", name="sum_task")
+    def sum_task(a, b):
+        sum_results.append(a + b)
+
+    async def task_kwargs():
+        for i in range(10):
+            yield {"a": i, "b": i}
+
+    job_ids = [
+        job_id
+        async for job_id in sum_task.defer_stream(
+            task_kwargs(), chunk_size=3, max_in_flight=2
+        )
+    ]
+
+    # Chunks are deferred concurrently, so ids are not necessarily increasing,
+    # but they are yielded in the order of the arguments
+    jobs_by_id = {job.id: job for job in await async_app.job_manager.list_jobs_async()}
+    assert [jobs_by_id[job_id].task_kwargs for job_id in job_ids] == [
+        {"a": i, "b": i} for i in range(10)
+    ]
+
+    await async_app.run_worker_async(queues=["default"], wait=False)
+
+    assert sorted(sum_results) == [2 * i for i in range(10)]
+
+
+async def test_defer_batched(async_app: app_module.App):
+    batching_app = app_module.App(connector=async_app.connector, defer_batch_size=100)
+
+    @batching_app.task(queue="default", name="sum_task")
+    def sum_task(a, b):
+        pass
+
+    results = await asyncio.gather(
+        *(sum_task.defer_async(a=i, b=i) for i in range(10)),
+        sum_task.configure(queueing_lock="lock").defer_async(a=0, b=0),
+        sum_task.configure(queueing_lock="lock").defer_async(a=0, b=0),
+        return_exceptions=True,
+    )
+
+    *job_ids, queueing_lock_result, conflict = results
+    assert len({*job_ids, queueing_lock_result}) == 11
+    assert isinstance(conflict, AlreadyEnqueued)
+
+    jobs_by_id = {job.id: job for job in await async_app.job_manager.list_jobs_async()}
+    assert [jobs_by_id[job_id].task_kwargs for job_id in job_ids] == [
+        {"a": i, "b": i} for i in range(10)
+    ]
+
+
+async def test_app_batch_defer(async_app: app_module.App):
+    results = []
+
+    @async_app.task(queue="default", name="sum_task")
+    def sum_task(a, b):
+        results.append(a + b)
+
+    @async_app.task(queue="other", name="product_task")
+    async def product_task(a, b):
+        results.append(a * b)
+
+    job_ids = await async_app.batch_defer_async(
+        [
+            sum_task.configure(priority=1).job_for(a=1, b=2),
+            product_task.configure(priority=2).job_for(a=3, b=4),
+            sum_task.configure(priority=3, queueing_lock="free").job_for(a=5, b=6),
+        ]
+    )
+    assert len(job_ids) == 3
+
+    await async_app.run_worker_async(queues=["default", "other"], wait=False)
+
+    assert results == [11, 12, 3]
+
+
+async def test_app_batch_defer_already_enqueued(async_app: app_module.App):
+    @async_app.task(queue="default", name="sum_task")
+    def sum_task(a, b):
+        pass
+
+    await sum_task.configure(queueing_lock="taken").defer_async(a=0, b=0)
+
+    with pytest.raises(BatchAlreadyEnqueued) as excinfo:
+        await async_app.batch_defer_async(
+            [
+                sum_task.job_for(a=1, b=1),
+                sum_task.configure(queueing_lock="taken").job_for(a=2, b=2),
+                sum_task.configure(queueing_lock="new").job_for(a=3, b=3),
+                sum_task.configure(queueing_lock="new").job_for(a=4, b=4),
+            ]
+        )
+    assert excinfo.value.conflicts == {1: "taken", 3: "new"}
+
+    # The whole batch was rolled back
+    jobs = await async_app.job_manager.list_jobs_async()
+    assert [job.task_kwargs for job in jobs] == [{"a": 0, "b": 0}]
+
+
 async def test_cancel(async_app: app_module.App):
     sum_results = []
 
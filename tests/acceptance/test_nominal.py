@@ -236,3 +236,86 @@ def test_priority_order(defer, worker):
     lines = stdout.splitlines()
     assert lines[0] == "high"
     assert lines[1] == "low"
+
+
+def test_worker_processes(defer, process_env):
+    for i in range(4):
+        defer("sum_task", a=i, b=10)
+
+    process = subprocess.run(
+        [
+            "procrastinate",
+            "-vvv",
+            "worker",
+            "--name=multi",
+            "--processes=2",
+            "--one-shot",
+        ],
+        env=process_env(),
+        capture_output=True,
+        encoding="utf-8",
+        timeout=30,
+    )
+    print(process.stdout, process.stderr)
+
+    assert process.returncode == 0
+    # Both processes print to the same stdout, possibly interleaving their lines
+    assert process.stderr.count("ended with status: Success") == 4
+    assert "procrastinate.worker.multi-0:Starting worker" in process.stderr
+    assert "procrastinate.worker.multi-1:Starting worker" in process.stderr
+
+
+def test_worker_processes_stop(process_env):
+    process = subprocess.Popen(
+        ["procrastinate", "-vvv", "worker", "--name=multi", "--processes=2"],
+        env=process_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    time.sleep(2)
+    process.send_signal(signal.SIGINT)
+    stdout, stderr = process.communicate(timeout=30)
+    print(stdout, stderr)
+
+    assert process.returncode == 0
+    assert "Stop requested, stopping worker processes" in stderr
+    assert stderr.count("Stopped worker") == 2
+
+
+def test_worker_loops(defer, process_env):
+    for i in range(4):
+        defer("sum_task", a=i, b=10)
+
+    process = subprocess.Popen(
+        ["procrastinate", "-vvv", "worker", "--name=multi", "--loops=2"],
+        env=process_env(),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    time.sleep(2)
+    process.send_signal(signal.SIGINT)
+    stdout, stderr = process.communicate(timeout=30)
+    print(stdout, stderr)
+
+    assert process.returncode == 0
+    assert stderr.count("ended with status: Success") == 4
+    assert "procrastinate.worker.multi-0:Starting worker" in stderr
+    assert "procrastinate.worker.multi-1:Starting worker" in stderr
+    assert stderr.count("Stopped worker") == 2
+
+
+def test_process_executor(defer, running_worker):
+    defer("pid_task")
+
+    process = running_worker("process_queue")
+    time.sleep(2)
+    process.send_signal(signal.SIGINT)
+    stdout, stderr = process.communicate()
+    print(stdout, stderr)
+
+    assert "ended with status: Success" in stderr
+    # The job ran in another process than the worker
+    (job_pid,) = stdout.split()
+    assert int(job_pid) != process.pid
@@ -96,19 +96,19 @@ async def test_shell(read, write, defer):
 
     await write("list_queues")
     assert await read() == [
-        "default: 3 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
-        "other: 1 jobs (todo: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
+        "default: 3 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
+        "other: 1 jobs (todo: 0, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
     ]
 
     await write("list_tasks")
     assert await read() == [
-        "ns:tests.acceptance.app.sum_task: 3 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
-        "tests.acceptance.app.increment_task: 1 jobs (todo: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
+        "ns:tests.acceptance.app.sum_task: 3 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
+        "tests.acceptance.app.increment_task: 1 jobs (todo: 0, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
     ]
 
     await write("list_locks")
     assert await read() == [
-        "a: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
-        "b: 1 jobs (todo: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
-        "lock: 2 jobs (todo: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
+        "a: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "b: 1 jobs (todo: 0, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 1, aborted: 0)",
+        "lock: 2 jobs (todo: 0, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 2, aborted: 0)",
     ]
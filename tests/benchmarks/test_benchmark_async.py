@@ -1,17 +1,24 @@
 from __future__ import annotations
 
+import asyncio
+
 import pytest
 
 from procrastinate import app as app_module
-from procrastinate.contrib import aiopg
+from procrastinate import psycopg_connector as psycopg_connector_module
+from procrastinate import testing
+from procrastinate.contrib import aiopg, asyncpg
 
 
-@pytest.fixture(params=["psycopg_connector", "aiopg_connector"])
+@pytest.fixture(params=["psycopg_connector", "aiopg_connector", "asyncpg_connector"])
 async def async_app(request, psycopg_connector, connection_params):
     app = app_module.App(
         connector={
             "psycopg_connector": psycopg_connector,
             "aiopg_connector": aiopg.AiopgConnector(**connection_params),
+            "asyncpg_connector": asyncpg.AsyncpgConnector(
+                database=connection_params["dbname"]
+            ),
         }[request.param]
     )
     async with app.open_async():
@@ -45,3 +52,225 @@ def test_benchmark_1000_async_batch_jobs(aio_benchmark, async_app: app_module.Ap
         await async_app.run_worker_async(queues=["default"], wait=False)
 
     aio_benchmark(defer_and_process_jobs)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("defer_batch_size", [None, 500])
+def test_benchmark_1000_concurrent_async_defers(
+    aio_benchmark, async_app: app_module.App, defer_batch_size: int | None
+):
+    # Like the handlers of a web application deferring jobs under load
+    batching_app = app_module.App(
+        connector=async_app.connector, defer_batch_size=defer_batch_size
+    )
+
+    @batching_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    async def defer_jobs():
+        await asyncio.gather(*(simple_task.defer_async() for _ in range(1000)))
+
+    aio_benchmark(defer_jobs)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("log_level", ["WARNING", "INFO"])
+def test_benchmark_1000_defers_cpu(aio_benchmark, caplog, log_level: str):
+    # The in-memory connector leaves out the database round trip, so that this
+    # measures the CPU cost of a defer on the client side: divide by 1000
+    caplog.set_level(log_level, logger="procrastinate")
+    connector = testing.InMemoryConnector()
+    app = app_module.App(connector=connector)
+
+    @app.task(queue="default", name="simple_task")
+    async def simple_task(a, b):
+        pass
+
+    async def defer_jobs():
+        connector.reset()
+        for i in range(1000):
+            await simple_task.defer_async(a=i, b={"c": [1, 2, 3]})
+
+    aio_benchmark(defer_jobs)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("max_in_flight", [1, 4])
+def test_benchmark_10_000_jobs_defer_stream(
+    aio_benchmark, async_app: app_module.App, max_in_flight: int
+):
+    @async_app.task(queue="default", name="simple_task")
+    async def simple_task(i):
+        pass
+
+    async def task_kwargs():
+        for i in range(10_000):
+            yield {"i": i}
+
+    async def defer_jobs():
+        async for _ in simple_task.defer_stream(
+            task_kwargs(), chunk_size=500, max_in_flight=max_in_flight
+        ):
+            pass
+
+    aio_benchmark(defer_jobs)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("jobs_per_lock", [10, 1000, 10_000])
+def test_benchmark_fetch_job_with_lock_backlog(
+    aio_benchmark, async_app: app_module.App, jobs_per_lock: int
+):
+    # Fetch latency should stay flat, however many jobs wait behind held locks
+    @async_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    job_manager = async_app.job_manager
+
+    async def defer_jobs_and_hold_locks() -> int:
+        for lock in ["lock_1", "lock_2", "lock_3"]:
+            await simple_task.configure(lock=lock).batch_defer_async(
+                *[{} for _ in range(jobs_per_lock)]
+            )
+        worker_id = await job_manager.register_worker()
+        await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=3)
+        await simple_task.defer_async()
+        return worker_id
+
+    worker_id = asyncio.get_event_loop().run_until_complete(defer_jobs_and_hold_locks())
+
+    async def fetch_job():
+        (job,) = await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+        # Put the job back, for the next round
+        await job_manager.retry_job(job=job)
+
+    aio_benchmark(fetch_job)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("other_queue_jobs", [10, 1000, 10_000])
+def test_benchmark_fetch_job_with_other_queue_backlog(
+    aio_benchmark, async_app: app_module.App, other_queue_jobs: int
+):
+    # Fetch latency should stay flat, however many jobs wait in other queues
+    @async_app.task(queue="default", name="simple_task")
+    async def simple_task():
+        pass
+
+    job_manager = async_app.job_manager
+
+    async def defer_jobs() -> int:
+        await simple_task.configure(queue="other", priority=10).batch_defer_async(
+            *[{} for _ in range(other_queue_jobs)]
+        )
+        await simple_task.defer_async()
+        # As autovacuum would, so that the planner knows about the backlog
+        await async_app.connector.execute_query_async("ANALYZE procrastinate_jobs")
+        return await job_manager.register_worker()
+
+    worker_id = asyncio.get_event_loop().run_until_complete(defer_jobs())
+
+    async def fetch_job():
+        (job,) = await job_manager.fetch_jobs(
+            queues=["default"], worker_id=worker_id, limit=1
+        )
+        # Put the job back, for the next round
+        await job_manager.retry_job(job=job)
+
+    aio_benchmark(fetch_job)
+
+
+@pytest.fixture(
+    params=[
+        pytest.param({}, id="default"),
+        pytest.param({"prepare_statements": True}, id="prepare"),
+        pytest.param({"prepare_statements": True, "pipeline": True}, id="pipeline"),
+        pytest.param(None, id="asyncpg"),
+    ]
+)
+async def hot_queries_app(request, psycopg_connection_params, connection_params):
+    if request.param is None:
+        connector = asyncpg.AsyncpgConnector(database=connection_params["dbname"])
+    else:
+        connector = psycopg_connector_module.PsycopgConnector(
+            **psycopg_connection_params, **request.param
+        )
+    app = app_module.App(connector=connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_100_hot_queries(aio_benchmark, hot_queries_app: app_module.App):
+    # The small queries an idle worker keeps sending: divide 100 by the mean
+    # time to get the queries per second
+    job_manager = hot_queries_app.job_manager
+    worker_id = asyncio.get_event_loop().run_until_complete(
+        job_manager.register_worker()
+    )
+
+    async def run_queries():
+        for _ in range(25):
+            await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+            await job_manager.get_next_scheduled_job_delay_async(queues=None)
+            # 2 queries
+            await job_manager.update_heartbeat_and_count_workers(worker_id=worker_id)
+
+    aio_benchmark(run_queries)
+
+
+@pytest.fixture(params=["psycopg_connector", "asyncpg_connector"])
+async def copy_app(request, psycopg_connector, connection_params):
+    app = app_module.App(
+        connector={
+            "psycopg_connector": psycopg_connector,
+            "asyncpg_connector": asyncpg.AsyncpgConnector(
+                database=connection_params["dbname"]
+            ),
+        }[request.param]
+    )
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize(
+    "method, job_count",
+    [
+        ("bulk_defer_async", 1_000_000),
+        ("bulk_defer_async", 100_000),
+        # A single array of 1M jobs takes gigabytes of memory on the server
+        ("batch_defer_async", 100_000),
+    ],
+)
+def test_benchmark_jobs_bulk_defer(
+    benchmark, copy_app: app_module.App, method: str, job_count: int
+):
+    @copy_app.task(queue="default", name="simple_task")
+    async def simple_task(i):
+        pass
+
+    event_loop = asyncio.get_event_loop()
+
+    async def defer_jobs():
+        task_kwargs = ({"i": i} for i in range(job_count))
+        if method == "bulk_defer_async":
+            await simple_task.bulk_defer_async(task_kwargs, chunk_size=50_000)
+        else:
+            await simple_task.batch_defer_async(*task_kwargs)
+
+    def delete_jobs():
+        event_loop.run_until_complete(
+            copy_app.connector.execute_query_async(
+                "TRUNCATE procrastinate_jobs CASCADE"
+            )
+        )
+
+    # A round takes seconds: don't let pytest-benchmark calibrate
+    benchmark.pedantic(
+        lambda: event_loop.run_until_complete(defer_jobs()),
+        setup=delete_jobs,
+        rounds=3,
+    )
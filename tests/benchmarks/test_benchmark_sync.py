@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import time
+
 import pytest
 
 import procrastinate
+from procrastinate import testing
 from procrastinate.contrib import psycopg2
 
 
@@ -57,3 +61,61 @@ def test_benchmark_1000_sync_batch_jobs(
         await async_app.run_worker_async(queues=["default"], wait=False)
 
     aio_benchmark(defer_and_process_jobs)
+
+
+@pytest.fixture(params=[False, True], ids=["event_loop", "sync_pool"])
+async def mixed_app(request, psycopg_connection_params):
+    connector = procrastinate.PsycopgConnector(
+        **psycopg_connection_params, sync_pool=request.param
+    )
+    app = procrastinate.App(connector=connector)
+    async with app.open_async():
+        yield app
+
+
+@pytest.mark.benchmark
+def test_benchmark_100_sync_defers_on_async_connector(
+    aio_benchmark, mixed_app: procrastinate.App
+):
+    # Sync code (e.g. a sync view or task) deferring jobs in a thread, while the
+    # event loop owning the async pool runs: divide the mean by 100 to get the
+    # latency of a single defer
+    @mixed_app.task(queue="default", name="simple_task")
+    def simple_task():
+        pass
+
+    def defer_jobs():
+        for _ in range(100):
+            simple_task.defer()
+
+    async def defer_jobs_in_thread():
+        await asyncio.to_thread(defer_jobs)
+
+    aio_benchmark(defer_jobs_in_thread)
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("sync_concurrency", [1, 5, 20])
+def test_benchmark_100_blocking_sync_jobs(aio_benchmark, sync_concurrency: int):
+    # Sync jobs blocking for 10ms (e.g. on I/O) with a concurrency of 20: the
+    # throughput depends on the number of threads running them
+    connector = testing.InMemoryConnector()
+    app = procrastinate.App(connector=connector)
+
+    @app.task(queue="default", name="blocking_task")
+    def blocking_task():
+        time.sleep(0.01)
+
+    async def defer_and_process_jobs():
+        connector.reset()
+        async with app.open_async():
+            await blocking_task.batch_defer_async(*[{} for _ in range(100)])
+
+            await app.run_worker_async(
+                queues=["default"],
+                wait=False,
+                concurrency=20,
+                sync_concurrency=sync_concurrency,
+            )
+
+    aio_benchmark(defer_and_process_jobs)
@@ -176,9 +176,11 @@ async def test_execute_query_simultaneous(aiopg_connector):
 async def test_close_async(aiopg_connector):
     await aiopg_connector.execute_query_async("SELECT 1")
     pool = aiopg_connector._pool
+    assert aiopg_connector.is_open is True
     await aiopg_connector.close_async()
     assert pool.closed is True
     assert aiopg_connector._pool is None
+    assert aiopg_connector.is_open is False
 
 
 async def test_get_connection_no_psycopg2_adapter_registration(
@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import pytest
+
+from procrastinate.contrib.asyncpg import asyncpg_connector as asyncpg
+
+
+@pytest.fixture
+def asyncpg_connection_params(connection_params):
+    return {"database": connection_params["dbname"]}
+
+
+@pytest.fixture
+async def asyncpg_connector_factory(asyncpg_connection_params):
+    connectors = []
+
+    async def _(*, open: bool = True, **kwargs):
+        connector = asyncpg.AsyncpgConnector(**{**asyncpg_connection_params, **kwargs})
+        connectors.append(connector)
+        if open:
+            await connector.open_async()
+        return connector
+
+    yield _
+    for connector in connectors:
+        await connector.close_async()
+
+
+@pytest.fixture
+async def asyncpg_connector(
+    asyncpg_connector_factory,
+) -> asyncpg.AsyncpgConnector:
+    return await asyncpg_connector_factory()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+
+import asgiref.sync
+import asyncpg
+import attr
+import pytest
+
+from procrastinate import App, exceptions, manager, sync_psycopg_connector
+from procrastinate.contrib.asyncpg import asyncpg_connector as asyncpg_connector_module
+
+
+@pytest.mark.parametrize(
+    "method_name, expected",
+    [
+        ("execute_query_one_async", {"json": {"a": "a", "b": "foo"}}),
+        ("execute_query_all_async", [{"json": {"a": "a", "b": "foo"}}]),
+    ],
+)
+async def test_execute_query_json_dumps(
+    asyncpg_connector_factory, method_name, expected
+):
+    class NotJSONSerializableByDefault:
+        pass
+
+    def encode(obj):
+        if isinstance(obj, NotJSONSerializableByDefault):
+            return "foo"
+        raise TypeError()
+
+    query = "SELECT %(arg)s::jsonb as json"
+    arg = {"a": "a", "b": NotJSONSerializableByDefault()}
+    json_dumps = functools.partial(json.dumps, default=encode)
+    connector = await asyncpg_connector_factory(json_dumps=json_dumps)
+    method = getattr(connector, method_name)
+
+    result = await method(query, arg=arg)
+    assert result == expected
+
+
+async def test_json_loads(asyncpg_connector_factory):
+    @attr.dataclass
+    class Param:
+        p: int
+
+    def decode(dct):
+        if "b" in dct:
+            dct["b"] = Param(p=dct["b"])
+        return dct
+
+    json_loads = functools.partial(json.loads, object_hook=decode)
+
+    query = "SELECT %(arg)s::jsonb as json, %(arg)s::json as json2"
+    arg = {"a": 1, "b": 2}
+    connector = await asyncpg_connector_factory(json_loads=json_loads)
+
+    result = await connector.execute_query_one_async(query, arg=arg)
+    assert result["json"] == {"a": 1, "b": Param(p=2)}
+    assert result["json2"] == {"a": 1, "b": Param(p=2)}
+
+
+async def test_wrap_exceptions(asyncpg_connector):
+    query = """SELECT procrastinate_defer_jobs_v1(
+        ARRAY[
+            ROW(
+                'queue'::character varying,
+                'foo'::character varying,
+                0::integer,
+                NULL::text,
+                'same_queueing_lock'::text,
+                '{}'::jsonb,
+                NULL::timestamptz
+            )
+        ]::procrastinate_job_to_defer_v1[]
+    ) AS id;"""
+    await asyncpg_connector.execute_query_async(query)
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await asyncpg_connector.execute_query_async(query)
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "same_queueing_lock"
+
+
+async def test_execute_query(asyncpg_connector):
+    assert (
+        await asyncpg_connector.execute_query_async(
+            "COMMENT ON TABLE \"procrastinate_jobs\" IS 'foo' "
+        )
+        is None
+    )
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == {"obj_description": "foo"}
+
+    result = await asyncpg_connector.execute_query_all_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == [{"obj_description": "foo"}]
+
+
+async def test_execute_query_several_statements(asyncpg_connector):
+    # Without arguments, queries such as the schema may hold several statements
+    await asyncpg_connector.execute_query_async(
+        "COMMENT ON TABLE procrastinate_jobs IS 'foo'; "
+        "COMMENT ON TABLE procrastinate_events IS 'bar';"
+    )
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_events'::regclass)"
+    )
+    assert result == {"obj_description": "bar"}
+
+
+async def test_apply_schema(db_factory, asyncpg_connector_factory):
+    db_factory(dbname="procrastinate_test_asyncpg")
+    connector = await asyncpg_connector_factory(database="procrastinate_test_asyncpg")
+    app = App(connector=connector)
+
+    await app.schema_manager.apply_schema_async()
+
+    # The "%" of the RAISE statements of the schema were unescaped
+    with pytest.raises(exceptions.ConnectorException) as exc_info:
+        await connector.execute_query_async(
+            "SELECT procrastinate_finish_job_v1(%(job_id)s, 'succeeded', false)",
+            job_id=42,
+        )
+    assert "(job id: 42)" in str(exc_info.value.__cause__)
+
+
+async def test_execute_query_interpolate(asyncpg_connector):
+    result = await asyncpg_connector.execute_query_one_async(
+        "SELECT %(foo)s::text as foo, %(bar)s::int as bar, %(foo)s::text as foo2;",
+        foo="bar",
+        bar=1,
+    )
+    assert result == {"foo": "bar", "bar": 1, "foo2": "bar"}
+
+
+async def test_execute_query_one_no_result(asyncpg_connector):
+    with pytest.raises(exceptions.NoResult):
+        await asyncpg_connector.execute_query_one_async(
+            "SELECT 1 WHERE %(value)s::boolean", value=False
+        )
+
+
+async def test_execute_query_connector_exception(asyncpg_connector):
+    with pytest.raises(exceptions.ConnectorException):
+        await asyncpg_connector.execute_query_async("SELECT * FROM nope")
+
+
+async def test_close_async(asyncpg_connector):
+    await asyncpg_connector.execute_query_async("SELECT 1")
+    pool = asyncpg_connector._pool
+    assert asyncpg_connector.is_open is True
+    await asyncpg_connector.close_async()
+    assert pool.is_closing() is True
+    assert asyncpg_connector._pool is None
+    assert asyncpg_connector.is_open is False
+
+
+async def test_open_async_external_pool(asyncpg_connection_params):
+    connector = asyncpg_connector_module.AsyncpgConnector()
+    pool = await asyncpg.create_pool(
+        **asyncpg_connection_params, init=connector.init_connection
+    )
+    try:
+        await connector.open_async(pool=pool)
+        result = await connector.execute_query_one_async(
+            "SELECT %(arg)s::jsonb as json", arg={"a": 1}
+        )
+        assert result == {"json": {"a": 1}}
+
+        await connector.close_async()
+        assert pool.is_closing() is False
+    finally:
+        await pool.close()
+
+
+async def test_listen_notify(asyncpg_connector):
+    channel = "somechannel"
+    event = asyncio.Event()
+    received_args: list[dict] = []
+
+    async def handle_notification(*, channel: str, payload: str):
+        event.set()
+        received_args.append({"channel": channel, "payload": payload})
+
+    task = asyncio.ensure_future(
+        asyncpg_connector.listen_notify(
+            channels=[channel], on_notification=handle_notification
+        )
+    )
+    try:
+        await asyncio.sleep(0.1)
+        await asyncpg_connector.execute_query_async(
+            f"""NOTIFY "{channel}", 'somepayload' """
+        )
+        await asyncio.wait_for(event.wait(), timeout=1)
+        args = received_args.pop()
+        assert args["channel"] == "somechannel"
+        assert args["payload"] == "somepayload"
+    except asyncio.TimeoutError:
+        pytest.fail("Notify not received within 1 sec")
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # The listening connection went back to the pool, without its listener
+    await asyncpg_connector.close_async()
+
+
+async def test_listen_notify_pool_max_size_1(asyncpg_connector_factory, caplog):
+    connector = await asyncpg_connector_factory(min_size=1, max_size=1)
+
+    async def handle_notification(*, channel: str, payload: str):
+        pass
+
+    await connector.listen_notify(
+        channels=["somechannel"], on_notification=handle_notification
+    )
+    assert {e.action for e in caplog.records} == {"listen_notify_disabled"}
+
+
+async def test_loop_notify_timeout(asyncpg_connector):
+    # We want to make sure that when the listen starts, we don't listen forever. If the
+    # connection closes, we eventually finish the coroutine.
+    event = asyncio.Event()
+
+    async def handle_notification(channel: str, payload: str):
+        event.set()
+
+    async with asyncpg_connector.pool.acquire() as connection:
+        task = asyncio.ensure_future(
+            asyncpg_connector._loop_notify(
+                on_notification=handle_notification,
+                connection=connection,
+                notifications=asyncio.Queue(),
+                timeout=0.01,
+            )
+        )
+        await asyncio.sleep(0.1)
+        assert not task.done()
+        connection.terminate()
+        try:
+            await asyncio.wait_for(task, 0.1)
+        except asyncio.TimeoutError:
+            pytest.fail("Failed to detect that connection was closed and stop")
+
+    assert not event.is_set()
+
+
+async def test_get_sync_connector(asyncpg_connector_factory):
+    result = []
+
+    asyncpg_connector = await asyncpg_connector_factory(open=False)
+
+    @asgiref.sync.sync_to_async
+    def f():
+        sync_conn = asyncpg_connector.get_sync_connector()
+        sync_conn.open()
+        try:
+            result.append(sync_conn.execute_query_one("SELECT 1 AS one"))
+        finally:
+            sync_conn.close()
+
+    await f()
+    assert result == [{"one": 1}]
+
+
+async def test_get_sync_connector__open(asyncpg_connector):
+    assert asyncpg_connector.get_sync_connector() is asyncpg_connector
+
+
+async def test_get_sync_connector__not_open(asyncpg_connection_params):
+    connector = asyncpg_connector_module.AsyncpgConnector(**asyncpg_connection_params)
+    sync = connector.get_sync_connector()
+    assert isinstance(sync, sync_psycopg_connector.SyncPsycopgConnector)
+    assert connector.get_sync_connector() is sync
+
+
+async def test_copy_and_execute_query_all_async(asyncpg_connector):
+    result = await asyncpg_connector.copy_and_execute_query_all_async(
+        setup_query="CREATE TEMPORARY TABLE copied (a integer, b jsonb) ON COMMIT DROP",
+        table="copied",
+        columns=["a", "b"],
+        rows=[(1, {"x": 1}), (2, None)],
+        query="SELECT a, b FROM copied WHERE a >= %(min)s ORDER BY a",
+        min=1,
+    )
+
+    assert result == [{"a": 1, "b": {"x": 1}}, {"a": 2, "b": None}]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import functools
+
+import pytest
+
+from procrastinate import exceptions, jobs, manager
+
+
+@pytest.fixture
+def pg_job_manager(asyncpg_connector):
+    return manager.JobManager(connector=asyncpg_connector)
+
+
+@pytest.fixture
+def deferred_job_factory(deferred_job_factory, pg_job_manager):
+    return functools.partial(deferred_job_factory, job_manager=pg_job_manager)
+
+
+async def test_defer_and_fetch_job(pg_job_manager, deferred_job_factory):
+    job = await deferred_job_factory(queue="queue_a", task_kwargs={"a": {"b": [1]}})
+    worker_id = await pg_job_manager.register_worker()
+
+    (fetched,) = await pg_job_manager.fetch_jobs(
+        queues=["queue_a"], worker_id=worker_id, limit=1
+    )
+
+    assert fetched.id == job.id
+    assert fetched.status == jobs.Status.DOING.value
+    assert fetched.task_kwargs == {"a": {"b": [1]}}
+
+
+async def test_defer_job_queueing_lock(pg_job_manager, deferred_job_factory):
+    await deferred_job_factory(queueing_lock="some-lock")
+
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        await deferred_job_factory(queueing_lock="some-lock")
+
+
+async def test_bulk_defer_copy(pg_job_manager, job_factory):
+    job_ids = await pg_job_manager.bulk_defer_copy_async(
+        jobs=(job_factory(id=None, task_kwargs={"i": i}) for i in range(3)),
+        chunk_size=2,
+    )
+
+    jobs_by_id = {job.id: job for job in await pg_job_manager.list_jobs_async()}
+    assert [jobs_by_id[job_id].task_kwargs for job_id in job_ids] == [
+        {"i": 0},
+        {"i": 1},
+        {"i": 2},
+    ]
+
+
+async def test_delete_old_jobs(pg_job_manager, deferred_job_factory):
+    await deferred_job_factory(queue="queue_a")
+    worker_id = await pg_job_manager.register_worker()
+    (job,) = await pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+    await pg_job_manager.finish_job(
+        job=job, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+
+    await pg_job_manager.delete_old_jobs(nb_hours=0)
+
+    assert await pg_job_manager.list_jobs_async() == []
+
+
+async def test_get_stalled_jobs_by_heartbeat(pg_job_manager, deferred_job_factory):
+    await deferred_job_factory(queue="queue_a")
+    worker_id = await pg_job_manager.register_worker()
+    await pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+
+    assert await pg_job_manager.get_stalled_jobs(seconds_since_heartbeat=60) == []
+    (stalled,) = await pg_job_manager.get_stalled_jobs(seconds_since_heartbeat=0)
+    assert stalled.worker_id == worker_id
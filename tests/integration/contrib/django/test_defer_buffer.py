@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+import procrastinate.contrib.django
+from procrastinate import App, exceptions, tasks, testing
+from procrastinate.contrib.django import django_connector, models
+
+
+@pytest.fixture
+def buffered_task(db):
+    def buffered_task(a):
+        pass
+
+    return tasks.Task(
+        buffered_task,
+        blueprint=procrastinate.contrib.django.app,
+        name="buffered_task",
+        queue="default",
+    )
+
+
+def buffered_jobs():
+    return models.ProcrastinateJob.objects.filter(task_name="buffered_task").order_by(
+        "id"
+    )
+
+
+def job_args():
+    return list(buffered_jobs().values_list("args", flat=True))
+
+
+def test_atomic_defer(buffered_task):
+    with CaptureQueriesContext(connection) as queries:
+        with procrastinate.contrib.django.atomic_defer() as buffer:
+            for i in range(3):
+                assert (
+                    procrastinate.contrib.django.buffered_defer(buffered_task, a=i)
+                    is None
+                )
+            procrastinate.contrib.django.buffered_defer(
+                buffered_task.configure(queue="other"), a=3
+            )
+
+            assert job_args() == []
+
+    defer_queries = [
+        query for query in queries if "procrastinate_defer_jobs" in query["sql"]
+    ]
+    assert len(defer_queries) == 1
+
+    jobs = buffered_jobs()
+    assert [job.id for job in jobs] == buffer.job_ids
+    assert [job.args for job in jobs] == [{"a": i} for i in range(4)]
+    assert [job.queue_name for job in jobs] == ["default"] * 3 + ["other"]
+
+
+def test_atomic_defer__plain_defer(buffered_task):
+    # Buffering is opt-in: defer() returns the id of the job, so it inserts it
+    # right away, in the transaction
+    with procrastinate.contrib.django.atomic_defer() as buffer:
+        job_id = buffered_task.defer(a=1)
+
+        assert list(buffered_jobs().values_list("id", flat=True)) == [job_id]
+        assert buffer.jobs == []
+
+    assert buffer.job_ids == []
+    assert job_args() == [{"a": 1}]
+
+
+def test_atomic_defer__error(buffered_task):
+    with pytest.raises(ZeroDivisionError):
+        with procrastinate.contrib.django.atomic_defer() as buffer:
+            buffer.defer(buffered_task, a=1)
+            1 / 0
+
+    assert job_args() == []
+    assert buffer.job_ids == []
+
+
+def test_atomic_defer__already_enqueued(buffered_task):
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        with procrastinate.contrib.django.atomic_defer() as buffer:
+            # Deferred right away, but rolled back with the rest of the block
+            buffered_task.defer(a=0)
+            buffer.defer(buffered_task.configure(queueing_lock="lock"), a=1)
+            buffer.defer(buffered_task.configure(queueing_lock="lock"), a=2)
+
+    assert job_args() == []
+
+
+def test_atomic_defer__nested(buffered_task):
+    with procrastinate.contrib.django.atomic_defer() as outer:
+        outer.defer(buffered_task, a=1)
+        with pytest.raises(ZeroDivisionError):
+            with procrastinate.contrib.django.atomic_defer() as inner:
+                procrastinate.contrib.django.buffered_defer(buffered_task, a=2)
+                1 / 0
+        with procrastinate.contrib.django.atomic_defer() as inner:
+            procrastinate.contrib.django.buffered_defer(buffered_task, a=3)
+
+        assert job_args() == [{"a": 3}]
+
+    assert job_args() == [{"a": 3}, {"a": 1}]
+    assert len(inner.job_ids) == len(outer.job_ids) == 1
+
+
+@pytest.mark.parametrize(
+    "connector",
+    [testing.InMemoryConnector(), django_connector.DjangoConnector(alias="other")],
+)
+def test_atomic_defer__not_in_transaction(buffered_task, connector):
+    other_task = tasks.Task(
+        buffered_task.func,
+        blueprint=App(connector=connector),
+        name="buffered_task",
+        queue="default",
+    )
+
+    with pytest.raises(ImproperlyConfigured):
+        with procrastinate.contrib.django.atomic_defer() as buffer:
+            buffer.defer(buffered_task, a=1)
+            buffer.defer(other_task, a=2)
+
+    # No job is deferred, and the block is rolled back
+    assert job_args() == []
+    assert buffer.job_ids == []
+    if isinstance(connector, testing.InMemoryConnector):
+        assert connector.jobs == {}
+
+
+def test_buffered_defer__no_buffer(buffered_task):
+    job_id = procrastinate.contrib.django.buffered_defer(buffered_task, a=1)
+
+    assert buffered_jobs().get().id == job_id
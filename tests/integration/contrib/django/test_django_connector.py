@@ -50,6 +50,12 @@ def test_close(django_connector):
     assert django_connector.close() is None
 
 
+def test_is_open(django_connector):
+    # Opened by Django, on first use
+    django_connector.execute_query("SELECT 1")
+    assert django_connector.is_open is True
+
+
 async def test_open_async(django_connector):
     assert await django_connector.open_async() is None
 
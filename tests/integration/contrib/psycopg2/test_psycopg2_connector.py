@@ -144,5 +144,7 @@ def test_execute_query_arg(psycopg2_connector):
 
 def test_close(psycopg2_connector):
     pool = psycopg2_connector._pool
+    assert psycopg2_connector.is_open is True
     psycopg2_connector.close()
     assert pool.closed is True
+    assert psycopg2_connector.is_open is False
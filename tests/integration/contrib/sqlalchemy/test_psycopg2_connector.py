@@ -156,8 +156,10 @@ def test_close(sqlalchemy_psycopg2_connector):
     sqlalchemy_psycopg2_connector.execute_query("SELECT 1")
     engine = sqlalchemy_psycopg2_connector.engine
     assert engine.pool.checkedin() == 1
+    assert sqlalchemy_psycopg2_connector.is_open is True
     sqlalchemy_psycopg2_connector.close()
     assert engine.pool.checkedin() == 0
+    assert sqlalchemy_psycopg2_connector.is_open is False
 
 
 def test_execute_query_all_with_connection(sqlalchemy_psycopg2_connector):
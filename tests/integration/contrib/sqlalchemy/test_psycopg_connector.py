@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+
+import asgiref.sync
+import attr
+import pytest
+import sqlalchemy.ext.asyncio
+
+from procrastinate import App, exceptions, jobs, manager, sync_psycopg_connector
+from procrastinate.contrib.sqlalchemy import SQLAlchemyAsyncConnector
+
+
+@pytest.fixture
+def sqlalchemy_async_engine_dsn(connection_params):
+    yield f"postgresql+psycopg:///{connection_params['dbname']}"
+
+
+@pytest.fixture
+async def sqlalchemy_async_connector_factory(sqlalchemy_async_engine_dsn):
+    connectors = []
+
+    async def _(*, open: bool = True, **kwargs):
+        connector = SQLAlchemyAsyncConnector(dsn=sqlalchemy_async_engine_dsn, **kwargs)
+        connectors.append(connector)
+        if open:
+            await connector.open_async()
+        return connector
+
+    yield _
+    for connector in connectors:
+        await connector.close_async()
+
+
+@pytest.fixture
+async def sqlalchemy_async_connector(sqlalchemy_async_connector_factory):
+    return await sqlalchemy_async_connector_factory()
+
+
+@pytest.mark.parametrize(
+    "method_name, expected",
+    [
+        ("execute_query_one_async", {"json": {"a": "a", "b": "foo"}}),
+        ("execute_query_all_async", [{"json": {"a": "a", "b": "foo"}}]),
+    ],
+)
+async def test_execute_query_json_dumps(
+    sqlalchemy_async_connector_factory, method_name, expected
+):
+    class NotJSONSerializableByDefault:
+        pass
+
+    def encode(obj):
+        if isinstance(obj, NotJSONSerializableByDefault):
+            return "foo"
+        raise TypeError()
+
+    query = "SELECT %(arg)s::jsonb as json"
+    arg = {"a": "a", "b": NotJSONSerializableByDefault()}
+    json_dumps = functools.partial(json.dumps, default=encode)
+    connector = await sqlalchemy_async_connector_factory(json_dumps=json_dumps)
+    method = getattr(connector, method_name)
+
+    result = await method(query, arg=arg)
+    assert result == expected
+
+
+async def test_json_loads(sqlalchemy_async_connector_factory):
+    @attr.dataclass
+    class Param:
+        p: int
+
+    def decode(dct):
+        if "b" in dct:
+            dct["b"] = Param(p=dct["b"])
+        return dct
+
+    json_loads = functools.partial(json.loads, object_hook=decode)
+
+    query = "SELECT %(arg)s::jsonb as json"
+    arg = {"a": 1, "b": 2}
+    connector = await sqlalchemy_async_connector_factory(json_loads=json_loads)
+
+    result = await connector.execute_query_one_async(query, arg=arg)
+    assert result["json"] == {"a": 1, "b": Param(p=2)}
+
+
+async def test_wrap_exceptions(sqlalchemy_async_connector):
+    query = """SELECT procrastinate_defer_jobs_v1(
+        ARRAY[
+            ROW(
+                'queue'::character varying,
+                'foo'::character varying,
+                0::integer,
+                NULL::text,
+                'same_queueing_lock'::text,
+                '{}'::jsonb,
+                NULL::timestamptz
+            )
+        ]::procrastinate_job_to_defer_v1[]
+    ) AS id;"""
+    await sqlalchemy_async_connector.execute_query_async(query)
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await sqlalchemy_async_connector.execute_query_async(query)
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "same_queueing_lock"
+
+
+async def test_execute_query(sqlalchemy_async_connector):
+    await sqlalchemy_async_connector.execute_query_async(
+        "COMMENT ON TABLE \"procrastinate_jobs\" IS 'foo'"
+    )
+    result = await sqlalchemy_async_connector.execute_query_one_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == {"obj_description": "foo"}
+
+    result = await sqlalchemy_async_connector.execute_query_all_async(
+        "SELECT obj_description('public.procrastinate_jobs'::regclass)"
+    )
+    assert result == [{"obj_description": "foo"}]
+
+
+async def test_execute_query_arg(sqlalchemy_async_connector):
+    await sqlalchemy_async_connector.execute_query_async("SELECT %(arg)s", arg=1)
+    result = await sqlalchemy_async_connector.execute_query_one_async(
+        "SELECT %(arg)s AS col, 5 % 2 AS mod", arg=1
+    )
+    assert result == {"col": 1, "mod": 1}
+
+    result = await sqlalchemy_async_connector.execute_query_all_async(
+        "SELECT %(arg)s AS col", arg=1
+    )
+    assert result == [{"col": 1}]
+
+
+async def test_execute_query_one_no_result(sqlalchemy_async_connector):
+    with pytest.raises(exceptions.NoResult):
+        await sqlalchemy_async_connector.execute_query_one_async(
+            "SELECT 1 WHERE %(value)s", value=False
+        )
+
+
+async def test_close_async(sqlalchemy_async_connector):
+    await sqlalchemy_async_connector.execute_query_async("SELECT 1")
+    engine = sqlalchemy_async_connector.engine
+    assert engine.pool.checkedin() == 1
+    assert sqlalchemy_async_connector.is_open is True
+    await sqlalchemy_async_connector.close_async()
+    assert engine.pool.checkedin() == 0
+    assert sqlalchemy_async_connector.is_open is False
+
+
+async def test_open_async_external_engine(sqlalchemy_async_engine_dsn):
+    engine = sqlalchemy.ext.asyncio.create_async_engine(sqlalchemy_async_engine_dsn)
+    connector = SQLAlchemyAsyncConnector()
+    try:
+        await connector.open_async(engine=engine)
+        assert connector.engine is engine
+        await connector.execute_query_async("SELECT 1")
+
+        await connector.close_async()
+        # The engine belongs to the application, and is left as is
+        assert engine.pool.checkedin() == 1
+    finally:
+        await engine.dispose()
+
+
+async def test_listen_notify(sqlalchemy_async_connector):
+    channel = "somechannel"
+    event = asyncio.Event()
+    received_args: list[dict] = []
+
+    async def handle_notification(*, channel: str, payload: str):
+        event.set()
+        received_args.append({"channel": channel, "payload": payload})
+
+    task = asyncio.ensure_future(
+        sqlalchemy_async_connector.listen_notify(
+            channels=[channel], on_notification=handle_notification
+        )
+    )
+    try:
+        await asyncio.sleep(0.1)
+        await sqlalchemy_async_connector.execute_query_async(
+            f"""NOTIFY "{channel}", 'somepayload' """
+        )
+        await asyncio.wait_for(event.wait(), timeout=1)
+        args = received_args.pop()
+        assert args["channel"] == "somechannel"
+        assert args["payload"] == "somepayload"
+    except asyncio.TimeoutError:
+        pytest.fail("Notify not received within 1 sec")
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # The connection went back to the pool, and doesn't listen anymore
+    result = await sqlalchemy_async_connector.execute_query_all_async(
+        "SELECT pg_listening_channels() AS channel"
+    )
+    assert result == []
+
+
+async def test_defer_with_external_connection_commit(sqlalchemy_async_connector):
+    app = App(connector=sqlalchemy_async_connector)
+
+    @app.task
+    def my_sqla_async_task(x):
+        pass
+
+    async with sqlalchemy_async_connector.engine.connect() as conn:
+        job_id = await my_sqla_async_task.configure(connection=conn).defer_async(x=1)
+        await conn.commit()
+
+    status = await app.job_manager.get_job_status_async(job_id)
+    assert status == jobs.Status.TODO
+
+
+async def test_batch_defer_with_external_connection_rollback(
+    sqlalchemy_async_connector,
+):
+    app = App(connector=sqlalchemy_async_connector)
+
+    @app.task
+    def my_sqla_async_rollback_task(x):
+        pass
+
+    async with sqlalchemy_async_connector.engine.connect() as conn:
+        await my_sqla_async_rollback_task.configure(connection=conn).batch_defer_async(
+            {"x": 1}, {"x": 2}
+        )
+        await conn.rollback()
+
+    assert await app.job_manager.list_jobs_async() == []
+
+
+async def test_run_worker(sqlalchemy_async_connector):
+    app = App(connector=sqlalchemy_async_connector)
+    results = []
+
+    @app.task(queue="sqla")
+    async def sum_task(a, b):
+        results.append(a + b)
+
+    await sum_task.defer_async(a=1, b=2)
+    await app.run_worker_async(queues=["sqla"], wait=False)
+
+    assert results == [3]
+
+
+async def test_get_sync_connector(sqlalchemy_async_connector_factory):
+    result = []
+
+    connector = await sqlalchemy_async_connector_factory(open=False)
+
+    @asgiref.sync.sync_to_async
+    def f():
+        sync_conn = connector.get_sync_connector()
+        assert isinstance(sync_conn, sync_psycopg_connector.SyncPsycopgConnector)
+        sync_conn.open()
+        try:
+            result.append(sync_conn.execute_query_one("SELECT 1 AS one"))
+        finally:
+            sync_conn.close()
+
+    await f()
+    assert result == [{"one": 1}]
+
+
+async def test_get_sync_connector__open(sqlalchemy_async_connector):
+    assert sqlalchemy_async_connector.get_sync_connector() is sqlalchemy_async_connector
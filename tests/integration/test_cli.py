@@ -87,6 +87,74 @@ async def test_worker(entrypoint, cli_app, mocker):
     )
 
 
+def test_worker_processes(cli_app, mocker, capsys):
+    def run_worker_processes(**kwargs):
+        # Worker processes are forked before any event loop is started
+        with pytest.raises(RuntimeError):
+            asyncio.get_running_loop()
+        return 0
+
+    cli_app.run_worker_processes = mocker.Mock(side_effect=run_worker_processes)
+    open_async = mocker.patch.object(cli_app, "open_async")
+    cli.run_command(
+        cli.parse_args("worker --queues a --processes=3 --one-shot".split())
+    )
+
+    assert "Launching 3 worker processes on a" in capsys.readouterr().err
+    cli_app.run_worker_processes.assert_called_once_with(
+        processes=3, queues=["a"], wait=False
+    )
+    # Worker processes open the app themselves
+    open_async.assert_not_called()
+
+
+def test_worker_processes_error(cli_app, mocker):
+    cli_app.run_worker_processes = mocker.Mock(return_value=137)
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.run_command(cli.parse_args(["worker", "--processes=2"]))
+
+    assert exc_info.value.code == 137
+
+
+def test_worker_processes_and_loops(cli_app, mocker, capsys):
+    cli_app.run_worker_processes = mocker.Mock()
+
+    with pytest.raises(SystemExit) as exc_info:
+        cli.run_command(cli.parse_args(["worker", "--processes=2", "--loops=2"]))
+
+    assert exc_info.value.code == 1
+    assert "cannot be used together" in capsys.readouterr().err
+    cli_app.run_worker_processes.assert_not_called()
+
+
+async def test_worker_processes_running_loop(entrypoint, cli_app, mocker):
+    cli_app.run_worker_processes = mocker.Mock()
+    result = await entrypoint("worker --processes=2")
+
+    assert result.exit_code == 1
+    assert "running event loop" in result.stderr
+    cli_app.run_worker_processes.assert_not_called()
+
+
+async def test_worker_loops(entrypoint, cli_app, mocker):
+    cli_app.run_worker_loops_async = mocker.AsyncMock()
+    result = await entrypoint("worker --queues a --loops=3 --one-shot")
+
+    assert "Launching 3 worker loops on a" in result.stderr.strip()
+    assert result.exit_code == 0
+    cli_app.run_worker_loops_async.assert_called_once_with(
+        loops=3, queues=["a"], wait=False
+    )
+
+
+async def test_worker_loops_and_processes(entrypoint, cli_app):
+    result = await entrypoint("worker --loops=2 --processes=2")
+
+    assert "cannot be used together" in result.stderr
+    assert result.exit_code == 1
+
+
 async def test_schema_apply(entrypoint, cli_app, mocker):
     apply_schema_async = mocker.patch(
         "procrastinate.schema.SchemaManager.apply_schema_async"
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import asyncio
+
+from procrastinate import app, manager
+
+
+async def count_listening_connections(connector) -> int:
+    row = await connector.execute_query_one_async(
+        "SELECT count(*) AS count FROM pg_stat_activity "
+        "WHERE datname = current_database() AND query LIKE 'LISTEN %%'"
+    )
+    return row["count"]
+
+
+async def test_run_workers__single_listen_connection(psycopg_connector):
+    pg_app = app.App(connector=psycopg_connector)
+    run_task = asyncio.create_task(
+        pg_app.run_workers_async(
+            [{"queues": ["a"]}, {"queues": ["b"]}, {}],
+            install_signal_handlers=False,
+        )
+    )
+    try:
+        for _ in range(100):
+            if await count_listening_connections(psycopg_connector):
+                break
+            await asyncio.sleep(0.05)
+        # Let the workers that started listening last show up
+        await asyncio.sleep(0.2)
+
+        assert await count_listening_connections(psycopg_connector) == 1
+        assert await pg_app.job_manager.count_workers_async() == (
+            manager.WorkersCount(all_queues=1, by_queue={"a": 1, "b": 1})
+        )
+    finally:
+        run_task.cancel()
+        await asyncio.gather(run_task, return_exceptions=True)
+
+    assert await count_listening_connections(psycopg_connector) == 0
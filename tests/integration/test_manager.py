@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import functools
 
@@ -126,6 +127,268 @@ async def test_fetch_job_no_result(
     )
 
 
+async def test_fetch_jobs(pg_job_manager, deferred_job_factory, worker_id):
+    job1 = await deferred_job_factory(priority=1)
+    job2 = await deferred_job_factory(priority=5)
+    await deferred_job_factory()
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=2
+    )
+
+    assert fetched_jobs == [
+        job2.evolve(status="doing", worker_id=worker_id),
+        job1.evolve(status="doing", worker_id=worker_id),
+    ]
+
+
+async def test_fetch_jobs_respect_lock_ordering(
+    pg_job_manager, deferred_job_factory, fetched_job_factory, worker_id
+):
+    await fetched_job_factory(lock="lock_1")
+    await deferred_job_factory(lock="lock_1")
+    job_lock_2 = await deferred_job_factory(lock="lock_2")
+    await deferred_job_factory(lock="lock_2", priority=-1)
+    job_no_lock = await deferred_job_factory(lock=None)
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=10
+    )
+
+    assert [job.id for job in fetched_jobs] == [job_lock_2.id, job_no_lock.id]
+
+
+async def test_fetch_jobs_merge_queues(pg_job_manager, deferred_job_factory, worker_id):
+    job_a = await deferred_job_factory(queue="queue_a", priority=1)
+    job_b1 = await deferred_job_factory(queue="queue_b", priority=5)
+    await deferred_job_factory(queue="queue_b", priority=0)
+    await deferred_job_factory(queue="queue_c", priority=10)
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=["queue_a", "queue_b", "queue_a"], worker_id=worker_id, limit=2
+    )
+
+    assert [job.id for job in fetched_jobs] == [job_b1.id, job_a.id]
+
+
+async def test_fetch_jobs_merge_queues_locked_jobs(
+    pg_job_manager, deferred_job_factory, worker_id
+):
+    job_a = await deferred_job_factory(queue="queue_a", lock="lock_a", priority=1)
+    await deferred_job_factory(queue="queue_b", lock="lock_b", priority=5)
+    job_b = await deferred_job_factory(queue="queue_b", lock="lock_b", priority=10)
+    await deferred_job_factory(queue="queue_c", lock="lock_c", priority=10)
+    job_no_lock = await deferred_job_factory(queue="queue_a")
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=["queue_a", "queue_b"], worker_id=worker_id, limit=5
+    )
+
+    # Only the first job of lock_b can be fetched
+    assert [job.id for job in fetched_jobs] == [job_b.id, job_a.id, job_no_lock.id]
+
+
+@pytest.mark.parametrize(
+    "head_kwargs",
+    [
+        {"queue": "queue_b"},
+        {"scheduled_at": conftest.aware_datetime(2100, 1, 1)},
+    ],
+)
+async def test_fetch_jobs_lock_blocked_by_unavailable_head(
+    pg_job_manager, deferred_job_factory, worker_id, head_kwargs
+):
+    # The first job of the lock can't be fetched, so the lock is blocked
+    await deferred_job_factory(lock="lock_1", priority=1, **head_kwargs)
+    await deferred_job_factory(lock="lock_1", queue="queue_a")
+
+    assert (
+        await pg_job_manager.fetch_jobs(
+            queues=["queue_a"], worker_id=worker_id, limit=5
+        )
+        == []
+    )
+
+
+async def test_locks_table_follows_jobs(
+    get_all, pg_job_manager, deferred_job_factory, worker_id
+):
+    await deferred_job_factory(lock="lock_1")
+    await deferred_job_factory(lock="lock_1")
+    assert await get_all("procrastinate_locks", "lock", "doing_job_id") == [
+        {"lock": "lock_1", "doing_job_id": None}
+    ]
+
+    (job1,) = await pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=5)
+    assert await get_all("procrastinate_locks", "lock", "doing_job_id") == [
+        {"lock": "lock_1", "doing_job_id": job1.id}
+    ]
+
+    job2 = await pg_job_manager.finish_job_and_fetch_next(
+        job=job1,
+        status=jobs.Status.SUCCEEDED,
+        delete_job=False,
+        queues=None,
+        worker_id=worker_id,
+    )
+    assert job2
+    assert await get_all("procrastinate_locks", "lock", "doing_job_id") == [
+        {"lock": "lock_1", "doing_job_id": job2.id}
+    ]
+
+    # The row is deleted along with the last job of the lock
+    await pg_job_manager.finish_job(
+        job=job2, status=jobs.Status.FAILED, delete_job=True
+    )
+    assert await get_all("procrastinate_locks", "lock") == []
+
+
+async def test_locks_table_retry_with_new_lock(
+    get_all, pg_job_manager, fetched_job_factory
+):
+    job = await fetched_job_factory(lock="lock_1")
+
+    await pg_job_manager.retry_job(job=job, lock="lock_2")
+
+    assert await get_all("procrastinate_locks", "lock", "doing_job_id") == [
+        {"lock": "lock_2", "doing_job_id": None}
+    ]
+
+
+async def test_locks_table_head(
+    get_all, pg_job_manager, deferred_job_factory, worker_id
+):
+    def get_head():
+        return get_all(
+            "procrastinate_locks", "head_job_id", "head_priority", "head_queue_name"
+        )
+
+    job1 = await deferred_job_factory(lock="lock_1", queue="queue_a")
+    job2 = await deferred_job_factory(lock="lock_1", queue="queue_b", priority=1)
+    assert await get_head() == [
+        {"head_job_id": job2.id, "head_priority": 1, "head_queue_name": "queue_b"}
+    ]
+
+    (fetched_job,) = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=5
+    )
+    assert fetched_job.id == job2.id
+    assert await get_head() == [
+        {"head_job_id": job1.id, "head_priority": 0, "head_queue_name": "queue_a"}
+    ]
+
+    assert job1.id
+    await pg_job_manager.cancel_job_by_id_async(job1.id)
+    assert await get_head() == [
+        {"head_job_id": None, "head_priority": None, "head_queue_name": None}
+    ]
+
+
+async def test_locks_table_concurrent_changes(
+    get_all,
+    pg_job_manager,
+    deferred_job_factory,
+    fetched_job_factory,
+    connection_params,
+):
+    import psycopg
+
+    doing_job = await fetched_job_factory(lock="lock_1")
+    todo_job = await deferred_job_factory(lock="lock_1")
+
+    conninfo = psycopg.conninfo.make_conninfo(**connection_params)
+    async with (
+        await psycopg.AsyncConnection.connect(conninfo) as conn,
+        await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as other_conn,
+    ):
+        await conn.execute(
+            "SELECT procrastinate_finish_job_v1(%s, 'succeeded', false)",
+            (doing_job.id,),
+        )
+        # Removing the last job of the lock waits for the first transaction, so
+        # that the row is deleted once both are over
+        delete = asyncio.create_task(
+            other_conn.execute(
+                "DELETE FROM procrastinate_jobs WHERE id = %s", (todo_job.id,)
+            )
+        )
+        await asyncio.sleep(0.1)
+        assert not delete.done()
+
+        await conn.commit()
+        await delete
+
+    assert await get_all("procrastinate_locks", "lock") == []
+
+
+async def test_fetch_jobs_lock_changed_in_open_transaction(
+    pg_job_manager, deferred_job_factory, worker_id, connection_params
+):
+    import psycopg
+
+    locked_job = await deferred_job_factory(lock="lock_1")
+    unlocked_job = await deferred_job_factory()
+
+    conninfo = psycopg.conninfo.make_conninfo(**connection_params)
+    async with await psycopg.AsyncConnection.connect(conninfo) as conn:
+        await conn.execute(
+            "INSERT INTO procrastinate_jobs (queue_name, task_name, lock) "
+            "VALUES ('queue', 'task_name', 'lock_1')"
+        )
+        # The lock is skipped instead of waiting for the transaction
+        fetched_jobs = await asyncio.wait_for(
+            pg_job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=5),
+            timeout=1,
+        )
+        assert [job.id for job in fetched_jobs] == [unlocked_job.id]
+
+        await conn.commit()
+
+    fetched_jobs = await pg_job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=5
+    )
+    assert [job.id for job in fetched_jobs] == [locked_job.id]
+
+
+async def test_fetch_jobs_locks_only_fetched_jobs(
+    pg_job_manager, deferred_job_factory, worker_id, connection_params
+):
+    import psycopg
+
+    await deferred_job_factory(queue="queue_a", priority=2)
+    job_b = await deferred_job_factory(queue="queue_b", priority=1)
+    job_a = await deferred_job_factory(queue="queue_a")
+
+    conninfo = psycopg.conninfo.make_conninfo(**connection_params)
+    async with await psycopg.AsyncConnection.connect(conninfo) as conn:
+        await conn.execute(
+            "SELECT * FROM procrastinate_fetch_jobs_v1(%s, %s, 1)",
+            (["queue_a", "queue_b"], worker_id),
+        )
+        # The job locked by the open fetch is replaced by the next candidate
+        fetched_jobs = await pg_job_manager.fetch_jobs(
+            queues=["queue_a", "queue_b"], worker_id=worker_id, limit=1
+        )
+        assert [job.id for job in fetched_jobs] == [job_b.id]
+
+        # The other candidates of the open fetch can still be fetched
+        fetched_jobs = await pg_job_manager.fetch_jobs(
+            queues=["queue_a", "queue_b"], worker_id=worker_id, limit=5
+        )
+        assert [job.id for job in fetched_jobs] == [job_a.id]
+
+
+async def test_fetch_jobs_no_result(pg_job_manager, deferred_job_factory, worker_id):
+    await deferred_job_factory(queue="queue_b")
+
+    assert (
+        await pg_job_manager.fetch_jobs(
+            queues=["queue_a"], worker_id=worker_id, limit=5
+        )
+        == []
+    )
+
+
 @pytest.mark.parametrize(
     "filter_args",
     [
@@ -314,7 +577,7 @@ async def test_get_stalled_jobs_by_heartbeat__pruned_worker(
 
 
 async def test_register_and_unregister_worker(pg_job_manager, psycopg_connector):
-    worker_id = await pg_job_manager.register_worker()
+    worker_id = await pg_job_manager.register_worker(queues=["a"])
     assert worker_id is not None
 
     rows = await psycopg_connector.execute_query_all_async(
@@ -322,6 +585,7 @@ async def test_register_and_unregister_worker(pg_job_manager, psycopg_connector)
     )
     assert len(rows) == 1
     assert rows[0]["id"] == worker_id
+    assert rows[0]["queues"] == ["a"]
     assert abs((rows[0]["last_heartbeat"] - utils.utcnow()).total_seconds()) < 0.1
 
     await pg_job_manager.unregister_worker(worker_id=worker_id)
@@ -332,6 +596,21 @@ async def test_register_and_unregister_worker(pg_job_manager, psycopg_connector)
     assert len(rows) == 0
 
 
+async def test_count_workers(pg_job_manager):
+    assert await pg_job_manager.count_workers_async() == manager.WorkersCount(
+        all_queues=0
+    )
+
+    await pg_job_manager.register_worker()
+    await pg_job_manager.register_worker()
+    await pg_job_manager.register_worker(queues=["a", "b"])
+    await pg_job_manager.register_worker(queues=["a"])
+
+    assert await pg_job_manager.count_workers_async() == manager.WorkersCount(
+        all_queues=2, by_queue={"a": 2, "b": 1}
+    )
+
+
 async def test_update_heartbeat(pg_job_manager, psycopg_connector, worker_id):
     rows = await psycopg_connector.execute_query_all_async(
         f"SELECT * FROM procrastinate_workers WHERE id={worker_id}"
@@ -507,6 +786,209 @@ async def test_finish_job_wrong_end_status(
     )
 
 
+async def test_finish_jobs_by_id_async(get_all, pg_job_manager, fetched_job_factory):
+    job1 = await fetched_job_factory(queue="queue_a")
+    job2 = await fetched_job_factory(queue="queue_a")
+    job3 = await fetched_job_factory(queue="queue_a")
+    await pg_job_manager.finish_job(
+        job=job3, status=jobs.Status.SUCCEEDED, delete_job=False
+    )
+
+    failed_job_ids = await pg_job_manager.finish_jobs_by_id_async(
+        job_ids=[job1.id, job2.id, job3.id, 999_999],
+        statuses=[
+            jobs.Status.SUCCEEDED,
+            jobs.Status.ABORTED,
+            jobs.Status.FAILED,
+            jobs.Status.FAILED,
+        ],
+        delete_jobs=[False, True, False, False],
+    )
+
+    # job3 was already finished, and the last job doesn't exist
+    assert failed_job_ids == [job3.id, 999_999]
+    rows = await get_all("procrastinate_jobs", "id", "status", "attempts")
+    assert sorted(rows, key=lambda row: row["id"]) == [
+        {"id": job1.id, "status": "succeeded", "attempts": 1},
+        {"id": job3.id, "status": "succeeded", "attempts": 1},
+    ]
+
+
+async def test_finish_jobs_by_id_async_wrong_end_status(
+    pg_job_manager, fetched_job_factory
+):
+    job = await fetched_job_factory(queue="queue_a")
+
+    with pytest.raises(exceptions.ConnectorException) as excinfo:
+        await pg_job_manager.finish_jobs_by_id_async(
+            job_ids=[job.id], statuses=[jobs.Status.TODO], delete_jobs=[False]
+        )
+    assert 'End status should be either "succeeded", "failed" or "aborted"' in str(
+        excinfo.value.__cause__
+    )
+
+
+async def test_finish_job_and_fetch_next(
+    get_all, pg_job_manager, deferred_job_factory, fetched_job_factory, worker_id
+):
+    job = await fetched_job_factory(queue="queue_a", lock="sher")
+    next_job = await deferred_job_factory(queue="queue_a", lock="sher")
+
+    # The next job shares the lock of the finished one: it can only be fetched
+    # because the job is finished first, in the same transaction
+    fetched_job = await pg_job_manager.finish_job_and_fetch_next(
+        job=job,
+        status=jobs.Status.SUCCEEDED,
+        delete_job=False,
+        queues=["queue_a"],
+        worker_id=worker_id,
+    )
+
+    assert fetched_job == next_job.evolve(status="doing", worker_id=worker_id)
+    rows = await get_all("procrastinate_jobs", "id", "status")
+    assert sorted(rows, key=lambda row: row["id"]) == [
+        {"id": job.id, "status": "succeeded"},
+        {"id": next_job.id, "status": "doing"},
+    ]
+
+
+async def test_finish_job_and_fetch_next_no_result(
+    get_all, pg_job_manager, deferred_job_factory, fetched_job_factory, worker_id
+):
+    job = await fetched_job_factory(queue="queue_a")
+    await deferred_job_factory(queue="queue_b")
+
+    fetched_job = await pg_job_manager.finish_job_and_fetch_next(
+        job=job,
+        status=jobs.Status.FAILED,
+        delete_job=True,
+        queues=["queue_a"],
+        worker_id=worker_id,
+    )
+
+    assert fetched_job is None
+    assert await get_all("procrastinate_jobs", "queue_name") == [
+        {"queue_name": "queue_b"}
+    ]
+
+
+@pytest.mark.parametrize(
+    "job_kwargs, expected_status",
+    [
+        ({"lock": None}, "scheduled"),
+        ({"lock": "sher"}, "todo"),
+        ({"lock": None, "queueing_lock": "houba"}, "todo"),
+    ],
+)
+async def test_defer_job_far_future(
+    pg_job_manager, deferred_job_factory, get_all, job_kwargs, expected_status
+):
+    await deferred_job_factory(
+        scheduled_at=utils.utcnow() + datetime.timedelta(days=1), **job_kwargs
+    )
+
+    assert await get_all("procrastinate_jobs", "status") == [
+        {"status": expected_status}
+    ]
+    assert await get_all("procrastinate_events", "type") == [
+        {"type": "scheduled"},
+        {"type": "deferred"},
+    ]
+
+
+async def test_listen_for_jobs_notifies_once_per_queue_per_statement(
+    pg_job_manager, job_factory
+):
+    notifications = []
+
+    async def on_notification(*, channel: str, notification: jobs.Notification):
+        notifications.append((channel, notification))
+
+    listen_task = asyncio.create_task(
+        pg_job_manager.listen_for_jobs(
+            on_notification=on_notification, queues=["queue_a"]
+        )
+    )
+    try:
+        await asyncio.sleep(0.1)
+        await pg_job_manager.batch_defer_jobs_async(
+            jobs=[
+                job_factory(id=None, queue=queue)
+                for queue in ["queue_a", "queue_b", "queue_a"]
+            ]
+        )
+        await asyncio.sleep(0.1)
+    finally:
+        listen_task.cancel()
+
+    assert notifications == [
+        (
+            "procrastinate_queue_v1#queue_a",
+            {"type": "job_inserted", "queue_name": "queue_a", "count": 2},
+        )
+    ]
+
+
+async def test_get_next_scheduled_job_delay(pg_job_manager, deferred_job_factory):
+    now = utils.utcnow()
+    await deferred_job_factory(queue="queue_a", scheduled_at=now)
+    await deferred_job_factory(
+        queue="queue_a", scheduled_at=now + datetime.timedelta(seconds=50)
+    )
+    await deferred_job_factory(
+        queue="queue_b", scheduled_at=now + datetime.timedelta(seconds=20)
+    )
+
+    delay = await pg_job_manager.get_next_scheduled_job_delay_async(queues=["queue_a"])
+    assert 49 < delay <= 50
+
+    delay = await pg_job_manager.get_next_scheduled_job_delay_async(queues=None)
+    assert 19 < delay <= 20
+
+    assert (
+        await pg_job_manager.get_next_scheduled_job_delay_async(queues=["queue_c"])
+        is None
+    )
+
+
+async def test_promote_scheduled_jobs(
+    pg_job_manager, deferred_job_factory, get_all, psycopg_connector, worker_id
+):
+    now = utils.utcnow()
+    job = await deferred_job_factory(
+        lock=None, scheduled_at=now + datetime.timedelta(days=1)
+    )
+    other_job = await deferred_job_factory(
+        lock=None, scheduled_at=now + datetime.timedelta(days=2)
+    )
+
+    assert await pg_job_manager.fetch_job(queues=None, worker_id=worker_id) is None
+
+    await psycopg_connector.execute_query_async(
+        "UPDATE procrastinate_jobs SET scheduled_at = NOW() WHERE id = %(id)s",
+        id=job.id,
+    )
+
+    assert await pg_job_manager.promote_scheduled_jobs_async(limit=10) == 1
+    statuses = {
+        row["id"]: row["status"]
+        for row in await get_all("procrastinate_jobs", "id", "status")
+    }
+    assert statuses == {job.id: "todo", other_job.id: "scheduled"}
+
+    fetched_job = await pg_job_manager.fetch_job(queues=None, worker_id=worker_id)
+    assert fetched_job.id == job.id
+
+
+async def test_cancel_scheduled_job(pg_job_manager, deferred_job_factory, get_all):
+    job = await deferred_job_factory(
+        lock=None, scheduled_at=utils.utcnow() + datetime.timedelta(days=1)
+    )
+
+    assert await pg_job_manager.cancel_job_by_id_async(job.id) is True
+    assert await get_all("procrastinate_jobs", "status") == [{"status": "cancelled"}]
+
+
 async def test_retry_job(pg_job_manager, fetched_job_factory, worker_id):
     job1 = await fetched_job_factory(queue="queue_a")
 
@@ -705,6 +1187,69 @@ async def test_batch_defer_jobs_violate_queueing_lock(
     assert await get_all("procrastinate_jobs", "id") == []
 
 
+async def test_bulk_defer_copy(pg_job_manager, get_all, job_factory):
+    job_ids = await pg_job_manager.bulk_defer_copy_async(
+        jobs=(
+            job_factory(
+                id=None,
+                queue="marsupilami",
+                task_name="bob",
+                lock=None,
+                task_kwargs={"i": i},
+                scheduled_at=(conftest.aware_datetime(2100, 1, 1) if i == 4 else None),
+            )
+            for i in range(5)
+        ),
+        chunk_size=2,
+    )
+
+    result = await get_all("procrastinate_jobs", "id", "args", "status", "task_name")
+    assert sorted(result, key=lambda row: row["id"]) == [
+        {
+            "id": job_id,
+            "args": {"i": i},
+            "status": "scheduled" if i == 4 else "todo",
+            "task_name": "bob",
+        }
+        for i, job_id in enumerate(job_ids)
+    ]
+
+
+async def test_bulk_defer_copy_count(pg_job_manager, get_all, job_factory):
+    job_count = await pg_job_manager.bulk_defer_copy_count_async(
+        jobs=[job_factory(id=None) for _ in range(3)], chunk_size=2
+    )
+
+    assert job_count == 3
+    assert len(await get_all("procrastinate_jobs", "id")) == 3
+
+
+async def test_bulk_defer_copy_violate_queueing_lock(
+    pg_job_manager, get_all, job_factory
+):
+    with pytest.raises(exceptions.AlreadyEnqueued) as excinfo:
+        await pg_job_manager.bulk_defer_copy_async(
+            jobs=[
+                job_factory(id=None, queueing_lock="other_queueing_lock"),
+                job_factory(id=None, queueing_lock="same_queueing_lock"),
+                job_factory(id=None, queueing_lock="same_queueing_lock"),
+            ],
+            chunk_size=2,
+        )
+
+    assert excinfo.value.__cause__.queueing_lock == "same_queueing_lock"
+    # The first chunk was committed, the second one was rolled back
+    assert len(await get_all("procrastinate_jobs", "id")) == 2
+
+
+def test_bulk_defer_copy_sync(pg_job_manager, job_factory):
+    job_ids = pg_job_manager.bulk_defer_copy(
+        jobs=[job_factory(id=None) for _ in range(3)], chunk_size=2
+    )
+
+    assert len(job_ids) == 3
+
+
 async def test_check_connection(pg_job_manager):
     assert await pg_job_manager.check_connection_async() is True
 
@@ -786,6 +1331,7 @@ async def test_list_queues_dict(fixture_jobs, pg_job_manager):
         "name": "q1",
         "jobs_count": 2,
         "todo": 1,
+        "scheduled": 0,
         "doing": 0,
         "succeeded": 0,
         "failed": 1,
@@ -815,6 +1361,7 @@ async def test_list_tasks_dict(fixture_jobs, pg_job_manager):
         "name": "task_bar",
         "jobs_count": 2,
         "todo": 0,
+        "scheduled": 0,
         "doing": 1,
         "succeeded": 0,
         "failed": 1,
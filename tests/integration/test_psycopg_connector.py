@@ -8,7 +8,13 @@ import asgiref.sync
 import attr
 import pytest
 
-from procrastinate import exceptions, manager, psycopg_connector, sync_psycopg_connector
+from procrastinate import (
+    exceptions,
+    manager,
+    psycopg_connector,
+    sql,
+    sync_psycopg_connector,
+)
 
 
 @pytest.fixture
@@ -177,12 +183,58 @@ async def test_execute_query_simultaneous(psycopg_connector):
         pytest.fail("ResourceWarning")
 
 
+@pytest.mark.parametrize("prepare_statements", [False, True])
+async def test_execute_query_prepare_statements(
+    psycopg_connector_factory, prepare_statements
+):
+    connector = await psycopg_connector_factory(
+        prepare_statements=prepare_statements, min_size=1, max_size=1
+    )
+
+    await connector.execute_query_one_async(sql.queries["count_workers"])
+    # Not a named query: never prepared by us
+    await connector.execute_query_one_async("SELECT 1 AS one")
+
+    result = await connector.execute_query_all_async(
+        "SELECT statement FROM pg_prepared_statements"
+    )
+    assert [row["statement"] for row in result] == (
+        [sql.queries["count_workers"]] if prepare_statements else []
+    )
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_execute_queries_one_async(psycopg_connector_factory, pipeline):
+    connector = await psycopg_connector_factory(pipeline=pipeline)
+
+    result = await connector.execute_queries_one_async(
+        [
+            ("SELECT %(foo)s AS foo", {"foo": "bar"}),
+            ("SELECT 2 AS two", {}),
+        ]
+    )
+
+    assert result == [{"foo": "bar"}, {"two": 2}]
+
+
+@pytest.mark.parametrize("pipeline", [False, True])
+async def test_execute_queries_one_async_no_result(psycopg_connector_factory, pipeline):
+    connector = await psycopg_connector_factory(pipeline=pipeline)
+
+    with pytest.raises(exceptions.NoResult):
+        await connector.execute_queries_one_async(
+            [("SELECT 1 AS one", {}), ("SELECT 1 WHERE false", {})]
+        )
+
+
 async def test_close_async(psycopg_connector):
     await psycopg_connector.execute_query_async("SELECT 1")
     pool = psycopg_connector._async_pool
+    assert psycopg_connector.is_open is True
     await psycopg_connector.close_async()
     assert pool.closed is True
     assert psycopg_connector._async_pool is None
+    assert psycopg_connector.is_open is False
 
 
 async def test_listen_notify(psycopg_connector):
@@ -278,6 +330,43 @@ async def test_get_sync_connector__open(psycopg_connector):
     await psycopg_connector.close_async()
 
 
+async def test_get_sync_connector__open_sync_pool(psycopg_connection_params):
+    connector = psycopg_connector.PsycopgConnector(
+        **psycopg_connection_params, sync_pool=True
+    )
+    await connector.open_async()
+
+    def defer():
+        sync = connector.get_sync_connector()
+        assert sync is connector.get_sync_connector()
+        return sync, sync.execute_query_one("SELECT 1 AS one")
+
+    # Sync calls run in other threads, on the companion pool, without
+    # going through the event loop
+    sync, result = await asyncio.to_thread(defer)
+    assert isinstance(sync, sync_psycopg_connector.SyncPsycopgConnector)
+    assert result == {"one": 1}
+
+    await connector.close_async()
+    assert sync._pool is None
+    assert connector._sync_connector is None
+
+
+async def test_get_sync_connector__open_sync_pool_threads(psycopg_connection_params):
+    connector = psycopg_connector.PsycopgConnector(
+        **psycopg_connection_params, sync_pool=True
+    )
+    await connector.open_async()
+
+    try:
+        sync_connectors = await asyncio.gather(
+            *(asyncio.to_thread(connector.get_sync_connector) for _ in range(5))
+        )
+        assert len(set(sync_connectors)) == 1
+    finally:
+        await connector.close_async()
+
+
 async def test_get_sync_connector__not_open(not_opened_psycopg_connector):
     sync = not_opened_psycopg_connector.get_sync_connector()
     assert isinstance(sync, sync_psycopg_connector.SyncPsycopgConnector)
@@ -538,3 +627,16 @@ async def test_get_job_status_with_external_connection(
     ) as conn:
         status = await app.job_manager.get_job_status_async(job_id, connection=conn)
     assert status == jobs.Status.TODO
+
+
+async def test_copy_and_execute_query_all_async(psycopg_connector):
+    result = await psycopg_connector.copy_and_execute_query_all_async(
+        setup_query="CREATE TEMPORARY TABLE copied (a integer, b jsonb) ON COMMIT DROP",
+        table="copied",
+        columns=["a", "b"],
+        rows=[(1, {"x": 1}), (2, None)],
+        query="SELECT a, b FROM copied WHERE a >= %(min)s ORDER BY a",
+        min=1,
+    )
+
+    assert result == [{"a": 1, "b": {"x": 1}}, {"a": 2, "b": None}]
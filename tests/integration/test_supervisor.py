@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import pytest
+
+from procrastinate import app as app_module
+from procrastinate import supervisor
+from procrastinate.contrib.sqlalchemy import SQLAlchemyPsycopg2Connector
+
+
+@pytest.mark.parametrize(
+    "connector_fixture",
+    [
+        "psycopg_connector",
+        "sync_psycopg_connector",
+    ],
+)
+def test_run_worker_processes__app_open(request, mocker, connector_fixture):
+    connector = request.getfixturevalue(connector_fixture)
+    start_process = mocker.patch.object(supervisor.Supervisor, "_start_process")
+
+    with pytest.raises(RuntimeError, match="must not be open"):
+        app_module.App(connector=connector).run_worker_processes(processes=1)
+
+    start_process.assert_not_called()
+
+
+def test_run_worker_processes__engine_open(connection_params, mocker):
+    connector = SQLAlchemyPsycopg2Connector(
+        dsn=f"postgresql+psycopg2:///{connection_params['dbname']}"
+    )
+    connector.open()
+    start_process = mocker.patch.object(supervisor.Supervisor, "_start_process")
+
+    try:
+        with pytest.raises(RuntimeError, match="must not be open"):
+            app_module.App(connector=connector).run_worker_processes(processes=1)
+    finally:
+        connector.close()
+
+    start_process.assert_not_called()
+
+
+def test_run_worker_processes__sync_connector_open(
+    not_opened_psycopg_connector, mocker
+):
+    # Used synchronously before being opened, the connector opens a sync
+    # connector of its own
+    sync_connector = not_opened_psycopg_connector.get_sync_connector()
+    sync_connector.open()
+    start_process = mocker.patch.object(supervisor.Supervisor, "_start_process")
+
+    try:
+        with pytest.raises(RuntimeError, match="must not be open"):
+            app_module.App(connector=not_opened_psycopg_connector).run_worker_processes(
+                processes=1
+            )
+    finally:
+        sync_connector.close()
+
+    start_process.assert_not_called()
+
+
+def test_check_app_closed(not_opened_psycopg_connector):
+    sup = supervisor.Supervisor(
+        app=app_module.App(connector=not_opened_psycopg_connector), processes=1
+    )
+
+    sup._check_app_closed()
@@ -89,8 +89,10 @@ def test_execute_query_arg(sync_psycopg_connector):
 
 def test_close(sync_psycopg_connector):
     pool = sync_psycopg_connector._pool
+    assert sync_psycopg_connector.is_open is True
     sync_psycopg_connector.close()
     assert pool.closed is True
+    assert sync_psycopg_connector.is_open is False
 
 
 def test_execute_query_all_with_connection(sync_psycopg_connector):
@@ -333,3 +335,16 @@ def test_get_job_status_with_external_connection(
         conn.autocommit = False
         status = app.job_manager.get_job_status(job_id, connection=conn)
     assert status == jobs.Status.TODO
+
+
+def test_copy_and_execute_query_all(sync_psycopg_connector):
+    result = sync_psycopg_connector.copy_and_execute_query_all(
+        setup_query="CREATE TEMPORARY TABLE copied (a integer, b jsonb) ON COMMIT DROP",
+        table="copied",
+        columns=["a", "b"],
+        rows=[(1, {"x": 1}), (2, None)],
+        query="SELECT a, b FROM copied WHERE a >= %(min)s ORDER BY a",
+        min=1,
+    )
+
+    assert result == [{"a": 1, "b": {"x": 1}}, {"a": 2, "b": None}]
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncpg
+import pytest
+
+from procrastinate import exceptions, manager
+from procrastinate.contrib.asyncpg import asyncpg_connector
+
+
+@pytest.fixture
+def connector():
+    return asyncpg_connector.AsyncpgConnector()
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("SELECT 1", ("SELECT 1", ())),
+        ("SELECT %(a)s, %(b)s", ("SELECT $1, $2", ("a", "b"))),
+        (
+            "SELECT %(a)s::varchar[] IS NULL OR ANY(%(a)s), %(b)s",
+            ("SELECT $1::varchar[] IS NULL OR ANY($1), $2", ("a", "b")),
+        ),
+        ("SELECT 5 %% 2", ("SELECT 5 % 2", ())),
+    ],
+)
+def test_convert_query(query, expected):
+    assert asyncpg_connector.convert_query(query) == expected
+
+
+async def test_wrap_exceptions_unique_violation():
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc():
+        exc = asyncpg.UniqueViolationError("duplicate key")
+        exc.constraint_name = manager.QUEUEING_LOCK_CONSTRAINT
+        exc.detail = "Key (queueing_lock)=(some-lock) already exists."
+        raise exc
+
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await corofunc()
+
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "some-lock"
+
+
+@pytest.mark.parametrize(
+    "exc_type, expected_type",
+    [
+        (asyncpg.UniqueViolationError, exceptions.UniqueViolation),
+        (asyncpg.PostgresError, exceptions.ConnectorException),
+        (asyncpg.InterfaceError, exceptions.ConnectorException),
+    ],
+)
+async def test_wrap_exceptions_wraps(exc_type, expected_type):
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc():
+        raise exc_type("error")
+
+    with pytest.raises(expected_type):
+        await corofunc()
+
+
+async def test_wrap_exceptions_success():
+    @asyncpg_connector.wrap_exceptions()
+    async def corofunc(a, b):
+        return a, b
+
+    assert await corofunc(1, 2) == (1, 2)
+
+
+def test_pool_not_open(connector):
+    with pytest.raises(exceptions.AppNotOpen):
+        connector.pool
+
+
+@pytest.mark.parametrize(
+    "kwargs, expected",
+    [
+        ({}, ""),
+        ({"dsn": "postgresql:///foo"}, "postgresql:///foo"),
+        (
+            {"host": "db", "port": 5433, "database": "foo", "min_size": 2},
+            "host=db port=5433 dbname=foo",
+        ),
+    ],
+)
+def test_get_sync_connector_conninfo(kwargs, expected):
+    connector = asyncpg_connector.AsyncpgConnector(**kwargs)
+    assert connector.get_sync_connector()._pool_args == {"conninfo": expected}
+
+
+async def test_open_async_external_pool(connector, mocker):
+    pool = mocker.Mock()
+    await connector.open_async(pool=pool)
+
+    assert connector.pool is pool
+    await connector.close_async()
+    assert not pool.close.called
@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+import psycopg
+import pytest
+import sqlalchemy
+import sqlalchemy.exc
+
+from procrastinate import exceptions, manager
+from procrastinate.contrib.sqlalchemy import (
+    psycopg_connector as sqlalchemy_psycopg_connector,
+)
+
+
+async def test_wrap_exceptions_wraps():
+    @sqlalchemy_psycopg_connector.wrap_exceptions()
+    async def corofunc():
+        raise sqlalchemy.exc.OperationalError(
+            statement="SELECT 1", params={}, orig=psycopg.DatabaseError()
+        )
+
+    with pytest.raises(exceptions.ConnectorException):
+        await corofunc()
+
+
+async def test_wrap_exceptions_unique_violation(mocker):
+    @sqlalchemy_psycopg_connector.wrap_exceptions()
+    async def corofunc():
+        exc = psycopg.errors.UniqueViolation()
+        mocker.patch.object(
+            psycopg.errors.UniqueViolation,
+            "diag",
+            mocker.Mock(
+                constraint_name=manager.QUEUEING_LOCK_CONSTRAINT,
+                message_detail="Key (queueing_lock)=(some-lock) already exists.",
+            ),
+        )
+        raise sqlalchemy.exc.IntegrityError(statement="SELECT 1", params={}, orig=exc)
+
+    with pytest.raises(exceptions.UniqueViolation) as excinfo:
+        await corofunc()
+
+    assert excinfo.value.constraint_name == manager.QUEUEING_LOCK_CONSTRAINT
+    assert excinfo.value.queueing_lock == "some-lock"
+
+
+async def test_wrap_exceptions_integrity_error_not_unique():
+    @sqlalchemy_psycopg_connector.wrap_exceptions()
+    async def corofunc():
+        raise sqlalchemy.exc.IntegrityError(
+            statement="SELECT 1", params={}, orig=psycopg.errors.NotNullViolation()
+        )
+
+    with pytest.raises(exceptions.ConnectorException):
+        await corofunc()
+
+
+async def test_wrap_exceptions_success():
+    @sqlalchemy_psycopg_connector.wrap_exceptions()
+    async def corofunc(a, b):
+        return a, b
+
+    assert await corofunc(1, 2) == (1, 2)
+
+
+async def test_wrap_query_exceptions_retry():
+    call_count = 0
+
+    @sqlalchemy_psycopg_connector.wrap_query_exceptions
+    async def corofunc():
+        nonlocal call_count
+        call_count += 1
+        raise sqlalchemy.exc.DBAPIError(
+            statement="SELECT 1",
+            params={},
+            orig=psycopg.errors.AdminShutdown(),
+            connection_invalidated=True,
+        )
+
+    with pytest.raises(sqlalchemy.exc.DBAPIError):
+        await corofunc()
+
+    assert call_count == 2
+
+
+async def test_wrap_query_exceptions_unhandled_exception():
+    call_count = 0
+
+    @sqlalchemy_psycopg_connector.wrap_query_exceptions
+    async def corofunc():
+        nonlocal call_count
+        call_count += 1
+        raise sqlalchemy.exc.OperationalError(
+            statement="SELECT 1",
+            params={},
+            orig=psycopg.errors.OperationalError(),
+        )
+
+    with pytest.raises(sqlalchemy.exc.OperationalError):
+        await corofunc()
+
+    assert call_count == 1
+
+
+@pytest.mark.parametrize(
+    "method_name",
+    [
+        "close_async",
+        "execute_query_async",
+        "execute_query_one_async",
+        "execute_query_all_async",
+        "execute_query_one_async_with_connection",
+        "execute_query_all_async_with_connection",
+        "listen_notify",
+    ],
+)
+def test_wrap_exceptions_applied(method_name):
+    connector = sqlalchemy_psycopg_connector.SQLAlchemyAsyncConnector()
+    assert hasattr(getattr(connector, method_name), "__wrapped__")
+
+
+async def test_open_async_no_engine_specified(mocker):
+    create_async_engine = mocker.patch.object(
+        sqlalchemy_psycopg_connector.sqlalchemy_asyncio, "create_async_engine"
+    )
+    connector = sqlalchemy_psycopg_connector.SQLAlchemyAsyncConnector(
+        dsn="postgresql+psycopg:///foo", pool_size=3
+    )
+
+    await connector.open_async()
+
+    assert connector._engine_externally_set is False
+    create_async_engine.assert_called_once_with(
+        "postgresql+psycopg:///foo", pool_size=3
+    )
+    assert connector.engine is create_async_engine.return_value
+
+
+async def test_open_async_engine_argument_specified(mocker):
+    connector = sqlalchemy_psycopg_connector.SQLAlchemyAsyncConnector()
+
+    engine = mocker.MagicMock()
+    await connector.open_async(engine)
+
+    assert connector._engine_externally_set is True
+    assert connector.engine == engine
+
+    await connector.close_async()
+    engine.dispose.assert_not_called()
+
+
+def test_get_engine():
+    connector = sqlalchemy_psycopg_connector.SQLAlchemyAsyncConnector()
+
+    with pytest.raises(exceptions.AppNotOpen):
+        _ = connector.engine
+
+
+def test_get_sync_connector_conninfo():
+    connector = sqlalchemy_psycopg_connector.SQLAlchemyAsyncConnector(
+        dsn="postgresql+psycopg://user:secret@db:5433/foo"
+    )
+    assert connector.get_sync_connector()._pool_args == {
+        "conninfo": "postgresql://user:secret@db:5433/foo"
+    }
@@ -238,6 +238,118 @@ async def test_close_async(app, connector):
     assert connector.states == ["closed_async"]
 
 
+async def test_close_async_flushes_deferred_jobs(connector):
+    app = app_module.App(
+        connector=connector, defer_batch_size=10, defer_flush_interval=60
+    )
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    await app.open_async()
+    job_id = asyncio.create_task(task.defer_async())
+    await asyncio.sleep(0)
+    await app.close_async()
+
+    assert await job_id == 1
+    assert connector.states == ["open_async", "closed_async"]
+
+
+def test_with_connector_defer_batching(connector):
+    app = app_module.App(
+        connector=connector, defer_batch_size=10, defer_flush_interval=0.5
+    )
+    other_app = app.with_connector(testing.InMemoryConnector())
+
+    assert other_app.job_manager.defer_batch_size == 10
+    assert other_app.job_manager.defer_flush_interval == 0.5
+
+
+async def test_app_batch_defer_async(app: app_module.App, connector):
+    @app.task(queue="a", name="task_a")
+    def task_a(a): ...
+
+    @app.task(queue="b", name="task_b")
+    def task_b(b): ...
+
+    job_ids = await app.batch_defer_async(
+        [
+            task_a.configure(priority=5).job_for(a=1),
+            task_b.job_for(b=2),
+            app.configure_task(name="task_a", lock="sher").job_for(a=3),
+        ]
+    )
+
+    assert job_ids == [1, 2, 3]
+    assert [name for name, _ in connector.queries] == ["defer_jobs"]
+    assert [
+        (job["task_name"], job["queue_name"], job["priority"], job["args"])
+        for job in connector.jobs.values()
+    ] == [
+        ("task_a", "a", 5, {"a": 1}),
+        ("task_b", "b", 0, {"b": 2}),
+        ("task_a", "a", 0, {"a": 3}),
+    ]
+    assert connector.jobs[3]["lock"] == "sher"
+
+
+async def test_app_batch_defer_async_already_enqueued(app: app_module.App, connector):
+    @app.task(name="task_a")
+    def task_a(a): ...
+
+    await task_a.configure(queueing_lock="x").defer_async(a=0)
+
+    with pytest.raises(exceptions.BatchAlreadyEnqueued) as excinfo:
+        await app.batch_defer_async(
+            [
+                task_a.job_for(a=1),
+                task_a.configure(queueing_lock="x").job_for(a=2),
+                task_a.configure(queueing_lock="y").job_for(a=3),
+                task_a.configure(queueing_lock="y").job_for(a=4),
+            ]
+        )
+
+    assert excinfo.value.conflicts == {1: "x", 3: "y"}
+    assert isinstance(excinfo.value, exceptions.AlreadyEnqueued)
+    assert len(connector.jobs) == 1
+
+
+async def test_app_batch_defer_async_already_enqueued_job_left(
+    app: app_module.App, connector, mocker
+):
+    @app.task(name="task_a")
+    def task_a(a): ...
+
+    # By the time we look, the conflicting job has left the queue
+    connector.defer_jobs_all = mocker.AsyncMock(
+        side_effect=exceptions.UniqueViolation(
+            constraint_name="procrastinate_jobs_queueing_lock_idx_v1",
+            queueing_lock="x",
+        )
+    )
+
+    with pytest.raises(exceptions.BatchAlreadyEnqueued) as excinfo:
+        await app.batch_defer_async(
+            [task_a.job_for(a=1), task_a.configure(queueing_lock="x").job_for(a=2)]
+        )
+
+    assert excinfo.value.conflicts == {1: "x"}
+
+
+def test_app_batch_defer(app: app_module.App, connector):
+    @app.task(name="task_a")
+    def task_a(a): ...
+
+    assert app.batch_defer([task_a.job_for(a=1), task_a.job_for(a=2)]) == [1, 2]
+
+    with pytest.raises(exceptions.BatchAlreadyEnqueued) as excinfo:
+        app.batch_defer(
+            [
+                task_a.configure(queueing_lock="x").job_for(a=3),
+                task_a.configure(queueing_lock="x").job_for(a=4),
+            ]
+        )
+    assert excinfo.value.conflicts == {1: "x"}
+
+
 def test_check_stack(app, caplog):
     caplog.set_level("WARNING")
 
@@ -35,9 +35,10 @@ def test_configure_logging(mocker, caplog):
 
 
 def test_main(mocker):
-    mock = mocker.patch("procrastinate.cli.cli", new=mocker.AsyncMock())
+    mocker.patch("procrastinate.cli.parse_args", return_value={"command": "foo"})
+    mock = mocker.patch("procrastinate.cli.execute_command", new=mocker.AsyncMock())
     cli.main()
-    mock.assert_called_once()
+    mock.assert_called_once_with({"command": "foo"})
 
 
 @pytest.mark.parametrize(
@@ -55,6 +56,48 @@ def test_main(mocker):
             ["worker", "--delete-jobs", "never"],
             {"command": "worker", "delete_jobs": jobs.DeleteJobCondition.NEVER},
         ),
+        (
+            [
+                "worker",
+                "--finish-jobs-batch-size",
+                "100",
+                "--finish-jobs-flush-interval",
+                "0.01",
+            ],
+            {
+                "command": "worker",
+                "finish_jobs_batch_size": 100,
+                "finish_jobs_flush_interval": 0.01,
+            },
+        ),
+        (
+            [
+                "worker",
+                "--fetch-job-polling-max-interval",
+                "60",
+                "--fetch-job-polling-jitter",
+                "0.1",
+            ],
+            {
+                "command": "worker",
+                "fetch_job_polling_max_interval": 60.0,
+                "fetch_job_polling_jitter": 0.1,
+            },
+        ),
+        (
+            ["worker", "--wake-up-workers-per-job", "1.5"],
+            {"command": "worker", "wake_up_workers_per_job": 1.5},
+        ),
+        (["worker", "--processes", "3"], {"command": "worker", "processes": 3}),
+        (["worker", "--loops", "3"], {"command": "worker", "loops": 3}),
+        (
+            ["worker", "--process-pool-size", "2"],
+            {"command": "worker", "process_pool_size": 2},
+        ),
+        (
+            ["worker", "--sync-concurrency", "4"],
+            {"command": "worker", "sync_concurrency": 4},
+        ),
         (["defer", "x"], {"command": "defer", "task": "x"}),
         (["defer", "x", "{}"], {"command": "defer", "task": "x", "json_args": "{}"}),
         (
@@ -30,6 +30,7 @@ async def test_close_async(connector):
         ["execute_query_async", {"query": ""}],
         ["execute_query_one_async", {"query": ""}],
         ["execute_query_all_async", {"query": ""}],
+        ["execute_queries_one_async", {"queries": []}],
         ["listen_notify", {"on_notification": None, "channels": []}],
     ],
 )
@@ -38,3 +39,35 @@ async def test_missing_app_async(method_name, kwargs):
         # Some of this methods are not async but they'll raise
         # before the await is reached.
         await getattr(connector_module.BaseConnector(), method_name)(**kwargs)
+
+
+def test_is_open():
+    assert connector_module.BaseConnector().is_open is False
+
+
+async def test_execute_queries_one_async():
+    class Connector(connector_module.BaseAsyncConnector):
+        async def execute_query_one_async(self, query, **arguments):
+            return {"query": query, **arguments}
+
+    assert await Connector().execute_queries_one_async(
+        [("SELECT 1", {}), ("SELECT 2", {"a": 1})]
+    ) == [{"query": "SELECT 1"}, {"query": "SELECT 2", "a": 1}]
+
+
+@pytest.mark.parametrize(
+    "connector_class",
+    [connector_module.BaseConnector, connector_module.BaseAsyncConnector],
+)
+async def test_copy_and_execute_query_all_async_not_supported(connector_class):
+    with pytest.raises(exceptions.ConnectorException, match="does not support COPY"):
+        await connector_class().copy_and_execute_query_all_async(
+            setup_query="", table="t", columns=["a"], rows=[], query=""
+        )
+
+
+def test_copy_and_execute_query_all_not_supported():
+    with pytest.raises(exceptions.ConnectorException, match="does not support COPY"):
+        connector_module.BaseConnector().copy_and_execute_query_all(
+            setup_query="", table="t", columns=["a"], rows=[], query=""
+        )
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import json
+import threading
+
+import pytest
+
+from procrastinate import coordinator, jobs, manager, periodic, utils
+from procrastinate.worker import Worker
+
+
+@pytest.fixture
+async def coord(app):
+    coord = coordinator.Coordinator(
+        app=app, update_heartbeat_interval=0.01, abort_job_polling_interval=0.01
+    )
+    task = asyncio.create_task(coord.run())
+    await asyncio.sleep(0)
+    yield coord
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+
+def listen(coord, queues, received):
+    async def on_notification(*, channel: str, notification: jobs.Notification):
+        received.append((channel, notification))
+
+    return asyncio.create_task(
+        coord.listen_for_jobs(on_notification=on_notification, queues=queues)
+    )
+
+
+async def test_listen_for_jobs(coord, connector):
+    received_a, received_all = [], []
+    listeners = [listen(coord, ["a"], received_a), listen(coord, None, received_all)]
+    await asyncio.sleep(0.01)
+
+    # A single connection listens to the channels of all the workers
+    assert connector.notify_channels == [
+        "procrastinate_any_queue_v1",
+        "procrastinate_queue_v1#a",
+    ]
+    payload = json.dumps({"type": "job_inserted", "job_id": 1})
+    await connector.on_notification(channel="procrastinate_queue_v1#a", payload=payload)
+
+    assert received_a == [
+        ("procrastinate_queue_v1#a", {"type": "job_inserted", "job_id": 1})
+    ]
+    assert received_all == []
+
+    listeners[0].cancel()
+    await asyncio.sleep(0.01)
+
+    # Channels are updated when a worker stops listening
+    assert connector.notify_channels == ["procrastinate_any_queue_v1"]
+    listeners[1].cancel()
+
+
+async def test_listen_for_jobs__other_loop(coord, connector):
+    received = []
+
+    async def on_notification(**kwargs):
+        received.append(asyncio.get_running_loop())
+
+    loop_started = threading.Event()
+    other_loop = asyncio.new_event_loop()
+
+    def run_loop():
+        asyncio.set_event_loop(other_loop)
+        loop_started.set()
+        other_loop.run_forever()
+
+    thread = threading.Thread(target=run_loop)
+    thread.start()
+    loop_started.wait()
+    try:
+        listener = asyncio.run_coroutine_threadsafe(
+            coord.listen_for_jobs(on_notification=on_notification, queues=None),
+            other_loop,
+        )
+        while not connector.notify_channels:
+            await asyncio.sleep(0.01)
+
+        await connector.on_notification(
+            channel="procrastinate_any_queue_v1",
+            payload=json.dumps({"type": "job_inserted", "job_id": 1}),
+        )
+        while not received:
+            await asyncio.sleep(0.01)
+
+        # The notification is handled on the event loop of the listener
+        assert received == [other_loop]
+        listener.cancel()
+        while coord._subscriptions:
+            await asyncio.sleep(0.01)
+    finally:
+        other_loop.call_soon_threadsafe(other_loop.stop)
+        thread.join()
+        other_loop.close()
+
+
+async def test_dispatch__closed_loop(coord):
+    coros = []
+
+    async def handle(**kwargs):
+        pass
+
+    def on_notification(**kwargs):
+        coros.append(handle(**kwargs))
+        return coros[-1]
+
+    closed_loop = asyncio.new_event_loop()
+    closed_loop.close()
+    # A worker that stopped on its own event loop, without unsubscribing yet
+    coord._subscriptions.append(
+        coordinator._Subscription(
+            channels=frozenset(["procrastinate_any_queue_v1"]),
+            on_notification=on_notification,
+            loop=closed_loop,
+            listening=asyncio.get_running_loop().create_future(),
+        )
+    )
+
+    await coord._dispatch(
+        channel="procrastinate_any_queue_v1",
+        payload=json.dumps({"type": "job_inserted", "job_id": 1}),
+    )
+
+    # The notification is dropped, and its coroutine closed rather than left
+    # unawaited
+    assert [inspect.getcoroutinestate(coro) for coro in coros] == ["CORO_CLOSED"]
+
+
+async def test_listen_for_jobs__listener_fails(app, connector, mocker):
+    mocker.patch.object(connector, "listen_notify", side_effect=ValueError("nope"))
+    coord = coordinator.Coordinator(app=app)
+    coordinator_task = asyncio.create_task(coord.run())
+    try:
+        with pytest.raises(ValueError, match="nope"):
+            await asyncio.wait_for(listen(coord, None, []), timeout=1)
+    finally:
+        coordinator_task.cancel()
+
+
+async def test_update_heartbeats(app, coord, connector):
+    workers = [Worker(app), Worker(app)]
+    for worker in workers:
+        worker.worker_id = await app.job_manager.register_worker()
+        coord.add_worker(worker)
+    connector.queries.clear()
+
+    await asyncio.sleep(0.05)
+
+    # All the heartbeats are updated at once
+    assert connector.queries
+    assert {name for name, _ in connector.queries} == {"update_heartbeats"}
+    assert connector.queries[0][1] == {"worker_ids": [1, 2]}
+
+    coord.remove_worker(workers[0])
+    connector.queries.clear()
+    await asyncio.sleep(0.05)
+
+    assert connector.queries[0][1] == {"worker_ids": [2]}
+
+
+async def test_update_heartbeats__count_workers(app, coord, connector):
+    worker = Worker(app, wake_up_workers_per_job=1)
+    worker.worker_id = await app.job_manager.register_worker()
+    await app.job_manager.register_worker(queues=["a"])
+    coord.add_worker(worker)
+
+    await asyncio.sleep(0.05)
+
+    assert worker._workers_count == manager.WorkersCount(
+        all_queues=1, by_queue={"a": 1}
+    )
+
+
+async def test_periodic_deferrer(app, mocker):
+    deferrer_worker = mocker.patch.object(periodic.PeriodicDeferrer, "worker")
+    coord = coordinator.Coordinator(app=app)
+    task = asyncio.create_task(coord.run())
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    deferrer_worker.assert_awaited_once_with()
+
+
+async def test_poll_jobs_to_abort(app, coord, mocker):
+    mocker.patch.object(
+        app.job_manager, "list_jobs_to_abort_async", return_value=[1, 3]
+    )
+    busy, idle = Worker(app), Worker(app)
+    busy._running_jobs = {0: mocker.Mock()}
+    for worker in (busy, idle):
+        mocker.patch.object(worker, "_handle_abort_jobs_requested")
+        coord.add_worker(worker)
+
+    await asyncio.sleep(0.05)
+
+    # A single query for all the workers, and only the workers running jobs
+    busy._handle_abort_jobs_requested.assert_called_with([1, 3])
+    idle._handle_abort_jobs_requested.assert_not_called()
+
+
+async def test_promote_scheduled_jobs(app, connector, mocker):
+    mocker.patch("procrastinate.coordinator.PROMOTE_SCHEDULED_JOBS_BATCH_SIZE", 2)
+
+    @app.task
+    async def t():
+        pass
+
+    for _ in range(3):
+        await t.configure(schedule_in={"days": 1}).defer_async()
+    for job_row in connector.jobs.values():
+        job_row["scheduled_at"] = utils.utcnow()
+
+    coord = coordinator.Coordinator(app=app)
+    worker = Worker(app)
+    mocker.patch.object(worker, "_handle_scheduled_jobs_promoted")
+    coord.add_worker(worker)
+    task = asyncio.create_task(coord.run())
+    await asyncio.sleep(0.01)
+    task.cancel()
+
+    # Promoted right away, in batches, and the workers are woken up
+    assert [job_row["status"] for job_row in connector.jobs.values()] == ["todo"] * 3
+    assert [
+        args["limit"]
+        for name, args in connector.queries
+        if name == "promote_scheduled_jobs"
+    ] == [2, 2]
+    worker._handle_scheduled_jobs_promoted.assert_called_with()
+
+
+async def test_run_workers(app, connector):
+    worker_names = {}
+
+    @app.task(pass_context=True, queue="a")
+    async def record_worker(context):
+        worker_names[context.job.queue] = context.worker_name
+
+    await record_worker.defer_async()
+    await record_worker.configure(queue="b").defer_async()
+
+    run_task = asyncio.create_task(
+        app.run_workers_async(
+            [{"queues": ["a"], "concurrency": 2}, {"queues": ["b"], "name": "b"}],
+            name="w",
+            install_signal_handlers=False,
+        )
+    )
+    while len(worker_names) < 2:
+        await asyncio.sleep(0.01)
+
+    assert worker_names == {"a": "w-0", "b": "b"}
+    # The workers listen on the connection of the coordinator
+    assert connector.notify_channels == [
+        "procrastinate_queue_v1#a",
+        "procrastinate_queue_v1#b",
+    ]
+    run_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await run_task
+
+
+async def test_run_workers__cancelled(app, connector):
+    run_task = asyncio.create_task(
+        app.run_workers_async([{}, {}], install_signal_handlers=False)
+    )
+    while len(connector.workers) < 2:
+        await asyncio.sleep(0.01)
+
+    run_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(run_task, timeout=5)
+
+    # The workers stopped gracefully, and unregistered themselves
+    assert connector.workers == {}
+
+
+async def test_run_workers__coordinator_fails(app, mocker, caplog):
+    mocker.patch.object(
+        coordinator.Coordinator, "_update_heartbeats", side_effect=ValueError("nope")
+    )
+
+    await asyncio.wait_for(
+        app.run_workers_async([{}], install_signal_handlers=False), timeout=5
+    )
+
+    assert "Coordinator failed with exception: ValueError('nope')" in caplog.text
@@ -38,6 +38,14 @@ def test_job_result_duration(job_result, expected):
                 "result": "foo",
             },
         ),
+        (
+            job_context.JobResult(start_timestamp=10, thread_wait=0.5),
+            {
+                "start_timestamp": 10,
+                "duration": 15,
+                "thread_wait": 0.5,
+            },
+        ),
     ],
 )
 def test_job_result_as_dict(job_result, expected, mocker):
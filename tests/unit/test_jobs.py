@@ -54,6 +54,26 @@ def test_job_evolve(job_factory):
     assert job.evolve(id=13, lock="bu") == expected
 
 
+def test_job_get_context_copies_task_kwargs(job_factory):
+    job = job_factory(task_kwargs={"a": "b"})
+
+    job.log_context()["task_kwargs"]["a"] = "c"
+
+    assert job.task_kwargs == {"a": "b"}
+
+
+async def test_job_deferrer_defer_async_logging_disabled(
+    job_factory, job_manager, caplog, mocker
+):
+    caplog.set_level("WARNING", logger="procrastinate.jobs")
+    log_context = mocker.patch.object(jobs.Job, "log_context")
+    deferrer = jobs.JobDeferrer(job=job_factory(), job_manager=job_manager)
+
+    assert await deferrer.defer_async(a="b") == 1
+
+    log_context.assert_not_called()
+
+
 async def test_job_deferrer_defer_async(job_factory, job_manager, connector):
     job = job_factory(
         queue="marsupilami",
@@ -87,6 +107,15 @@ async def test_job_deferrer_defer_async(job_factory, job_manager, connector):
     }
 
 
+def test_job_deferrer_job_for(job_factory, job_manager, connector):
+    job = job_factory(task_name="mytask", priority=5, task_kwargs={"a": "b"})
+
+    deferrer = jobs.JobDeferrer(job=job, job_manager=job_manager)
+
+    assert deferrer.job_for(c=3) == job.evolve(task_kwargs={"a": "b", "c": 3})
+    assert connector.jobs == {}
+
+
 def test_job_scheduled_at_naive(job_factory):
     with pytest.raises(ValueError):
         job_factory(scheduled_at=datetime.datetime(2000, 1, 1))
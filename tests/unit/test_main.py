@@ -7,6 +7,6 @@ from procrastinate import __main__
 
 @pytest.mark.parametrize("name, called", [("something", False), ("__main__", True)])
 def test_main(mocker, name, called):
-    cli = mocker.patch("procrastinate.cli.cli")
+    cli = mocker.patch("procrastinate.cli.main")
     __main__.main(name)
     assert cli.called is called
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
 import uuid
 
@@ -173,6 +174,186 @@ async def test_manager_defer_job_unique_violation_exception_other_constraint_syn
         job_manager.defer_job(job=job_factory(task_kwargs={"a": "b"}))
 
 
+@pytest.fixture
+def batching_job_manager(connector):
+    return manager.JobManager(connector=connector, defer_batch_size=3)
+
+
+async def test_manager_defer_job_async_batched(
+    batching_job_manager, job_factory, connector
+):
+    deferred = await asyncio.gather(
+        *(
+            batching_job_manager.defer_job_async(job=job_factory(task_kwargs={"i": i}))
+            for i in range(4)
+        )
+    )
+
+    assert [job.id for job in deferred] == [1, 2, 3, 4]
+    assert [job.task_kwargs for job in deferred] == [{"i": i} for i in range(4)]
+    # A full batch is inserted right away, the rest after the flush interval
+    assert [len(arguments["jobs"]) for _, arguments in connector.queries] == [3, 1]
+
+
+async def test_manager_defer_job_async_batched_already_enqueued(
+    batching_job_manager, job_factory, connector
+):
+    results = await asyncio.gather(
+        batching_job_manager.defer_job_async(job=job_factory(queueing_lock="a")),
+        batching_job_manager.defer_job_async(job=job_factory(queueing_lock="a")),
+        batching_job_manager.defer_job_async(job=job_factory(queueing_lock="b")),
+        return_exceptions=True,
+    )
+
+    assert results[0].id == 1
+    assert isinstance(results[1], exceptions.AlreadyEnqueued)
+    assert results[2].id == 2
+    assert [job["queueing_lock"] for job in connector.jobs.values()] == ["a", "b"]
+
+
+async def test_manager_defer_job_async_batched_connection(
+    batching_job_manager, job_factory, connector, mocker
+):
+    connector.execute_query_all_async_with_connection = mocker.AsyncMock(
+        return_value=[{"id": 1}]
+    )
+    job = await batching_job_manager.defer_job_async(
+        job=job_factory(), connection=mocker.sentinel.connection
+    )
+
+    assert job.id == 1
+    assert batching_job_manager._defer_batchers.get(asyncio.get_running_loop()) is None
+
+
+async def test_manager_flush_deferred_jobs_async(job_manager, job_factory, connector):
+    job_manager = manager.JobManager(
+        connector=connector, defer_batch_size=10, defer_flush_interval=60
+    )
+    task = asyncio.create_task(job_manager.defer_job_async(job=job_factory()))
+    await asyncio.sleep(0)
+    assert connector.jobs == {}
+
+    await job_manager.flush_deferred_jobs_async()
+
+    assert (await task).id == 1
+
+
+async def test_manager_flush_deferred_jobs_async_not_batching(job_manager):
+    await job_manager.flush_deferred_jobs_async()
+
+
+async def test_manager_get_queueing_lock_conflicts_async(job_manager, job_factory):
+    await job_manager.defer_job_async(job=job_factory(queueing_lock="a"))
+
+    conflicts = await job_manager.get_queueing_lock_conflicts_async(
+        jobs=[
+            job_factory(queueing_lock="a"),
+            job_factory(queueing_lock="b"),
+            job_factory(),
+            job_factory(queueing_lock="b"),
+            job_factory(queueing_lock="c"),
+        ]
+    )
+
+    assert conflicts == {0: "a", 3: "b"}
+
+
+def test_manager_get_queueing_lock_conflicts(job_manager, job_factory, connector):
+    assert job_manager.get_queueing_lock_conflicts(jobs=[job_factory()]) == {}
+    # No query needed without queueing locks
+    assert connector.queries == []
+
+
+async def test_manager_bulk_defer_copy_async(job_manager, job_factory, connector):
+    job_ids = await job_manager.bulk_defer_copy_async(
+        jobs=(job_factory(id=None, task_kwargs={"i": i}) for i in range(3)),
+        chunk_size=2,
+    )
+
+    assert job_ids == [1, 2, 3]
+    assert [job["args"] for job in connector.jobs.values()] == [
+        {"i": 0},
+        {"i": 1},
+        {"i": 2},
+    ]
+    assert [name for name, _ in connector.queries] == [
+        "create_staged_jobs_table",
+        "defer_staged_jobs",
+        "create_staged_jobs_table",
+        "defer_staged_jobs",
+    ]
+
+
+async def test_manager_bulk_defer_copy_count_async(job_manager, job_factory, connector):
+    job_count = await job_manager.bulk_defer_copy_count_async(
+        jobs=[job_factory(id=None) for _ in range(3)], chunk_size=2
+    )
+
+    assert job_count == 3
+    assert len(connector.jobs) == 3
+    assert [name for name, _ in connector.queries] == [
+        "create_staged_jobs_table",
+        "defer_staged_jobs_count",
+        "create_staged_jobs_table",
+        "defer_staged_jobs_count",
+    ]
+
+
+async def test_manager_bulk_defer_copy_async_empty(job_manager, connector):
+    assert await job_manager.bulk_defer_copy_async(jobs=[]) == []
+    assert connector.queries == []
+
+
+async def test_manager_bulk_defer_copy_async_invalid_chunk_size(
+    job_manager, job_factory
+):
+    with pytest.raises(ValueError):
+        await job_manager.bulk_defer_copy_async(jobs=[job_factory()], chunk_size=0)
+
+
+async def test_manager_bulk_defer_copy_async_unique_violation(
+    job_manager, job_factory, connector
+):
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        await job_manager.bulk_defer_copy_async(
+            jobs=[
+                job_factory(id=None),
+                job_factory(id=None, queueing_lock="a"),
+                job_factory(id=None, queueing_lock="a"),
+            ],
+            chunk_size=2,
+        )
+
+    # Each chunk is committed on its own
+    assert list(connector.jobs) == [1, 2]
+
+
+def test_manager_bulk_defer_copy(job_manager, job_factory, connector):
+    job_ids = job_manager.bulk_defer_copy(
+        jobs=[job_factory(id=None) for _ in range(3)], chunk_size=2
+    )
+
+    assert job_ids == [1, 2, 3]
+
+
+def test_manager_bulk_defer_copy_count(job_manager, job_factory, connector):
+    job_count = job_manager.bulk_defer_copy_count(
+        jobs=[job_factory(id=None) for _ in range(3)], chunk_size=2
+    )
+
+    assert job_count == 3
+
+
+def test_manager_bulk_defer_copy_unique_violation(job_manager, job_factory, connector):
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        job_manager.bulk_defer_copy_count(
+            jobs=[
+                job_factory(id=None, queueing_lock="a"),
+                job_factory(id=None, queueing_lock="a"),
+            ],
+        )
+
+
 async def test_fetch_job_no_suitable_job(job_manager, worker_id):
     assert await job_manager.fetch_job(queues=None, worker_id=worker_id) is None
 
@@ -184,6 +365,23 @@ async def test_fetch_job(job_manager, job_factory, worker_id):
     assert await job_manager.fetch_job(queues=None, worker_id=worker_id) == expected_job
 
 
+async def test_fetch_jobs(job_manager, job_factory, worker_id):
+    await job_manager.batch_defer_jobs_async(
+        jobs=[job_factory(id=None), job_factory(id=None), job_factory(id=None)]
+    )
+
+    fetched_jobs = await job_manager.fetch_jobs(
+        queues=None, worker_id=worker_id, limit=2
+    )
+
+    assert [job.id for job in fetched_jobs] == [1, 2]
+    assert {job.status for job in fetched_jobs} == {"doing"}
+
+
+async def test_fetch_jobs_no_suitable_job(job_manager, worker_id):
+    assert await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=3) == []
+
+
 async def test_get_stalled_jobs_by_started_not_stalled(job_manager, job_factory):
     job = job_factory(id=1)
     await job_manager.defer_job_async(job=job)
@@ -307,6 +505,148 @@ async def test_finish_job_with_deletion(job_manager, job_factory, connector):
     assert 1 not in connector.jobs
 
 
+async def test_finish_jobs_by_id_async(job_manager, job_factory, connector):
+    await job_manager.batch_defer_jobs_async(
+        jobs=[job_factory(id=None), job_factory(id=None)]
+    )
+
+    failed_job_ids = await job_manager.finish_jobs_by_id_async(
+        job_ids=[1, 2, 3],
+        statuses=[jobs.Status.SUCCEEDED, jobs.Status.FAILED, jobs.Status.SUCCEEDED],
+        delete_jobs=[False, True, False],
+    )
+
+    assert failed_job_ids == [3]
+    assert connector.queries[-1] == (
+        "finish_jobs",
+        {
+            "job_ids": [1, 2, 3],
+            "statuses": ["succeeded", "failed", "succeeded"],
+            "delete_jobs": [False, True, False],
+        },
+    )
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert 2 not in connector.jobs
+
+
+async def test_finish_job_and_fetch_next(
+    job_manager, job_factory, connector, worker_id
+):
+    await job_manager.batch_defer_jobs_async(
+        jobs=[job_factory(id=None), job_factory(id=None)]
+    )
+    (job,) = await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+
+    next_job = await job_manager.finish_job_and_fetch_next(
+        job=job,
+        status=jobs.Status.SUCCEEDED,
+        delete_job=False,
+        queues=None,
+        worker_id=worker_id,
+    )
+
+    assert next_job is not None
+    assert next_job.id == 2
+    assert next_job.status == "doing"
+    assert connector.jobs[1]["status"] == "succeeded"
+
+
+async def test_finish_job_and_fetch_next_no_suitable_job(
+    job_manager, job_factory, connector, worker_id
+):
+    await job_manager.batch_defer_jobs_async(jobs=[job_factory(id=None)])
+    (job,) = await job_manager.fetch_jobs(queues=None, worker_id=worker_id, limit=1)
+
+    next_job = await job_manager.finish_job_and_fetch_next(
+        job=job,
+        status=jobs.Status.FAILED,
+        delete_job=True,
+        queues=None,
+        worker_id=worker_id,
+    )
+
+    assert next_job is None
+    assert 1 not in connector.jobs
+
+
+async def test_count_workers_async(job_manager, connector):
+    connector.workers = {1: utils.utcnow(), 2: utils.utcnow()}
+
+    assert await job_manager.count_workers_async() == manager.WorkersCount(all_queues=2)
+    assert connector.queries == [("count_workers", {})]
+
+
+async def test_count_workers_async__queues(job_manager, connector):
+    await job_manager.register_worker(queues=["a", "b"])
+    await job_manager.register_worker(queues=["a"])
+    await job_manager.register_worker()
+
+    workers_count = await job_manager.count_workers_async()
+
+    assert workers_count == manager.WorkersCount(
+        all_queues=1, by_queue={"a": 2, "b": 1}
+    )
+    assert workers_count.listening_to("a") == 3
+    assert workers_count.listening_to("b") == 2
+    assert workers_count.listening_to("c") == 1
+
+
+async def test_update_heartbeat_and_count_workers(job_manager, connector):
+    connector.workers = {1: utils.utcnow(), 2: utils.utcnow()}
+    heartbeat = connector.workers[1]
+
+    assert await job_manager.update_heartbeat_and_count_workers(
+        worker_id=1
+    ) == manager.WorkersCount(all_queues=2)
+    assert connector.workers[1] > heartbeat
+    assert connector.queries == [
+        ("update_heartbeat", {"worker_id": 1}),
+        ("count_workers", {}),
+    ]
+
+
+async def test_get_next_scheduled_job_delay_async(job_manager, job_factory, connector):
+    assert await job_manager.get_next_scheduled_job_delay_async(queues=None) is None
+
+    await job_manager.defer_job_async(
+        job=job_factory(
+            id=None,
+            queue="queue_a",
+            scheduled_at=utils.utcnow() + datetime.timedelta(seconds=30),
+        )
+    )
+
+    delay = await job_manager.get_next_scheduled_job_delay_async(queues=["queue_a"])
+    assert 29 < delay <= 30
+    assert connector.queries[-1] == (
+        "next_scheduled_job_delay",
+        {"queues": ["queue_a"]},
+    )
+
+
+async def test_promote_scheduled_jobs_async(job_manager, job_factory, connector):
+    await job_manager.batch_defer_jobs_async(
+        jobs=[
+            job_factory(
+                id=None,
+                lock=None,
+                scheduled_at=utils.utcnow() + manager.SCHEDULED_JOBS_HORIZON * 2,
+            )
+        ]
+    )
+    assert connector.jobs[1]["status"] == "scheduled"
+
+    assert await job_manager.promote_scheduled_jobs_async(limit=10) == 0
+    assert connector.queries[-1] == (
+        "promote_scheduled_jobs",
+        {"scheduled_horizon": manager.SCHEDULED_JOBS_HORIZON, "limit": 10},
+    )
+
+    connector.jobs[1]["scheduled_at"] = utils.utcnow()
+    assert await job_manager.promote_scheduled_jobs_async(limit=10) == 1
+    assert connector.jobs[1]["status"] == "todo"
+
+
 def test_cancel_todo_job(job_manager, job_factory, connector):
     job = job_factory(id=1)
     job_manager.defer_job(job=job)
@@ -597,6 +937,7 @@ async def test_list_queues_async(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
@@ -614,6 +955,7 @@ def test_list_queues_(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
@@ -631,6 +973,7 @@ async def test_list_tasks_async(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
@@ -648,6 +991,7 @@ def test_list_tasks(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
@@ -665,6 +1009,7 @@ async def test_list_locks_async(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
@@ -682,6 +1027,7 @@ def test_list_locks(job_manager, job_factory):
             "name": "foo",
             "jobs_count": 1,
             "todo": 1,
+            "scheduled": 0,
             "doing": 0,
             "succeeded": 0,
             "failed": 0,
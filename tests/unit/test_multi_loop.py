@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from procrastinate import manager, multi_loop
+from procrastinate.jobs import Status
+
+
+def run_in_other_loop(coro_func):
+    result = {}
+
+    def run():
+        result["value"] = asyncio.run(coro_func())
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+async def test_loop_connector(app, connector):
+    loop_connector = multi_loop.LoopConnector(connector, asyncio.get_running_loop())
+    owner_thread = threading.get_ident()
+    threads = []
+
+    register_worker_one = connector.register_worker_one
+
+    async def register_worker_spy(**kwargs):
+        threads.append(threading.get_ident())
+        return await register_worker_one(**kwargs)
+
+    connector.register_worker_one = register_worker_spy
+
+    thread, result = run_in_other_loop(
+        manager.JobManager(connector=loop_connector).register_worker
+    )
+    while thread.is_alive():
+        await asyncio.sleep(0.01)
+
+    # The query made from another event loop ran on the loop owning the connector
+    assert result["value"] == 1
+    assert threads == [owner_thread]
+
+
+async def test_loop_connector__same_loop(app, connector):
+    loop_connector = multi_loop.LoopConnector(connector, asyncio.get_running_loop())
+
+    assert await manager.JobManager(connector=loop_connector).register_worker() == 1
+    assert loop_connector.get_sync_connector() is loop_connector
+
+
+async def test_loop_connector__is_open(connector):
+    loop_connector = multi_loop.LoopConnector(connector, asyncio.get_running_loop())
+    assert loop_connector.is_open is False
+
+    await connector.open_async()
+    assert loop_connector.is_open is True
+
+
+def test_worker_loops__invalid_loops(app):
+    with pytest.raises(ValueError):
+        multi_loop.WorkerLoops(app=app, loops=0)
+
+
+async def test_run_worker_loops(app):
+    worker_names = set()
+
+    @app.task(pass_context=True)
+    async def record_worker(context):
+        worker_names.add(context.worker_name)
+        await asyncio.sleep(0.01)
+
+    job_ids = [await record_worker.defer_async() for _ in range(10)]
+
+    await asyncio.wait_for(
+        app.run_worker_loops_async(loops=2, wait=False, name="w", concurrency=2),
+        timeout=5,
+    )
+
+    for job_id in job_ids:
+        assert await app.job_manager.get_job_status_async(job_id) == Status.SUCCEEDED
+    assert worker_names <= {"w-0", "w-1"}
+    # The connector of the app is restored
+    assert not isinstance(app.connector, multi_loop.LoopConnector)
+
+
+async def test_run_worker_loops__stop(app, connector):
+    worker_loops = multi_loop.WorkerLoops(
+        app=app, loops=2, install_signal_handlers=False
+    )
+    run_task = asyncio.create_task(worker_loops.run())
+    while len(connector.workers) < 2:
+        await asyncio.sleep(0.01)
+
+    worker_loops.stop()
+    await asyncio.wait_for(run_task, timeout=5)
+
+    # The workers stopped gracefully, and unregistered themselves
+    assert connector.workers == {}
+
+
+async def test_run_worker_loops__cancelled(app, connector):
+    run_task = asyncio.create_task(
+        app.run_worker_loops_async(loops=2, install_signal_handlers=False)
+    )
+    while len(connector.workers) < 2:
+        await asyncio.sleep(0.01)
+
+    run_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(run_task, timeout=5)
+
+    assert connector.workers == {}
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from procrastinate import blueprints, exceptions, process_pool, utils
+from procrastinate.jobs import Status
+
+blueprint = blueprints.Blueprint()
+
+state = {"value": "imported"}
+
+
+@blueprint.task(executor="process")
+def get_pid() -> int:
+    return os.getpid()
+
+
+def divide(a: int, b: int) -> float:
+    return a / b
+
+
+def sleep(duration: float) -> None:
+    time.sleep(duration)
+
+
+def get_state() -> str:
+    return state["value"]
+
+
+@pytest.fixture
+async def pool():
+    pool = process_pool.ProcessPool(size=1)
+    yield pool
+    await pool.close()
+
+
+async def run(pool, task, should_abort=lambda: False, job_id=1, **task_kwargs):
+    return await pool.run(
+        job_id=job_id,
+        task_path=utils.get_full_path(task),
+        task_kwargs=task_kwargs,
+        should_abort=should_abort,
+    )
+
+
+def test_run_task():
+    assert process_pool.run_task(utils.get_full_path(divide), {"a": 1, "b": 2}) == 0.5
+
+
+def test_run_task__task():
+    assert process_pool.run_task(get_pid.full_path, {}) == os.getpid()
+
+
+async def test_process_pool_run(pool):
+    pid = await run(pool, get_pid)
+
+    assert pid != os.getpid()
+    # The process is reused
+    assert await run(pool, get_pid) == pid
+
+
+async def test_process_pool_run__not_forked(pool, monkeypatch):
+    monkeypatch.setitem(state, "value", "changed in the worker")
+
+    # The process imports the module again instead of inheriting the memory of
+    # the worker
+    assert await run(pool, get_state) == "imported"
+
+
+def test_get_mp_context():
+    assert process_pool.get_mp_context().get_start_method() in {"forkserver", "spawn"}
+
+
+async def test_process_pool_run__error(pool):
+    with pytest.raises(ZeroDivisionError):
+        await run(pool, divide, a=1, b=0)
+
+    assert await run(pool, divide, a=1, b=2) == 0.5
+
+
+async def test_process_pool_run__should_abort(pool):
+    with pytest.raises(exceptions.JobAborted):
+        await run(pool, divide, should_abort=lambda: True, a=1, b=0)
+
+
+async def test_process_pool_kill(pool):
+    pid = await run(pool, get_pid)
+    assert pool.kill(job_id=1) is False
+
+    run_task = asyncio.create_task(run(pool, sleep, duration=10))
+    while not pool.kill(job_id=1):
+        await asyncio.sleep(0.01)
+
+    with pytest.raises(exceptions.JobAborted):
+        await run_task
+
+    # The killed process is replaced
+    assert await run(pool, get_pid) != pid
+
+
+async def test_process_pool_size(pool):
+    first = asyncio.create_task(run(pool, sleep, job_id=1, duration=0.2))
+    second = asyncio.create_task(run(pool, get_pid, job_id=2))
+    await asyncio.sleep(0.1)
+
+    # The second job waits for the process running the first one
+    assert not second.done()
+    await first
+    await second
+
+
+async def test_worker_process_task(app):
+    task = app.task(executor="process")(divide)
+    job_id = await task.defer_async(a=1, b=2)
+
+    await app.run_worker_async(wait=False, process_pool_size=1)
+
+    assert await app.job_manager.get_job_status_async(job_id) == Status.SUCCEEDED
+
+
+async def test_worker_abort_process_task(app):
+    task = app.task(executor="process")(sleep)
+    job_id = await task.defer_async(duration=10)
+
+    worker_task = asyncio.create_task(app.run_worker_async(process_pool_size=1))
+    while (await app.job_manager.get_job_status_async(job_id)) != Status.DOING:
+        await asyncio.sleep(0.01)
+    await app.job_manager.cancel_job_by_id_async(job_id, abort=True)
+
+    for _ in range(100):
+        if await app.job_manager.get_job_status_async(job_id) != Status.DOING:
+            break
+        await asyncio.sleep(0.01)
+    worker_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await worker_task
+
+    assert await app.job_manager.get_job_status_async(job_id) == Status.ABORTED
@@ -38,6 +38,7 @@ async def test_wrap_exceptions_success():
         "execute_query_async",
         "execute_query_one_async",
         "execute_query_all_async",
+        "execute_queries_one_async",
         "listen_notify",
     ],
 )
@@ -202,8 +202,8 @@ async def test_list_queues(
     await utils.sync_to_async(shell.do_list_queues, "")
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "queue1: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
-        "queue2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "queue1: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "queue2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
@@ -246,7 +246,7 @@ async def test_list_queues_filters(
     )
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "queue2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "queue2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
@@ -302,8 +302,8 @@ async def test_list_tasks(
     await utils.sync_to_async(shell.do_list_tasks, "")
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "task1: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
-        "task2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "task1: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "task2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
@@ -346,7 +346,7 @@ async def test_list_tasks_filters(
     )
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "task2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "task2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
@@ -402,8 +402,8 @@ async def test_list_locks(
     await utils.sync_to_async(shell.do_list_locks, "")
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "lock1: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
-        "lock2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "lock1: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "lock2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
@@ -446,7 +446,7 @@ async def test_list_locks_filters(
     )
     captured = capsys.readouterr()
     assert captured.out.splitlines() == [
-        "lock2: 1 jobs (todo: 1, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
+        "lock2: 1 jobs (todo: 1, scheduled: 0, doing: 0, succeeded: 0, failed: 0, cancelled: 0, aborted: 0)",
     ]
     assert connector.queries == [
         (
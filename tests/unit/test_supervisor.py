@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import signal
+
+import pytest
+
+from procrastinate import supervisor
+
+
+@pytest.fixture
+def sup(not_opened_app):
+    # Worker processes open the app for themselves
+    return supervisor.Supervisor(app=not_opened_app, processes=2, restart_delay=0)
+
+
+@pytest.fixture
+def os_kill(mocker):
+    return mocker.patch("os.kill")
+
+
+def test_supervisor__invalid_processes(app):
+    with pytest.raises(ValueError):
+        supervisor.Supervisor(app=app, processes=0)
+
+
+def test_supervisor__worker_options(app):
+    app.worker_defaults = {"concurrency": 3, "name": "w"}
+
+    sup = supervisor.Supervisor(app=app, processes=2, name="other")
+
+    assert sup.worker_options == {"concurrency": 3, "name": "other"}
+
+
+@pytest.mark.parametrize(
+    "exit_codes, expected",
+    [
+        ({}, 0),
+        ({0: 0, 1: 0}, 0),
+        ({0: 0, 1: 2}, 2),
+        ({0: 3, 1: 2}, 3),
+        ({0: -signal.SIGKILL, 1: 0}, 128 + signal.SIGKILL),
+    ],
+)
+def test_exit_status(sup, exit_codes, expected):
+    sup.exit_codes = exit_codes
+
+    assert sup.exit_status == expected
+
+
+def test_stop(sup, os_kill):
+    sup._pids = {0: 10, 1: 11}
+    sup._restart_at = {2: 0}
+
+    sup.stop()
+    sup.stop()
+
+    assert os_kill.call_args_list == [
+        ((10, signal.SIGTERM),),
+        ((11, signal.SIGTERM),),
+    ]
+    assert sup._restart_at == {}
+
+
+def test_stop__process_gone(sup, os_kill):
+    sup._pids = {0: 10, 1: 11}
+    os_kill.side_effect = [ProcessLookupError, None]
+
+    sup.stop()
+
+    assert os_kill.call_count == 2
+
+
+def test_kill(sup, os_kill):
+    sup._pids = {0: 10}
+
+    sup.kill()
+
+    os_kill.assert_called_once_with(10, signal.SIGKILL)
+
+
+def test_reap_processes(sup, mocker):
+    sup._pids = {0: 10, 1: 11, 2: 12}
+    statuses = {10: (0, 0), 11: (11, 0), 12: (12, 1)}
+    mocker.patch("os.waitpid", side_effect=lambda pid, options: statuses[pid])
+    mocker.patch("os.waitstatus_to_exitcode", side_effect=lambda status: status)
+
+    sup._reap_processes()
+
+    assert sup._pids == {0: 10}
+    assert sup.exit_codes == {1: 0, 2: 1}
+    # Only the process that crashed is restarted
+    assert list(sup._restart_at) == [2]
+
+
+def test_reap_processes__stopping(sup, mocker):
+    sup._pids = {0: 10}
+    sup._stopping = True
+    mocker.patch("os.waitpid", return_value=(10, 1))
+    mocker.patch("os.waitstatus_to_exitcode", return_value=1)
+
+    sup._reap_processes()
+
+    assert sup.exit_codes == {0: 1}
+    assert sup._restart_at == {}
+
+
+def test_check_processes__restart(sup, mocker):
+    mocker.patch.object(sup, "_reap_processes")
+    start_process = mocker.patch.object(sup, "_start_process")
+    mocker.patch.object(supervisor, "POLL_INTERVAL", 0)
+    sup._restart_at = {1: 0}
+
+    sup._check_processes()
+
+    start_process.assert_called_once_with(1)
+    assert sup.restarts == 1
+    assert sup._restart_at == {}
+
+
+def test_run(sup, mocker):
+    started = []
+
+    def start_process(index):
+        started.append(index)
+        sup._pids[index] = 10 + index
+
+    def reap_processes():
+        sup.exit_codes.update({index: 0 for index in sup._pids})
+        sup._pids.clear()
+
+    mocker.patch.object(sup, "_start_process", side_effect=start_process)
+    mocker.patch.object(sup, "_reap_processes", side_effect=reap_processes)
+    mocker.patch.object(supervisor, "POLL_INTERVAL", 0)
+
+    assert sup.run() == 0
+    assert started == [0, 1]
+    assert sup.exit_codes == {0: 0, 1: 0}
+
+
+async def test_run__running_loop(sup, mocker):
+    start_process = mocker.patch.object(sup, "_start_process")
+
+    with pytest.raises(RuntimeError, match="running event loop"):
+        sup.run()
+
+    start_process.assert_not_called()
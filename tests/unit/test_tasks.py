@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import pytest
 
-from procrastinate import tasks, utils
+from procrastinate import exceptions, tasks, utils
 from procrastinate.app import App
 
 from .. import conftest
@@ -19,6 +19,36 @@ def test_task_init_with_no_name(app: App):
     assert task.name == "tests.unit.test_tasks.task_func"
 
 
+def test_task_init_executor(app: App):
+    task = tasks.Task(task_func, blueprint=app, queue="queue", executor="process")
+
+    assert task.executor == "process"
+
+
+def test_task_init_executor_invalid(app: App):
+    with pytest.raises(ValueError):
+        tasks.Task(task_func, blueprint=app, queue="queue", executor="fiber")  # pyright: ignore[reportArgumentType]
+
+
+async def async_task_func():
+    pass
+
+
+@pytest.mark.parametrize(
+    "func, pass_context",
+    [(async_task_func, False), (task_func, True)],
+)
+def test_task_init_executor_process_unsupported(app: App, func, pass_context):
+    with pytest.raises(exceptions.InvalidTaskExecutor):
+        tasks.Task(
+            func,
+            blueprint=app,
+            queue="queue",
+            pass_context=pass_context,
+            executor="process",
+        )
+
+
 async def test_task_defer_async(app: App, connector):
     task = tasks.Task(task_func, blueprint=app, queue="queue")
 
@@ -83,6 +113,103 @@ async def test_task_batch_defer_async(app: App, connector):
     }
 
 
+async def test_task_bulk_defer_async(app: App, connector, caplog):
+    caplog.set_level("INFO")
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    job_count = await task.bulk_defer_async(({"i": i} for i in range(5)), chunk_size=2)
+
+    assert job_count == 5
+    assert [job["args"] for job in connector.jobs.values()] == [
+        {"i": i} for i in range(5)
+    ]
+    assert {job["queue_name"] for job in connector.jobs.values()} == {"queue"}
+    assert [
+        record.job_count
+        for record in caplog.records
+        if record.action == "jobs_bulk_deferred"
+    ] == [5]
+
+
+def test_task_bulk_defer(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue", priority=3)
+
+    assert task.bulk_defer([{"a": 1}, {"b": 2}]) == 2
+    assert [job["priority"] for job in connector.jobs.values()] == [3, 3]
+
+
+async def test_task_bulk_defer_async_external_connection(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    with pytest.raises(ValueError):
+        await task.configure(connection=object()).bulk_defer_async([{"a": 1}])
+
+    assert connector.jobs == {}
+
+
+async def test_task_defer_stream(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    async def task_kwargs():
+        for i in range(5):
+            yield {"i": i}
+
+    job_ids = [
+        job_id async for job_id in task.defer_stream(task_kwargs(), chunk_size=2)
+    ]
+
+    assert job_ids == [1, 2, 3, 4, 5]
+    assert [connector.jobs[job_id]["args"] for job_id in job_ids] == [
+        {"i": i} for i in range(5)
+    ]
+    assert [name for name, _ in connector.queries] == ["defer_jobs"] * 3
+
+
+async def test_task_defer_stream_backpressure(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+    read = []
+
+    async def task_kwargs():
+        for i in range(100):
+            read.append(i)
+            yield {"i": i}
+
+    stream = task.defer_stream(task_kwargs(), chunk_size=2, max_in_flight=2)
+    assert await stream.__anext__() == 1
+    await stream.aclose()
+
+    # 2 chunks in flight at most, and the first one is being consumed
+    assert read == [0, 1, 2, 3]
+    assert len(connector.jobs) == 4
+
+
+async def test_task_defer_stream_already_enqueued(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    async def task_kwargs():
+        for i in range(4):
+            yield {"i": i}
+
+    job_ids = []
+    with pytest.raises(exceptions.AlreadyEnqueued):
+        async for job_id in task.configure(queueing_lock="a").defer_stream(
+            task_kwargs(), chunk_size=1
+        ):
+            job_ids.append(job_id)
+
+    assert job_ids == [1]
+
+
+async def test_task_defer_stream_invalid_chunk_size(app: App):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    async def task_kwargs():
+        yield {}
+
+    with pytest.raises(ValueError):
+        await task.defer_stream(task_kwargs(), chunk_size=0).__anext__()
+
+
 async def test_task_default_priority(app: App, connector):
     task = tasks.Task(task_func, blueprint=app, queue="queue", priority=7)
 
@@ -95,6 +222,33 @@ async def test_task_default_priority(app: App, connector):
     assert connector.jobs[3]["priority"] == 7
 
 
+async def test_task_defer_async_reuses_default_deferrer(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    await task.defer_async(c=3)
+    deferrer = task._configure_default()
+    await task.defer_async(c=4)
+
+    assert task._configure_default() is deferrer
+    assert [job["args"] for job in connector.jobs.values()] == [{"c": 3}, {"c": 4}]
+
+
+async def test_task_defer_async_default_deferrer_follows_defaults(app: App, connector):
+    task = tasks.Task(task_func, blueprint=app, queue="queue")
+
+    await task.defer_async(c=3)
+    task.queue = "other_queue"
+    task.priority = 5
+    await task.defer_async(c=4)
+
+    assert [
+        (job["queue_name"], job["priority"]) for job in connector.jobs.values()
+    ] == [
+        ("queue", 0),
+        ("other_queue", 5),
+    ]
+
+
 def test_configure_task(job_manager):
     job = tasks.configure_task(
         name="my_name", job_manager=job_manager, lock="sher", task_kwargs={"yay": "ho"}
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import datetime
+import json
 from unittest.mock import AsyncMock
 
 import pytest
@@ -17,6 +19,14 @@ def test_reset(connector: testing.InMemoryConnector):
     assert connector.jobs == {}
 
 
+async def test_is_open(connector: testing.InMemoryConnector):
+    assert connector.is_open is False
+    await connector.open_async()
+    assert connector.is_open is True
+    await connector.close_async()
+    assert connector.is_open is False
+
+
 async def test_generic_execute(connector: testing.InMemoryConnector):
     result = {}
     connector.reverse_queries = {"a": "b"}
@@ -149,6 +159,108 @@ async def test_defer_multiple_jobs_at_once(connector: testing.InMemoryConnector)
     assert len(connector.jobs) == 2
 
 
+@pytest.mark.parametrize(
+    "days, lock, queueing_lock, expected_status",
+    [
+        (1, None, None, "scheduled"),
+        (0, None, None, "todo"),
+        (1, "sher", None, "todo"),
+        (1, None, "houba", "todo"),
+    ],
+)
+async def test_defer_jobs_all_far_future(
+    connector: testing.InMemoryConnector, days, lock, queueing_lock, expected_status
+):
+    scheduled_at = utils.utcnow() + datetime.timedelta(days=days, seconds=1)
+    (job_row,) = await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="default",
+                task_name="mytask",
+                priority=0,
+                lock=lock,
+                queueing_lock=queueing_lock,
+                args={},
+                scheduled_at=scheduled_at,
+            )
+        ]
+    )
+
+    assert job_row["status"] == expected_status
+    assert [event["type"] for event in connector.events[job_row["id"]]] == [
+        "scheduled",
+        "deferred",
+    ]
+
+
+async def test_next_scheduled_job_delay_one(connector: testing.InMemoryConnector):
+    now = utils.utcnow()
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name=queue_name,
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=now + datetime.timedelta(seconds=seconds),
+            )
+            for queue_name, seconds in [
+                ("default", -10),
+                ("default", 100),
+                ("default", 50),
+                ("other", 20),
+            ]
+        ]
+    )
+
+    result = await connector.next_scheduled_job_delay_one(queues=["default"])
+    assert 49 < result["delay"] <= 50
+
+    result = await connector.next_scheduled_job_delay_one(queues=None)
+    assert 19 < result["delay"] <= 20
+
+    result = await connector.next_scheduled_job_delay_one(queues=["empty"])
+    assert result == {"delay": None}
+
+
+async def test_promote_scheduled_jobs_one(connector: testing.InMemoryConnector):
+    now = utils.utcnow()
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="default",
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=now + datetime.timedelta(hours=hours),
+            )
+            for hours in [3, 2, 1]
+        ]
+    )
+
+    result = await connector.promote_scheduled_jobs_one(
+        scheduled_horizon=datetime.timedelta(hours=2, minutes=30), limit=1
+    )
+
+    assert result == {"count": 1}
+    assert [job["status"] for job in connector.jobs.values()] == [
+        "scheduled",
+        "scheduled",
+        "todo",
+    ]
+
+    result = await connector.promote_scheduled_jobs_one(
+        scheduled_horizon=datetime.timedelta(hours=2, minutes=30), limit=10
+    )
+
+    assert result == {"count": 1}
+    assert connector.jobs[1]["status"] == "scheduled"
+
+
 async def test_defer_same_job_with_queueing_lock_second_time_after_first_one_succeeded(
     connector: testing.InMemoryConnector,
 ):
@@ -534,6 +646,54 @@ async def test_fetch_job_one_none_lock(connector: testing.InMemoryConnector):
     assert (await connector.fetch_job_one(queues=None, worker_id=1))["id"] == 2
 
 
+async def test_fetch_jobs_all(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="default",
+                task_name="mytask",
+                priority=0,
+                lock=lock,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for lock in ["a", "a", None, "b", None]
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    # Only the first job of each lock can be fetched
+    jobs = await connector.fetch_jobs_all(queues=None, worker_id=1, limit=10)
+    assert [job["id"] for job in jobs] == [1, 3, 4, 5]
+    assert {job["status"] for job in jobs} == {"doing"}
+
+    assert await connector.fetch_jobs_all(queues=None, worker_id=1, limit=10) == []
+
+
+async def test_fetch_jobs_all_limit(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="default",
+                task_name="mytask",
+                priority=priority,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for priority in [0, 1, 2]
+        ]
+    )
+
+    connector.workers = {1: utils.utcnow()}
+
+    jobs = await connector.fetch_jobs_all(queues=None, worker_id=1, limit=2)
+    assert [job["id"] for job in jobs] == [3, 2]
+
+
 async def test_finish_job_run(connector: testing.InMemoryConnector):
     await connector.defer_jobs_all(
         [
@@ -560,6 +720,76 @@ async def test_finish_job_run(connector: testing.InMemoryConnector):
     assert connector.jobs[id]["status"] == "finished"
 
 
+async def test_finish_and_fetch_job_one(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock="sher",
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+        * 2
+    )
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_jobs_all(queues=None, worker_id=1, limit=2)
+
+    # The lock held by the first job is released before fetching
+    job_row = await connector.finish_and_fetch_job_one(
+        job_id=1, status="succeeded", delete_job=False, queues=None, worker_id=1
+    )
+
+    assert job_row["id"] == 2
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert connector.jobs[2]["status"] == "doing"
+
+    job_row = await connector.finish_and_fetch_job_one(
+        job_id=2, status="succeeded", delete_job=False, queues=None, worker_id=1
+    )
+
+    assert job_row == {"id": None}
+
+
+async def test_finish_jobs_all(connector: testing.InMemoryConnector):
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name="marsupilami",
+                task_name="mytask",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+        ]
+        * 2
+    )
+
+    connector.workers = {1: utils.utcnow()}
+    await connector.fetch_jobs_all(queues=None, worker_id=1, limit=2)
+
+    failed = await connector.finish_jobs_all(
+        job_ids=[1, 2, 3],
+        statuses=["succeeded", "failed", "failed"],
+        delete_jobs=[False, True, False],
+    )
+
+    assert failed == [{"id": 3}]
+    assert connector.jobs[1]["status"] == "succeeded"
+    assert 2 not in connector.jobs
+
+    # Job 1 is already finished
+    assert await connector.finish_jobs_all(
+        job_ids=[1], statuses=["failed"], delete_jobs=[False]
+    ) == [{"id": 1}]
+
+
 async def test_retry_job_run(connector: testing.InMemoryConnector):
     await connector.defer_jobs_all(
         [
@@ -637,11 +867,56 @@ async def test_defer_no_notify(connector: testing.InMemoryConnector):
     assert not event.is_set()
 
 
+async def test_defer_notifies_once_per_queue(connector: testing.InMemoryConnector):
+    payloads = []
+
+    async def on_notification(*, channel: str, payload: str):
+        payloads.append(json.loads(payload))
+
+    await connector.open_async()
+    await connector.listen_notify(
+        on_notification=on_notification, channels=["procrastinate_any_queue_v1"]
+    )
+    await connector.defer_jobs_all(
+        [
+            t.JobToDefer(
+                queue_name=queue_name,
+                task_name="foo",
+                priority=0,
+                lock=None,
+                queueing_lock=None,
+                args={},
+                scheduled_at=None,
+            )
+            for queue_name in ["a", "b", "a"]
+        ]
+    )
+
+    assert payloads == [
+        {"type": "job_inserted", "queue_name": "a", "count": 2},
+        {"type": "job_inserted", "queue_name": "b", "count": 1},
+    ]
+
+
 async def test_register_worker(connector: testing.InMemoryConnector):
     then = utils.utcnow()
     assert connector.workers == {}
     row = await connector.register_worker_one()
     assert then <= connector.workers[row["worker_id"]] <= utils.utcnow()
+    assert connector.worker_queues == {row["worker_id"]: None}
+
+
+async def test_count_workers(connector: testing.InMemoryConnector):
+    await connector.register_worker_one()
+    await connector.register_worker_one(queues=["a", "b"])
+    await connector.register_worker_one(queues=["a"])
+    # Workers added without registration listen to all the queues
+    connector.workers[4] = utils.utcnow()
+
+    assert await connector.count_workers_one() == {
+        "all_queues_count": 2,
+        "queues_count": {"a": 2, "b": 1},
+    }
 
 
 async def test_unregister_worker(connector: testing.InMemoryConnector):
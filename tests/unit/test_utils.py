@@ -385,6 +385,91 @@ async def test_cancel_and_capture_errors(task_1_error, task_2_error, caplog):
     assert len(caplog.records) == expected_error_count
 
 
+async def test_batcher_max_size():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = utils.Batcher(process_batch=process_batch, max_size=2, max_delay=100)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.submit(item) for item in [1, 2, 3, 4])), timeout=1
+    )
+
+    assert results == [2, 4, 6, 8]
+    assert batches == [[1, 2], [3, 4]]
+
+
+async def test_batcher_max_delay():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(items)
+        return [None] * len(items)
+
+    batcher = utils.Batcher(process_batch=process_batch, max_size=100, max_delay=0.01)
+
+    await asyncio.wait_for(
+        asyncio.gather(batcher.submit(1), batcher.submit(2)), timeout=1
+    )
+
+    assert batches == [[1, 2]]
+
+
+async def test_batcher_item_error():
+    async def process_batch(items):
+        return [ValueError(item) if item == "b" else item for item in items]
+
+    batcher = utils.Batcher(process_batch=process_batch, max_size=3, max_delay=100)
+
+    results = await asyncio.gather(
+        batcher.submit("a"),
+        batcher.submit("b"),
+        batcher.submit("c"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == "a"
+    assert isinstance(results[1], ValueError)
+    assert results[2] == "c"
+
+
+async def test_batcher_batch_error():
+    error = ValueError("nope")
+
+    async def process_batch(items):
+        raise error
+
+    batcher = utils.Batcher(process_batch=process_batch, max_size=2, max_delay=100)
+
+    results = await asyncio.gather(
+        batcher.submit(1), batcher.submit(2), return_exceptions=True
+    )
+
+    assert results == [error, error]
+
+
+async def test_batcher_flush():
+    batches = []
+
+    async def process_batch(items):
+        batches.append(items)
+        return [None] * len(items)
+
+    batcher = utils.Batcher(process_batch=process_batch, max_size=100, max_delay=100)
+
+    task = asyncio.create_task(batcher.submit(1))
+    await asyncio.sleep(0)
+    assert batches == []
+
+    await batcher.flush()
+
+    assert batches == [[1]]
+    assert task.done()
+
+
 @pytest.mark.parametrize(
     "queues, result", [(None, "all queues"), (["foo", "bar"], "queues foo, bar")]
 )
@@ -3,13 +3,15 @@ from __future__ import annotations
 import asyncio
 import datetime
 import signal
+import threading
+import time
 from typing import cast
 from unittest import mock
 
 import pytest
 from pytest_mock import MockerFixture
 
-from procrastinate import utils
+from procrastinate import coordinator, exceptions, manager, utils
 from procrastinate.app import App
 from procrastinate.exceptions import JobAborted
 from procrastinate.job_context import JobContext
@@ -209,6 +211,69 @@ async def test_worker_run_respects_concurrency_variant(worker: Worker, app: App)
     assert parallel_jobs == 0
 
 
+@pytest.mark.parametrize(
+    "worker",
+    [({"concurrency": 3})],
+    indirect=["worker"],
+)
+async def test_worker_run_fetches_jobs_for_all_free_slots(worker, app: App):
+    complete_tasks = asyncio.Event()
+
+    @app.task
+    async def perform_job():
+        await complete_tasks.wait()
+
+    await perform_job.defer_async()
+    await perform_job.defer_async()
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    fetch_queries = [query for query in connector.queries if query[0] == "fetch_jobs"]
+    # A single query fetched both jobs, using all the free slots
+    assert len(fetch_queries) == 1
+    assert fetch_queries[0][1]["limit"] == 3
+    assert len(worker._running_jobs) == 2
+
+    await perform_job.defer_async()
+    await asyncio.sleep(0.01)
+
+    fetch_queries = [query for query in connector.queries if query[0] == "fetch_jobs"]
+    assert len(fetch_queries) == 2
+    assert fetch_queries[1][1]["limit"] == 1
+
+    complete_tasks.set()
+
+
+async def test_worker_run_finished_job_hands_slot_to_next_job(worker, app: App):
+    second_job_started = asyncio.Event()
+    complete_tasks = asyncio.Event()
+
+    @app.task
+    async def perform_job(a):
+        if a == 2:
+            second_job_started.set()
+            await complete_tasks.wait()
+
+    job_id = await perform_job.defer_async(a=1)
+    await perform_job.defer_async(a=2)
+
+    await start_worker(worker)
+    await asyncio.wait_for(second_job_started.wait(), timeout=1)
+
+    connector = cast(InMemoryConnector, app.connector)
+    # The first fetch only gets one job (concurrency is 1), the second one is
+    # fetched while finishing the first one
+    assert [query[0] for query in connector.queries][-2:] == [
+        "fetch_jobs",
+        "finish_and_fetch_job",
+    ]
+    assert connector.jobs[job_id]["status"] == "succeeded"
+    assert worker._job_semaphore.locked()
+
+    complete_tasks.set()
+
+
 async def test_worker_run_fetches_job_on_notification(worker, app: App):
     complete_tasks = asyncio.Event()
 
@@ -220,16 +285,16 @@ async def test_worker_run_fetches_job_on_notification(worker, app: App):
 
     connector = cast(InMemoryConnector, app.connector)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await perform_job.defer_async()
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 2
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 2
 
     complete_tasks.set()
 
@@ -245,11 +310,11 @@ async def test_worker_run_respects_polling(worker, app):
     connector = cast(InMemoryConnector, app.connector)
     await asyncio.sleep(0.01)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 1
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 1
 
     await asyncio.sleep(0.07)
 
-    assert len([query for query in connector.queries if query[0] == "fetch_job"]) == 2
+    assert len([query for query in connector.queries if query[0] == "fetch_jobs"]) == 2
 
 
 @pytest.mark.parametrize(
@@ -298,6 +363,72 @@ async def test_process_job_with_deletion(app: App, worker, fail_task):
     assert job_id not in connector.jobs
 
 
+@pytest.mark.parametrize(
+    "worker",
+    [
+        (
+            {
+                "concurrency": 3,
+                "finish_jobs_batch_size": 3,
+                "finish_jobs_flush_interval": 5,
+            }
+        )
+    ],
+    indirect=["worker"],
+)
+async def test_process_job_batch_finish(app: App, worker):
+    @app.task()
+    async def task_func():
+        pass
+
+    job_ids = [await task_func.defer_async() for _ in range(3)]
+
+    await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    query_names = [query[0] for query in connector.queries]
+    assert "finish_job" not in query_names
+    assert query_names.count("finish_jobs") == 1
+    assert {connector.jobs[job_id]["status"] for job_id in job_ids} == {"succeeded"}
+
+
+@pytest.mark.parametrize(
+    "worker",
+    [({"finish_jobs_batch_size": 10, "finish_jobs_flush_interval": 5})],
+    indirect=["worker"],
+)
+async def test_process_job_batch_finish_flushed_on_stop(app: App, worker):
+    @app.task()
+    async def task_func():
+        pass
+
+    job_id = await task_func.defer_async()
+
+    run_task = await start_worker(worker)
+
+    connector = cast(InMemoryConnector, app.connector)
+    # The job is done, but its outcome is still buffered
+    assert connector.jobs[job_id]["status"] == "doing"
+
+    worker.stop()
+    await asyncio.wait_for(run_task, timeout=0.5)
+
+    assert connector.jobs[job_id]["status"] == "succeeded"
+
+
+async def test_finish_jobs_reports_errors_per_job(app: App, mocker: MockerFixture):
+    worker = Worker(app, finish_jobs_batch_size=10)
+    mocker.patch.object(app.job_manager, "finish_jobs_by_id_async", return_value=[2])
+
+    results = await worker._finish_jobs(
+        [(1, Status.SUCCEEDED, False), (2, Status.FAILED, False)]
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], exceptions.ConnectorException)
+    assert "job id: 2" in str(results[1])
+
+
 async def test_stopping_worker_waits_for_task(app: App, worker):
     complete_task_event = asyncio.Event()
 
@@ -742,9 +873,11 @@ async def test_run_log_actions(app: App, caplog, worker):
         "defer_jobs",
         "prune_stalled_workers",
         "register_worker",
-        "fetch_job",
-        "finish_job",
-        "fetch_job",
+        "promote_scheduled_jobs",
+        "fetch_jobs",
+        "finish_and_fetch_job",
+        "fetch_jobs",
+        "next_scheduled_job_delay",
     ]
 
     async def wait_for_actions():
@@ -831,6 +964,370 @@ async def test_worker_id_and_heartbeat_lifecycle(app: App):
     assert connector.workers == {}
 
 
+async def test_worker_fetch_stats(app: App):
+    @app.task
+    async def t():
+        pass
+
+    await t.defer_async()
+
+    worker = Worker(app, wait=False)
+    await worker.run()
+
+    # fetch 1 job, then finish it and fetch nothing, then fetch nothing
+    assert worker.fetch_stats.as_dict() == {
+        "fetches": 3,
+        "empty_fetches": 2,
+        "notifications": 0,
+        "skipped_wake_ups": 0,
+        "polls": 0,
+        "polling_interval": 5.0,
+        "empty_fetch_ratio": 2 / 3,
+    }
+
+
+async def test_worker_sync_concurrency(app: App):
+    running = 0
+    max_running = 0
+    thread_names = set()
+    lock = threading.Lock()
+
+    @app.task(name="blocking_task")
+    def blocking_task():
+        nonlocal running, max_running
+        thread_names.add(threading.current_thread().name)
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    for _ in range(4):
+        await blocking_task.defer_async()
+
+    worker = Worker(app, wait=False, concurrency=4, sync_concurrency=2, name="w")
+    await worker.run()
+
+    # Only 2 jobs ran at once, in the threads of the worker
+    assert max_running == 2
+    assert thread_names
+    for name in thread_names:
+        assert name.startswith("procrastinate-w_")
+        assert " blocking_task[" in name
+    assert worker.sync_stats.jobs == 4
+    assert worker.sync_stats.max_wait > 0.01
+    assert worker.sync_stats.mean_wait == worker.sync_stats.total_wait / 4
+
+
+def test_worker_sync_concurrency_default(app: App):
+    assert Worker(app, concurrency=3).sync_concurrency == 3
+
+
+async def test_worker_thread_wait_logged(app: App, caplog):
+    caplog.set_level("INFO")
+
+    @app.task
+    def t():
+        pass
+
+    await t.defer_async()
+    await Worker(app, wait=False).run()
+
+    (record,) = [r for r in caplog.records if r.action == "job_success"]
+    assert record.thread_wait >= 0
+
+
+@pytest.mark.parametrize(
+    "wake_up_workers_per_job, count, random_value, expected",
+    [
+        (None, 1, 0.99, True),
+        (2, 1, 0.1, True),
+        (2, 1, 0.3, False),
+        (2, 3, 0.5, True),
+        (0.5, 20, 0.99, True),
+    ],
+)
+async def test_worker_handle_notification_wake_up(
+    app: App, mocker, wake_up_workers_per_job, count, random_value, expected
+):
+    mocker.patch("procrastinate.worker.random.random", return_value=random_value)
+    worker = Worker(app, wake_up_workers_per_job=wake_up_workers_per_job)
+    worker._workers_count = manager.WorkersCount(all_queues=10)
+
+    await worker._handle_notification(
+        channel="procrastinate_any_queue_v1",
+        notification={"type": "job_inserted", "queue_name": "default", "count": count},
+    )
+
+    assert worker._new_job_event.is_set() is expected
+    assert worker.fetch_stats.notifications == 1
+    assert worker.fetch_stats.skipped_wake_ups == (0 if expected else 1)
+
+
+@pytest.mark.parametrize(
+    "queue_name, random_value, expected",
+    [
+        # 2 workers listen to "a": each wakes up with a probability of 1/2
+        ("a", 0.4, True),
+        ("a", 0.6, False),
+        # 10 workers listen to "b": each wakes up with a probability of 1/10
+        ("b", 0.05, True),
+        ("b", 0.2, False),
+    ],
+)
+def test_worker_should_wake_up__queues(
+    app: App, mocker, queue_name, random_value, expected
+):
+    mocker.patch("procrastinate.worker.random.random", return_value=random_value)
+    worker = Worker(app, wake_up_workers_per_job=1)
+    worker._workers_count = manager.WorkersCount(
+        all_queues=1, by_queue={"a": 1, "b": 9}
+    )
+
+    assert (
+        worker._should_wake_up(
+            {"type": "job_inserted", "queue_name": queue_name, "count": 1}
+        )
+        is expected
+    )
+
+
+async def test_worker_counts_workers_for_targeted_wake_ups(app: App):
+    connector = cast(InMemoryConnector, app.connector)
+    connector.workers = {1: utils.utcnow(), 2: utils.utcnow()}
+
+    worker = Worker(app, wake_up_workers_per_job=1, update_heartbeat_interval=0.02)
+    run_task = await start_worker(worker)
+
+    assert worker._workers_count == manager.WorkersCount(all_queues=3)
+    assert "count_workers" in [query[0] for query in connector.queries]
+
+    connector.workers.pop(1)
+    await asyncio.sleep(0.05)
+    assert worker._workers_count == manager.WorkersCount(all_queues=2)
+
+    worker.stop()
+    await run_task
+
+
+async def test_worker_does_not_count_workers_by_default(app: App):
+    worker = Worker(app, wait=False)
+    await worker.run()
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert "count_workers" not in [query[0] for query in connector.queries]
+
+
+async def test_worker_registers_its_queues(app: App):
+    worker = Worker(app, queues=["a", "b"], wait=False)
+    await worker.run()
+
+    connector = cast(InMemoryConnector, app.connector)
+    assert ("register_worker", {"queues": ["a", "b"]}) in connector.queries
+
+
+@pytest.mark.parametrize(
+    "max_interval, polling_interval, reset, expected",
+    [
+        (None, 1, False, 1),
+        (10, 1, False, 2),
+        (10, 8, False, 10),
+        (10, 10, False, 10),
+        (10, 8, True, 1),
+    ],
+)
+def test_worker_get_next_polling_interval(
+    app: App, max_interval, polling_interval, reset, expected
+):
+    worker = Worker(
+        app, fetch_job_polling_interval=1, fetch_job_polling_max_interval=max_interval
+    )
+
+    assert worker._get_next_polling_interval(polling_interval, reset=reset) == expected
+
+
+async def test_worker_get_fetch_delay_jitter(app: App, mocker):
+    uniform = mocker.patch("procrastinate.worker.random.uniform", return_value=-0.1)
+    worker = Worker(app, fetch_job_polling_jitter=0.2)
+
+    assert await worker._get_fetch_delay(10) == pytest.approx(9)
+    uniform.assert_called_once_with(-0.2, 0.2)
+
+
+async def test_worker_get_fetch_delay_cached(app: App, mocker):
+    get_delay = mocker.patch.object(
+        app.job_manager, "get_next_scheduled_job_delay_async", return_value=5
+    )
+    worker = Worker(app, fetch_job_polling_interval=1, fetch_job_polling_max_interval=8)
+
+    assert await worker._get_fetch_delay(10) == pytest.approx(5, abs=0.1)
+    assert await worker._get_fetch_delay(1) == 1
+    assert get_delay.await_count == 1
+
+    # Jobs may have been scheduled since a notification or a polling backoff
+    await worker._handle_notification(
+        channel="procrastinate_any_queue_v1",
+        notification={"type": "job_inserted", "job_id": 1, "count": 1},
+    )
+    await worker._get_fetch_delay(1)
+    assert get_delay.await_count == 2
+
+    worker._get_next_polling_interval(1, reset=False)
+    await worker._get_fetch_delay(2)
+    assert get_delay.await_count == 3
+
+
+async def test_worker_get_fetch_delay_job_due(app: App, mocker):
+    get_delay = mocker.patch.object(
+        app.job_manager, "get_next_scheduled_job_delay_async", side_effect=[0, None]
+    )
+    worker = Worker(app)
+
+    assert await worker._get_fetch_delay(10) == 0
+    # Once the job is due, the next one is looked up
+    assert await worker._get_fetch_delay(10) == 10
+    assert get_delay.await_count == 2
+
+
+async def test_worker_get_fetch_delay_error(app: App, mocker, caplog):
+    get_delay = mocker.patch.object(
+        app.job_manager,
+        "get_next_scheduled_job_delay_async",
+        side_effect=[ValueError("nope"), 5],
+    )
+    worker = Worker(app)
+
+    assert await worker._get_fetch_delay(10) == 10
+    assert "next_scheduled_job_delay error: ValueError('nope')" in caplog.text
+
+    # The delay is queried again next time
+    assert await worker._get_fetch_delay(10) == pytest.approx(5, abs=0.1)
+    assert get_delay.await_count == 2
+
+
+async def test_worker_adaptive_polling(app: App):
+    done = asyncio.Event()
+
+    @app.task
+    async def t():
+        done.set()
+
+    worker = Worker(
+        app,
+        listen_notify=False,
+        fetch_job_polling_interval=0.01,
+        fetch_job_polling_max_interval=0.04,
+    )
+    run_task = await start_worker(worker)
+
+    await asyncio.sleep(0.15)
+    assert worker.fetch_stats.polling_interval == 0.04
+    polls = worker.fetch_stats.polls
+    assert polls >= 3
+
+    await t.defer_async()
+    await asyncio.wait_for(done.wait(), timeout=0.2)
+
+    async def polling_interval_reset():
+        while worker.fetch_stats.polling_interval != 0.01:
+            await asyncio.sleep(0.001)
+
+    await asyncio.wait_for(polling_interval_reset(), timeout=0.2)
+    assert worker.fetch_stats.polls > polls
+
+    worker.stop()
+    await run_task
+
+
+async def test_worker_wakes_up_when_scheduled_job_is_due(app: App):
+    done = asyncio.Event()
+
+    @app.task
+    async def t():
+        done.set()
+
+    await t.configure(schedule_in={"seconds": 0.1}).defer_async()
+
+    worker = Worker(app, fetch_job_polling_interval=10)
+    run_task = await start_worker(worker)
+
+    await asyncio.wait_for(done.wait(), timeout=0.2)
+
+    worker.stop()
+    await run_task
+
+
+async def test_worker_promotes_scheduled_jobs(app: App, mocker: MockerFixture):
+    mocker.patch("procrastinate.worker.PROMOTE_SCHEDULED_JOBS_INTERVAL", 0.02)
+    mocker.patch("procrastinate.worker.PROMOTE_SCHEDULED_JOBS_BATCH_SIZE", 2)
+
+    @app.task(queue="other_queue")
+    async def t():
+        pass
+
+    for _ in range(3):
+        await t.configure(schedule_in={"days": 1}).defer_async()
+
+    connector = cast(InMemoryConnector, app.connector)
+    for job_row in connector.jobs.values():
+        assert job_row["status"] == "scheduled"
+        job_row["scheduled_at"] = utils.utcnow()
+
+    worker = Worker(app, queues=["default"])
+    run_task = await start_worker(worker)
+    await asyncio.sleep(0.03)
+    worker.stop()
+    await run_task
+
+    assert [job_row["status"] for job_row in connector.jobs.values()] == ["todo"] * 3
+    promote_queries = [
+        query for query in connector.queries if query[0] == "promote_scheduled_jobs"
+    ]
+    assert promote_queries[0][1]["limit"] == 2
+    assert len(promote_queries) >= 2
+
+
+async def test_worker_promotes_scheduled_jobs_at_startup(
+    app: App, mocker: MockerFixture
+):
+    done = asyncio.Event()
+
+    @app.task
+    async def t():
+        done.set()
+
+    await t.configure(schedule_in={"days": 1}).defer_async()
+    connector = cast(InMemoryConnector, app.connector)
+    for job_row in connector.jobs.values():
+        job_row["scheduled_at"] = utils.utcnow()
+
+    worker = Worker(app, fetch_job_polling_interval=10)
+    run_task = await start_worker(worker)
+
+    # The job that came due while no worker was running is promoted and
+    # fetched right away
+    await asyncio.wait_for(done.wait(), timeout=0.5)
+
+    worker.stop()
+    await run_task
+
+
+async def test_worker_with_coordinator_does_not_promote_scheduled_jobs(
+    app: App, mocker: MockerFixture
+):
+    promote = mocker.patch.object(app.job_manager, "promote_scheduled_jobs_async")
+    worker = Worker(app, coordinator=coordinator.Coordinator(app=app))
+
+    run_task = await start_worker(worker)
+    await asyncio.sleep(0.01)
+    worker.stop()
+    await run_task
+
+    # The coordinator promotes the scheduled jobs for all its workers
+    promote.assert_not_called()
+
+
 async def test_job_receives_worker_id(app: App):
     @app.task(queue="some_queue")
     async def t():